@@ -30,10 +30,93 @@ async def lifespan(app: FastAPI):
         print(f"⚠️ Database setup warning: {e}")
         print("📝 Will continue with file-only uploads")
     
+    # Replay workflow step journals left behind by crashed runs that are not running
+    try:
+        from src.models.database import AsyncSessionLocal
+        from src.services.workflow.step_journal import recover_step_journals
+        async with AsyncSessionLocal() as db:
+            recovered = await recover_step_journals(db)
+        if recovered:
+            print(f"✅ Recovered {recovered} workflow step(s) from journal")
+    except Exception as e:
+        print(f"⚠️ Workflow journal recovery warning: {e}")
+    
+    # Fan workflow events out to WebSocket clients, the instance log and metrics
+    try:
+        from src.services.workflow.event_subscribers import register_event_subscribers
+        register_event_subscribers()
+    except Exception as e:
+        print(f"⚠️ Workflow event bus warning: {e}")
+    
+    # Queue workers have no WebSocket clients; relay their journaled events from here
+    if settings.WORKFLOW_QUEUE_BACKEND != "inline":
+        try:
+            from src.services.workflow.event_subscribers import execution_log_relay
+            execution_log_relay.start()
+        except Exception as e:
+            print(f"⚠️ Workflow event relay warning: {e}")
+    
+    # Drop large node outputs no run has referenced within the retention window
+    try:
+        from src.services.workflow.blob_store import blob_store
+        pruned = await asyncio.to_thread(
+            blob_store.prune, settings.WORKFLOW_BLOB_RETENTION_DAYS * 24 * 3600
+        )
+        if pruned:
+            print(f"✅ Pruned {pruned} expired workflow output blob(s)")
+    except Exception as e:
+        print(f"⚠️ Workflow blob pruning warning: {e}")
+    
+    # Carry on with bulk runs whose driving process stopped (restart, crash)
+    try:
+        from src.services.workflow.bulk_runs import bulk_runner
+        from src.services.workflow.job_queue import get_job_queue
+        bulk_runner.start(get_job_queue())
+    except Exception as e:
+        print(f"⚠️ Workflow bulk run resume warning: {e}")
+    
+    # Fire schedule_trigger workflows; API and worker processes elect one leader
+    if settings.WORKFLOW_SCHEDULER_ENABLED:
+        try:
+            from src.services.workflow.scheduler import workflow_scheduler
+            workflow_scheduler.start()
+        except Exception as e:
+            print(f"⚠️ Workflow scheduler warning: {e}")
+    
     yield
     
     # Shutdown
     print(f"Shutting down {settings.APP_NAME}")
+    try:
+        from src.services.workflow.scheduler import workflow_scheduler
+        await workflow_scheduler.stop()
+    except Exception as e:
+        print(f"⚠️ Workflow scheduler shutdown warning: {e}")
+    try:
+        from src.services.workflow.bulk_runs import bulk_runner
+        await bulk_runner.stop()
+    except Exception as e:
+        print(f"⚠️ Workflow bulk run shutdown warning: {e}")
+    try:
+        from src.services.workflow.event_subscribers import execution_log_relay
+        await execution_log_relay.stop()
+    except Exception as e:
+        print(f"⚠️ Workflow event relay shutdown warning: {e}")
+    try:
+        from src.services.workflow.event_bus import event_bus
+        await event_bus.close()
+    except Exception as e:
+        print(f"⚠️ Workflow event bus shutdown warning: {e}")
+    try:
+        from src.services.workflow.job_queue import close_job_queue
+        await close_job_queue()
+    except Exception as e:
+        print(f"⚠️ Workflow queue shutdown warning: {e}")
+    try:
+        from src.services.workflow.provider_pool import provider_client_pool
+        await provider_client_pool.close()
+    except Exception as e:
+        print(f"⚠️ AI provider client shutdown warning: {e}")
     await engine.dispose()
 
 
@@ -0,0 +1,17 @@
+-- Migration: Add AI Response Cache
+-- PostgreSQL version - Persistent tier of the prompt/response cache
+
+CREATE TABLE IF NOT EXISTS ai_response_cache (
+    key VARCHAR(64) PRIMARY KEY,  -- sha256 of provider, model, normalized prompt and sampling settings
+    provider VARCHAR(50) NOT NULL,
+    model VARCHAR(255),
+    response JSONB NOT NULL,  -- generate_content result
+    size_bytes INTEGER DEFAULT 0,  -- Counted against the size cap
+    hits INTEGER DEFAULT 0,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_used_at TIMESTAMP WITH TIME ZONE,  -- Eviction drops least recently used rows first
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_ai_response_cache_last_used_at ON ai_response_cache (last_used_at);
+CREATE INDEX IF NOT EXISTS ix_ai_response_cache_expires_at ON ai_response_cache (expires_at);
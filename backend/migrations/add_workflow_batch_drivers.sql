@@ -0,0 +1,8 @@
+-- Migration: Add Workflow Bulk Run Drivers
+-- PostgreSQL version - Lease on the process driving a batch, so another one can resume it
+
+ALTER TABLE workflow_batches ADD COLUMN IF NOT EXISTS driver_id VARCHAR(255);
+ALTER TABLE workflow_batches ADD COLUMN IF NOT EXISTS driver_expires_at TIMESTAMP WITH TIME ZONE;
+
+-- Batches left running by a process that stopped, for the resume scan
+CREATE INDEX IF NOT EXISTS ix_workflow_batches_status_driver_expires_at ON workflow_batches (status, driver_expires_at);
@@ -0,0 +1,27 @@
+-- Migration: Add Workflow Bulk Runs
+-- PostgreSQL version - One workflow executed over many inputs
+
+CREATE TABLE IF NOT EXISTS workflow_batches (
+    id VARCHAR(255) PRIMARY KEY,
+    template_id VARCHAR(255) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    status VARCHAR(50) DEFAULT 'pending',  -- pending, running, completed, cancelled
+    total_runs INTEGER DEFAULT 0,
+    parallelism INTEGER,  -- Runs of the batch executing at once
+    priority INTEGER DEFAULT 0,  -- Copied to every instance
+    created_by VARCHAR(255),
+    error_message TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    
+    -- Foreign key constraint
+    CONSTRAINT fk_workflow_batches_template_id 
+        FOREIGN KEY (template_id) REFERENCES workflow_templates (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_workflow_batches_template_id ON workflow_batches (template_id);
+
+-- Runs of a batch, for progress counts
+ALTER TABLE workflow_instances ADD COLUMN IF NOT EXISTS batch_id VARCHAR(255) REFERENCES workflow_batches (id);
+CREATE INDEX IF NOT EXISTS ix_workflow_instances_batch_id ON workflow_instances (batch_id);
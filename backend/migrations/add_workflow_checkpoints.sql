@@ -0,0 +1,8 @@
+-- Migration: Add Workflow Checkpoints
+-- PostgreSQL version - Lets failed workflow runs resume from completed steps
+
+-- Output handles fired by a completed step, used to route restored nodes
+ALTER TABLE workflow_execution_steps ADD COLUMN IF NOT EXISTS next_steps JSONB;
+
+-- Queued job continues the instance's previous run instead of starting over
+ALTER TABLE workflow_jobs ADD COLUMN IF NOT EXISTS resume BOOLEAN DEFAULT FALSE;
@@ -0,0 +1,13 @@
+-- Migration: Add Workflow Fair-Share Scheduling
+-- PostgreSQL version - Per-user fair queuing and priorities for queued runs
+
+-- Higher runs first among the same user's queued runs
+ALTER TABLE workflow_instances ADD COLUMN IF NOT EXISTS priority INTEGER DEFAULT 0;
+
+-- User the run is scheduled for, its priority, and time spent queued
+ALTER TABLE workflow_jobs ADD COLUMN IF NOT EXISTS tenant_id VARCHAR(255);
+ALTER TABLE workflow_jobs ADD COLUMN IF NOT EXISTS priority INTEGER DEFAULT 0;
+ALTER TABLE workflow_jobs ADD COLUMN IF NOT EXISTS wait_ms INTEGER;
+
+-- Fair-share claim: head of each tenant's queue
+CREATE INDEX IF NOT EXISTS ix_workflow_jobs_status_tenant_id ON workflow_jobs (status, tenant_id);
@@ -0,0 +1,5 @@
+-- Migration: Add Workflow Graph Analysis
+-- PostgreSQL version - Validation result and run order computed when a workflow is saved
+
+-- Errors, warnings and topological order from /workflow/editor/save and /editor/update
+ALTER TABLE workflow_templates ADD COLUMN IF NOT EXISTS graph_analysis JSONB;
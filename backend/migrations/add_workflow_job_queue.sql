@@ -0,0 +1,26 @@
+-- Migration: Add Workflow Job Queue
+-- PostgreSQL version - Durable queue polled by workflow worker processes
+
+CREATE TABLE IF NOT EXISTS workflow_jobs (
+    id VARCHAR(255) PRIMARY KEY,
+    workflow_instance_id VARCHAR(255) NOT NULL,
+    status VARCHAR(50) DEFAULT 'queued',  -- queued, running, completed, failed, cancelled
+    input_data JSONB,
+    attempts INTEGER DEFAULT 0,  -- Times the job has been claimed
+    max_attempts INTEGER DEFAULT 3,
+    worker_id VARCHAR(255),  -- Worker holding the lease
+    lease_expires_at TIMESTAMP WITH TIME ZONE,  -- Job is reclaimable after this
+    heartbeat_at TIMESTAMP WITH TIME ZONE,
+    error_message TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    
+    -- Foreign key constraint
+    CONSTRAINT fk_workflow_jobs_instance_id 
+        FOREIGN KEY (workflow_instance_id) REFERENCES workflow_instances (id) ON DELETE CASCADE
+);
+
+-- Claim query: oldest queued job, or running job with an expired lease
+CREATE INDEX IF NOT EXISTS ix_workflow_jobs_status_created_at ON workflow_jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS ix_workflow_jobs_workflow_instance_id ON workflow_jobs (workflow_instance_id);
@@ -0,0 +1,33 @@
+-- Migration: Add Workflow Schedules
+-- PostgreSQL version - Cron and interval triggers fired by the in-process scheduler
+
+CREATE TABLE IF NOT EXISTS workflow_schedules (
+    id VARCHAR(255) PRIMARY KEY,  -- <template_id>:<node_id>
+    template_id VARCHAR(255) NOT NULL,
+    node_id VARCHAR(100) NOT NULL,  -- schedule_trigger node in the template
+    cron_expression VARCHAR(255),  -- Either a cron expression...
+    interval_seconds INTEGER,  -- ...or a fixed interval
+    timezone VARCHAR(64) DEFAULT 'UTC',
+    enabled BOOLEAN DEFAULT TRUE,
+    input_data JSONB,
+    created_by VARCHAR(255),
+    next_run_at TIMESTAMP WITH TIME ZONE,
+    last_run_at TIMESTAMP WITH TIME ZONE,
+    last_instance_id VARCHAR(255),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    
+    -- Foreign key constraint
+    CONSTRAINT fk_workflow_schedules_template_id 
+        FOREIGN KEY (template_id) REFERENCES workflow_templates (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_workflow_schedules_template_id ON workflow_schedules (template_id);
+CREATE INDEX IF NOT EXISTS ix_workflow_schedules_enabled_next_run_at ON workflow_schedules (enabled, next_run_at);
+
+-- Leader election between API and worker processes
+CREATE TABLE IF NOT EXISTS workflow_scheduler_leases (
+    name VARCHAR(100) PRIMARY KEY,
+    holder VARCHAR(255),
+    expires_at TIMESTAMP WITH TIME ZONE
+);
@@ -0,0 +1,5 @@
+-- Migration: Add Workflow Execution Tracing
+-- PostgreSQL version - Per-node span timeline of each run
+
+-- Spans of the last run, exported at GET /workflow/instances/{id}/trace
+ALTER TABLE workflow_instances ADD COLUMN IF NOT EXISTS trace_data JSONB;
@@ -102,11 +102,11 @@ async def send_message(
         if request.provider != 'ollama' and not request.apiKey:
             raise HTTPException(status_code=400, detail=f"API key is required for {request.provider}")
         
-        # Create AI provider instance
+        # Get the pooled AI provider for these credentials
         if request.provider == 'ollama':
-            ai_provider = AIProviderFactory.create_provider(request.provider, base_url="http://localhost:11434")
+            ai_provider = AIProviderFactory.get_provider(request.provider, base_url="http://localhost:11434")
         else:
-            ai_provider = AIProviderFactory.create_provider(request.provider, api_key=request.apiKey)
+            ai_provider = AIProviderFactory.get_provider(request.provider, api_key=request.apiKey)
         
         # Prepare conversation context
         conversation_context = ""
@@ -233,11 +233,11 @@ async def test_connection(provider: str, api_key: Optional[str] = None, model: s
         if provider != 'ollama' and not api_key:
             raise HTTPException(status_code=400, detail=f"API key is required for {provider}")
         
-        # Create AI provider instance
+        # Get the pooled AI provider for these credentials
         if provider == 'ollama':
-            ai_provider = AIProviderFactory.create_provider(provider, base_url="http://localhost:11434")
+            ai_provider = AIProviderFactory.get_provider(provider, base_url="http://localhost:11434")
         else:
-            ai_provider = AIProviderFactory.create_provider(provider, api_key=api_key)
+            ai_provider = AIProviderFactory.get_provider(provider, api_key=api_key)
         
         # Test with simple prompt
         start_time = time.time()
@@ -1,25 +1,43 @@
 """
 Workflow API Routes
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, WebSocket
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, WebSocket
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import asyncio
 import uuid
 
-from ...core.database import get_db
-from ...models.workflow import WorkflowTemplate, WorkflowInstance, WorkflowExecutionStep, WorkflowTaskLog
+from ...core.config import settings
+from ...models.database import get_db, AsyncSessionLocal
+from ...models.workflow import WorkflowTemplate, WorkflowInstance, WorkflowExecutionStep, WorkflowTaskLog, WorkflowSchedule
 from ...schemas.workflow_editor import SaveWorkflowRequest, UpdateWorkflowRequest, WorkflowEditorResponse, WorkflowEditorData
 from ...schemas.workflow_components import WorkflowComponentMetadata, ComponentCategory
 from ...services.workflow.workflow_engine import WorkflowExecutor
+from ...services.workflow.job_queue import get_job_queue
+from ...services.workflow.blob_store import blob_store, BLOB_REF_KEY
+from ...services.workflow.resource_governor import resource_governor
+from ...services.workflow.event_bus import event_bus
+from ...services.workflow.event_subscribers import execution_metrics
 from ...services.workflow.execution_engine import WorkflowExecutionEngine
+from ...services.workflow.graph_analyzer import analyze_workflow, describe_errors
+from ...services.workflow.execution_plan import execution_plan_cache
+from ...services.workflow.bulk_runs import bulk_runner, iter_ndjson
+from ...services.workflow.scheduler import workflow_scheduler
+from ...services.workflow.tracing import to_chrome_trace
 from ...services.workflow.component_registry import component_registry
-from ...services.workflow.websocket_manager import websocket_manager, handle_websocket_connection, execution_event_callback
+from ...services.workflow.websocket_manager import websocket_manager, handle_websocket_connection
 from ...services.workflow.google_services import GoogleServicesManager
 from ...services.workflow.notifications import NotificationManager, EmailService, SlackService
 from ...services.workflow.analytics import AnalyticsService
 from ...services.workflow.ai_providers import AIProviderFactory
+from ...services.workflow.prompt_cache import prompt_response_cache
+from ...services.workflow.provider_pool import provider_client_pool
+from ...services.workflow.rate_limiter import ai_rate_limits
+from ...services.workflow.resilience import circuit_breakers
 from ...services.workflow.email_report_service import (
     EmailReportService, 
     WorkflowExecutionSummary, 
@@ -42,12 +60,21 @@ async def workflow_health():
 
 
 # Dependency to get workflow execution engine
-async def get_execution_engine(db: Session = Depends(get_db)) -> WorkflowExecutionEngine:
+async def get_execution_engine(db: AsyncSession = Depends(get_db)) -> WorkflowExecutionEngine:
     """Get workflow execution engine"""
-    engine = WorkflowExecutionEngine(db)
-    # Add WebSocket callback for real-time updates
-    engine.add_event_callback(execution_event_callback)
-    return engine
+    # Events reach WebSocket clients through the event bus subscribers
+    return WorkflowExecutionEngine(db)
+
+
+async def _run_workflow_in_background(instance_id: str, input_data: Dict[str, Any], resume: bool = False):
+    """Execute a workflow with its own session so the run outlives the request"""
+    async with AsyncSessionLocal() as db:
+        engine = WorkflowExecutionEngine(db)
+        try:
+            await engine.execute_workflow(instance_id, input_data, resume=resume)
+        except Exception as e:
+            # Failure is already recorded on the instance by the engine
+            print(f"Workflow execution {instance_id} failed: {e}")
 
 
 # Component Management Endpoints
@@ -151,7 +178,7 @@ def get_workflow_executor(db: Session) -> 'WorkflowExecutor':
 @router.post("/templates")
 async def create_workflow_template(
     template_data: Dict[str, Any],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new workflow template"""
     try:
@@ -166,8 +193,8 @@ async def create_workflow_template(
         )
         
         db.add(template)
-        db.commit()
-        db.refresh(template)
+        await db.commit()
+        await db.refresh(template)
         
         return {
             "success": True,
@@ -176,7 +203,7 @@ async def create_workflow_template(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -184,20 +211,21 @@ async def create_workflow_template(
 async def list_workflow_templates(
     category: Optional[str] = None,
     is_public: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List workflow templates"""
     try:
         # For development, return mock data if no templates exist
-        query = db.query(WorkflowTemplate)
+        query = select(WorkflowTemplate)
         
         if category:
-            query = query.filter(WorkflowTemplate.category == category)
+            query = query.where(WorkflowTemplate.category == category)
         
         if is_public is not None:
-            query = query.filter(WorkflowTemplate.is_public == is_public)
+            query = query.where(WorkflowTemplate.is_public == is_public)
         
-        templates = query.all()
+        result = await db.execute(query)
+        templates = result.scalars().all()
         
         # If no templates exist, return empty array
         return {
@@ -230,13 +258,14 @@ async def list_workflow_templates(
 @router.get("/templates/{template_id}")
 async def get_workflow_template(
     template_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific workflow template"""
     try:
-        template = db.query(WorkflowTemplate).filter(
-            WorkflowTemplate.id == template_id
-        ).first()
+        result = await db.execute(
+            select(WorkflowTemplate).where(WorkflowTemplate.id == template_id)
+        )
+        template = result.scalar_one_or_none()
         
         if not template:
             raise HTTPException(status_code=404, detail="Template not found")
@@ -261,19 +290,153 @@ async def get_workflow_template(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/templates/{template_id}/bulk-execute")
+async def bulk_execute_template(
+    template_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    name: Optional[str] = None,
+    parallelism: Optional[int] = None,
+    priority: int = 0,
+    created_by: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Execute a template once per input
+    
+    The body is a JSON list of inputs, a JSON object {"inputs": [...]} that
+    may also carry the options, or (Content-Type application/x-ndjson) one
+    input object per line. Options default to the query parameters. Returns
+    the batch id; follow progress at GET /batches/{batch_id}.
+    """
+    try:
+        template = await db.get(WorkflowTemplate, template_id)
+        if not template:
+            raise HTTPException(status_code=404, detail="Template not found")
+        
+        # Compiled and checked once for every run of the batch
+        analysis = analyze_workflow(template.template_data, template.graph_analysis)
+        if not analysis["valid"]:
+            raise HTTPException(status_code=400, detail=describe_errors(analysis))
+        plan = execution_plan_cache.get_plan(template.template_data)
+        
+        content_type = request.headers.get("content-type", "")
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            inputs = iter_ndjson(request.stream())
+        else:
+            body = await request.json()
+            if isinstance(body, dict):
+                name = body.get("name", name)
+                parallelism = body.get("parallelism", parallelism)
+                priority = body.get("priority", priority)
+                created_by = body.get("created_by", created_by)
+                body = body.get("inputs")
+            if not isinstance(body, list):
+                raise HTTPException(status_code=400, detail="Expected a list of inputs")
+            inputs = body
+        
+        try:
+            batch = await bulk_runner.create_batch(
+                db,
+                template,
+                inputs,
+                name=name,
+                parallelism=parallelism,
+                priority=int(priority or 0),
+                created_by=created_by
+            )
+        except ValueError as e:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        background_tasks.add_task(bulk_runner.run_batch, batch.id, plan, get_job_queue())
+        
+        return {
+            "success": True,
+            "data": {
+                "batch_id": batch.id,
+                "status": batch.status,
+                "total_runs": batch.total_runs,
+                "parallelism": batch.parallelism
+            }
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/batches/{batch_id}")
+async def get_batch_progress(batch_id: str, db: AsyncSession = Depends(get_db)):
+    """Get aggregate progress of a bulk run"""
+    try:
+        progress = await bulk_runner.get_progress(db, batch_id)
+        if progress is None:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        
+        return {"success": True, "data": progress}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/schedules")
+async def list_workflow_schedules(
+    template_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List schedule triggers and the state of this process's scheduler"""
+    try:
+        query = select(WorkflowSchedule).order_by(WorkflowSchedule.next_run_at)
+        if template_id:
+            query = query.where(WorkflowSchedule.template_id == template_id)
+        result = await db.execute(query)
+        
+        schedules = [
+            {
+                "id": schedule.id,
+                "template_id": schedule.template_id,
+                "node_id": schedule.node_id,
+                "cron_expression": schedule.cron_expression,
+                "interval_seconds": schedule.interval_seconds,
+                "timezone": schedule.timezone,
+                "enabled": schedule.enabled,
+                "next_run_at": schedule.next_run_at.isoformat() if schedule.next_run_at else None,
+                "last_run_at": schedule.last_run_at.isoformat() if schedule.last_run_at else None,
+                "last_instance_id": schedule.last_instance_id
+            }
+            for schedule in result.scalars().all()
+        ]
+        
+        return {
+            "success": True,
+            "data": {
+                "schedules": schedules,
+                "scheduler": workflow_scheduler.get_status()
+            }
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/instances")
 async def create_workflow_instance(
     instance_data: Dict[str, Any],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new workflow instance"""
     try:
         # If template_id is provided, get workflow_data from template
         workflow_data = instance_data.get("workflow_data")
         if not workflow_data and instance_data.get("template_id"):
-            template = db.query(WorkflowTemplate).filter(
-                WorkflowTemplate.id == instance_data["template_id"]
-            ).first()
+            result = await db.execute(
+                select(WorkflowTemplate).where(WorkflowTemplate.id == instance_data["template_id"])
+            )
+            template = result.scalar_one_or_none()
             if template:
                 workflow_data = template.template_data
             else:
@@ -289,12 +452,13 @@ async def create_workflow_instance(
             workflow_data=workflow_data,
             input_data=instance_data.get("input_data"),
             created_by=instance_data.get("created_by"),
+            priority=int(instance_data.get("priority") or 0),
             status="draft"
         )
         
         db.add(instance)
-        db.commit()
-        db.refresh(instance)
+        await db.commit()
+        await db.refresh(instance)
         
         return {
             "success": True,
@@ -303,7 +467,7 @@ async def create_workflow_instance(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -312,16 +476,19 @@ async def list_workflow_instances(
     status: Optional[str] = None,
     limit: Optional[int] = 50,
     offset: Optional[int] = 0,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List workflow instances"""
     try:
-        query = db.query(WorkflowInstance)
+        query = select(WorkflowInstance)
         
         if status:
-            query = query.filter(WorkflowInstance.status == status)
+            query = query.where(WorkflowInstance.status == status)
         
-        instances = query.order_by(WorkflowInstance.created_at.desc()).offset(offset).limit(limit).all()
+        result = await db.execute(
+            query.order_by(WorkflowInstance.created_at.desc()).offset(offset).limit(limit)
+        )
+        instances = result.scalars().all()
         
         return {
             "success": True,
@@ -335,7 +502,8 @@ async def list_workflow_instances(
                         "created_at": instance.created_at.isoformat() if instance.created_at else None,
                         "started_at": instance.started_at.isoformat() if instance.started_at else None,
                         "completed_at": instance.completed_at.isoformat() if instance.completed_at else None,
-                        "created_by": instance.created_by
+                        "created_by": instance.created_by,
+                        "priority": instance.priority or 0
                     }
                     for instance in instances
                 ]
@@ -348,17 +516,23 @@ async def list_workflow_instances(
 @router.get("/instances/{instance_id}")
 async def get_workflow_instance(
     instance_id: str,
-    db: Session = Depends(get_db)
+    resolve: bool = True,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get a specific workflow instance"""
+    """Get a specific workflow instance; ``resolve=false`` keeps large outputs as {"$blob": ...} references"""
     try:
-        instance = db.query(WorkflowInstance).filter(
-            WorkflowInstance.id == instance_id
-        ).first()
+        result = await db.execute(
+            select(WorkflowInstance).where(WorkflowInstance.id == instance_id)
+        )
+        instance = result.scalar_one_or_none()
         
         if not instance:
             raise HTTPException(status_code=404, detail="Workflow instance not found")
         
+        output_data = instance.output_data
+        if resolve:
+            output_data = await blob_store.resolve_nested(output_data, settings.WORKFLOW_BLOB_RESOLVE_MAX_BYTES)
+        
         return {
             "success": True,
             "data": {
@@ -369,12 +543,13 @@ async def get_workflow_instance(
                     "workflow_data": instance.workflow_data,
                     "status": instance.status,
                     "input_data": instance.input_data,
-                    "output_data": instance.output_data,
+                    "output_data": output_data,
                     "error_message": instance.error_message,
                     "created_at": instance.created_at.isoformat() if instance.created_at else None,
                     "started_at": instance.started_at.isoformat() if instance.started_at else None,
                     "completed_at": instance.completed_at.isoformat() if instance.completed_at else None,
-                    "created_by": instance.created_by
+                    "created_by": instance.created_by,
+                    "priority": instance.priority or 0
                 }
             }
         }
@@ -390,27 +565,62 @@ async def execute_workflow_instance(
     input_data: Optional[Dict[str, Any]] = None,
     background_tasks: BackgroundTasks = None,
     execution_engine: WorkflowExecutionEngine = Depends(get_execution_engine),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Execute a workflow instance with real-time updates"""
     try:
         # Check if instance exists
-        instance = db.query(WorkflowInstance).filter(
-            WorkflowInstance.id == instance_id
-        ).first()
+        result = await db.execute(
+            select(WorkflowInstance).where(WorkflowInstance.id == instance_id)
+        )
+        instance = result.scalar_one_or_none()
         
         if not instance:
             raise HTTPException(status_code=404, detail="Workflow instance not found")
         
-        # Check if already running
-        current_status = execution_engine.get_execution_status(instance_id)
-        if current_status.get("is_running"):
+        # Reject broken graphs before queueing any work
+        template = await db.get(WorkflowTemplate, instance.template_id) if instance.template_id else None
+        analysis = analyze_workflow(instance.workflow_data, template.graph_analysis if template else None)
+        if not analysis["valid"]:
+            raise HTTPException(status_code=400, detail=describe_errors(analysis))
+        
+        job_queue = get_job_queue()
+        
+        # Check if already running, here or queued/claimed for a worker. Inline
+        # runs die with the API process, so a persisted "running" status only
+        # means something while a queue backend is configured
+        current_status = await execution_engine.get_execution_status(instance_id)
+        if current_status.get("is_running") or (
+            job_queue and (
+                instance.status in ("queued", "running")
+                or await job_queue.has_active_job(instance_id)
+            )
+        ):
             raise HTTPException(status_code=400, detail="Workflow is already running")
         
-        # Start execution in background
+        # Hand the run to the worker processes
+        if job_queue:
+            job_id = await job_queue.enqueue(
+                instance_id,
+                input_data or {},
+                tenant=instance.created_by,
+                priority=instance.priority or 0
+            )
+            instance.status = "queued"
+            await db.commit()
+            
+            return {
+                "success": True,
+                "message": "Workflow execution queued",
+                "instance_id": instance_id,
+                "job_id": job_id,
+                "status": "queued"
+            }
+        
+        # Inline mode: start execution in the API process
         if background_tasks:
             background_tasks.add_task(
-                execution_engine.execute_workflow,
+                _run_workflow_in_background,
                 instance_id,
                 input_data or {}
             )
@@ -433,6 +643,66 @@ async def execute_workflow_instance(
                 "result": result
             }
             
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/instances/{instance_id}/resume")
+async def resume_workflow_instance(
+    instance_id: str,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    """Resume a failed or stopped run from its checkpointed steps"""
+    try:
+        instance = await db.get(WorkflowInstance, instance_id)
+        
+        if not instance:
+            raise HTTPException(status_code=404, detail="Workflow instance not found")
+        
+        if not instance.started_at:
+            raise HTTPException(status_code=400, detail="Workflow instance has not been executed yet")
+        
+        job_queue = get_job_queue()
+        if instance_id in WorkflowExecutionEngine.active_executions or (
+            job_queue and (
+                instance.status in ("queued", "running")
+                or await job_queue.has_active_job(instance_id)
+            )
+        ):
+            raise HTTPException(status_code=400, detail="Workflow is already running")
+        
+        if job_queue:
+            job_id = await job_queue.enqueue(
+                instance_id,
+                resume=True,
+                tenant=instance.created_by,
+                priority=instance.priority or 0
+            )
+            instance.status = "queued"
+            await db.commit()
+            
+            return {
+                "success": True,
+                "message": "Workflow resume queued",
+                "instance_id": instance_id,
+                "job_id": job_id,
+                "status": "queued"
+            }
+        
+        background_tasks.add_task(_run_workflow_in_background, instance_id, None, True)
+        
+        return {
+            "success": True,
+            "message": "Workflow execution resumed",
+            "instance_id": instance_id,
+            "status": "starting"
+        }
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -440,11 +710,22 @@ async def execute_workflow_instance(
 @router.post("/instances/{instance_id}/stop")
 async def stop_workflow_execution(
     instance_id: str,
-    execution_engine: WorkflowExecutionEngine = Depends(get_execution_engine)
+    execution_engine: WorkflowExecutionEngine = Depends(get_execution_engine),
+    db: AsyncSession = Depends(get_db)
 ):
     """Stop a running workflow execution"""
     try:
-        success = await execution_engine.stop_execution(instance_id)
+        # Queued runs are dropped; running ones are cancelled by their worker on its next heartbeat
+        job_queue = get_job_queue()
+        if job_queue and await job_queue.cancel(instance_id):
+            instance = await db.get(WorkflowInstance, instance_id)
+            if instance:
+                instance.status = "cancelled"
+                instance.completed_at = datetime.now()
+                await db.commit()
+            success = True
+        else:
+            success = await execution_engine.stop_execution(instance_id)
         
         if success:
             return {
@@ -466,7 +747,12 @@ async def get_execution_status(
 ):
     """Get current execution status for a workflow instance"""
     try:
-        status = execution_engine.get_execution_status(instance_id)
+        status = await execution_engine.get_execution_status(instance_id)
+        
+        job_queue = get_job_queue()
+        if job_queue and "error" not in status:
+            status["is_running"] = status["is_running"] or await job_queue.has_active_job(instance_id)
+        
         return {
             "success": True,
             "data": status
@@ -475,18 +761,138 @@ async def get_execution_status(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/queue/stats")
+async def get_queue_stats():
+    """Get workflow job counts by state, and queue depth and wait times per user"""
+    try:
+        job_queue = get_job_queue()
+        return {
+            "success": True,
+            "data": {
+                "backend": settings.WORKFLOW_QUEUE_BACKEND,
+                "jobs": await job_queue.get_stats() if job_queue else {},
+                "tenants": await job_queue.get_tenant_stats() if job_queue else {}
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/events/stats")
+async def get_event_stats():
+    """Get event bus queue, drop and lag metrics per subscriber, and execution metrics"""
+    try:
+        return {
+            "success": True,
+            "data": {
+                "subscribers": event_bus.get_stats(),
+                "metrics": execution_metrics.get_stats()
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/resources/stats")
+async def get_resource_stats():
+    """Get usage of the concurrency pools shared by workflow runs in this process"""
+    try:
+        return {
+            "success": True,
+            "data": {
+                "limits": resource_governor.limits,
+                "pools": resource_governor.get_stats()
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/ai/stats")
+async def get_ai_provider_stats():
+    """Get AI response cache hit/miss counts, pooled provider client usage and rate limiter state"""
+    try:
+        return {
+            "success": True,
+            "data": {
+                "cache": {"enabled": settings.AI_CACHE_ENABLED, **prompt_response_cache.get_stats()},
+                "clients": provider_client_pool.get_stats(),
+                "rate_limits": ai_rate_limits.get_stats()
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/ai/breakers")
+async def get_ai_circuit_breakers():
+    """Get the circuit breaker state of each AI provider used by this process"""
+    try:
+        return {
+            "success": True,
+            "data": {
+                "breakers": circuit_breakers.get_states(),
+                "failover": {
+                    provider: {key: value for key, value in target.items() if key != "api_key"}
+                    for provider, target in settings.AI_FAILOVER.items()
+                }
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/ai/breakers/{provider}/reset")
+async def reset_ai_circuit_breaker(provider: str):
+    """Close a provider's circuit, e.g. after fixing its credentials or once an outage is over"""
+    try:
+        breaker = circuit_breakers.find(provider)
+        if breaker is None:
+            raise HTTPException(status_code=404, detail=f"No circuit breaker for provider {provider}")
+        breaker.reset()
+        return {"success": True, "data": breaker.get_state()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/blobs/{blob_id}")
+async def get_output_blob(blob_id: str):
+    """Get a large node output value referenced as {"$blob": blob_id} in step or instance outputs"""
+    try:
+        value = await asyncio.to_thread(blob_store.get, {BLOB_REF_KEY: blob_id})
+        return {"success": True, "data": value}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/instances/{instance_id}/logs")
 async def get_execution_logs(
     instance_id: str,
     limit: Optional[int] = 100,
     offset: Optional[int] = 0,
-    db: Session = Depends(get_db)
+    resolve: bool = True,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get execution logs for a workflow instance"""
+    """Get execution logs for a workflow instance; ``resolve=false`` keeps large outputs as {"$blob": ...} references"""
     try:
-        logs = db.query(WorkflowExecutionStep).filter(
-            WorkflowExecutionStep.workflow_instance_id == instance_id
-        ).order_by(WorkflowExecutionStep.created_at.desc()).offset(offset).limit(limit).all()
+        result = await db.execute(
+            select(WorkflowExecutionStep)
+            .where(WorkflowExecutionStep.workflow_instance_id == instance_id)
+            .order_by(WorkflowExecutionStep.created_at.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        logs = result.scalars().all()
+        
+        outputs = [log.output_data for log in logs]
+        if resolve:
+            outputs = await blob_store.resolve_nested(outputs, settings.WORKFLOW_BLOB_RESOLVE_MAX_BYTES)
         
         return {
             "success": True,
@@ -504,10 +910,10 @@ async def get_execution_logs(
                         "execution_time_ms": log.execution_time_ms,
                         "error_message": log.error_message,
                         "input_data": log.input_data,
-                        "output_data": log.output_data,
+                        "output_data": output_data,
                         "logs": []  # For compatibility
                     }
-                    for log in logs
+                    for log, output_data in zip(logs, outputs)
                 ]
             }
         }
@@ -515,11 +921,34 @@ async def get_execution_logs(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/instances/{instance_id}/trace")
+async def get_execution_trace(instance_id: str, db: AsyncSession = Depends(get_db)):
+    """Get the timeline of the instance's last run as Chrome trace-event JSON
+    
+    Open the downloaded file in chrome://tracing or https://ui.perfetto.dev.
+    """
+    try:
+        instance = await db.get(WorkflowInstance, instance_id)
+        if not instance:
+            raise HTTPException(status_code=404, detail="Workflow instance not found")
+        if not instance.trace_data:
+            raise HTTPException(status_code=404, detail="No trace recorded for this instance")
+        
+        return JSONResponse(
+            content=to_chrome_trace(instance.trace_data),
+            headers={"Content-Disposition": f'attachment; filename="workflow-trace-{instance_id}.json"'}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/instances/{instance_id}/execute-legacy")
 async def execute_workflow_instance_legacy(
     instance_id: str,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Execute a workflow instance (legacy method - deprecated, use new execute endpoint)"""
     raise HTTPException(status_code=501, detail="Legacy execution method deprecated. Use /instances/{instance_id}/execute instead.")
@@ -530,7 +959,7 @@ async def _execute_workflow_background(
     workflow_data: Dict[str, Any],
     input_data: Dict[str, Any],
     executor: WorkflowExecutor,
-    db: Session
+    db: AsyncSession
 ):
     """Execute workflow in background"""
     try:
@@ -546,9 +975,7 @@ async def _execute_workflow_background(
         result = await executor.execute_automation_workflow(execution_input)
         
         # Update instance with result
-        instance = db.query(WorkflowInstance).filter(
-            WorkflowInstance.id == instance_id
-        ).first()
+        instance = await db.get(WorkflowInstance, instance_id)
         
         if instance:
             instance.status = "completed" if result.get("status") == "completed" else "failed"
@@ -558,19 +985,17 @@ async def _execute_workflow_background(
             if result.get("error"):
                 instance.error_message = result.get("error_message", "Unknown error")
             
-            db.commit()
+            await db.commit()
         
     except Exception as e:
         # Update instance with error
-        instance = db.query(WorkflowInstance).filter(
-            WorkflowInstance.id == instance_id
-        ).first()
+        instance = await db.get(WorkflowInstance, instance_id)
         
         if instance:
             instance.status = "failed"
             instance.error_message = str(e)
             instance.completed_at = datetime.now()
-            db.commit()
+            await db.commit()
 
 
 @router.get("/instances")
@@ -578,16 +1003,17 @@ async def list_workflow_instances(
     status: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List workflow instances"""
     try:
-        query = db.query(WorkflowInstance)
+        query = select(WorkflowInstance)
         
         if status:
-            query = query.filter(WorkflowInstance.status == status)
+            query = query.where(WorkflowInstance.status == status)
         
-        instances = query.offset(offset).limit(limit).all()
+        result = await db.execute(query.offset(offset).limit(limit))
+        instances = result.scalars().all()
         
         # Return empty array if no instances exist
         return {
@@ -619,17 +1045,23 @@ async def list_workflow_instances(
 @router.get("/instances/{instance_id}")
 async def get_workflow_instance(
     instance_id: str,
-    db: Session = Depends(get_db)
+    resolve: bool = True,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get a specific workflow instance"""
+    """Get a specific workflow instance; ``resolve=false`` keeps large outputs as {"$blob": ...} references"""
     try:
-        instance = db.query(WorkflowInstance).filter(
-            WorkflowInstance.id == instance_id
-        ).first()
+        result = await db.execute(
+            select(WorkflowInstance).where(WorkflowInstance.id == instance_id)
+        )
+        instance = result.scalar_one_or_none()
         
         if not instance:
             raise HTTPException(status_code=404, detail="Workflow instance not found")
         
+        output_data = instance.output_data
+        if resolve:
+            output_data = await blob_store.resolve_nested(output_data, settings.WORKFLOW_BLOB_RESOLVE_MAX_BYTES)
+        
         return {
             "success": True,
             "instance": {
@@ -638,7 +1070,7 @@ async def get_workflow_instance(
                 "status": instance.status,
                 "workflow_data": instance.workflow_data,
                 "input_data": instance.input_data,
-                "output_data": instance.output_data,
+                "output_data": output_data,
                 "error_message": instance.error_message,
                 "created_at": instance.created_at.isoformat(),
                 "started_at": instance.started_at.isoformat() if instance.started_at else None,
@@ -657,7 +1089,7 @@ async def get_workflow_instance(
 async def process_google_sheets(
     request_data: Dict[str, Any],
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Process Google Sheets data with automation workflow (legacy - needs update)"""
     raise HTTPException(status_code=501, detail="Google Sheets processing endpoint needs to be updated to use new execution engine")
@@ -709,7 +1141,7 @@ async def _execute_sheets_workflow(
 async def generate_daily_report(
     request_data: Dict[str, Any],
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Generate daily analytics report (legacy - needs update)"""
     raise HTTPException(status_code=501, detail="Daily report generation endpoint needs to be updated to use new execution engine")
@@ -748,7 +1180,7 @@ async def _execute_daily_report(
 @router.get("/analytics/daily")
 async def get_daily_analytics(
     date: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get daily analytics data"""
     try:
@@ -757,14 +1189,18 @@ async def get_daily_analytics(
         target_date = datetime.strptime(date, '%Y-%m-%d').date()
         
         # Get basic stats from database
-        instances_count = db.query(WorkflowInstance).filter(
-            func.date(WorkflowInstance.created_at) == target_date
-        ).count()
+        instances_count = (await db.execute(
+            select(func.count(WorkflowInstance.id)).where(
+                func.date(WorkflowInstance.created_at) == target_date
+            )
+        )).scalar() or 0
         
-        completed_count = db.query(WorkflowInstance).filter(
-            func.date(WorkflowInstance.created_at) == target_date,
-            WorkflowInstance.status == 'completed'
-        ).count()
+        completed_count = (await db.execute(
+            select(func.count(WorkflowInstance.id)).where(
+                func.date(WorkflowInstance.created_at) == target_date,
+                WorkflowInstance.status == 'completed'
+            )
+        )).scalar() or 0
         
         return {
             "success": True,
@@ -795,7 +1231,7 @@ async def get_daily_analytics(
 @router.get("/analytics/weekly")
 async def get_weekly_analytics(
     end_date: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get weekly analytics summary"""
     try:
@@ -805,16 +1241,20 @@ async def get_weekly_analytics(
         start_datetime = end_datetime - timedelta(days=7)
         
         # Get basic weekly stats from database
-        instances_count = db.query(WorkflowInstance).filter(
-            func.date(WorkflowInstance.created_at) >= start_datetime,
-            func.date(WorkflowInstance.created_at) <= end_datetime
-        ).count()
+        instances_count = (await db.execute(
+            select(func.count(WorkflowInstance.id)).where(
+                func.date(WorkflowInstance.created_at) >= start_datetime,
+                func.date(WorkflowInstance.created_at) <= end_datetime
+            )
+        )).scalar() or 0
         
-        completed_count = db.query(WorkflowInstance).filter(
-            func.date(WorkflowInstance.created_at) >= start_datetime,
-            func.date(WorkflowInstance.created_at) <= end_datetime,
-            WorkflowInstance.status == 'completed'
-        ).count()
+        completed_count = (await db.execute(
+            select(func.count(WorkflowInstance.id)).where(
+                func.date(WorkflowInstance.created_at) >= start_datetime,
+                func.date(WorkflowInstance.created_at) <= end_datetime,
+                WorkflowInstance.status == 'completed'
+            )
+        )).scalar() or 0
         
         return {
             "success": True,
@@ -849,24 +1289,25 @@ async def get_task_logs(
     status: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get task logs with filtering"""
     try:
-        query = db.query(WorkflowTaskLog)
+        query = select(WorkflowTaskLog)
         
         if status:
-            query = query.filter(WorkflowTaskLog.status == status)
+            query = query.where(WorkflowTaskLog.status == status)
         
         if start_date:
             start_datetime = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(WorkflowTaskLog.created_at >= start_datetime)
+            query = query.where(WorkflowTaskLog.created_at >= start_datetime)
         
         if end_date:
             end_datetime = datetime.strptime(end_date, '%Y-%m-%d')
-            query = query.filter(WorkflowTaskLog.created_at <= end_datetime)
+            query = query.where(WorkflowTaskLog.created_at <= end_datetime)
         
-        logs = query.offset(offset).limit(limit).all()
+        result = await db.execute(query.offset(offset).limit(limit))
+        logs = result.scalars().all()
         
         return {
             "success": True,
@@ -901,24 +1342,33 @@ async def get_task_logs(
 @router.post("/editor/save", response_model=Dict[str, Any])
 async def save_workflow(
     request: SaveWorkflowRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Save a workflow from the visual editor"""
+    """Save a workflow from the visual editor
+    
+    The graph is analyzed on save; invalid workflows are still saved (so
+    drafts are not lost) but are rejected when executed.
+    """
     try:
+        workflow_data = request.workflow_data.dict()
+        
         # Create new workflow template
         template = WorkflowTemplate(
             id=str(uuid.uuid4()),
             name=request.name,
             description=request.description,
             category=request.category,
-            template_data=request.workflow_data.dict(),  # Fixed: WorkflowTemplate uses template_data field
+            template_data=workflow_data,  # Fixed: WorkflowTemplate uses template_data field
+            graph_analysis=analyze_workflow(workflow_data),
             is_public=request.is_public,
             created_by="system"  # Replace with actual user ID
         )
         
         db.add(template)
-        db.commit()
-        db.refresh(template)
+        await db.flush()
+        schedules = await workflow_scheduler.sync_template(db, template)
+        await db.commit()
+        await db.refresh(template)
         
         return {
             "success": True,
@@ -928,6 +1378,8 @@ async def save_workflow(
                 "description": template.description,
                 "category": template.category,
                 "workflow_data": template.template_data,  # Fixed: WorkflowTemplate has template_data field
+                "analysis": template.graph_analysis,
+                "schedules": schedules,
                 "is_public": template.is_public,
                 "created_at": template.created_at.isoformat() if template.created_at else None,
                 "updated_at": template.updated_at.isoformat() if template.updated_at else None
@@ -935,18 +1387,18 @@ async def save_workflow(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/editor/load/{workflow_id}", response_model=Dict[str, Any])
 async def load_workflow(
     workflow_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Load a workflow for the visual editor"""
     try:
-        template = db.query(WorkflowTemplate).filter(WorkflowTemplate.id == workflow_id).first()
+        template = await db.get(WorkflowTemplate, workflow_id)
         
         if not template:
             raise HTTPException(status_code=404, detail="Workflow not found")
@@ -959,6 +1411,7 @@ async def load_workflow(
                 "description": template.description,
                 "category": template.category,
                 "workflow_data": template.template_data,  # Fixed: use template_data field
+                "analysis": template.graph_analysis,
                 "is_public": template.is_public,
                 "created_at": template.created_at.isoformat(),
                 "updated_at": template.updated_at.isoformat() if template.updated_at else None
@@ -975,11 +1428,11 @@ async def load_workflow(
 async def update_workflow(
     workflow_id: str,
     request: UpdateWorkflowRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a workflow from the visual editor"""
     try:
-        template = db.query(WorkflowTemplate).filter(WorkflowTemplate.id == workflow_id).first()
+        template = await db.get(WorkflowTemplate, workflow_id)
         
         if not template:
             raise HTTPException(status_code=404, detail="Workflow not found")
@@ -991,15 +1444,18 @@ async def update_workflow(
             template.description = request.description
         if request.category is not None:
             template.category = request.category
+        schedules = None
         if request.workflow_data is not None:
-            template.workflow_data = request.workflow_data.dict()
+            template.template_data = request.workflow_data.dict()
+            template.graph_analysis = analyze_workflow(template.template_data)
+            schedules = await workflow_scheduler.sync_template(db, template)
         if request.is_public is not None:
             template.is_public = request.is_public
         
         template.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(template)
+        await db.commit()
+        await db.refresh(template)
         
         return {
             "success": True,
@@ -1008,7 +1464,9 @@ async def update_workflow(
                 "name": template.name,
                 "description": template.description,
                 "category": template.category,
-                "workflow_data": template.workflow_data,
+                "workflow_data": template.template_data,
+                "analysis": template.graph_analysis,
+                "schedules": schedules,
                 "is_public": template.is_public,
                 "created_at": template.created_at.isoformat(),
                 "updated_at": template.updated_at.isoformat()
@@ -1018,24 +1476,25 @@ async def update_workflow(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.delete("/editor/delete/{workflow_id}", response_model=Dict[str, Any])
 async def delete_workflow(
     workflow_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a workflow"""
     try:
-        template = db.query(WorkflowTemplate).filter(WorkflowTemplate.id == workflow_id).first()
+        template = await db.get(WorkflowTemplate, workflow_id)
         
         if not template:
             raise HTTPException(status_code=404, detail="Workflow not found")
         
-        db.delete(template)
-        db.commit()
+        await workflow_scheduler.remove_template(db, workflow_id)
+        await db.delete(template)
+        await db.commit()
         
         return {
             "success": True,
@@ -1047,7 +1506,7 @@ async def delete_workflow(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1055,19 +1514,20 @@ async def delete_workflow(
 async def list_editor_workflows(
     category: Optional[str] = None,
     is_public: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List workflows for the editor"""
     try:
-        query = db.query(WorkflowTemplate)
+        query = select(WorkflowTemplate)
         
         if category:
-            query = query.filter(WorkflowTemplate.category == category)
+            query = query.where(WorkflowTemplate.category == category)
         
         if is_public is not None:
-            query = query.filter(WorkflowTemplate.is_public == is_public)
+            query = query.where(WorkflowTemplate.is_public == is_public)
         
-        templates = query.order_by(WorkflowTemplate.updated_at.desc()).all()
+        result = await db.execute(query.order_by(WorkflowTemplate.updated_at.desc()))
+        templates = result.scalars().all()
         
         return {
             "success": True,
@@ -1100,7 +1560,7 @@ async def send_workflow_execution_report(
     instance_id: str,
     request_data: Dict[str, Any],
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Send comprehensive workflow execution report via email
@@ -1122,23 +1582,30 @@ async def send_workflow_execution_report(
         include_detailed_logs = request_data.get("include_detailed_logs", True)
         
         # Get workflow instance
-        instance = db.query(WorkflowInstance).filter(
-            WorkflowInstance.id == instance_id
-        ).first()
+        result = await db.execute(
+            select(WorkflowInstance).where(WorkflowInstance.id == instance_id)
+        )
+        instance = result.scalar_one_or_none()
         
         if not instance:
             raise HTTPException(status_code=404, detail="Workflow instance not found")
         
         # Get execution logs and events
-        execution_steps = db.query(WorkflowExecutionStep).filter(
-            WorkflowExecutionStep.workflow_instance_id == instance_id
-        ).order_by(WorkflowExecutionStep.created_at.asc()).all()
+        result = await db.execute(
+            select(WorkflowExecutionStep)
+            .where(WorkflowExecutionStep.workflow_instance_id == instance_id)
+            .order_by(WorkflowExecutionStep.created_at.asc())
+        )
+        execution_steps = result.scalars().all()
+        step_outputs = await blob_store.resolve_nested(
+            [step.output_data for step in execution_steps], settings.WORKFLOW_BLOB_RESOLVE_MAX_BYTES
+        )
         
         # Convert to format expected by email service
         execution_logs = []
         execution_events = []
         
-        for step in execution_steps:
+        for step, output_data in zip(execution_steps, step_outputs):
             # Add as log entry
             log_level = 'error' if step.status == 'failed' else 'success' if step.status == 'completed' else 'info'
             execution_logs.append({
@@ -1150,7 +1617,7 @@ async def send_workflow_execution_report(
                 'details': {
                     'step_type': step.step_type,
                     'input_data': step.input_data,
-                    'output_data': step.output_data,
+                    'output_data': output_data,
                     'error_message': step.error_message
                 }
             })
@@ -1187,7 +1654,6 @@ async def send_workflow_execution_report(
         
         # Initialize email service using settings
         try:
-            from ...core.config import settings
             email_service = EmailService(
                 smtp_server=settings.SMTP_SERVER,
                 smtp_port=settings.SMTP_PORT,
@@ -1228,7 +1694,7 @@ async def send_workflow_execution_report(
 async def send_daily_analytics_report(
     request_data: Dict[str, Any],
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Send daily analytics report via email
@@ -1258,21 +1724,31 @@ async def send_daily_analytics_report(
         )
         
         # Get analytics data from database
-        instances_query = db.query(WorkflowInstance).filter(
+        in_date_range = (
             WorkflowInstance.created_at >= date_range[0],
             WorkflowInstance.created_at <= date_range[1]
         )
         
-        total_executions = instances_query.count()
-        successful_executions = instances_query.filter(WorkflowInstance.status == 'completed').count()
-        failed_executions = instances_query.filter(WorkflowInstance.status == 'failed').count()
+        async def count_instances(*conditions) -> int:
+            result = await db.execute(
+                select(func.count(WorkflowInstance.id)).where(*in_date_range, *conditions)
+            )
+            return result.scalar() or 0
+        
+        total_executions = await count_instances()
+        successful_executions = await count_instances(WorkflowInstance.status == 'completed')
+        failed_executions = await count_instances(WorkflowInstance.status == 'failed')
         
         # Calculate average execution time
-        completed_instances = instances_query.filter(
-            WorkflowInstance.status == 'completed',
-            WorkflowInstance.started_at.isnot(None),
-            WorkflowInstance.completed_at.isnot(None)
-        ).all()
+        result = await db.execute(
+            select(WorkflowInstance).where(
+                *in_date_range,
+                WorkflowInstance.status == 'completed',
+                WorkflowInstance.started_at.isnot(None),
+                WorkflowInstance.completed_at.isnot(None)
+            )
+        )
+        completed_instances = result.scalars().all()
         
         if completed_instances:
             execution_times = []
@@ -1295,11 +1771,13 @@ async def send_daily_analytics_report(
             average_execution_time = 0
         
         # Get error breakdown from execution steps
-        error_steps = db.query(WorkflowExecutionStep).join(WorkflowInstance).filter(
-            WorkflowInstance.created_at >= date_range[0],
-            WorkflowInstance.created_at <= date_range[1],
-            WorkflowExecutionStep.status == 'failed'
-        ).all()
+        result = await db.execute(
+            select(WorkflowExecutionStep).join(WorkflowInstance).where(
+                *in_date_range,
+                WorkflowExecutionStep.status == 'failed'
+            )
+        )
+        error_steps = result.scalars().all()
         
         error_breakdown = {}
         for step in error_steps:
@@ -1318,7 +1796,13 @@ async def send_daily_analytics_report(
         )
         
         # Get recent executions for the report
-        recent_instances = instances_query.order_by(WorkflowInstance.created_at.desc()).limit(10).all()
+        result = await db.execute(
+            select(WorkflowInstance)
+            .where(*in_date_range)
+            .order_by(WorkflowInstance.created_at.desc())
+            .limit(10)
+        )
+        recent_instances = result.scalars().all()
         recent_executions = []
         
         for instance in recent_instances:
@@ -1332,9 +1816,12 @@ async def send_daily_analytics_report(
             }
             
             # Get step counts for this instance
-            steps = db.query(WorkflowExecutionStep).filter(
-                WorkflowExecutionStep.workflow_instance_id == instance.id
-            ).all()
+            result = await db.execute(
+                select(WorkflowExecutionStep).where(
+                    WorkflowExecutionStep.workflow_instance_id == instance.id
+                )
+            )
+            steps = result.scalars().all()
             
             execution_data['total_steps'] = len(steps)
             execution_data['completed_steps'] = len([s for s in steps if s.status == 'completed'])
@@ -1396,7 +1883,7 @@ async def send_daily_analytics_report(
 async def send_execution_report(
     request_data: Dict[str, Any],
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Send execution report via email
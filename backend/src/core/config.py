@@ -1,5 +1,5 @@
 # Application configuration
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 from pydantic_settings import BaseSettings
 import os
 
@@ -32,7 +32,134 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
+
+    # Workflow Execution
+    WORKFLOW_MAX_CONCURRENCY: int = 4  # Max nodes running at once within a single run
+    WORKFLOW_PLAN_CACHE_SIZE: int = 128  # Compiled execution plans kept in memory
+    WORKFLOW_JOURNAL_DIR: str = "workflow_journal"  # Write-ahead files for buffered step rows
+    WORKFLOW_JOURNAL_FLUSH_SIZE: int = 50  # Flush step rows once this many are buffered
+    WORKFLOW_JOURNAL_FLUSH_INTERVAL: float = 2.0  # ...or once the oldest buffered row is this old (seconds)
+    WORKFLOW_NODE_TIMEOUT_SECONDS: int = 900  # Deadline for components without max_runtime_seconds (0 disables)
+    WORKFLOW_BLOB_DIR: str = "workflow_blobs"  # Compressed store for large node outputs; empty keeps them in memory
+    WORKFLOW_BLOB_SPILL_BYTES: int = 64 * 1024  # Output values larger than this (as JSON) are spilled
+    WORKFLOW_BLOB_RETENTION_DAYS: int = 30  # Blobs not referenced for this long are pruned at startup
+    WORKFLOW_BLOB_RESOLVE_MAX_BYTES: int = 16 * 1024 * 1024  # Read endpoints inline spilled values up to this size
+    
+    # Workflow Tracing (timeline at GET /workflow/instances/{id}/trace)
+    WORKFLOW_TRACING_ENABLED: bool = True
+    WORKFLOW_TRACE_MAX_SPANS: int = 20000  # Spans kept per run; later ones are counted as dropped
+
+    # Workflow Streaming (Sheets -> AI -> Sheets-write chains run as one pipeline)
+    # Streamed stages keep a summary output instead of their records, so the execution
+    # panels show no processed results for them. Opt a node out with "streaming": false.
+    WORKFLOW_STREAMING_ENABLED: bool = False
+    WORKFLOW_STREAM_BATCH_SIZE: int = 25  # Records handed from one stage to the next at a time
+    WORKFLOW_STREAM_BUFFER_BATCHES: int = 4  # Batches buffered between two stages before the producer waits
+
+    # Workflow AI Processing (records run concurrently; the limit adapts to latency and 429s)
+    WORKFLOW_AI_CONCURRENCY_START: int = 4  # Calls in flight at the start of a run
+    WORKFLOW_AI_CONCURRENCY_MAX: int = 16  # Ceiling unless a node sets "max_concurrency"
+    WORKFLOW_AI_LATENCY_TOLERANCE: float = 2.0  # Back off when a call takes this many times the best recent latency
+    WORKFLOW_AI_MAX_RECORDS: int = 0  # Records processed per run unless a node sets "max_records"; 0 processes all
+
+    # Workflow Map / Reduce (fan a collection out into sub-workflow runs)
+    WORKFLOW_MAP_PARALLELISM: int = 4  # Sub-runs a map node runs at once unless its config sets "parallelism"
+    WORKFLOW_MAP_MAX_ITEMS: int = 10000  # Largest collection a map node accepts
+
+    # Workflow Bulk Runs (POST /workflow/templates/{id}/bulk-execute)
+    WORKFLOW_BULK_MAX_INPUTS: int = 10000  # Inputs accepted per batch
+    WORKFLOW_BULK_PARALLELISM: int = 8  # Runs of one batch executing at once unless the request sets it
+    WORKFLOW_BULK_INSERT_SIZE: int = 500  # Instance rows created per INSERT
+    WORKFLOW_BULK_LEASE_SECONDS: int = 60  # Another API process resumes a batch whose driver is silent this long
+
+    # Workflow Scheduler (schedule_trigger nodes; runs in API and worker processes, one leads)
+    WORKFLOW_SCHEDULER_ENABLED: bool = True
+    WORKFLOW_SCHEDULER_TICK_SECONDS: float = 1.0  # Timer wheel resolution
+    WORKFLOW_SCHEDULER_WHEEL_SLOTS: int = 3600  # Slots in the wheel; timers further out wait extra turns
+    WORKFLOW_SCHEDULER_LEASE_SECONDS: int = 30  # Another process takes over a leader silent this long
+    WORKFLOW_SCHEDULER_RELOAD_SECONDS: int = 60  # Leader re-reads schedules changed by other processes
+
+    # Workflow Event Bus
+    WORKFLOW_EVENT_QUEUE_SIZE: int = 1000  # Events buffered per subscriber before the oldest is dropped
+    WORKFLOW_EVENT_JOURNAL_BATCH_SIZE: int = 50  # Events written to execution_logs per commit
+    WORKFLOW_EVENT_LOG_MAX_ENTRIES: int = 1000  # Most recent events kept in an instance's execution_logs
+    WORKFLOW_EVENT_RELAY_INTERVAL: float = 1.0  # Seconds between polls relaying queue workers' events to WebSocket clients
+    
+    # Workflow Job Queue
+    # inline runs inside the API process; database and redis need the worker running
+    # (python -m src.services.workflow.worker) or queued runs never start
+    WORKFLOW_QUEUE_BACKEND: str = "inline"  # inline, database, or redis
+    WORKFLOW_QUEUE_LEASE_SECONDS: int = 60  # A job whose worker stops heartbeating is reclaimed after this
+    WORKFLOW_QUEUE_HEARTBEAT_SECONDS: int = 15
+    WORKFLOW_QUEUE_POLL_INTERVAL: float = 1.0  # Seconds between claim attempts when the queue is empty
+    WORKFLOW_QUEUE_MAX_ATTEMPTS: int = 3  # Claims before a repeatedly abandoned job is failed
+    WORKFLOW_QUEUE_REDIS_PREFIX: str = "workflow:jobs"
+    WORKFLOW_WORKER_PROCESSES: int = 2  # Executor processes started by the worker entry point
+    WORKFLOW_WORKER_CONCURRENCY: int = 4  # Runs executed at once in each worker process
+    WORKFLOW_TENANT_WEIGHTS: Dict[str, float] = {}  # Share of worker slots per user id (JSON); others weigh 1
     
+    # Workflow Resource Limits (concurrent holders per process; JSON object in the environment)
+    # "component:<type>" is held while a node of that type runs, "service:<name>"
+    # around calls to that external API. Names not listed are not limited.
+    WORKFLOW_RESOURCE_LIMITS: Dict[str, int] = {
+        "component:ai_processing": 8,
+        "component:google_sheets": 8,
+        "component:google_sheets_write": 4,
+        "component:google_drive_write": 4,
+        "service:google_sheets": 6,
+        "service:google_drive": 3,
+        "service:openai": 16,
+        "service:claude": 8,
+        "service:anthropic": 8,
+        "service:gemini": 8,
+        "service:google": 8,
+        "service:ollama": 2,
+    }
+    
+    # Node Result Cache (opt-in per node with "cache_results": true in its config)
+    NODE_CACHE_TTL_SECONDS: int = 3600  # Default lifetime; a node can set "cache_ttl_seconds"
+    NODE_CACHE_MAX_ENTRIES: int = 256  # Results kept in memory
+    NODE_CACHE_DIR: str = "node_cache"  # Disk tier directory; empty disables the disk tier
+    NODE_CACHE_MAX_DISK_MB: int = 512
+
+    # AI Provider Clients (pooled per provider, base URL and API key)
+    AI_CLIENT_IDLE_SECONDS: int = 300  # Pooled clients unused this long are closed
+    AI_CLIENT_MAX_POOLED: int = 64  # Clients kept at most; the least recently used are closed first
+    AI_CLIENT_CLOSE_GRACE_SECONDS: int = 120  # Evicted clients stay open this long for calls still using them
+    AI_CLIENT_MAX_CONNECTIONS: int = 100  # Connections per client
+    AI_CLIENT_KEEPALIVE_CONNECTIONS: int = 20  # Idle connections kept warm per client
+    AI_CLIENT_HTTP2: bool = True  # Used when the h2 package is installed
+
+    # AI Response Cache (deterministic prompts answered from cache; memory LRU + database tier)
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_TTL_SECONDS: int = 86400  # Default lifetime of a cached response
+    AI_CACHE_MAX_ENTRIES: int = 512  # Responses kept in memory
+    AI_CACHE_PERSISTENT: bool = True  # Also keep responses in the ai_response_cache table
+    AI_CACHE_MAX_DB_MB: int = 256  # Hard cap on the table; least recently used rows are dropped
+    AI_CACHE_MAX_TEMPERATURE: float = 0.0  # Calls sampling above this temperature are never cached
+
+    # AI Provider Rate Limits (shared by all AI calls in a process; JSON object in the environment)
+    # Requests and tokens per minute by "provider" or "provider:model". Limits reported in
+    # response headers replace these; a provider or value not listed is unlimited until then.
+    AI_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+        "openai": {"rpm": 500, "tpm": 30000},
+        "claude": {"rpm": 50, "tpm": 40000},
+        "gemini": {"rpm": 10, "tpm": 250000},
+    }
+    AI_RATE_LIMIT_MAX_WAIT_SECONDS: int = 120  # A call waits this long for capacity, then goes ahead
+    AI_RATE_LIMIT_RETRY_SECONDS: float = 2.0  # First back-off after a 429 without Retry-After; doubles per retry
+    AI_RATE_LIMIT_OUTPUT_TOKENS: int = 500  # Output tokens charged up front when a call sets no max_tokens
+
+    # AI Provider Resilience (retries, a circuit breaker per provider, optional failover)
+    AI_RETRY_MAX_ATTEMPTS: int = 3  # Attempts per call on timeouts, connection errors and 5xx (SDKs may retry within each)
+    AI_RETRY_BASE_SECONDS: float = 0.5  # Backoff before retry n is random up to base * 2^n
+    AI_RETRY_MAX_SECONDS: float = 10.0
+    AI_BREAKER_FAILURE_THRESHOLD: int = 5  # Failed calls in a row that open a provider's circuit
+    AI_BREAKER_RECOVERY_SECONDS: float = 30.0  # An open circuit lets one trial call through after this
+    # Secondary provider per provider (JSON object), used when a call fails on the provider's side or
+    # its circuit is open, e.g. {"openai": {"provider": "claude", "model": "claude-3-5-haiku-20241022", "api_key": "..."}}
+    AI_FAILOVER: Dict[str, Dict[str, str]] = {}
+
     # Email Configuration
     SMTP_SERVER: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
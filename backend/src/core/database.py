@@ -1,5 +1,9 @@
 """
-Synchronous Database Configuration for Workflow Services
+Synchronous Database Configuration for Workflow Scripts
+
+The API and the workflow execution engine use the async session from
+``src.models.database``; this module is kept for standalone scripts such as
+``init_workflow_db.py`` and ``create_sample_data.py``.
 """
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, JSON, Integer, Index
+from sqlalchemy.sql import func
+from .database import Base
+
+
+class AIResponseCache(Base):
+    """Persistent tier of the AI prompt/response cache"""
+    __tablename__ = "ai_response_cache"
+    
+    key = Column(String(64), primary_key=True)  # sha256 of provider, model, normalized prompt and sampling settings
+    provider = Column(String(50), nullable=False)
+    model = Column(String(255))
+    response = Column(JSON, nullable=False)  # generate_content result
+    size_bytes = Column(Integer, default=0)  # Serialized response size, counted against the size cap
+    hits = Column(Integer, default=0)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    last_used_at = Column(DateTime(timezone=True))  # Eviction drops least recently used rows first
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_ai_response_cache_last_used_at", "last_used_at"),
+        Index("ix_ai_response_cache_expires_at", "expires_at"),
+    )
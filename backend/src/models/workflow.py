@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, Integer, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -12,6 +12,7 @@ class WorkflowTemplate(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text)
     template_data = Column(JSON, nullable=False)  # Node and edge configuration
+    graph_analysis = Column(JSON)  # Validation result and run order from the last save
     category = Column(String(100))
     is_public = Column(Boolean, default=False)
     created_by = Column(String, nullable=True)  # User ID who created this template
@@ -30,12 +31,15 @@ class WorkflowInstance(Base):
     name = Column(String(255), nullable=False)
     template_id = Column(String, ForeignKey("workflow_templates.id"), nullable=True)
     workflow_data = Column(JSON, nullable=False)  # Current node and edge configuration
-    status = Column(String(50), default="draft")  # draft, running, completed, failed, paused
+    status = Column(String(50), default="draft")  # draft, queued, running, completed, failed, paused, cancelled
     input_data = Column(JSON)  # Input parameters for the workflow
     output_data = Column(JSON)  # Final results
     error_message = Column(Text)
     execution_logs = Column(JSON)  # Array of execution step logs
+    trace_data = Column(JSON)  # Tracing spans of the last run
     created_by = Column(String, nullable=True)  # User ID who created this instance
+    priority = Column(Integer, default=0)  # Higher runs first among the same user's queued runs
+    batch_id = Column(String, ForeignKey("workflow_batches.id"), nullable=True, index=True)  # Bulk run this belongs to
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     started_at = Column(DateTime(timezone=True))
@@ -46,6 +50,26 @@ class WorkflowInstance(Base):
     execution_steps = relationship("WorkflowExecutionStep", back_populates="workflow_instance")
 
 
+class WorkflowBatch(Base):
+    """One workflow executed over many inputs (POST /templates/{id}/bulk-execute)"""
+    __tablename__ = "workflow_batches"
+    
+    id = Column(String, primary_key=True)
+    template_id = Column(String, ForeignKey("workflow_templates.id"), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    status = Column(String(50), default="pending")  # pending, running, completed, failed, cancelled
+    total_runs = Column(Integer, default=0)
+    parallelism = Column(Integer)  # Runs of the batch executing at once
+    priority = Column(Integer, default=0)  # Copied to every instance
+    created_by = Column(String, nullable=True)
+    error_message = Column(Text)
+    driver_id = Column(String, nullable=True)  # Process driving the batch's runs
+    driver_expires_at = Column(DateTime(timezone=True))  # Another process takes over after this
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
+
+
 class WorkflowExecutionStep(Base):
     """Individual step execution within a workflow"""
     __tablename__ = "workflow_execution_steps"
@@ -60,6 +84,7 @@ class WorkflowExecutionStep(Base):
     output_data = Column(JSON)
     error_message = Column(Text)
     execution_time_ms = Column(Integer)
+    next_steps = Column(JSON)  # Output handles fired by a completed step, used to resume runs
     retry_count = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     started_at = Column(DateTime(timezone=True))
@@ -69,6 +94,70 @@ class WorkflowExecutionStep(Base):
     workflow_instance = relationship("WorkflowInstance", back_populates="execution_steps")
 
 
+class WorkflowJob(Base):
+    """Queued workflow execution, claimed by worker processes"""
+    __tablename__ = "workflow_jobs"
+    
+    id = Column(String, primary_key=True)
+    workflow_instance_id = Column(String, ForeignKey("workflow_instances.id"), nullable=False, index=True)
+    status = Column(String(50), default="queued")  # queued, running, completed, failed, cancelled
+    input_data = Column(JSON)
+    resume = Column(Boolean, default=False)  # Continue the instance's previous run from its checkpoints
+    tenant_id = Column(String(255))  # User the run is scheduled for (instance created_by)
+    priority = Column(Integer, default=0)  # Copied from the instance
+    attempts = Column(Integer, default=0)  # Times the job has been claimed
+    max_attempts = Column(Integer, default=3)
+    worker_id = Column(String(255))  # Worker holding the lease
+    lease_expires_at = Column(DateTime(timezone=True))  # Job is reclaimable after this
+    heartbeat_at = Column(DateTime(timezone=True))
+    error_message = Column(Text)
+    created_at = Column(DateTime(timezone=True))
+    started_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
+    wait_ms = Column(Integer)  # Time from enqueue to first claim
+    
+    __table_args__ = (
+        # Claim query: oldest queued job, or running job with an expired lease
+        Index("ix_workflow_jobs_status_created_at", "status", "created_at"),
+        # Fair-share claim: head of each tenant's queue
+        Index("ix_workflow_jobs_status_tenant_id", "status", "tenant_id"),
+    )
+
+
+class WorkflowSchedule(Base):
+    """Timed runs of a template, one per schedule_trigger node"""
+    __tablename__ = "workflow_schedules"
+    
+    id = Column(String, primary_key=True)  # "<template_id>:<node_id>"
+    template_id = Column(String, ForeignKey("workflow_templates.id"), nullable=False, index=True)
+    node_id = Column(String(100), nullable=False)  # schedule_trigger node in the template
+    cron_expression = Column(String(255))  # Either a cron expression...
+    interval_seconds = Column(Integer)  # ...or a fixed interval
+    timezone = Column(String(64), default="UTC")  # Wall clock the cron expression is read in
+    enabled = Column(Boolean, default=True)
+    input_data = Column(JSON)  # Input for each scheduled run
+    created_by = Column(String, nullable=True)  # Scheduled runs are created for this user
+    next_run_at = Column(DateTime(timezone=True))  # UTC
+    last_run_at = Column(DateTime(timezone=True))  # Scheduled time of the last run fired
+    last_instance_id = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        # Scheduler start-up and reload: enabled schedules by due time
+        Index("ix_workflow_schedules_enabled_next_run_at", "enabled", "next_run_at"),
+    )
+
+
+class WorkflowSchedulerLease(Base):
+    """Lease held by the one process that fires schedules"""
+    __tablename__ = "workflow_scheduler_leases"
+    
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255))  # Scheduler id of the leader
+    expires_at = Column(DateTime(timezone=True))  # Another process may take over after this
+
+
 class WorkflowTaskLog(Base):
     """Logs for the Google Sheets automation tasks"""
     __tablename__ = "workflow_task_logs"
@@ -1,7 +1,7 @@
 """
 Schemas for Workflow Components
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, SkipValidation
 from typing import Dict, Any, List, Optional
 from enum import Enum
 
@@ -62,7 +62,8 @@ class ExecutionContext(BaseModel):
     instance_id: str
     step_id: str
     input_data: Dict[str, Any]
-    previous_outputs: Dict[str, Any]
+    # Not validated: the engine passes a read-only, lazily loaded view
+    previous_outputs: SkipValidation[Dict[str, Any]]
     global_variables: Dict[str, Any]
 
 
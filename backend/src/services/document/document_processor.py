@@ -51,6 +51,8 @@ ADVANCED_TEXT_AVAILABLE = False  # Disabled textract to avoid installation issue
 
 
 from ..workflow.ai_providers import AIProviderFactory
+from ..workflow.rate_limiter import ATTACHMENT_TOKENS, ai_rate_limits, estimate_tokens
+from ...core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -112,6 +114,20 @@ class DocumentProcessor:
         
         return text
     
+    async def _run_gemini(self, generate, prompt: str, attachments: int = 0, model: str = "gemini-2.5-flash"):
+        """Run a blocking Gemini call in a thread, within the shared Gemini rate limits
+        
+        OpenAI and Claude calls are limited by the pooled clients' transport;
+        the Gemini SDK has its own HTTP stack, so its calls are limited here.
+        """
+        loop = asyncio.get_event_loop()
+        estimated_tokens = (
+            estimate_tokens(prompt) + ATTACHMENT_TOKENS * attachments + settings.AI_RATE_LIMIT_OUTPUT_TOKENS
+        )
+        return await ai_rate_limits.call(
+            "gemini", model, estimated_tokens, lambda: loop.run_in_executor(None, generate)
+        )
+    
     async def process_document(
         self, 
         file_path: str, 
@@ -571,8 +587,7 @@ class DocumentProcessor:
     async def _analyze_image_with_openai(self, image_base64: str, api_key: str) -> Dict[str, Any]:
         """Analyze image using OpenAI Vision API"""
         try:
-            import openai
-            client = openai.AsyncOpenAI(api_key=api_key)
+            client = AIProviderFactory.get_provider("openai", api_key=api_key).client
             
             response = await client.chat.completions.create(
                 model="gpt-4o",
@@ -632,8 +647,7 @@ class DocumentProcessor:
     async def _analyze_image_with_claude(self, image_base64: str, api_key: str) -> Dict[str, Any]:
         """Analyze image using Claude Vision API"""
         try:
-            import anthropic
-            client = anthropic.AsyncAnthropic(api_key=api_key)
+            client = AIProviderFactory.get_provider("claude", api_key=api_key).client
             
             response = await client.messages.create(
                 model="claude-3-sonnet-20240229",
@@ -695,11 +709,10 @@ class DocumentProcessor:
     async def _analyze_image_with_gemini(self, image_base64: str, api_key: str) -> Dict[str, Any]:
         """Analyze image using official Google AI Client API - following image understanding docs"""
         try:
-            from google import genai
             from google.genai import types
             
-            # Create client with API key
-            client = genai.Client(api_key=api_key)
+            # Pooled client for this API key
+            client = AIProviderFactory.get_provider("gemini", api_key=api_key).client
             
             # Convert base64 to bytes
             image_data = base64.b64decode(image_base64)
@@ -737,7 +750,7 @@ Provide detailed analysis in English."""
                     ]
                 )
             
-            response = await asyncio.get_event_loop().run_in_executor(None, generate_analysis)
+            response = await self._run_gemini(generate_analysis, analysis_prompt, attachments=1)
             content = response.text
             
             # Generate concise summary
@@ -749,7 +762,7 @@ Provide detailed analysis in English."""
                     contents=[summary_prompt]
                 )
             
-            summary_response = await asyncio.get_event_loop().run_in_executor(None, generate_summary)
+            summary_response = await self._run_gemini(generate_summary, summary_prompt)
             
             return {
                 "description": content,
@@ -814,11 +827,10 @@ Provide detailed analysis in English."""
     async def _analyze_video_with_gemini(self, file_path: str, api_key: str) -> Dict[str, Any]:
         """Analyze video using official Google AI video understanding capabilities"""
         try:
-            from google import genai
             from google.genai import types
             
-            # Create client with API key
-            client = genai.Client(api_key=api_key)
+            # Pooled client for this API key
+            client = AIProviderFactory.get_provider("gemini", api_key=api_key).client
             
             # Read video file as bytes
             with open(file_path, 'rb') as f:
@@ -873,7 +885,7 @@ Please provide detailed analysis in English, utilizing your video understanding
                     ]
                 )
             
-            response = await asyncio.get_event_loop().run_in_executor(None, generate_analysis)
+            response = await self._run_gemini(generate_analysis, analysis_prompt, attachments=1)
             content = response.text
             
             # Generate summary
@@ -885,7 +897,7 @@ Please provide detailed analysis in English, utilizing your video understanding
                     contents=[summary_prompt]
                 )
             
-            summary_response = await asyncio.get_event_loop().run_in_executor(None, generate_summary)
+            summary_response = await self._run_gemini(generate_summary, summary_prompt)
             
             return {
                 "extracted_text": self._clean_text_for_db(content),
@@ -916,11 +928,10 @@ Please provide detailed analysis in English, utilizing your video understanding
     async def _analyze_audio_with_gemini(self, file_path: str, api_key: str) -> Dict[str, Any]:
         """Analyze audio using official Google AI audio understanding capabilities"""
         try:
-            from google import genai
             from google.genai import types
             
-            # Create client with API key
-            client = genai.Client(api_key=api_key)
+            # Pooled client for this API key
+            client = AIProviderFactory.get_provider("gemini", api_key=api_key).client
             
             # Read audio file as bytes
             with open(file_path, 'rb') as f:
@@ -977,7 +988,7 @@ Please provide detailed analysis in English, including full transcription of any
                     ]
                 )
             
-            response = await asyncio.get_event_loop().run_in_executor(None, generate_analysis)
+            response = await self._run_gemini(generate_analysis, analysis_prompt, attachments=1)
             content = response.text
             
             # Generate summary
@@ -989,7 +1000,7 @@ Please provide detailed analysis in English, including full transcription of any
                     contents=[summary_prompt]
                 )
             
-            summary_response = await asyncio.get_event_loop().run_in_executor(None, generate_summary)
+            summary_response = await self._run_gemini(generate_summary, summary_prompt)
             
             return {
                 "extracted_text": self._clean_text_for_db(content),
@@ -1111,8 +1122,7 @@ Please provide detailed analysis in English, including full transcription of any
     async def _analyze_text_with_openai(self, text: str, api_key: str) -> Dict[str, Any]:
         """Analyze text using OpenAI"""
         try:
-            import openai
-            client = openai.AsyncOpenAI(api_key=api_key)
+            client = AIProviderFactory.get_provider("openai", api_key=api_key).client
             
             # Analysis
             analysis_response = await client.chat.completions.create(
@@ -1149,8 +1159,7 @@ Please provide detailed analysis in English, including full transcription of any
     async def _analyze_text_with_claude(self, text: str, api_key: str) -> Dict[str, Any]:
         """Analyze text using Claude"""
         try:
-            import anthropic
-            client = anthropic.AsyncAnthropic(api_key=api_key)
+            client = AIProviderFactory.get_provider("claude", api_key=api_key).client
             
             # Analysis
             analysis_response = await client.messages.create(
@@ -1187,11 +1196,10 @@ Please provide detailed analysis in English, including full transcription of any
     async def _analyze_text_with_gemini(self, text: str, api_key: str) -> Dict[str, Any]:
         """Analyze text using new Google Gemini Client API"""
         try:
-            from google import genai
             from google.genai import types
             
-            # Create client with API key
-            client = genai.Client(api_key=api_key)
+            # Pooled client for this API key
+            client = AIProviderFactory.get_provider("gemini", api_key=api_key).client
             
             # Analysis prompt in English
             analysis_prompt = f"""Analyze the following document and provide detailed information about:
@@ -1212,7 +1220,7 @@ Please respond in English."""
                     contents=[analysis_prompt]
                 )
             
-            analysis_response = await asyncio.get_event_loop().run_in_executor(None, generate_analysis)
+            analysis_response = await self._run_gemini(generate_analysis, analysis_prompt)
             
             # Summary
             summary_prompt = f"Summarize the main content of the document in English (max 200 words):\n\n{text[:2000]}"
@@ -1223,7 +1231,7 @@ Please respond in English."""
                     contents=[summary_prompt]
                 )
             
-            summary_response = await asyncio.get_event_loop().run_in_executor(None, generate_summary)
+            summary_response = await self._run_gemini(generate_summary, summary_prompt)
             
             return {
                 "analysis": analysis_response.text,
@@ -1236,11 +1244,10 @@ Please respond in English."""
     async def _process_pdf_with_gemini(self, file_path: str, ai_provider: str, api_key: str) -> Dict[str, Any]:
         """Process PDF using official Google AI document processing API"""
         try:
-            from google import genai
             from google.genai import types
             
-            # Create client with API key
-            client = genai.Client(api_key=api_key)
+            # Pooled client for this API key
+            client = AIProviderFactory.get_provider("gemini", api_key=api_key).client
             
             # Read PDF file as bytes
             with open(file_path, 'rb') as f:
@@ -1276,7 +1283,7 @@ Please provide a thorough analysis in Vietnamese, utilizing your natural vision
                     ]
                 )
             
-            response = await asyncio.get_event_loop().run_in_executor(None, generate_analysis)
+            response = await self._run_gemini(generate_analysis, analysis_prompt, attachments=1)
             content = response.text
             
             # Generate executive summary
@@ -1288,7 +1295,7 @@ Please provide a thorough analysis in Vietnamese, utilizing your natural vision
                     contents=[summary_prompt]
                 )
             
-            summary_response = await asyncio.get_event_loop().run_in_executor(None, generate_summary)
+            summary_response = await self._run_gemini(generate_summary, summary_prompt)
             
             return {
                 "extracted_text": self._clean_text_for_db(content),
@@ -0,0 +1,148 @@
+"""
+Adaptive Concurrency for Per-Record Provider Calls
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+from ...core.config import settings
+
+# Calls faster than this never count as slow, however small the baseline
+MIN_SLOW_SECONDS = 0.1
+
+# How quickly the latency baseline drifts up towards slower samples
+BASELINE_DRIFT = 0.05
+
+# Error text providers use when throttling
+RATE_LIMIT_MARKERS = ("429", "rate limit", "rate_limit", "ratelimit", "too many requests", "resource_exhausted", "quota")
+
+
+def looks_rate_limited(error: Optional[str]) -> bool:
+    """Whether an error message reports throttling by the provider"""
+    if not error:
+        return False
+    error = str(error).lower()
+    return any(marker in error for marker in RATE_LIMIT_MARKERS)
+
+
+class LimiterCall:
+    """One call holding a limiter slot; set ``throttled`` if the provider pushed back"""
+
+    __slots__ = ("throttled",)
+
+    def __init__(self):
+        self.throttled = False
+
+
+class AIMDLimiter:
+    """Concurrency limit tuned by additive increase / multiplicative decrease
+
+    Every call that completes normally raises the limit by ``1 / limit``,
+    i.e. by one per window of ``limit`` calls. A throttled call, or one
+    slower than ``latency_tolerance`` times the best recent latency,
+    multiplies the limit by ``backoff``. Calls already in flight when the
+    limit was cut report the same congestion, so they do not cut it again.
+    """
+
+    def __init__(
+        self,
+        initial: Optional[int] = None,
+        max_limit: Optional[int] = None,
+        min_limit: int = 1,
+        backoff: float = 0.5,
+        latency_tolerance: Optional[float] = None
+    ):
+        self.max_limit = max(int(max_limit or settings.WORKFLOW_AI_CONCURRENCY_MAX), 1)
+        self.min_limit = max(min(int(min_limit), self.max_limit), 1)
+        start = int(initial or settings.WORKFLOW_AI_CONCURRENCY_START)
+        self.limit = float(min(max(start, self.min_limit), self.max_limit))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance or settings.WORKFLOW_AI_LATENCY_TOLERANCE
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+        self.decreases = 0
+        self._baseline: Optional[float] = None
+        self._generation = 0  # Bumped by every decrease
+        self._condition = asyncio.Condition()
+
+    @property
+    def current_limit(self) -> int:
+        return max(int(self.limit), self.min_limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a free slot and hold it for one call"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.current_limit)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        generation = self._generation
+        call = LimiterCall()
+        started = time.monotonic()
+        try:
+            yield call
+        finally:
+            latency = time.monotonic() - started
+            async with self._condition:
+                self.in_flight -= 1
+                self.calls += 1
+                self._record(latency, call.throttled, generation)
+                self._condition.notify_all()
+
+    def _record(self, latency: float, throttled: bool, generation: int):
+        if throttled:
+            self.throttled += 1
+            self._decrease(generation)
+            return
+
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline += (latency - self._baseline) * BASELINE_DRIFT
+
+        if latency > max(self._baseline * self.latency_tolerance, MIN_SLOW_SECONDS):
+            self._decrease(generation)
+        else:
+            self.limit = min(self.limit + 1 / self.limit, float(self.max_limit))
+
+    def _decrease(self, generation: int):
+        if generation != self._generation:
+            return
+        self.limit = max(self.limit * self.backoff, float(self.min_limit))
+        self._generation += 1
+        self.decreases += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "limit": self.current_limit,
+            "max_limit": self.max_limit,
+            "peak_in_flight": self.peak_in_flight,
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "decreases": self.decreases
+        }
+
+
+async def map_ordered(
+    items: Sequence[Any],
+    func: Callable[[Any, LimiterCall], Awaitable[Any]],
+    limiter: AIMDLimiter
+) -> List[Any]:
+    """Run ``func(item, call)`` for every item under ``limiter``; results keep the input order
+
+    At most ``limiter.max_limit`` workers pull items from a shared iterator,
+    so waiting items cost nothing until a slot frees up.
+    """
+    results: List[Any] = [None] * len(items)
+    pending = iter(enumerate(items))
+
+    async def worker():
+        for index, item in pending:
+            async with limiter.slot() as call:
+                results[index] = await func(item, call)
+
+    await asyncio.gather(*(worker() for _ in range(min(limiter.max_limit, len(items)))))
+    return results
@@ -7,6 +7,7 @@ import io
 from typing import Dict, Any, List, Optional, Union
 from abc import ABC, abstractmethod
 
+import httpx
 import openai
 import anthropic
 import ollama
@@ -14,6 +15,19 @@ from google import genai
 from google.genai import types
 from PIL import Image
 import requests
+
+from ...core.config import settings
+from .prompt_cache import CachedAIProvider
+from .provider_pool import close_client, provider_client_pool
+from .rate_limiter import RateLimitedTransport, ai_rate_limits, estimate_tokens
+from .resilience import ResilientAIProvider
+
+# HTTP/2 for pooled clients is optional
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 # Note: moviepy import is commented out as it's not currently used in the implementation
 # from moviepy.editor import AudioFileClip
 
@@ -24,6 +38,11 @@ class BaseAIProvider(ABC):
     def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         self.api_key = api_key
         self.base_url = base_url
+        self.client = None
+    
+    async def aclose(self):
+        """Close the SDK client and its connection pool"""
+        await close_client(self.client)
     
     @abstractmethod
     async def generate_content(
@@ -52,9 +71,9 @@ class BaseAIProvider(ABC):
 class OpenAIProvider(BaseAIProvider):
     """OpenAI provider for content generation"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http_client: Optional[httpx.AsyncClient] = None):
         super().__init__(api_key)
-        self.client = openai.AsyncOpenAI(api_key=api_key)
+        self.client = openai.AsyncOpenAI(api_key=api_key, http_client=http_client)
     
     async def generate_content(
         self, 
@@ -210,9 +229,9 @@ class OpenAIProvider(BaseAIProvider):
 class ClaudeProvider(BaseAIProvider):
     """Anthropic Claude provider"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http_client: Optional[httpx.AsyncClient] = None):
         super().__init__(api_key)
-        self.client = anthropic.AsyncAnthropic(api_key=api_key)
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, http_client=http_client)
     
     async def generate_content(
         self, 
@@ -370,6 +389,15 @@ class GeminiProvider(BaseAIProvider):
                 }
             }
     
+    async def _generate(self, model_name: str, contents: Any, config: Optional[types.GenerateContentConfig] = None):
+        """Call the model within the shared Gemini rate limits"""
+        async def request():
+            # The async client; the sync one would block the event loop for the whole call
+            return await self.client.aio.models.generate_content(model=model_name, contents=contents, config=config)
+        
+        output_tokens = getattr(config, "max_output_tokens", None) or settings.AI_RATE_LIMIT_OUTPUT_TOKENS
+        return await ai_rate_limits.call("gemini", model_name, estimate_tokens(contents) + output_tokens, request)
+    
     async def _generate_image_description(self, prompt: str, model_name: str, **kwargs) -> Dict[str, Any]:
         """Generate detailed image description for image generation tools"""
         enhanced_prompt = f"Create a detailed, vivid image description for: {prompt}. Include specific details about composition, style, colors, lighting, and visual elements."
@@ -380,11 +408,7 @@ class GeminiProvider(BaseAIProvider):
             thinking_config=types.ThinkingConfig(thinking_budget=0)  # Disable thinking for speed
         )
         
-        response = self.client.models.generate_content(
-            model=model_name,
-            contents=enhanced_prompt,
-            config=config
-        )
+        response = await self._generate(model_name, enhanced_prompt, config)
         
         return {
             "success": True,
@@ -408,11 +432,7 @@ class GeminiProvider(BaseAIProvider):
             thinking_config=types.ThinkingConfig(thinking_budget=0)
         )
         
-        response = self.client.models.generate_content(
-            model=model_name,
-            contents=enhanced_prompt,
-            config=config
-        )
+        response = await self._generate(model_name, enhanced_prompt, config)
         
         return {
             "success": True,
@@ -434,11 +454,7 @@ class GeminiProvider(BaseAIProvider):
             thinking_config=types.ThinkingConfig(thinking_budget=0)
         )
         
-        response = self.client.models.generate_content(
-            model=model_name,
-            contents=prompt,
-            config=config
-        )
+        response = await self._generate(model_name, prompt, config)
         
         return {
             "success": True,
@@ -478,11 +494,7 @@ class GeminiProvider(BaseAIProvider):
                 thinking_config=types.ThinkingConfig(thinking_budget=0)
             )
             
-            response = self.client.models.generate_content(
-                model=model_name,
-                contents=full_prompt,
-                config=config
-            )
+            response = await self._generate(model_name, full_prompt, config)
             
             generated_content = response.text
             
@@ -517,9 +529,10 @@ class GeminiProvider(BaseAIProvider):
 class OllamaProvider(BaseAIProvider):
     """Ollama provider for local AI models"""
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = "http://localhost:11434", **client_options):
         super().__init__(base_url=base_url)
-        self.client = ollama.AsyncClient(host=base_url)
+        # Extra options (http2, limits) go to the underlying httpx client
+        self.client = ollama.AsyncClient(host=base_url, **client_options)
     
     async def generate_content(
         self, 
@@ -601,6 +614,22 @@ class OllamaProvider(BaseAIProvider):
             }
 
 
+def _pooled_http_options(provider: str) -> Dict[str, Any]:
+    """Connection settings for clients that live in the provider pool
+    
+    Their requests go through the shared rate limits of ``provider``.
+    """
+    transport = httpx.AsyncHTTPTransport(
+        http2=HTTP2_AVAILABLE and settings.AI_CLIENT_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.AI_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_CLIENT_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.AI_CLIENT_IDLE_SECONDS
+        )
+    )
+    return {"transport": RateLimitedTransport(provider, transport)}
+
+
 class AIProviderFactory:
     """Factory for creating AI providers"""
     
@@ -608,12 +637,59 @@ class AIProviderFactory:
     def create_provider(provider_type: str, **kwargs) -> BaseAIProvider:
         """Create an AI provider instance"""
         if provider_type.lower() == "openai":
-            return OpenAIProvider(kwargs.get("api_key"))
+            return OpenAIProvider(kwargs.get("api_key"), http_client=kwargs.get("http_client"))
         elif provider_type.lower() == "claude":
-            return ClaudeProvider(kwargs.get("api_key"))
+            return ClaudeProvider(kwargs.get("api_key"), http_client=kwargs.get("http_client"))
         elif provider_type.lower() == "gemini":
             return GeminiProvider(kwargs.get("api_key"))
         elif provider_type.lower() == "ollama":
-            return OllamaProvider(kwargs.get("base_url", "http://localhost:11434"))
+            return OllamaProvider(kwargs.get("base_url", "http://localhost:11434"), **kwargs.get("client_options", {}))
         else:
             raise ValueError(f"Unsupported provider type: {provider_type}")
+    
+    @staticmethod
+    def get_provider(provider_type: str, api_key: Optional[str] = None, base_url: Optional[str] = None) -> BaseAIProvider:
+        """Get the shared provider for these credentials, creating it on first use
+        
+        Pooled providers keep their HTTP connections warm between calls and
+        are closed by the pool; do not close them yourself. Their calls are
+        retried on transient failures, fail fast while the provider's
+        circuit is open and fail over as configured in AI_FAILOVER. With
+        AI_CACHE_ENABLED, deterministic ``generate_content`` calls are
+        answered from the prompt/response cache.
+        """
+        provider = provider_type.lower()
+        
+        def build() -> BaseAIProvider:
+            instance = ResilientAIProvider(provider, create(), failover=lambda: AIProviderFactory._failover(provider))
+            if settings.AI_CACHE_ENABLED:
+                return CachedAIProvider(provider, instance)
+            return instance
+        
+        def create() -> BaseAIProvider:
+            if provider == "openai":
+                http_client = openai.DefaultAsyncHttpxClient(**_pooled_http_options(provider))
+                return AIProviderFactory.create_provider(provider, api_key=api_key, http_client=http_client)
+            if provider == "claude":
+                http_client = anthropic.DefaultAsyncHttpxClient(**_pooled_http_options(provider))
+                return AIProviderFactory.create_provider(provider, api_key=api_key, http_client=http_client)
+            if provider == "ollama":
+                return AIProviderFactory.create_provider(
+                    provider, base_url=base_url or "http://localhost:11434", client_options=_pooled_http_options(provider)
+                )
+            return AIProviderFactory.create_provider(provider, api_key=api_key)
+        
+        return provider_client_pool.get(provider, build, api_key=api_key, base_url=base_url)
+    
+    @staticmethod
+    def _failover(provider: str):
+        """Secondary (name, provider, model) configured in AI_FAILOVER for ``provider``, if any"""
+        config = settings.AI_FAILOVER.get(provider) or {}
+        secondary = (config.get("provider") or "").lower()
+        if not secondary or secondary == provider:
+            return None
+        return (
+            secondary,
+            AIProviderFactory.get_provider(secondary, api_key=config.get("api_key"), base_url=config.get("base_url")),
+            config.get("model")
+        )
@@ -0,0 +1,206 @@
+"""
+Out-of-Band Store for Large Workflow Node Outputs
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional
+
+from ...core.config import settings
+
+# Key marking a value that was moved to the blob store
+BLOB_REF_KEY = "$blob"
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Whether a value is a reference produced by ``BlobStore.spill``"""
+    return isinstance(value, dict) and BLOB_REF_KEY in value and len(value) <= 3
+
+
+class BlobStore:
+    """Content-addressed, gzip-compressed blobs on local disk
+
+    ``spill`` replaces each large top-level value of a node's output with a
+    small reference (``{"$blob": <sha256>, "size": <bytes>, "items": <len>}``).
+    The references are what the engine keeps in memory, journals to
+    ``WorkflowExecutionStep.output_data`` and hands to downstream nodes, which
+    resolve them only when they read the key (see ``NodeOutput``). Identical
+    values are stored once.
+    """
+
+    def __init__(
+        self,
+        root_dir: Optional[str] = None,
+        spill_threshold_bytes: Optional[int] = None,
+        compression_level: int = 6
+    ):
+        root_dir = settings.WORKFLOW_BLOB_DIR if root_dir is None else root_dir
+        self.root_dir = Path(root_dir) if root_dir else None
+        self.spill_threshold_bytes = spill_threshold_bytes or settings.WORKFLOW_BLOB_SPILL_BYTES
+        self.compression_level = compression_level
+        self._write_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.root_dir is not None
+
+    def _path(self, blob_id: str) -> Path:
+        if len(blob_id) != 64 or any(c not in "0123456789abcdef" for c in blob_id):
+            raise ValueError(f"Invalid blob id: {blob_id}")
+        return self.root_dir / blob_id[:2] / f"{blob_id}.json.gz"
+
+    def put(self, value: Any, encoded: Optional[bytes] = None) -> Dict[str, Any]:
+        """Store a JSON-serializable value and return its reference (blocking)"""
+        if encoded is None:
+            encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        blob_id = hashlib.sha256(encoded).hexdigest()
+        path = self._path(blob_id)
+
+        if path.exists():
+            # Already stored; refresh the mtime so pruning keeps it
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(encoded, compresslevel=self.compression_level))
+            with self._write_lock:
+                os.replace(tmp_path, path)
+
+        ref = {BLOB_REF_KEY: blob_id, "size": len(encoded)}
+        if isinstance(value, (list, dict)):
+            ref["items"] = len(value)
+        return ref
+
+    def get(self, ref: Dict[str, Any]) -> Any:
+        """Load the value behind a reference (blocking)"""
+        path = self._path(ref[BLOB_REF_KEY])
+        try:
+            with open(path, "rb") as f:
+                return json.loads(gzip.decompress(f.read()).decode("utf-8"))
+        except FileNotFoundError:
+            raise KeyError(f"Blob {ref[BLOB_REF_KEY]} not found; it may have been pruned")
+
+    def resolve(self, value: Any) -> Any:
+        """Return ``value`` itself, or the stored value if it is a reference"""
+        return self.get(value) if is_blob_ref(value) else value
+
+    def spill_sync(self, output_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace large top-level values with references"""
+        if not self.enabled or not isinstance(output_data, dict):
+            return output_data
+
+        spilled = {}
+        for key, value in output_data.items():
+            if isinstance(value, (list, dict, str)) and not is_blob_ref(value):
+                encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+                if len(encoded) > self.spill_threshold_bytes:
+                    value = self.put(value, encoded)
+            spilled[key] = value
+        return spilled
+
+    async def spill(self, output_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace large top-level values with references, off the event loop"""
+        if not self.enabled or not isinstance(output_data, dict):
+            return output_data
+        try:
+            return await asyncio.to_thread(self.spill_sync, output_data)
+        except (OSError, TypeError, ValueError) as e:
+            # Keep the output in memory rather than failing the step
+            print(f"Error spilling node output to blob store: {e}")
+            return output_data
+
+    async def resolve_all(self, output_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of a node output with every reference loaded"""
+        if not isinstance(output_data, dict):
+            return output_data
+        return await asyncio.to_thread(
+            lambda: {key: self.resolve(value) for key, value in output_data.items()}
+        )
+
+    def resolve_nested_sync(self, value: Any, max_bytes: Optional[int] = None) -> Any:
+        """Return ``value`` with references at any depth loaded (blocking)
+
+        References to values larger than ``max_bytes``, or to pruned blobs,
+        are left in place for the client to fetch or report.
+        """
+        if is_blob_ref(value):
+            if max_bytes is not None and (value.get("size") or 0) > max_bytes:
+                return value
+            try:
+                return self.get(value)
+            except KeyError:
+                return value
+        if isinstance(value, dict):
+            return {key: self.resolve_nested_sync(item, max_bytes) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve_nested_sync(item, max_bytes) for item in value]
+        return value
+
+    async def resolve_nested(self, value: Any, max_bytes: Optional[int] = None) -> Any:
+        """Return ``value`` with references at any depth loaded, off the event loop"""
+        if not isinstance(value, (dict, list)):
+            return value
+        return await asyncio.to_thread(self.resolve_nested_sync, value, max_bytes)
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete blobs not written or re-referenced within ``max_age_seconds`` (blocking)"""
+        if not self.enabled or not self.root_dir.exists():
+            return 0
+
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for path in self.root_dir.glob("*/*.json.gz"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+class NodeOutput(dict):
+    """A node's output whose blob references load on first access
+
+    Subclasses dict so components' ``isinstance(output, dict)`` checks,
+    ``in`` tests and ``.get`` keep working. Each key is loaded at most once
+    per instance; the engine builds a fresh instance per step so loaded
+    values are released once the step finishes.
+    """
+
+    def __init__(self, output_data: Dict[str, Any], store: Optional[BlobStore] = None):
+        super().__init__(output_data)
+        self._store = store or blob_store
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if is_blob_ref(value):
+            value = self._store.get(value)
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __iter__(self) -> Iterator:
+        # Overridden so {**output} and dict(output) go through __getitem__
+        return super().__iter__()
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+
+# Global blob store instance
+blob_store = BlobStore()
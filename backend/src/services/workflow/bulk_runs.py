@@ -0,0 +1,423 @@
+"""
+Bulk Runs of One Workflow Over Many Inputs
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Any, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import func, insert, or_, select, update
+
+from ...core.config import settings
+from ...models.database import AsyncSessionLocal
+from ...models.workflow import WorkflowBatch, WorkflowInstance, WorkflowTemplate
+from .execution_engine import WorkflowExecutionEngine
+from .execution_plan import ExecutionPlan
+from .job_queue import WorkflowJobQueue
+from .leases import holder_id, renew_interval, utcnow
+
+# Instance statuses that end a run
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+# Batch statuses that still have runs to drive
+UNFINISHED_BATCH_STATUSES = ("pending", "running")
+
+
+def _parse_line(line: bytes, line_number: int) -> Dict[str, Any]:
+    try:
+        value = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Line {line_number} is not valid JSON: {e}")
+    if not isinstance(value, dict):
+        raise ValueError(f"Line {line_number} is not a JSON object")
+    return value
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """Parse an NDJSON byte stream into objects as its lines arrive"""
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _parse_line(line, line_number)
+    if buffer.strip():
+        yield _parse_line(buffer, line_number + 1)
+
+
+async def _aiter(inputs: Union[Iterable[Any], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+    if hasattr(inputs, "__aiter__"):
+        async for item in inputs:
+            yield item
+    else:
+        for item in inputs:
+            yield item
+
+
+class BulkRunner:
+    """Creates bulk-run batches and drives their runs
+
+    A batch's instances are created with multi-row INSERTs, then executed at
+    most ``parallelism`` at a time: inside this process when runs execute
+    inline, or by topping the job queue up as earlier runs finish, so one
+    large batch does not flood the queue ahead of other users' runs.
+
+    The process driving a batch holds a lease on its row and renews it while
+    it works. ``start`` makes this process pick up batches whose driver
+    stopped renewing (a restart or crash) and carry on with their
+    unfinished runs.
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[int] = None,
+        driver_id: Optional[str] = None
+    ):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.poll_interval = poll_interval or settings.WORKFLOW_QUEUE_POLL_INTERVAL
+        self.lease_seconds = lease_seconds or settings.WORKFLOW_BULK_LEASE_SECONDS
+        self.driver_id = driver_id or holder_id()
+        self._driving: Dict[str, asyncio.Task] = {}
+        self._resuming: set = set()
+        self._lost_leases: set = set()
+        self._inline_engines: Dict[str, set] = {}  # batch id -> engines of its in-flight inline runs
+        self._task: Optional[asyncio.Task] = None
+
+    async def create_batch(
+        self,
+        db,
+        template: WorkflowTemplate,
+        inputs: Union[Iterable[Dict[str, Any]], AsyncIterator[Dict[str, Any]]],
+        name: Optional[str] = None,
+        parallelism: Optional[int] = None,
+        priority: int = 0,
+        created_by: Optional[str] = None
+    ) -> WorkflowBatch:
+        """Create a batch with one queued instance per input
+
+        Nothing is committed unless every input is accepted; raises ValueError
+        for a bad input, too many inputs or none.
+        """
+        batch = WorkflowBatch(
+            id=str(uuid.uuid4()),
+            template_id=template.id,
+            name=name or f"{template.name} (bulk)",
+            status="pending",
+            parallelism=max(int(parallelism or settings.WORKFLOW_BULK_PARALLELISM), 1),
+            priority=priority or 0,
+            created_by=created_by
+        )
+        db.add(batch)
+        await db.flush()
+
+        rows: List[Dict[str, Any]] = []
+        total = 0
+        async for input_data in _aiter(inputs):
+            if not isinstance(input_data, dict):
+                raise ValueError(f"Input {total + 1} is not a JSON object")
+            total += 1
+            if total > settings.WORKFLOW_BULK_MAX_INPUTS:
+                raise ValueError(f"A batch takes at most {settings.WORKFLOW_BULK_MAX_INPUTS} inputs")
+            rows.append({
+                # Sortable ids keep the runs in input order
+                "id": f"{batch.id}-{total:06d}",
+                "name": f"{batch.name} #{total}",
+                "template_id": template.id,
+                "workflow_data": template.template_data,
+                "input_data": input_data,
+                "created_by": created_by,
+                "priority": batch.priority,
+                "batch_id": batch.id,
+                "status": "queued"
+            })
+            if len(rows) >= settings.WORKFLOW_BULK_INSERT_SIZE:
+                await db.execute(insert(WorkflowInstance), rows)
+                rows = []
+        if rows:
+            await db.execute(insert(WorkflowInstance), rows)
+        if not total:
+            raise ValueError("No inputs given")
+
+        batch.total_runs = total
+        await db.commit()
+        return batch
+
+    async def run_batch(
+        self,
+        batch_id: str,
+        plan: Optional[ExecutionPlan] = None,
+        job_queue: Optional[WorkflowJobQueue] = None
+    ):
+        """Execute the batch's unfinished runs, ``parallelism`` at a time
+
+        With a ``job_queue`` the runs are handed to the workers; otherwise they
+        execute here, sharing the compiled ``plan``. Returns at once if another
+        process holds the batch's lease.
+        """
+        if not await self._claim(batch_id):
+            return
+        driver = asyncio.create_task(self._drive(batch_id, plan, job_queue))
+        self._driving[batch_id] = driver
+        renewer = asyncio.create_task(self._hold_lease(batch_id, driver))
+        try:
+            await driver
+        except asyncio.CancelledError:
+            if batch_id not in self._lost_leases:
+                raise
+            # Lost the lease; whoever drives the batch now carries on
+        finally:
+            renewer.cancel()
+            self._driving.pop(batch_id, None)
+            self._lost_leases.discard(batch_id)
+
+    async def _drive(self, batch_id: str, plan: Optional[ExecutionPlan], job_queue: Optional[WorkflowJobQueue]):
+        try:
+            async with self.session_factory() as db:
+                batch = await db.get(WorkflowBatch, batch_id)
+                resumed = batch.status == "running"
+                batch.status = "running"
+                batch.started_at = batch.started_at or datetime.now()
+                await db.commit()
+                parallelism = batch.parallelism or settings.WORKFLOW_BULK_PARALLELISM
+                tenant, priority = batch.created_by, batch.priority
+
+                result = await db.execute(
+                    select(WorkflowInstance.id, WorkflowInstance.input_data)
+                    .where(
+                        WorkflowInstance.batch_id == batch_id,
+                        WorkflowInstance.status.notin_(FINISHED_STATUSES)
+                    )
+                    .order_by(WorkflowInstance.id)
+                )
+                pending = [tuple(row) for row in result.all()]
+
+            if job_queue is None:
+                await self._run_inline(batch_id, pending, parallelism, plan)
+            else:
+                active = set()
+                if resumed:
+                    # Runs queued by the previous driver are still on the queue
+                    for instance_id, _ in pending:
+                        if await job_queue.has_active_job(instance_id):
+                            active.add(instance_id)
+                    pending = [run for run in pending if run[0] not in active]
+                await self._run_queued(job_queue, pending, parallelism, tenant, priority, active)
+
+            await self._finish(batch_id, "completed")
+        except Exception as e:
+            print(f"Bulk run {batch_id} stopped: {e}")
+            await self._finish(batch_id, "failed", str(e))
+
+    async def _finish(self, batch_id: str, status: str, error: Optional[str] = None):
+        async with self.session_factory() as db:
+            batch = await db.get(WorkflowBatch, batch_id)
+            if batch:
+                batch.status = status
+                batch.error_message = error
+                batch.completed_at = datetime.now()
+                batch.driver_id = None
+                batch.driver_expires_at = None
+                await db.commit()
+
+    async def _claim(self, batch_id: str) -> bool:
+        """Take or renew the lease on an unfinished batch; True while this process drives it"""
+        now = utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(WorkflowBatch)
+                .where(
+                    WorkflowBatch.id == batch_id,
+                    WorkflowBatch.status.in_(UNFINISHED_BATCH_STATUSES),
+                    or_(
+                        WorkflowBatch.driver_id.is_(None),
+                        WorkflowBatch.driver_id == self.driver_id,
+                        WorkflowBatch.driver_expires_at < now
+                    )
+                )
+                .values(driver_id=self.driver_id, driver_expires_at=now + timedelta(seconds=self.lease_seconds))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            return result.rowcount > 0
+
+    async def _hold_lease(self, batch_id: str, driver: asyncio.Task):
+        while True:
+            await asyncio.sleep(renew_interval(self.lease_seconds))
+            try:
+                held = await self._claim(batch_id)
+            except Exception as e:
+                print(f"Error renewing bulk run {batch_id} lease: {e}")
+                continue
+            if not held:
+                print(f"Bulk run {batch_id} lease lost; another process drives it now")
+                self._lost_leases.add(batch_id)
+                self._abandon_inline_runs(batch_id)
+                driver.cancel()
+                return
+
+    async def resume_batches(self, job_queue: Optional[WorkflowJobQueue] = None) -> List[str]:
+        """Start driving unfinished batches whose driver stopped renewing its lease"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(WorkflowBatch.id).where(
+                    WorkflowBatch.status.in_(UNFINISHED_BATCH_STATUSES),
+                    or_(WorkflowBatch.driver_expires_at.is_(None), WorkflowBatch.driver_expires_at < utcnow())
+                )
+            )
+            batch_ids = [batch_id for batch_id in result.scalars().all() if batch_id not in self._driving]
+
+        for batch_id in batch_ids:
+            # run_batch claims the lease, so a batch another process just took is skipped
+            task = asyncio.create_task(self.run_batch(batch_id, job_queue=job_queue))
+            self._resuming.add(task)
+            task.add_done_callback(self._resuming.discard)
+        return batch_ids
+
+    async def _run(self, job_queue: Optional[WorkflowJobQueue]):
+        while True:
+            try:
+                resumed = await self.resume_batches(job_queue)
+                if resumed:
+                    print(f"Resuming {len(resumed)} unfinished bulk run(s)")
+            except Exception as e:
+                print(f"Error resuming bulk runs: {e}")
+            await asyncio.sleep(self.lease_seconds)
+
+    def start(self, job_queue: Optional[WorkflowJobQueue] = None):
+        """Resume unfinished batches now, and pick up abandoned ones from then on"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(job_queue))
+
+    async def stop(self):
+        """Stop driving batches and hand their leases over"""
+        tasks = [task for task in [self._task, *self._resuming, *self._driving.values()] if task is not None]
+        for batch_id in list(self._inline_engines):
+            self._abandon_inline_runs(batch_id)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        async with self.session_factory() as db:
+            await db.execute(
+                update(WorkflowBatch)
+                .where(WorkflowBatch.driver_id == self.driver_id)
+                .values(driver_expires_at=utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    def _abandon_inline_runs(self, batch_id: str):
+        """Make the batch's in-flight inline runs stop without being marked cancelled
+
+        Called before the driver is cancelled (shutdown or a lost lease), so the
+        runs stay unfinished and whoever drives the batch next runs them again.
+        """
+        for engine in self._inline_engines.get(batch_id, ()):
+            engine.abandoned = True
+
+    async def _run_inline(
+        self,
+        batch_id: str,
+        pending: List[Tuple[str, Any]],
+        parallelism: int,
+        plan: Optional[ExecutionPlan]
+    ):
+        runs = iter(pending)
+        engines = self._inline_engines.setdefault(batch_id, set())
+
+        async def worker():
+            # Workers share one iterator, so at most `parallelism` runs are in flight
+            for instance_id, input_data in runs:
+                async with self.session_factory() as db:
+                    engine = WorkflowExecutionEngine(db)
+                    engines.add(engine)
+                    try:
+                        await engine.execute_workflow(instance_id, input_data or {}, plan=plan)
+                    except asyncio.CancelledError:
+                        if engine.abandoned:
+                            raise
+                        # This run alone was stopped (/stop); the rest of the batch carries on
+                    except Exception as e:
+                        # Failure is already recorded on the instance by the engine
+                        print(f"Bulk run instance {instance_id} failed: {e}")
+                    finally:
+                        engines.discard(engine)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(parallelism, len(pending)))))
+        finally:
+            self._inline_engines.pop(batch_id, None)
+
+    async def _run_queued(
+        self,
+        job_queue: WorkflowJobQueue,
+        pending: List[Tuple[str, Any]],
+        parallelism: int,
+        tenant: Optional[str],
+        priority: int,
+        active: Optional[set] = None
+    ):
+        active = set(active or ())
+        while pending or active:
+            free = parallelism - len(active)
+            if pending and free > 0:
+                wave, pending = pending[:free], pending[free:]
+                await job_queue.enqueue_many([
+                    {"instance_id": instance_id, "input_data": input_data, "tenant": tenant, "priority": priority}
+                    for instance_id, input_data in wave
+                ])
+                active.update(instance_id for instance_id, _ in wave)
+
+            await asyncio.sleep(self.poll_interval)
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    select(WorkflowInstance.id).where(
+                        WorkflowInstance.id.in_(active),
+                        WorkflowInstance.status.in_(FINISHED_STATUSES)
+                    )
+                )
+                active.difference_update(result.scalars().all())
+
+    async def get_progress(self, db, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Aggregate progress of a batch, or None if it does not exist"""
+        batch = await db.get(WorkflowBatch, batch_id)
+        if not batch:
+            return None
+
+        result = await db.execute(
+            select(WorkflowInstance.status, func.count(WorkflowInstance.id))
+            .where(WorkflowInstance.batch_id == batch_id)
+            .group_by(WorkflowInstance.status)
+        )
+        counts = {status: count for status, count in result.all()}
+        finished = sum(counts.get(status, 0) for status in FINISHED_STATUSES)
+        total = batch.total_runs or 0
+
+        return {
+            "batch_id": batch.id,
+            "template_id": batch.template_id,
+            "name": batch.name,
+            "status": batch.status,
+            "total_runs": total,
+            "parallelism": batch.parallelism,
+            "counts": counts,
+            "finished": finished,
+            "succeeded": counts.get("completed", 0),
+            "failed": counts.get("failed", 0),
+            "running": counts.get("running", 0),
+            "progress": round(finished / total, 4) if total else 1.0,
+            "error_message": batch.error_message,
+            "created_at": batch.created_at.isoformat() if batch.created_at else None,
+            "started_at": batch.started_at.isoformat() if batch.started_at else None,
+            "completed_at": batch.completed_at.isoformat() if batch.completed_at else None
+        }
+
+
+# Global bulk runner instance
+bulk_runner = BulkRunner()
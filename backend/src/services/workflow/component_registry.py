@@ -1,13 +1,17 @@
 """
 Workflow Component Registry
 """
-from typing import Dict, List, Type, Tuple, Any
+from typing import Dict, List, Type, Tuple, Any, AsyncIterator, Optional
 from abc import ABC, abstractmethod
 import asyncio
+import re
 import time
 import json
+from collections import deque
 from datetime import datetime
 
+from ...core.config import settings
+
 from ...schemas.workflow_components import (
     WorkflowComponentMetadata, 
     ExecutionContext, 
@@ -36,10 +40,23 @@ except ImportError as e:
     GOOGLE_SHEETS_AVAILABLE = False
     print(f"❌ Google Sheets service import failed: {e}")
 
+from .adaptive_concurrency import AIMDLimiter, looks_rate_limited, map_ordered
+from .cron import CronExpression
+from .output_view import nearest_output
+from .resource_governor import resource_governor
+
 
 class BaseWorkflowComponent(ABC):
     """Base class for all workflow components"""
     
+    # Optional streaming protocol. A component that can hand records on while
+    # it is still producing them sets ``streams_output``; one that can consume
+    # records as they arrive sets ``streams_input``. The engine runs linear
+    # chains of such components as one pipeline (see streaming.py).
+    streams_input = False
+    streams_output = False
+    stream_result: Optional[ExecutionResult] = None
+    
     @classmethod
     @abstractmethod
     def get_metadata(cls) -> WorkflowComponentMetadata:
@@ -51,6 +68,25 @@ class BaseWorkflowComponent(ABC):
         """Execute the component with given context"""
         pass
     
+    async def stream(
+        self,
+        context: ExecutionContext,
+        upstream: Optional[AsyncIterator[List[Dict[str, Any]]]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Process records batch by batch, yielding output batches
+        
+        ``upstream`` yields the previous stage's batches, or is None for the
+        first stage of a chain (which reads its input from the context like
+        ``execute``). Before returning, set ``self.stream_result`` to the
+        summary result recorded for the node.
+        """
+        raise NotImplementedError(f"{self.get_metadata().type} does not support streaming")
+        yield
+    
+    @staticmethod
+    def _stream_batch_size(context: ExecutionContext) -> int:
+        return int(context.input_data.get("stream_batch_size") or settings.WORKFLOW_STREAM_BATCH_SIZE)
+    
     def validate_parameters(self, parameters: Dict) -> List[str]:
         """Validate component parameters, return list of errors"""
         errors = []
@@ -244,7 +280,7 @@ class HttpRequestComponent(BaseWorkflowComponent):
                     
                     try:
                         response_data["json"] = await response.json()
-                    except:
+                    except Exception:
                         pass
                     
                     execution_time = int((time.time() - start_time) * 1000)
@@ -350,9 +386,12 @@ class ComponentRegistry:
         self.register_component(GoogleDriveWriteComponent)
         self.register_component(AIProcessingComponent)
         self.register_component(WebhookComponent)
+        self.register_component(ScheduleTriggerComponent)
         self.register_component(EmailSenderComponent)
         self.register_component(EmailReportComponent)  # Add Email Report Component
         self.register_component(DatabaseWriteComponent)
+        self.register_component(MapComponent)
+        self.register_component(ReduceComponent)
     
     def register_component(self, component_class: Type[BaseWorkflowComponent]):
         """Register a component class"""
@@ -379,6 +418,8 @@ class ComponentRegistry:
 
 
 class GoogleSheetsComponent(BaseWorkflowComponent):
+    streams_output = True
+    
     @classmethod
     def get_metadata(cls) -> WorkflowComponentMetadata:
         return WorkflowComponentMetadata(
@@ -440,15 +481,16 @@ class GoogleSheetsComponent(BaseWorkflowComponent):
                 
                 sheets_service = GoogleSheetsService(credentials_path)
                 
-                if not await sheets_service.authenticate():
-                    raise Exception("Failed to authenticate with Google Sheets API")
-                
-                # Read data using API
-                success, result_data = await sheets_service.read_sheet(
-                    sheet_id=sheet_id, 
-                    sheet_name=sheet_name, 
-                    range_str=range_str
-                )
+                async with resource_governor.service("google_sheets"):
+                    if not await sheets_service.authenticate():
+                        raise Exception("Failed to authenticate with Google Sheets API")
+                    
+                    # Read data using API
+                    success, result_data = await sheets_service.read_sheet(
+                        sheet_id=sheet_id, 
+                        sheet_name=sheet_name, 
+                        range_str=range_str
+                    )
                 
                 if success and result_data.get('data'):
                     values = result_data['data']['values']
@@ -461,13 +503,7 @@ class GoogleSheetsComponent(BaseWorkflowComponent):
                     data_rows = values[1:] if len(values) > 1 else []
                     
                     # Create records (list of dictionaries)
-                    records = []
-                    for row in data_rows:
-                        # Pad row to match header length
-                        padded_row = row + [''] * (len(headers) - len(row))
-                        record = {headers[i]: padded_row[i] if i < len(padded_row) else '' 
-                                for i in range(len(headers))}
-                        records.append(record)
+                    records = self._rows_to_records(headers, data_rows)
                     
                     spreadsheet_data = {
                         "values": values,
@@ -512,14 +548,15 @@ class GoogleSheetsComponent(BaseWorkflowComponent):
             
             else:
                 # Fallback to CSV export for compatibility
-                import requests
+                import httpx
                 import pandas as pd
                 from io import StringIO
                 
                 # Use CSV export for public sheets (gid=0 for first sheet)
                 url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid=0"
                 
-                response = requests.get(url, timeout=10)
+                async with httpx.AsyncClient(timeout=10, follow_redirects=True) as client:
+                    response = await client.get(url)
                 response.raise_for_status()
                 
                 # Parse CSV data
@@ -583,9 +620,130 @@ class GoogleSheetsComponent(BaseWorkflowComponent):
                 execution_time_ms=int((time.time() - start_time) * 1000),
                 logs=[f"Error reading Google Sheets: {str(e)}"]
             )
+    
+    @staticmethod
+    def _rows_to_records(headers: list, rows: list) -> List[Dict[str, Any]]:
+        """Turn sheet rows into dictionaries keyed by header, padding short rows"""
+        records = []
+        for row in rows:
+            padded_row = row + [''] * (len(headers) - len(row))
+            records.append({headers[i]: padded_row[i] for i in range(len(headers))})
+        return records
+    
+    @staticmethod
+    def _page_ranges(range_str: str, page_rows: int):
+        """Split an A1 range such as "A1:Z1000" into its header row and data pages
+        
+        Returns None for ranges that cannot be paged, such as named ranges.
+        A range without row numbers ("A:Z") starts at row 1 and pages until
+        an empty page is read.
+        """
+        match = re.fullmatch(r"([A-Za-z]+)(\d*):([A-Za-z]+)(\d*)", range_str.strip())
+        if not match:
+            return None
+        start_col, start_row, end_col, end_row = match.groups()
+        start_row = int(start_row) if start_row else 1
+        end_row = int(end_row) if end_row else None
+        
+        def pages():
+            first = start_row + 1
+            while end_row is None or first <= end_row:
+                last = first + page_rows - 1
+                if end_row is not None:
+                    last = min(last, end_row)
+                yield f"{start_col}{first}:{end_col}{last}"
+                first = last + 1
+        
+        return f"{start_col}{start_row}:{end_col}{start_row}", pages()
+    
+    async def stream(self, context: ExecutionContext, upstream=None):
+        """Read the sheet a page at a time, yielding each page's records"""
+        start_time = time.time()
+        sheet_id = context.input_data.get("sheet_id")
+        sheet_name = context.input_data.get("sheet_name", "Sheet1")
+        range_str = context.input_data.get("range", "A1:Z1000")
+        batch_size = self._stream_batch_size(context)
+        
+        if not sheet_id:
+            raise ValueError("sheet_id is required")
+        
+        paged = self._page_ranges(range_str, batch_size) if GOOGLE_SHEETS_AVAILABLE else None
+        if paged is None:
+            # CSV export (or an unpageable range) is a single download; hand it on in batches
+            result = await self.execute(context)
+            if not result.success:
+                self.stream_result = result
+                return
+            records = result.output_data["records"]
+            headers = result.output_data["spreadsheet_info"]["columns"]
+            streamed = len(records)
+            for i in range(0, len(records), batch_size):
+                yield records[i:i + batch_size]
+        else:
+            import os
+            credentials_path = os.path.normpath(
+                os.path.join(os.path.dirname(__file__), "..", "..", "..", "credentials.json")
+            )
+            sheets_service = GoogleSheetsService(credentials_path)
+            
+            async def read(page_range: str) -> list:
+                async with resource_governor.service("google_sheets"):
+                    success, result_data = await sheets_service.read_sheet(
+                        sheet_id=sheet_id,
+                        sheet_name=sheet_name,
+                        range_str=page_range
+                    )
+                if not success:
+                    raise Exception(result_data.get("error", "Failed to read Google Sheets"))
+                return (result_data.get("data") or {}).get("values") or []
+            
+            async with resource_governor.service("google_sheets"):
+                if not await sheets_service.authenticate():
+                    raise Exception("Failed to authenticate with Google Sheets API")
+            
+            header_range, pages = paged
+            header_values = await read(header_range)
+            headers = header_values[0] if header_values else []
+            streamed = 0
+            if headers:
+                for page_range in pages:
+                    rows = await read(page_range)
+                    if not rows:
+                        break
+                    streamed += len(rows)
+                    yield self._rows_to_records(headers, rows)
+        
+        execution_time = int((time.time() - start_time) * 1000)
+        self.stream_result = ExecutionResult(
+            success=True,
+            # Records went downstream; only the sheet's shape is kept
+            output_data={
+                "records_streamed": streamed,
+                "spreadsheet_info": {
+                    "sheet_id": sheet_id,
+                    "sheet_name": sheet_name,
+                    "range": range_str,
+                    "total_rows": streamed + 1 if headers else 0,
+                    "total_columns": len(headers),
+                    "columns": headers,
+                    "streamed": True
+                }
+            },
+            execution_time_ms=execution_time,
+            logs=[
+                f"Streamed {streamed} records from sheet '{sheet_name}' in batches of {batch_size}",
+                f"Columns: {', '.join(headers)}"
+            ],
+            next_steps=["output"]
+        )
 
 
 class AIProcessingComponent(BaseWorkflowComponent):
+    streams_input = True
+    streams_output = True
+    # Batches processed at once while streaming; more would only reorder work
+    STREAM_BATCHES_AHEAD = 2
+    
     @classmethod
     def get_metadata(cls) -> WorkflowComponentMetadata:
         return WorkflowComponentMetadata(
@@ -644,6 +802,18 @@ class AIProcessingComponent(BaseWorkflowComponent):
                     type=ParameterType.NUMBER,
                     default_value=4000,  # ⬆️ Increased from 1000 to 4000
                     description="Maximum number of tokens to generate (up to 4000 for better responses)"
+                ),
+                ComponentParameter(
+                    name="max_concurrency",
+                    label="Max Concurrent Requests",
+                    type=ParameterType.NUMBER,
+                    description="Upper bound on rows sent to the provider at once; the actual number adapts to latency and rate limits"
+                ),
+                ComponentParameter(
+                    name="max_records",
+                    label="Max Records",
+                    type=ParameterType.NUMBER,
+                    description="Process at most this many rows per run (empty processes all)"
                 )
             ],
             input_handles=[
@@ -669,18 +839,7 @@ class AIProcessingComponent(BaseWorkflowComponent):
             max_tokens = context.input_data.get("max_tokens", 4000)  # ⬆️ Increased default to 4000
             
             # Get input data from previous step (should be Google Sheets data)
-            input_data = context.previous_outputs
-            sheets_data = None
-            
-            # Find Google Sheets data in previous outputs
-            for step_id, step_output in input_data.items():
-                if isinstance(step_output, dict) and "spreadsheet_info" in step_output:
-                    sheets_data = step_output
-                    break
-            
-            # If no sheets data from previous steps, try to get from context input_data
-            if not sheets_data and context.input_data.get("sheets_data"):
-                sheets_data = context.input_data["sheets_data"]
+            sheets_data = self._find_sheets_data(context)
                 
             if not sheets_data:
                 return ExecutionResult(
@@ -691,53 +850,33 @@ class AIProcessingComponent(BaseWorkflowComponent):
                     logs=["Error: Expected Google Sheets data as input"]
                 )
             
-            # Process each row of data
-            processed_results = []
             records = sheets_data.get("records", [])
+            max_records = self._max_records(context)
+            selected = records[:max_records] if max_records else records
+            limiter = self._create_limiter(context)
             
             logs = [
                 f"Starting AI processing with {provider} ({model})",
-                f"Processing {len(records)} records from Google Sheets",
+                f"Processing {len(selected)} of {len(records)} records from Google Sheets",
                 f"Temperature: {temperature}, Max Tokens: {max_tokens}"
             ]
             
-            for i, record in enumerate(records[:10]):  # Limit to 10 records for demo
-                try:
-                    # Replace {input} in prompt with actual record data
-                    prompt = prompt_template.replace("{input}", json.dumps(record, indent=2))
-                    
-                    # Simulate AI processing (replace with actual AI calls)
-                    ai_response = await self._process_with_ai(provider, api_key, model, prompt, temperature, max_tokens, record)
-                    
-                    processed_result = {
-                        "row_index": i + 1,
-                        "input_data": record,
-                        "ai_response": ai_response,
-                        "status": "success",
-                        "provider": provider,
-                        "model": model,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    
-                    processed_results.append(processed_result)
-                    logs.append(f"Successfully processed row {i + 1}")
-                    
-                except Exception as e:
-                    processed_result = {
-                        "row_index": i + 1,
-                        "input_data": record,
-                        "ai_response": None,
-                        "status": "error",
-                        "error": str(e),
-                        "provider": provider,
-                        "model": model,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    processed_results.append(processed_result)
-                    logs.append(f"Error processing row {i + 1}: {str(e)}")
-                
-                # Add small delay to avoid rate limiting
-                await asyncio.sleep(0.5)
+            # Rows run concurrently; results come back in row order
+            async def process(row, call):
+                row_index, record = row
+                result = await self._process_record(
+                    row_index, record, provider, api_key, model, prompt_template, temperature, max_tokens
+                )
+                call.throttled = self._was_rate_limited(result)
+                return result
+            
+            processed_results = await map_ordered(list(enumerate(selected, start=1)), process, limiter)
+            for processed_result in processed_results:
+                if processed_result["status"] == "success":
+                    logs.append(f"Successfully processed row {processed_result['row_index']}")
+                else:
+                    logs.append(f"Error processing row {processed_result['row_index']}: {processed_result['error']}")
+            logs.append(f"Concurrency: {limiter.get_stats()}")
             
             execution_time = int((time.time() - start_time) * 1000)
             
@@ -751,7 +890,8 @@ class AIProcessingComponent(BaseWorkflowComponent):
                     "failed_records": len([r for r in processed_results if r["status"] == "error"]),
                     "processing_time_ms": execution_time,
                     "provider": provider,
-                    "model": model
+                    "model": model,
+                    "concurrency": limiter.get_stats()
                 },
                 "original_sheets_info": sheets_data.get("spreadsheet_info", {}),
                 # Format for Google Sheets Write component - Use the CORRECT method for AI results
@@ -775,16 +915,187 @@ class AIProcessingComponent(BaseWorkflowComponent):
                 logs=[f"AI processing error: {str(e)}"]
             )
     
+    async def stream(self, context: ExecutionContext, upstream=None):
+        """Process records as their batches arrive, yielding processed results
+        
+        Without an upstream stage the records come from the Google Sheets
+        output in ``previous_outputs``, as in ``execute``.
+        """
+        start_time = time.time()
+        provider = context.input_data.get("provider", "openai")
+        api_key = context.input_data.get("apiKey", "")
+        model = context.input_data.get("model", "gpt-4o")
+        prompt_template = context.input_data.get("prompt", "")
+        temperature = context.input_data.get("temperature", 0.7)
+        max_tokens = context.input_data.get("max_tokens", 4000)
+        
+        if upstream is None:
+            sheets_data = self._find_sheets_data(context)
+            if not sheets_data:
+                self.stream_result = ExecutionResult(
+                    success=False,
+                    output_data={},
+                    error="No Google Sheets data found in previous steps",
+                    execution_time_ms=int((time.time() - start_time) * 1000),
+                    logs=["Error: Expected Google Sheets data as input"]
+                )
+                return
+            upstream = self._iterate_batches(sheets_data.get("records", []), self._stream_batch_size(context))
+        
+        logs = [
+            f"Streaming AI processing with {provider} ({model})",
+            f"Temperature: {temperature}, Max Tokens: {max_tokens}"
+        ]
+        max_records = self._max_records(context)
+        limiter = self._create_limiter(context)
+        total_records = 0
+        processed_records = 0
+        failed_records = 0
+        
+        async def process(row, call):
+            row_index, record = row
+            result = await self._process_record(
+                row_index, record, provider, api_key, model, prompt_template, temperature, max_tokens
+            )
+            call.throttled = self._was_rate_limited(result)
+            return result
+        
+        # Batches in flight, oldest first; they share the limiter and are yielded in order
+        pending = deque()
+        
+        def finished(processed_batch):
+            nonlocal failed_records
+            for processed_result in processed_batch:
+                if processed_result["status"] != "success":
+                    failed_records += 1
+                    logs.append(f"Error processing row {processed_result['row_index']}: {processed_result['error']}")
+            return processed_batch
+        
+        try:
+            async for batch in upstream:
+                total_records += len(batch)
+                # Keep reading past the limit so the upstream stage can finish
+                take = len(batch) if not max_records else max(min(len(batch), max_records - processed_records), 0)
+                rows = list(enumerate(batch[:take], start=processed_records + 1))
+                processed_records += take
+                if rows:
+                    pending.append(asyncio.create_task(map_ordered(rows, process, limiter)))
+                while pending and (pending[0].done() or len(pending) > self.STREAM_BATCHES_AHEAD):
+                    yield finished(await pending.popleft())
+            while pending:
+                yield finished(await pending.popleft())
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        execution_time = int((time.time() - start_time) * 1000)
+        logs.append(f"Processed {processed_records} of {total_records} streamed records")
+        logs.append(f"Concurrency: {limiter.get_stats()}")
+        self.stream_result = ExecutionResult(
+            success=True,
+            # Processed rows went downstream; only the summary is kept
+            output_data={
+                "summary": {
+                    "total_records": total_records,
+                    "processed_records": processed_records,
+                    "successful_records": processed_records - failed_records,
+                    "failed_records": failed_records,
+                    "processing_time_ms": execution_time,
+                    "provider": provider,
+                    "model": model,
+                    "concurrency": limiter.get_stats(),
+                    "streamed": True
+                }
+            },
+            execution_time_ms=execution_time,
+            logs=logs,
+            next_steps=["output"]
+        )
+    
+    @staticmethod
+    async def _iterate_batches(records: list, batch_size: int):
+        for i in range(0, len(records), batch_size):
+            yield records[i:i + batch_size]
+    
+    @staticmethod
+    def _max_records(context: ExecutionContext) -> int:
+        """Rows to process this run; 0 means all"""
+        value = context.input_data.get("max_records")
+        return int(value) if value not in (None, "") else settings.WORKFLOW_AI_MAX_RECORDS
+    
+    @staticmethod
+    def _create_limiter(context: ExecutionContext) -> AIMDLimiter:
+        """Concurrency limiter for this run, capped by the node's max_concurrency"""
+        value = context.input_data.get("max_concurrency")
+        max_limit = int(value) if value not in (None, "") else settings.WORKFLOW_AI_CONCURRENCY_MAX
+        return AIMDLimiter(
+            initial=min(settings.WORKFLOW_AI_CONCURRENCY_START, max(max_limit, 1)),
+            max_limit=max_limit
+        )
+    
+    @staticmethod
+    def _was_rate_limited(processed_result: dict) -> bool:
+        # Provider failures come back as an error string, either on the row or in its response
+        ai_response = processed_result.get("ai_response")
+        response_error = ai_response.get("error") if isinstance(ai_response, dict) else None
+        return looks_rate_limited(processed_result.get("error")) or looks_rate_limited(response_error)
+    
+    def _find_sheets_data(self, context: ExecutionContext) -> Optional[dict]:
+        """Find Google Sheets data from the nearest upstream sheet, else in the node input"""
+        _, step_output = nearest_output(context.previous_outputs, ("spreadsheet_info",))
+        return step_output or context.input_data.get("sheets_data") or None
+    
+    async def _process_record(
+        self,
+        row_index: int,
+        record: dict,
+        provider: str,
+        api_key: str,
+        model: str,
+        prompt_template: str,
+        temperature: float,
+        max_tokens: int
+    ) -> dict:
+        """Run the prompt for one record; errors are captured in the result"""
+        try:
+            # Replace {input} in prompt with actual record data
+            prompt = prompt_template.replace("{input}", json.dumps(record, indent=2))
+            ai_response = await self._process_with_ai(provider, api_key, model, prompt, temperature, max_tokens, record)
+            
+            return {
+                "row_index": row_index,
+                "input_data": record,
+                "ai_response": ai_response,
+                "status": "success",
+                "provider": provider,
+                "model": model,
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                "row_index": row_index,
+                "input_data": record,
+                "ai_response": None,
+                "status": "error",
+                "error": str(e),
+                "provider": provider,
+                "model": model,
+                "timestamp": datetime.now().isoformat()
+            }
+    
     async def _process_with_ai(self, provider: str, api_key: str, model: str, prompt: str, temperature: float, max_tokens: int, record: dict) -> dict:
         """Process data with AI provider"""
         
         # Try to use actual AI provider if we have API key
         if api_key and provider != "ollama":
             try:
-                return await self._process_with_real_ai_provider(provider, api_key, model, prompt, temperature, max_tokens, record)
+                # Shared with every other run in the process to stay under provider quotas
+                async with resource_governor.service(provider):
+                    return await self._process_with_real_ai_provider(provider, api_key, model, prompt, temperature, max_tokens, record)
             except Exception as e:
-                # Fall back to simulation if real provider fails
-                print(f"Real AI provider failed: {e}, falling back to simulation")
+                # Report the failure on the row; a simulated answer would hide it
+                print(f"Real AI provider failed: {e}")
+                return {"error": f"Real AI provider error: {str(e)}"}
         
         # Fallback to simulated processing
         if provider == "openai":
@@ -794,7 +1105,8 @@ class AIProcessingComponent(BaseWorkflowComponent):
         elif provider == "gemini":
             return await self._process_with_gemini(api_key, model, prompt, temperature, max_tokens, record)
         elif provider == "ollama":
-            return await self._process_with_ollama(model, prompt, temperature, max_tokens, record)
+            async with resource_governor.service("ollama"):
+                return await self._process_with_ollama(model, prompt, temperature, max_tokens, record)
         else:
             # Fallback simulation
             return await self._simulate_ai_processing(record)
@@ -805,11 +1117,11 @@ class AIProcessingComponent(BaseWorkflowComponent):
             # Import AI providers
             from .ai_providers import AIProviderFactory
             
-            # Create provider instance with API key
+            # Shared provider: rows reuse its client and warm connections
             if provider.lower() == "ollama":
-                ai_provider = AIProviderFactory.create_provider(provider, base_url="http://localhost:11434")
+                ai_provider = AIProviderFactory.get_provider(provider, base_url="http://localhost:11434")
             else:
-                ai_provider = AIProviderFactory.create_provider(provider, api_key=api_key)
+                ai_provider = AIProviderFactory.get_provider(provider, api_key=api_key)
             
             # Use the real provider
             result = await ai_provider.generate_content(
@@ -937,14 +1249,15 @@ class AIProcessingComponent(BaseWorkflowComponent):
     async def _process_with_ollama(self, model: str, prompt: str, temperature: float, max_tokens: int, record: dict) -> dict:
         """Process with Ollama local API"""
         try:
-            import requests
+            import httpx
             
             # Check if Ollama is running
             try:
-                health_response = requests.get('http://localhost:11434/api/tags', timeout=2)
+                async with httpx.AsyncClient(timeout=2) as client:
+                    health_response = await client.get('http://localhost:11434/api/tags')
                 if health_response.status_code != 200:
                     raise Exception("Ollama server not responding")
-            except:
+            except Exception:
                 # Fallback to simulation if Ollama not available
                 return await self._simulate_ai_processing(record)
             
@@ -1014,11 +1327,12 @@ class AIProcessingComponent(BaseWorkflowComponent):
                 }
             }
             
-            response = requests.post(
-                'http://localhost:11434/api/generate',
-                json=payload,
-                timeout=60  # Ollama can be slow
-            )
+            # Async so a node timeout or stopped run aborts the request
+            async with httpx.AsyncClient(timeout=60) as client:  # Ollama can be slow
+                response = await client.post(
+                    'http://localhost:11434/api/generate',
+                    json=payload
+                )
             
             if response.status_code == 200:
                 result = response.json()
@@ -1387,6 +1701,97 @@ class WebhookComponent(BaseWorkflowComponent):
             )
 
 
+class ScheduleTriggerComponent(BaseWorkflowComponent):
+    """Starts the workflow on a cron expression or a fixed interval
+
+    The scheduler service fires saved templates' schedule_trigger nodes; the
+    node itself only passes the schedule's input and fire times downstream.
+    """
+
+    @classmethod
+    def get_metadata(cls) -> WorkflowComponentMetadata:
+        return WorkflowComponentMetadata(
+            type="schedule_trigger",
+            name="Schedule",
+            description="Run the workflow on a cron schedule or at a fixed interval",
+            category=ComponentCategory.TRIGGERS,
+            icon="ClockIcon",
+            color="from-amber-500 via-orange-500 to-red-500",
+            parameters=[
+                ComponentParameter(
+                    name="cron_expression",
+                    label="Cron Expression",
+                    type=ParameterType.STRING,
+                    description="minute hour day-of-month month day-of-week, e.g. '0 8 * * mon-fri' or '@daily'"
+                ),
+                ComponentParameter(
+                    name="interval_seconds",
+                    label="Interval (seconds)",
+                    type=ParameterType.NUMBER,
+                    description="Run every N seconds instead of on a cron expression"
+                ),
+                ComponentParameter(
+                    name="timezone",
+                    label="Timezone",
+                    type=ParameterType.STRING,
+                    default_value="UTC",
+                    description="Timezone the cron expression is read in, e.g. 'Asia/Ho_Chi_Minh'"
+                ),
+                ComponentParameter(
+                    name="input_data",
+                    label="Input Data",
+                    type=ParameterType.JSON,
+                    description="Data passed to each scheduled run"
+                ),
+                ComponentParameter(
+                    name="enabled",
+                    label="Enabled",
+                    type=ParameterType.BOOLEAN,
+                    default_value=True
+                )
+            ],
+            input_handles=[],
+            output_handles=[
+                ComponentHandle(id="output", type="source", position="right", label="Start")
+            ],
+            is_trigger=True
+        )
+    
+    async def execute(self, context: ExecutionContext) -> ExecutionResult:
+        start_time = time.time()
+        
+        try:
+            cron_expression = context.input_data.get("cron_expression")
+            if cron_expression:
+                # Reject bad expressions in manual test runs too
+                CronExpression(cron_expression, context.input_data.get("timezone"))
+            
+            # Configured input first, then what the scheduler put on the run
+            output_data = dict(context.input_data.get("input_data") or {})
+            config_keys = {"cron_expression", "interval_seconds", "timezone", "input_data", "enabled"}
+            for key, value in context.input_data.items():
+                if key not in config_keys:
+                    output_data[key] = value
+            output_data.setdefault("triggered_at", datetime.now().isoformat())
+            output_data.setdefault("scheduled_for", None)
+            
+            return ExecutionResult(
+                success=True,
+                output_data=output_data,
+                execution_time_ms=int((time.time() - start_time) * 1000),
+                logs=[f"Schedule trigger fired (scheduled for {output_data['scheduled_for'] or 'manual run'})"],
+                next_steps=["output"]
+            )
+        except Exception as e:
+            return ExecutionResult(
+                success=False,
+                output_data={},
+                error=str(e),
+                execution_time_ms=int((time.time() - start_time) * 1000),
+                logs=[f"Schedule trigger error: {str(e)}"]
+            )
+
+
 class EmailSenderComponent(BaseWorkflowComponent):
     @classmethod
     def get_metadata(cls) -> WorkflowComponentMetadata:
@@ -1710,6 +2115,8 @@ class DatabaseWriteComponent(BaseWorkflowComponent):
 
 
 class GoogleSheetsWriteComponent(BaseWorkflowComponent):
+    streams_input = True
+    
     @classmethod
     def get_metadata(cls) -> WorkflowComponentMetadata:
         return WorkflowComponentMetadata(
@@ -1805,52 +2212,40 @@ class GoogleSheetsWriteComponent(BaseWorkflowComponent):
                 f"Sheet name: {sheet_name}"
             ]
             
-            # Log all previous outputs in detail
-            for node_id, node_output in context.previous_outputs.items():
+            # Log what each upstream node produced (keys only; values load lazily)
+            for node_id in context.previous_outputs:
+                node_output = context.previous_outputs[node_id]
                 debug_logs.append(f"Previous output from {node_id}: {type(node_output)}")
                 if isinstance(node_output, dict):
                     debug_logs.append(f"  Keys in {node_id}: {list(node_output.keys())}")
-                    # Check for results_for_sheets specifically
-                    if 'results_for_sheets' in node_output:
-                        sheets_data = node_output['results_for_sheets']
-                        debug_logs.append(f"  🎯 Found results_for_sheets in {node_id}: {len(sheets_data) if isinstance(sheets_data, list) else 'Not a list'}")
-                        if isinstance(sheets_data, list) and len(sheets_data) > 0:
-                            debug_logs.append(f"  📊 First row: {sheets_data[0] if len(sheets_data) > 0 else 'Empty'}")
-                            debug_logs.append(f"  📊 Headers: {sheets_data[0] if len(sheets_data) > 0 and isinstance(sheets_data[0], list) else 'Not list format'}")
-                
-                debug_logs.append(f"Previous output from {node_id}: {node_output}")
             
             # Get input data from previous nodes or workflow input
             input_data = None
             
             print(f"🔍 Searching for data in previous_outputs...")
             
-            # First try to get data from previous node outputs
-            for node_id, node_output in context.previous_outputs.items():
-                debug_logs.append(f"Checking node {node_id}: {type(node_output)}")
-                print(f"🔍 Checking node {node_id}: {type(node_output)}")
-                if isinstance(node_output, dict):
-                    print(f"🔍 Node {node_id} keys: {list(node_output.keys())}")
-                    
-                    # SIMPLIFIED: Use processed_results directly from AI Processing
-                    if "processed_results" in node_output and node_output["processed_results"]:
-                        processed_results = node_output["processed_results"]
-                        print(f"🎯 FOUND processed_results in {node_id}: {len(processed_results)} rows")
-                        
-                        # Convert processed_results to sheets format here (inline)
-                        input_data = self._convert_processed_results_to_sheets(processed_results)
-                        print(f"🎯 Converted to sheets format: {len(input_data)} rows")
-                        break
+            # First try the nearest upstream AI Processing output; farther ones are never used
+            node_id, node_output = nearest_output(
+                context.previous_outputs, ("processed_results", "results_for_sheets")
+            )
+            if node_output is not None:
+                print(f"🔍 Node {node_id} keys: {list(node_output.keys())}")
+                
+                # SIMPLIFIED: Use processed_results directly from AI Processing
+                if node_output.get("processed_results"):
+                    processed_results = node_output["processed_results"]
+                    print(f"🎯 FOUND processed_results in {node_id}: {len(processed_results)} rows")
                     
-                    # Backup: Check for 'results_for_sheets' 
-                    elif "results_for_sheets" in node_output and node_output["results_for_sheets"]:
-                        input_data = node_output["results_for_sheets"]
-                        debug_logs.append(f"🎯 Found results_for_sheets in {node_id}: {len(input_data)} rows")
-                        print(f"🎯 FOUND results_for_sheets in {node_id}: {len(input_data)} rows")
-                        print(f"🔍 First row sample: {input_data[0] if input_data else 'Empty'}")
-                        break
+                    # Convert processed_results to sheets format here (inline)
+                    input_data = self._convert_processed_results_to_sheets(processed_results)
+                    print(f"🎯 Converted to sheets format: {len(input_data)} rows")
                 
-                print(f"🔍 No suitable data found in {node_id}, continuing...")
+                # Backup: Check for 'results_for_sheets' 
+                elif node_output.get("results_for_sheets"):
+                    input_data = node_output["results_for_sheets"]
+                    debug_logs.append(f"🎯 Found results_for_sheets in {node_id}: {len(input_data)} rows")
+                    print(f"🎯 FOUND results_for_sheets in {node_id}: {len(input_data)} rows")
+                    print(f"🔍 First row sample: {input_data[0] if input_data else 'Empty'}")
             
             print(f"🔍 Final input_data: {type(input_data)} with {len(input_data) if input_data else 0} items")
                         
@@ -1888,9 +2283,10 @@ class GoogleSheetsWriteComponent(BaseWorkflowComponent):
             if GOOGLE_SHEETS_AVAILABLE:
                 debug_logs.append("Attempting to write to Google Sheets API...")
                 print(f"🔧 About to call _write_to_google_sheets")
-                success, result_data = await self._write_to_google_sheets(
-                    sheet_id, sheet_name, range_start, mode, processed_data
-                )
+                async with resource_governor.service("google_sheets"):
+                    success, result_data = await self._write_to_google_sheets(
+                        sheet_id, sheet_name, range_start, mode, processed_data
+                    )
                 
                 debug_logs.append(f"Google Sheets API result: success={success}, data={result_data}")
                 print(f"🔧 _write_to_google_sheets returned: success={success}, data={result_data}")
@@ -1963,10 +2359,13 @@ class GoogleSheetsWriteComponent(BaseWorkflowComponent):
             )
     
     async def _write_to_google_sheets(self, sheet_id: str, sheet_name: str, range_start: str, 
-                                     mode: str, data: list) -> tuple[bool, dict]:
+                                     mode: str, data: list, write_header: bool = True) -> tuple[bool, dict]:
         """
         Write data to Google Sheets using API
         
+        ``data[0]`` is the header row; with ``write_header=False`` it is only
+        used to align columns (later chunks of a streamed write).
+        
         Returns:
             tuple: (success: bool, result_data: dict)
         """
@@ -2011,26 +2410,26 @@ class GoogleSheetsWriteComponent(BaseWorkflowComponent):
             if mode == "append":
                 print(f"🔧 Calling write_to_sheet with append mode")
                 success, result_data = await sheets_service.write_to_sheet(
-                    sheet_id, sheet_name, range_start, "append", data
+                    sheet_id, sheet_name, range_start, "append", data, write_header
                 )
                 
             elif mode == "overwrite":
                 print(f"🔧 Calling write_to_sheet with overwrite mode")
                 success, result_data = await sheets_service.write_to_sheet(
-                    sheet_id, sheet_name, range_start, "overwrite", data
+                    sheet_id, sheet_name, range_start, "overwrite", data, write_header
                 )
                 
             elif mode == "clear_write":
                 print(f"🔧 Calling write_to_sheet with clear_write mode")
                 # Use overwrite mode which will replace data
                 success, result_data = await sheets_service.write_to_sheet(
-                    sheet_id, sheet_name, "A1", "overwrite", data
+                    sheet_id, sheet_name, "A1", "overwrite", data, write_header
                 )
             else:
                 print(f"🔧 Calling write_to_sheet with default overwrite mode")
                 # Default to overwrite
                 success, result_data = await sheets_service.write_to_sheet(
-                    sheet_id, sheet_name, range_start, "overwrite", data
+                    sheet_id, sheet_name, range_start, "overwrite", data, write_header
                 )
             
             print(f"🔧 write_to_sheet result: success={success}, data={result_data}")
@@ -2043,6 +2442,103 @@ class GoogleSheetsWriteComponent(BaseWorkflowComponent):
             print(f"💥 Traceback: {traceback.format_exc()}")
             return False, {"error": error_msg}
     
+    async def stream(self, context: ExecutionContext, upstream=None):
+        """Write each arriving batch as a chunk, yielding each chunk's write result
+        
+        The first chunk is written with the configured mode and the header
+        row; later chunks are appended (or, when overwriting, placed right
+        below the previous chunk) without it.
+        """
+        if upstream is None:
+            self.stream_result = await self.execute(context)
+            return
+        
+        start_time = time.time()
+        sheet_id = context.input_data.get("sheet_id")
+        sheet_name = context.input_data.get("sheet_name", "Sheet1")
+        range_start = context.input_data.get("range", "A1")
+        mode = context.input_data.get("mode", "append")
+        data_format = context.input_data.get("data_format", "auto")
+        
+        if not sheet_id:
+            raise ValueError("sheet_id is required")
+        
+        if mode == "clear_write":
+            range_start = "A1"
+        start_col = "".join(filter(str.isalpha, range_start)) or "A"
+        next_row = int("".join(filter(str.isdigit, range_start)) or 1)
+        
+        simulated = not GOOGLE_SHEETS_AVAILABLE
+        logs = [f"Streaming writes to sheet '{sheet_name}' starting at {range_start} (mode: {mode})"]
+        rows_written = 0
+        columns_count = 0
+        chunks = 0
+        
+        async for batch in upstream:
+            data = self._batch_to_rows(batch)
+            if len(data) < 2:
+                continue
+            first_chunk = chunks == 0
+            if first_chunk:
+                chunk_mode, chunk_start = mode, range_start
+            else:
+                chunk_mode = "append" if mode == "append" else "overwrite"
+                chunk_start = f"{start_col}{next_row}"
+            
+            chunk_result = {"rows_count": len(data) - 1, "range": chunk_start, "status": "simulated"}
+            if not simulated:
+                async with resource_governor.service("google_sheets"):
+                    success, result_data = await self._write_to_google_sheets(
+                        sheet_id, sheet_name, chunk_start, chunk_mode, data, write_header=first_chunk
+                    )
+                if success:
+                    chunk_result["status"] = "success"
+                else:
+                    # Fall back to simulation like execute(); earlier chunks stay written
+                    simulated = True
+                    logs.append(f"Google Sheets API failed after {rows_written} rows, falling back to simulation: {result_data}")
+            
+            next_row += len(data) if first_chunk else len(data) - 1
+            rows_written += len(data) - 1
+            columns_count = len(data[0])
+            chunks += 1
+            yield [chunk_result]
+        
+        execution_time = int((time.time() - start_time) * 1000)
+        logs.append(f"Wrote {rows_written} rows in {chunks} chunks{' (simulated)' if simulated else ''}")
+        self.stream_result = ExecutionResult(
+            success=True,
+            output_data={
+                "operation": "write_simulation" if simulated else "write_success",
+                "sheet_info": {
+                    "sheet_id": sheet_id,
+                    "sheet_name": sheet_name,
+                    "range": range_start,
+                    "mode": mode
+                },
+                "data_written": {
+                    "rows_count": rows_written,
+                    "columns_count": columns_count,
+                    "chunks": chunks,
+                    "format": data_format
+                },
+                "timestamp": datetime.now().isoformat(),
+                "status": "simulated" if simulated else "success"
+            },
+            execution_time_ms=execution_time,
+            logs=logs,
+            next_steps=["success"]
+        )
+    
+    def _batch_to_rows(self, batch: List[Dict[str, Any]]) -> List[List[Any]]:
+        """Header row plus one row per streamed record or AI processing result"""
+        if not batch:
+            return []
+        if "input_data" in batch[0]:
+            return self._convert_processed_results_to_sheets(batch)
+        headers = list(batch[0].keys())
+        return [headers] + [[str(record.get(header, "")) for header in headers] for record in batch]
+    
     def _process_input_data(self, data, format_type):
         """Process input data based on specified format"""
         if format_type == "auto":
@@ -2270,61 +2766,44 @@ class GoogleDriveWriteComponent(BaseWorkflowComponent):
             content_data = None
             
             if content_source == "previous_output":
-                # Get data from previous node outputs
-                for node_id, node_output in context.previous_outputs.items():
+                # Get data from the nearest upstream node that produced any; farther ones are never used
+                node_id, node_output = nearest_output(
+                    context.previous_outputs,
+                    ("processed_results", "results_for_sheets", "values", "records", "data", "results", "output", "content")
+                )
+                if node_output is not None:
                     debug_logs.append(f"Checking node {node_id}: {type(node_output)}")
-                    print(f"🔍 Drive: Checking node {node_id}: {type(node_output)}")
-                    if isinstance(node_output, dict):
-                        print(f"🔍 Drive: Node {node_id} keys: {list(node_output.keys())}")
-                        
-                        # Priority 1: Check for AI Processing processed_results (contains AI responses)
-                        if 'processed_results' in node_output and isinstance(node_output['processed_results'], list):
-                            print(f"🎯 Drive: Found processed_results in {node_id}: {len(node_output['processed_results'])} rows")
-                            # Convert to sheets format using the same method as GoogleSheetsWriteComponent
-                            sheets_data = self._convert_processed_results_to_sheets_for_drive(node_output['processed_results'])
-                            content_data = {'values': sheets_data}  # Wrap in sheets format
-                            debug_logs.append(f"Found AI Processing data in node {node_id}: {len(sheets_data)} rows")
-                            break
-                        
-                        # Priority 2: Check for AI Processing data (has results_for_sheets - perfect for CSV)
-                        elif 'results_for_sheets' in node_output and isinstance(node_output['results_for_sheets'], list):
-                            content_data = {'values': node_output['results_for_sheets']}  # Wrap in sheets format
-                            debug_logs.append(f"Found AI Processing data in node {node_id}: {len(node_output['results_for_sheets'])} rows")
-                            break
-                        # Priority 3: Check for Google Sheets data (fallback)
-                        elif 'values' in node_output and isinstance(node_output['values'], list):
-                            print(f"🔍 Drive: Found values in {node_id}, but skipping in favor of AI processing data...")
-                            # Don't break here, continue to look for AI processing data
-                            pass
-                        elif 'records' in node_output and isinstance(node_output['records'], list):
-                            print(f"🔍 Drive: Found records in {node_id}, but skipping in favor of AI processing data...")
-                            # Don't break here, continue to look for AI processing data
-                            pass
-                        else:
-                            # Try different possible data keys for other formats
-                            data_keys = ["data", "results", "output", "content"]
-                            for key in data_keys:
-                                if key in node_output and node_output[key]:
-                                    content_data = node_output[key]
-                                    debug_logs.append(f"Found data in node {node_id}.{key}: {type(content_data)}")
-                                    break
-                            if content_data:
-                                break
-                
-                # If no AI processing data found, fallback to Google Sheets data
-                if not content_data:
-                    print(f"🔍 Drive: No AI processing data found, falling back to Google Sheets data...")
-                    for node_id, node_output in context.previous_outputs.items():
-                        if isinstance(node_output, dict):
-                            if 'values' in node_output and isinstance(node_output['values'], list):
-                                content_data = node_output  # Keep the full sheets structure
-                                debug_logs.append(f"Fallback: Found Google Sheets data in node {node_id}: {len(node_output['values'])} rows")
-                                print(f"🔍 Drive: Fallback - Using Google Sheets data from {node_id}")
-                                break
-                            elif 'records' in node_output and isinstance(node_output['records'], list):
-                                content_data = node_output  # Keep the full sheets structure  
-                                debug_logs.append(f"Fallback: Found Google Sheets records in node {node_id}: {len(node_output['records'])} records")
-                                print(f"🔍 Drive: Fallback - Using Google Sheets records from {node_id}")
+                    print(f"🔍 Drive: Node {node_id} keys: {list(node_output.keys())}")
+                    
+                    # Priority 1: Check for AI Processing processed_results (contains AI responses)
+                    if isinstance(node_output.get('processed_results'), list):
+                        print(f"🎯 Drive: Found processed_results in {node_id}: {len(node_output['processed_results'])} rows")
+                        # Convert to sheets format using the same method as GoogleSheetsWriteComponent
+                        sheets_data = self._convert_processed_results_to_sheets_for_drive(node_output['processed_results'])
+                        content_data = {'values': sheets_data}  # Wrap in sheets format
+                        debug_logs.append(f"Found AI Processing data in node {node_id}: {len(sheets_data)} rows")
+                    
+                    # Priority 2: Check for AI Processing data (has results_for_sheets - perfect for CSV)
+                    elif isinstance(node_output.get('results_for_sheets'), list):
+                        content_data = {'values': node_output['results_for_sheets']}  # Wrap in sheets format
+                        debug_logs.append(f"Found AI Processing data in node {node_id}: {len(node_output['results_for_sheets'])} rows")
+                    
+                    # Priority 3: Google Sheets data
+                    elif isinstance(node_output.get('values'), list):
+                        content_data = node_output  # Keep the full sheets structure
+                        debug_logs.append(f"Found Google Sheets data in node {node_id}: {len(node_output['values'])} rows")
+                        print(f"🔍 Drive: Using Google Sheets data from {node_id}")
+                    elif isinstance(node_output.get('records'), list):
+                        content_data = node_output  # Keep the full sheets structure
+                        debug_logs.append(f"Found Google Sheets records in node {node_id}: {len(node_output['records'])} records")
+                        print(f"🔍 Drive: Using Google Sheets records from {node_id}")
+                    
+                    else:
+                        # Try different possible data keys for other formats
+                        for key in ["data", "results", "output", "content"]:
+                            if node_output.get(key):
+                                content_data = node_output[key]
+                                debug_logs.append(f"Found data in node {node_id}.{key}: {type(content_data)}")
                                 break
                         
             elif content_source == "input_data":
@@ -2365,14 +2844,15 @@ class GoogleDriveWriteComponent(BaseWorkflowComponent):
             # Convert content to bytes based on file type
             file_content = self._prepare_file_content(content_data, file_type)
             
-            # Smart file naming logic
-            final_file_name = await self._generate_smart_filename(file_name, folder_id)
-            debug_logs.append(f"Final file name: {final_file_name}")
-            
-            # Try OAuth service for real upload
-            oauth_success, oauth_result = await self._try_oauth_upload(
-                file_content, final_file_name, folder_id, mimetype
-            )
+            async with resource_governor.service("google_drive"):
+                # Smart file naming logic
+                final_file_name = await self._generate_smart_filename(file_name, folder_id)
+                debug_logs.append(f"Final file name: {final_file_name}")
+                
+                # Try OAuth service for real upload
+                oauth_success, oauth_result = await self._try_oauth_upload(
+                    file_content, final_file_name, folder_id, mimetype
+                )
             
             if oauth_success:
                 debug_logs.append("✅ Real OAuth upload successful!")
@@ -2967,5 +3447,356 @@ class EmailReportComponent(BaseWorkflowComponent):
             )
 
 
+class MapComponent(BaseWorkflowComponent):
+    """Runs a sub-workflow once per item (or chunk) of an upstream collection"""
+
+    # Upstream output keys searched for a collection when no items_path is set
+    COLLECTION_KEYS = ("records", "processed_results", "results", "items")
+
+    @classmethod
+    def get_metadata(cls) -> WorkflowComponentMetadata:
+        return WorkflowComponentMetadata(
+            type="map",
+            name="Map",
+            description="Run a sub-workflow for each item of a collection, in parallel",
+            category=ComponentCategory.CONTROL_FLOW,
+            icon="Squares2X2Icon",
+            color="from-indigo-500 via-indigo-600 to-violet-600",
+            parameters=[
+                ComponentParameter(
+                    name="workflow_id",
+                    label="Sub-workflow",
+                    type=ParameterType.STRING,
+                    description="ID of the saved workflow to run for each item (or set sub_workflow)"
+                ),
+                ComponentParameter(
+                    name="sub_workflow",
+                    label="Inline Sub-workflow",
+                    type=ParameterType.JSON,
+                    description="Nodes and edges of the workflow to run, instead of workflow_id"
+                ),
+                ComponentParameter(
+                    name="items_path",
+                    label="Items Path",
+                    type=ParameterType.STRING,
+                    description="node_id.key path to the collection; defaults to the nearest upstream records/results list"
+                ),
+                ComponentParameter(
+                    name="chunk_size",
+                    label="Chunk Size",
+                    type=ParameterType.NUMBER,
+                    default_value=1,
+                    description="Items per sub-run: 1 passes 'item', more pass 'items'"
+                ),
+                ComponentParameter(
+                    name="parallelism",
+                    label="Parallelism",
+                    type=ParameterType.NUMBER,
+                    default_value=settings.WORKFLOW_MAP_PARALLELISM,
+                    description="Sub-runs executed at once"
+                ),
+                ComponentParameter(
+                    name="ordering",
+                    label="Result Order",
+                    type=ParameterType.SELECT,
+                    default_value="input",
+                    options=[
+                        {"label": "Input order", "value": "input"},
+                        {"label": "Completion order", "value": "completion"}
+                    ]
+                ),
+                ComponentParameter(
+                    name="fail_fast",
+                    label="Stop on First Failure",
+                    type=ParameterType.BOOLEAN,
+                    default_value=False
+                )
+            ],
+            input_handles=[
+                ComponentHandle(id="input", type="target", position="left", label="Collection")
+            ],
+            output_handles=[
+                ComponentHandle(id="output", type="source", position="right", label="Results"),
+                ComponentHandle(id="error", type="source", position="bottom", label="Failed Items")
+            ]
+        )
+
+    async def execute(self, context: ExecutionContext) -> ExecutionResult:
+        start_time = time.time()
+
+        try:
+            config = context.input_data
+            items = self._find_items(context)
+            if items is None:
+                raise ValueError("No collection found: set items_path or connect a node that outputs records")
+            if len(items) > settings.WORKFLOW_MAP_MAX_ITEMS:
+                raise ValueError(f"Collection has {len(items)} items, more than the {settings.WORKFLOW_MAP_MAX_ITEMS} allowed")
+            workflow_data = await self._load_sub_workflow(config)
+
+            chunk_size = max(int(config.get("chunk_size") or 1), 1)
+            parallelism = max(int(config.get("parallelism") or settings.WORKFLOW_MAP_PARALLELISM), 1)
+            ordering = config.get("ordering") or "input"
+            fail_fast = bool(config.get("fail_fast", False))
+
+            if chunk_size == 1:
+                units = [{"item": item, "index": index} for index, item in enumerate(items)]
+            else:
+                units = [
+                    {"items": items[offset:offset + chunk_size], "index": index, "offset": offset}
+                    for index, offset in enumerate(range(0, len(items), chunk_size))
+                ]
+
+            # Deferred: the engine and the analyzer import this module
+            from .execution_engine import WorkflowExecutionEngine
+            from .graph_analyzer import analyze_workflow, describe_errors
+            analysis = analyze_workflow(workflow_data)
+            if not analysis["valid"]:
+                raise ValueError(f"Sub-workflow: {describe_errors(analysis)}")
+            engine = WorkflowExecutionEngine(None)
+
+            completed: List[Dict[str, Any]] = []
+            pending = iter(units)
+            stopped = False
+
+            async def run_unit(unit: Dict[str, Any]) -> Dict[str, Any]:
+                run_id = f"{context.instance_id}:{context.step_id}:{unit['index']}"
+                try:
+                    sub_run = await engine.run_subworkflow(run_id, workflow_data, unit)
+                except Exception as e:
+                    return {"index": unit["index"], "success": False, "output": None, "error": str(e)}
+                errors = [f"{step['node_id']}: {step['error']}" for step in sub_run["failed_steps"]]
+                return {
+                    "index": unit["index"],
+                    "success": not errors,
+                    "output": sub_run["output"],
+                    "error": "; ".join(errors) or None
+                }
+
+            async def worker():
+                nonlocal stopped
+                # Workers share one iterator, so at most `parallelism` sub-runs are in flight
+                for unit in pending:
+                    if stopped:
+                        return
+                    entry = await run_unit(unit)
+                    completed.append(entry)
+                    if fail_fast and not entry["success"]:
+                        stopped = True
+
+            await asyncio.gather(*(worker() for _ in range(min(parallelism, len(units)))))
+
+            results = completed if ordering == "completion" else sorted(completed, key=lambda entry: entry["index"])
+            failed = [entry for entry in results if not entry["success"]]
+            output_data = {
+                "map_results": results,
+                "total_items": len(items),
+                "units": len(units),
+                "chunk_size": chunk_size,
+                "succeeded": len(results) - len(failed),
+                "failed": len(failed),
+                "not_run": len(units) - len(results),
+                "ordering": ordering
+            }
+            logs = [
+                f"Mapped {len(items)} items in {len(units)} sub-runs ({parallelism} at a time): "
+                f"{output_data['succeeded']} succeeded, {len(failed)} failed"
+            ]
+
+            if fail_fast and failed:
+                return ExecutionResult(
+                    success=False,
+                    output_data=output_data,
+                    error=f"Item {failed[0]['index']} failed: {failed[0]['error']}",
+                    execution_time_ms=int((time.time() - start_time) * 1000),
+                    logs=logs,
+                    next_steps=["error"]
+                )
+
+            return ExecutionResult(
+                success=True,
+                output_data=output_data,
+                execution_time_ms=int((time.time() - start_time) * 1000),
+                logs=logs,
+                next_steps=["output", "error"] if failed else ["output"]
+            )
+
+        except Exception as e:
+            return ExecutionResult(
+                success=False,
+                output_data={},
+                error=str(e),
+                execution_time_ms=int((time.time() - start_time) * 1000),
+                logs=[f"Error in map component: {str(e)}"],
+                next_steps=["error"]
+            )
+
+    def _find_items(self, context: ExecutionContext) -> Optional[List[Any]]:
+        """The collection at items_path, else the nearest upstream list of records"""
+        items_path = context.input_data.get("items_path")
+        if items_path:
+            node_id, _, path = items_path.partition(".")
+            value = context.previous_outputs.get(node_id)
+            for key in filter(None, path.split(".")):
+                if isinstance(value, list) and key.isdigit():
+                    value = value[int(key)] if int(key) < len(value) else None
+                elif isinstance(value, dict):
+                    value = value.get(key)
+                else:
+                    value = None
+            return value if isinstance(value, list) else None
+
+        if isinstance(context.input_data.get("items"), list):
+            return context.input_data["items"]
+        # Only the nearest producer counts; farther outputs are never loaded
+        _, step_output = nearest_output(context.previous_outputs, self.COLLECTION_KEYS)
+        if step_output is None:
+            return None
+        for key in self.COLLECTION_KEYS:
+            if key in step_output and isinstance(step_output[key], list):
+                return step_output[key]
+        return None
+
+    async def _load_sub_workflow(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        if config.get("sub_workflow"):
+            sub_workflow = config["sub_workflow"]
+            return json.loads(sub_workflow) if isinstance(sub_workflow, str) else sub_workflow
+        if not config.get("workflow_id"):
+            raise ValueError("Set workflow_id or sub_workflow to choose the workflow to run per item")
+
+        from ...models.database import AsyncSessionLocal
+        from ...models.workflow import WorkflowTemplate
+        async with AsyncSessionLocal() as db:
+            template = await db.get(WorkflowTemplate, config["workflow_id"])
+        if not template:
+            raise ValueError(f"Sub-workflow {config['workflow_id']} not found")
+        return template.template_data
+
+
+class ReduceComponent(BaseWorkflowComponent):
+    """Gathers the per-item results of an upstream map node"""
+
+    @classmethod
+    def get_metadata(cls) -> WorkflowComponentMetadata:
+        return WorkflowComponentMetadata(
+            type="reduce",
+            name="Reduce",
+            description="Combine the results of a map node",
+            category=ComponentCategory.CONTROL_FLOW,
+            icon="FunnelIcon",
+            color="from-violet-500 via-violet-600 to-purple-600",
+            parameters=[
+                ComponentParameter(
+                    name="operation",
+                    label="Operation",
+                    type=ParameterType.SELECT,
+                    default_value="collect",
+                    options=[
+                        {"label": "Collect (one entry per item)", "value": "collect"},
+                        {"label": "Concatenate lists", "value": "concat"},
+                        {"label": "Merge objects", "value": "merge"},
+                        {"label": "Count", "value": "count"}
+                    ]
+                ),
+                ComponentParameter(
+                    name="map_node",
+                    label="Map Node",
+                    type=ParameterType.STRING,
+                    description="ID of the map node to reduce; defaults to the nearest upstream one"
+                ),
+                ComponentParameter(
+                    name="include_failed",
+                    label="Include Failed Items",
+                    type=ParameterType.BOOLEAN,
+                    default_value=False
+                )
+            ],
+            input_handles=[
+                ComponentHandle(id="input", type="target", position="left", label="Map Results")
+            ],
+            output_handles=[
+                ComponentHandle(id="output", type="source", position="right", label="Result")
+            ]
+        )
+
+    async def execute(self, context: ExecutionContext) -> ExecutionResult:
+        start_time = time.time()
+
+        try:
+            config = context.input_data
+            map_output = self._find_map_output(context, config.get("map_node"))
+            if map_output is None:
+                raise ValueError("No map results found upstream")
+
+            operation = config.get("operation") or "collect"
+            results = map_output["map_results"]
+            failed = [entry for entry in results if not entry["success"]]
+            entries = results if config.get("include_failed") else [entry for entry in results if entry["success"]]
+            outputs = [entry["output"] for entry in entries]
+
+            if operation == "collect":
+                result = outputs
+            elif operation == "concat":
+                result = []
+                for output in outputs:
+                    result.extend(self._as_list(output))
+            elif operation == "merge":
+                result = {}
+                for output in outputs:
+                    if isinstance(output, dict):
+                        result.update(output)
+            elif operation == "count":
+                result = {"succeeded": len(results) - len(failed), "failed": len(failed)}
+            else:
+                raise ValueError(f"Unknown reduce operation '{operation}'")
+
+            output_data = {
+                "result": result,
+                "count": len(entries),
+                "failed": len(failed),
+                "errors": [{"index": entry["index"], "error": entry["error"]} for entry in failed]
+            }
+            # Lists are also exposed as records, so a following map or writer picks them up
+            if isinstance(result, list):
+                output_data["records"] = result
+
+            return ExecutionResult(
+                success=True,
+                output_data=output_data,
+                execution_time_ms=int((time.time() - start_time) * 1000),
+                logs=[f"Reduced {len(entries)} map results with '{operation}'"],
+                next_steps=["output"]
+            )
+
+        except Exception as e:
+            return ExecutionResult(
+                success=False,
+                output_data={},
+                error=str(e),
+                execution_time_ms=int((time.time() - start_time) * 1000),
+                logs=[f"Error in reduce component: {str(e)}"]
+            )
+
+    @staticmethod
+    def _find_map_output(context: ExecutionContext, map_node: Optional[str]) -> Optional[dict]:
+        if map_node:
+            step_output = context.previous_outputs.get(map_node)
+        else:
+            _, step_output = nearest_output(context.previous_outputs, ("map_results",))
+        if isinstance(step_output, dict) and isinstance(step_output.get("map_results"), list):
+            return step_output
+        return None
+
+    @staticmethod
+    def _as_list(output: Any) -> List[Any]:
+        """A sub-run output as a list: itself, its first list value, or a single entry"""
+        if isinstance(output, list):
+            return output
+        if isinstance(output, dict):
+            for key in MapComponent.COLLECTION_KEYS:
+                if isinstance(output.get(key), list):
+                    return output[key]
+        return [] if output is None else [output]
+
+
 # Global component registry instance
 component_registry = ComponentRegistry()
@@ -0,0 +1,153 @@
+"""
+Cron Expressions for Scheduled Workflows
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Shorthands accepted in place of the five fields
+ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = {name: number for number, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1
+)}
+DAY_NAMES = {name: number for number, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+# (name, lowest, highest, names) per field, in expression order
+FIELDS: List[Tuple[str, int, int, dict]] = [
+    ("minute", 0, 59, {}),
+    ("hour", 0, 23, {}),
+    ("day of month", 1, 31, {}),
+    ("month", 1, 12, MONTH_NAMES),
+    ("day of week", 0, 7, DAY_NAMES),
+]
+
+# Search horizon for next_after; a valid expression matches well within it
+MAX_SEARCH_YEARS = 5
+
+
+def _parse_value(text: str, name: str, lowest: int, highest: int, names: dict) -> int:
+    value = names.get(text.lower())
+    if value is None:
+        try:
+            value = int(text)
+        except ValueError:
+            raise ValueError(f"Invalid {name} value '{text}'")
+    if not lowest <= value <= highest:
+        raise ValueError(f"{name.capitalize()} value {value} is outside {lowest}-{highest}")
+    return value
+
+
+def _parse_field(text: str, name: str, lowest: int, highest: int, names: dict) -> Set[int]:
+    values: Set[int] = set()
+    for part in text.split(","):
+        if not part:
+            raise ValueError(f"Empty item in {name} field '{text}'")
+        base, _, step_text = part.partition("/")
+        step = 1
+        if step_text:
+            try:
+                step = int(step_text)
+            except ValueError:
+                raise ValueError(f"Invalid {name} step '{step_text}'")
+            if step < 1:
+                raise ValueError(f"{name.capitalize()} step must be at least 1")
+
+        if base == "*":
+            start, end = lowest, highest
+        elif "-" in base:
+            start_text, end_text = base.split("-", 1)
+            start = _parse_value(start_text, name, lowest, highest, names)
+            end = _parse_value(end_text, name, lowest, highest, names)
+            if start > end:
+                raise ValueError(f"{name.capitalize()} range '{base}' runs backwards")
+        else:
+            start = _parse_value(base, name, lowest, highest, names)
+            # "5/15" means every 15 starting at 5
+            end = highest if step_text else start
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def get_timezone(name: Optional[str]):
+    """Resolve a timezone name; empty means UTC"""
+    if not name or name.upper() == "UTC":
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone '{name}'")
+
+
+class CronExpression:
+    """A five-field cron expression: minute hour day-of-month month day-of-week
+
+    Supports ``*``, lists, ranges, ``/`` steps, month and weekday names
+    (``jan``, ``mon``), 0 or 7 for Sunday and the ``@daily`` style aliases.
+    As in Vixie cron, when both day fields are restricted a day matches if
+    either does. Times are matched on the wall clock of ``tz``.
+    """
+
+    def __init__(self, expression: str, tz: Optional[str] = None):
+        self.expression = expression.strip()
+        self.tz = get_timezone(tz)
+        fields = ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields, got {len(fields)}")
+
+        parsed = [_parse_field(text, *spec) for text, spec in zip(fields, FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.day_restricted = fields[2] != "*"
+        self.weekday_restricted = fields[4] != "*"
+
+    def _day_matches(self, day: datetime) -> bool:
+        in_month = day.day in self.days
+        # Python weekday() is Monday=0; cron is Sunday=0
+        in_week = (day.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return in_month or in_week
+        return in_month and in_week
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching time strictly after ``after``, as an aware UTC datetime
+
+        Naive datetimes are taken as UTC. Local times skipped by a DST change
+        fire at the equivalent offset time; repeated ones fire once.
+        """
+        if after.tzinfo is None:
+            after = after.replace(tzinfo=timezone.utc)
+        local = after.astimezone(self.tz).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        limit = local.replace(year=local.year + MAX_SEARCH_YEARS)
+
+        while local < limit:
+            if local.month not in self.months:
+                local = (local.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(local):
+                local = local.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if local.hour not in self.hours:
+                local = local.replace(minute=0) + timedelta(hours=1)
+                continue
+            if local.minute not in self.minutes:
+                local += timedelta(minutes=1)
+                continue
+
+            candidate = local.replace(tzinfo=self.tz).astimezone(timezone.utc)
+            if candidate > after:
+                return candidate
+            local += timedelta(minutes=1)
+
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
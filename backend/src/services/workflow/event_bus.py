@@ -0,0 +1,234 @@
+"""
+In-Process Event Bus for Workflow Execution Events
+"""
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Awaitable, Callable, Deque, Iterable, Optional, Set, Tuple, Union
+
+from ...core.config import settings
+
+# Published events are (instance_id, ExecutionEvent) pairs
+EventHandler = Callable[..., Awaitable[None]]
+
+
+class Subscription:
+    """One subscriber's bounded queue and the task draining it
+
+    Events are delivered one at a time (or in lists of up to ``batch_size``)
+    in publish order. While an event whose type is in ``coalesce_types`` is
+    still queued, a newer event of the same type for the same instance and
+    node replaces it in place, so a slow consumer only sees the latest state.
+    ``coalesce_types`` may also map event types to a group name; events of
+    one group replace each other (``step_started`` by ``step_completed``).
+    When the queue is full the oldest event is dropped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: EventHandler,
+        max_queue: int,
+        coalesce_types: Union[Iterable[str], Dict[str, str]] = (),
+        event_types: Optional[Iterable[str]] = None,
+        batch_size: int = 1
+    ):
+        self.name = name
+        self.handler = handler
+        self.max_queue = max_queue
+        # event type -> coalescing group
+        self.coalesce_groups: Dict[str, str] = (
+            dict(coalesce_types) if isinstance(coalesce_types, dict)
+            else {event_type: event_type for event_type in coalesce_types}
+        )
+        self.event_types: Optional[Set[str]] = set(event_types) if event_types is not None else None
+        self.batch_size = batch_size
+
+        self._queue: Deque[list] = deque()  # [instance_id, event, coalesce_key]
+        self._pending: Dict[Tuple, list] = {}  # coalesce_key -> queued entry
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.last_lag_ms = 0
+        self.max_lag_ms = 0
+
+    def offer(self, instance_id: str, event) -> bool:
+        """Queue an event without blocking; False if it was filtered out"""
+        if self.event_types is not None and event.event_type not in self.event_types:
+            return False
+        self.published += 1
+
+        key = None
+        group = self.coalesce_groups.get(event.event_type)
+        if group is not None:
+            key = (instance_id, group, event.data.get("node_id"))
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry[1] = event
+                self.coalesced += 1
+                return True
+
+        if len(self._queue) >= self.max_queue:
+            _, _, dropped_key = self._queue.popleft()
+            if dropped_key is not None:
+                self._pending.pop(dropped_key, None)
+            self.dropped += 1
+
+        entry = [instance_id, event, key]
+        self._queue.append(entry)
+        if key is not None:
+            self._pending[key] = entry
+        self.max_depth = max(self.max_depth, len(self._queue))
+
+        self._ensure_running()
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._task = loop.create_task(self._run(), name=f"event-bus-{self.name}")
+
+    async def _run(self):
+        while True:
+            if not self._queue:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                instance_id, event, key = self._queue.popleft()
+                if key is not None:
+                    self._pending.pop(key, None)
+                batch.append((instance_id, event))
+
+            try:
+                if self.batch_size > 1:
+                    await self.handler(batch)
+                else:
+                    await self.handler(*batch[0])
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in event subscriber '{self.name}': {e}")
+
+            self.delivered += len(batch)
+            lag_ms = int((datetime.now() - batch[-1][1].timestamp).total_seconds() * 1000)
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until every queued event has been handled"""
+        if self._task is None or self._task.done() or (not self._queue and self._idle.is_set()):
+            return
+        await asyncio.wait_for(self._idle.wait(), timeout)
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self._queue),
+            "max_depth": self.max_depth,
+            "max_queue": self.max_queue,
+            "published": self.published,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms
+        }
+
+
+class EventBus:
+    """Fans execution events out to independent subscribers
+
+    ``publish`` never blocks the engine: each subscriber has its own bounded
+    queue and consumer task, so a slow WebSocket client or database cannot
+    delay execution or the other subscribers.
+    """
+
+    def __init__(self):
+        self.subscriptions: Dict[str, Subscription] = {}
+
+    def subscribe(
+        self,
+        name: str,
+        handler: EventHandler,
+        max_queue: Optional[int] = None,
+        coalesce_types: Union[Iterable[str], Dict[str, str]] = (),
+        event_types: Optional[Iterable[str]] = None,
+        batch_size: int = 1
+    ) -> Subscription:
+        """Register ``handler`` under ``name``, replacing any subscriber of that name
+
+        The handler is awaited with ``(instance_id, event)``, or with a list of
+        such pairs when ``batch_size`` is greater than 1.
+        """
+        subscription = Subscription(
+            name,
+            handler,
+            max_queue or settings.WORKFLOW_EVENT_QUEUE_SIZE,
+            coalesce_types,
+            event_types,
+            batch_size
+        )
+        self.subscriptions[name] = subscription
+        return subscription
+
+    def unsubscribe(self, name: str):
+        self.subscriptions.pop(name, None)
+
+    def publish(self, instance_id: str, event):
+        """Queue an event for every subscriber"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to deliver on (synchronous caller)
+            for subscription in self.subscriptions.values():
+                subscription.dropped += 1
+            return
+
+        for subscription in list(self.subscriptions.values()):
+            subscription.offer(instance_id, event)
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until all subscribers have caught up"""
+        for subscription in list(self.subscriptions.values()):
+            await subscription.drain(timeout)
+
+    async def close(self, timeout: float = 5.0):
+        """Deliver what is queued (up to ``timeout`` per subscriber), then stop"""
+        for subscription in list(self.subscriptions.values()):
+            try:
+                await subscription.drain(timeout)
+            except asyncio.TimeoutError:
+                print(f"Event subscriber '{subscription.name}' did not drain in {timeout}s")
+            await subscription.stop()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get queue and delivery metrics per subscriber"""
+        return {name: subscription.get_stats() for name, subscription in self.subscriptions.items()}
+
+
+# Global event bus instance
+event_bus = EventBus()
@@ -0,0 +1,199 @@
+"""
+Standard Subscribers of the Workflow Event Bus
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from ...core.config import settings
+from ...models.database import AsyncSessionLocal
+from ...models.workflow import WorkflowInstance
+from .event_bus import EventBus, event_bus
+
+# Status changes of one step; each supersedes the previous one
+STEP_STATUS_EVENT_TYPES = (
+    "step_started",
+    "step_completed",
+    "step_cached",
+    "step_restored",
+    "step_failed",
+    "step_timed_out",
+    "step_cancelled",
+)
+
+# Superseded by the next one of their group (per instance and step); only the
+# latest is worth sending to a slow client
+COALESCED_EVENT_TYPES = {
+    "execution_progress": "execution_progress",
+    **{event_type: "step_status" for event_type in STEP_STATUS_EVENT_TYPES},
+}
+
+# Events appended to WorkflowInstance.execution_logs
+JOURNALED_EVENT_TYPES = (
+    "execution_started",
+    "execution_resumed",
+    "execution_completed",
+    "execution_failed",
+    "execution_cancelled",
+    "execution_stopped",
+    *STEP_STATUS_EVENT_TYPES,
+)
+
+
+class EventLogJournal:
+    """Appends execution events to ``WorkflowInstance.execution_logs`` in batches"""
+
+    def __init__(self, session_factory=None, max_entries: int = None):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.max_entries = max_entries or settings.WORKFLOW_EVENT_LOG_MAX_ENTRIES
+
+    async def __call__(self, batch: List[Tuple[str, Any]]):
+        by_instance: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for instance_id, event in batch:
+            by_instance[instance_id].append(event.to_dict())
+
+        async with self.session_factory() as db:
+            for instance_id, entries in by_instance.items():
+                instance = await db.get(WorkflowInstance, instance_id)
+                if instance is None:
+                    continue
+                # Reassign so SQLAlchemy sees the JSON column change
+                instance.execution_logs = ((instance.execution_logs or []) + entries)[-self.max_entries:]
+            await db.commit()
+
+
+class ExecutionLogRelay:
+    """Forwards events journaled by worker processes to this process's WebSocket clients
+
+    Runs executed by queue workers publish to the workers' own event bus,
+    which has no WebSocket subscriber. The API process polls the
+    ``execution_logs`` of instances a client is watching and sends entries
+    added since the last poll. Only journaled event types are relayed.
+    """
+
+    def __init__(self, session_factory=None, interval: float = None, manager=None):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.interval = interval or settings.WORKFLOW_EVENT_RELAY_INTERVAL
+        self.manager = manager
+        self.relayed = 0
+        # Last entry sent per watched instance; None when nothing was logged yet
+        self._cursors: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.manager is None:
+            from .websocket_manager import websocket_manager
+            self.manager = websocket_manager
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="event-log-relay")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"Error relaying workflow events: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def poll(self):
+        """Send entries logged since the last poll to the clients of each watched instance"""
+        from .execution_engine import ExecutionEvent
+
+        watched = self.manager.get_all_instances()
+        for instance_id in list(self._cursors):
+            if instance_id not in watched:
+                del self._cursors[instance_id]
+        if not watched:
+            return
+
+        async with self.session_factory() as db:
+            for instance_id in watched:
+                instance = await db.get(WorkflowInstance, instance_id)
+                logs = (instance.execution_logs if instance else None) or []
+                if instance_id not in self._cursors:
+                    # A new client gets events from now on; it reads history from the API
+                    self._cursors[instance_id] = logs[-1] if logs else None
+                    continue
+
+                for entry in self._entries_after(logs, self._cursors[instance_id]):
+                    event = ExecutionEvent(
+                        entry["event_type"], entry.get("data") or {}, datetime.fromisoformat(entry["timestamp"])
+                    )
+                    await self.manager.send_event(instance_id, event)
+                    self.relayed += 1
+                if logs:
+                    self._cursors[instance_id] = logs[-1]
+
+    @staticmethod
+    def _entries_after(logs: List[Dict[str, Any]], cursor: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if cursor is None:
+            return logs
+        for index in range(len(logs) - 1, -1, -1):
+            if logs[index] == cursor:
+                return logs[index + 1:]
+        # The cursor was trimmed off the capped log; everything left is newer
+        return logs
+
+
+class ExecutionMetrics:
+    """Counts events and step timings for the metrics endpoint"""
+
+    def __init__(self):
+        self.events: Dict[str, int] = defaultdict(int)
+        self.step_count = 0
+        self.step_time_ms_total = 0
+        self.step_time_ms_max = 0
+
+    async def __call__(self, instance_id: str, event):
+        self.events[event.event_type] += 1
+        if event.event_type in ("step_completed", "step_timed_out"):
+            elapsed = event.data.get("execution_time_ms") or 0
+            self.step_count += 1
+            self.step_time_ms_total += elapsed
+            self.step_time_ms_max = max(self.step_time_ms_max, elapsed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "events": dict(self.events),
+            "steps_executed": self.step_count,
+            "avg_step_time_ms": self.step_time_ms_total // self.step_count if self.step_count else 0,
+            "max_step_time_ms": self.step_time_ms_max
+        }
+
+
+# Global metrics subscriber instance
+execution_metrics = ExecutionMetrics()
+
+# Global relay of worker events, started by the API process when runs are queued
+execution_log_relay = ExecutionLogRelay()
+
+
+def register_event_subscribers(bus: EventBus = None, websocket: bool = True):
+    """Subscribe the WebSocket push, database journal and metrics consumers"""
+    bus = bus or event_bus
+
+    if websocket:
+        from .websocket_manager import websocket_manager
+        bus.subscribe(
+            "websocket",
+            websocket_manager.send_event,
+            coalesce_types=COALESCED_EVENT_TYPES
+        )
+
+    bus.subscribe(
+        "journal",
+        EventLogJournal(),
+        event_types=JOURNALED_EVENT_TYPES,
+        batch_size=settings.WORKFLOW_EVENT_JOURNAL_BATCH_SIZE
+    )
+    bus.subscribe("metrics", execution_metrics)
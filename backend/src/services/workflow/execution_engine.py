@@ -2,16 +2,32 @@
 Enhanced Workflow Execution Engine with Real-time Updates
 """
 import asyncio
+import logging
 import uuid
-import json
-from typing import Dict, Any, List, Optional, Callable
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Callable, Tuple, Union
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...models.workflow import WorkflowInstance, WorkflowExecutionStep
+from ...core.config import settings
+from ...models.workflow import WorkflowInstance, WorkflowTemplate
 from ...schemas.workflow_components import ExecutionContext, ExecutionResult
 from ...schemas.workflow_editor import WorkflowEditorData
-from .component_registry import component_registry
+from .blob_store import blob_store
+from .event_bus import event_bus
+from .execution_plan import ExecutionPlan, execution_plan_cache
+from .graph_analyzer import analyze_workflow, describe_errors
+from .node_cache import node_result_cache
+from .output_view import UpstreamOutputs
+from .resource_governor import resource_governor
+from .step_journal import MemoryJournal, StepJournal, load_checkpoints, recover_step_journal
+from .streaming import StreamStage, run_stream_pipeline
+from .tracing import (
+    COMPONENT, DB, INIT, INPUT, QUEUE, RUN, STORAGE,
+    ExecutionTrace, activate_trace, current_trace, deactivate_trace, set_current_node, trace_span
+)
+
+logger = logging.getLogger(__name__)
 
 
 class ExecutionEvent:
@@ -33,10 +49,19 @@ class ExecutionEvent:
 class WorkflowExecutionEngine:
     """Enhanced workflow execution engine with real-time updates"""
     
-    def __init__(self, db: Session):
+    # Shared by every engine in the process, so a request-scoped engine can stop
+    # a run started by the background task's engine
+    active_executions: Dict[str, asyncio.Task] = {}
+    # Set once a run has recorded its outcome on the instance
+    finished_executions: Dict[str, asyncio.Event] = {}
+    
+    def __init__(self, db: AsyncSession, max_concurrency: Optional[int] = None):
         self.db = db
-        self.active_executions: Dict[str, asyncio.Task] = {}
+        self.max_concurrency = max_concurrency or settings.WORKFLOW_MAX_CONCURRENCY
         self.event_callbacks: List[Callable[[str, ExecutionEvent], None]] = []
+        # Set when the run now belongs to someone else (a worker whose lease was
+        # reclaimed): cancelling it then leaves the instance and its steps alone
+        self.abandoned = False
     
     def add_event_callback(self, callback: Callable[[str, ExecutionEvent], None]):
         """Add a callback for execution events"""
@@ -48,59 +73,136 @@ class WorkflowExecutionEngine:
             self.event_callbacks.remove(callback)
     
     def _emit_event(self, instance_id: str, event: ExecutionEvent):
-        """Emit an event to all registered callbacks"""
+        """Emit an event to all registered callbacks and the event bus"""
         for callback in self.event_callbacks:
             try:
                 callback(instance_id, event)
             except Exception as e:
                 print(f"Error in event callback: {e}")
+        
+        # WebSocket, journal and metrics subscribers consume it asynchronously
+        event_bus.publish(instance_id, event)
     
-    async def execute_workflow(self, instance_id: str, input_data: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Execute a workflow instance"""
+    async def execute_workflow(
+        self,
+        instance_id: str,
+        input_data: Dict[str, Any] = None,
+        resume: bool = False,
+        plan: Optional[ExecutionPlan] = None
+    ) -> Dict[str, Any]:
+        """Execute a workflow instance
         
+        With ``resume`` the previous run is continued: nodes that completed in
+        it are restored from their checkpointed step rows instead of running
+        again, and execution picks up at the nodes that failed or never ran.
+        
+        ``plan`` is the already compiled and analyzed plan of the instance's
+        workflow (bulk runs share one); by default it is looked up by hash.
+        
+        The run's spans (see tracing.py) are saved to ``instance.trace_data``.
+        """
+        trace = ExecutionTrace(instance_id) if settings.WORKFLOW_TRACING_ENABLED else None
+        token = activate_trace(trace)
+        try:
+            return await self._run_workflow(instance_id, input_data, resume, plan)
+        finally:
+            deactivate_trace(token)
+    
+    async def _run_workflow(
+        self,
+        instance_id: str,
+        input_data: Optional[Dict[str, Any]],
+        resume: bool,
+        plan: Optional[ExecutionPlan]
+    ) -> Dict[str, Any]:
         # Get workflow instance from database
-        instance = self.db.query(WorkflowInstance).filter(
-            WorkflowInstance.id == instance_id
-        ).first()
+        with trace_span("load instance", DB):
+            instance = await self.db.get(WorkflowInstance, instance_id)
         
         if not instance:
             raise ValueError(f"Workflow instance {instance_id} not found")
         
-        # Update instance status
-        instance.status = "running"
-        instance.started_at = datetime.now()
+        # Reject broken graphs before any node runs (analyzed once per revision)
+        if plan is not None and plan.analysis is not None:
+            analysis = plan.analysis
+        else:
+            stored = None
+            if instance.template_id and execution_plan_cache.get_plan(instance.workflow_data).analysis is None:
+                # Cold plan cache (e.g. a fresh worker): reuse the save-time analysis
+                with trace_span("load stored analysis", DB):
+                    template = await self.db.get(WorkflowTemplate, instance.template_id)
+                stored = template.graph_analysis if template else None
+            analysis = analyze_workflow(instance.workflow_data, stored)
+        if not analysis["valid"]:
+            error = describe_errors(analysis)
+            instance.status = "failed"
+            instance.completed_at = datetime.now()
+            instance.error_message = error
+            await self.db.commit()
+            self._emit_event(instance_id, ExecutionEvent(
+                "execution_failed",
+                {"instance_id": instance_id, "error": error, "validation_errors": analysis["errors"]}
+            ))
+            raise ValueError(error)
+        
+        # Steps a crashed earlier run left in its write-ahead file go in first
+        with trace_span("recover journal", DB):
+            await recover_step_journal(self.db, instance_id)
         
-        # Use instance input_data if no input_data provided in execution call
-        if not input_data and instance.input_data:
+        checkpoints = {}
+        if resume and instance.started_at:
+            # A resumed run continues the original one, so it keeps its start time
+            with trace_span("load checkpoints", DB):
+                checkpoints = await load_checkpoints(self.db, instance_id, instance.started_at)
             input_data = instance.input_data
-        elif input_data:
-            # Update instance with new input_data
-            instance.input_data = input_data
+        else:
+            instance.started_at = datetime.now()
+            instance.execution_logs = []
+            
+            # Use instance input_data if no input_data provided in execution call
+            if not input_data and instance.input_data:
+                input_data = instance.input_data
+            elif input_data:
+                # Update instance with new input_data
+                instance.input_data = input_data
         
-        instance.execution_logs = []
-        self.db.commit()
+        # Update instance status
+        instance.status = "running"
+        instance.completed_at = None
+        instance.error_message = None
+        with trace_span("save run status", DB):
+            await self.db.commit()
         
         # Emit execution started event
-        self._emit_event(instance_id, ExecutionEvent(
-            "execution_started",
-            {"instance_id": instance_id, "input_data": input_data}
-        ))
+        if resume:
+            self._emit_event(instance_id, ExecutionEvent(
+                "execution_resumed",
+                {"instance_id": instance_id, "restored_nodes": list(checkpoints.keys())}
+            ))
+        else:
+            self._emit_event(instance_id, ExecutionEvent(
+                "execution_started",
+                {"instance_id": instance_id, "input_data": input_data}
+            ))
         
+        finished = self.finished_executions[instance_id] = asyncio.Event()
         try:
             # Create execution task
             task = asyncio.create_task(
-                self._execute_workflow_steps(instance, input_data or {})
+                self._execute_workflow_steps(instance, input_data or {}, checkpoints, plan=plan)
             )
             self.active_executions[instance_id] = task
             
             # Wait for execution to complete
-            result = await task
+            with trace_span("execute workflow", RUN):
+                result = await task
             
             # Update instance with results
             instance.status = "completed"
             instance.completed_at = datetime.now()
             instance.output_data = result
-            self.db.commit()
+            self._save_trace(instance)
+            await self.db.commit()
             
             # Emit execution completed event
             self._emit_event(instance_id, ExecutionEvent(
@@ -115,7 +217,8 @@ class WorkflowExecutionEngine:
             instance.status = "failed"
             instance.completed_at = datetime.now()
             instance.error_message = str(e)
-            self.db.commit()
+            self._save_trace(instance)
+            await self.db.commit()
             
             # Emit execution failed event
             self._emit_event(instance_id, ExecutionEvent(
@@ -125,80 +228,288 @@ class WorkflowExecutionEngine:
             
             raise e
         
+        except asyncio.CancelledError:
+            if self.abandoned:
+                # The new owner of the run records its outcome
+                raise
+            # Stopped by stop_execution or by the worker's job being cancelled
+            instance.status = "cancelled"
+            instance.completed_at = datetime.now()
+            self._save_trace(instance)
+            await self.db.commit()
+            
+            self._emit_event(instance_id, ExecutionEvent(
+                "execution_cancelled",
+                {"instance_id": instance_id}
+            ))
+            
+            raise
+        
         finally:
             # Clean up
             if instance_id in self.active_executions:
                 del self.active_executions[instance_id]
+            if self.finished_executions.get(instance_id) is finished:
+                del self.finished_executions[instance_id]
+            finished.set()
     
-    async def _execute_workflow_steps(self, instance: WorkflowInstance, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute workflow steps"""
+    async def run_subworkflow(
+        self,
+        run_id: str,
+        workflow_data: Dict[str, Any],
+        input_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Run a workflow graph in memory as part of another run's node
         
-        workflow_data = instance.workflow_data
-        nodes = {node["id"]: node for node in workflow_data["nodes"]}
-        edges = workflow_data["edges"]
+        Used by the map component, once per item or chunk. The sub-run has no
+        instance row: its steps are kept in memory and its events are published
+        under ``run_id``. Besides the usual step results, returns ``output`` (the
+        output of its only sink node, or a dict keyed by sink node id) and
+        ``failed_steps`` (node id and error of every step that failed).
+        """
+        analysis = analyze_workflow(workflow_data)
+        if not analysis["valid"]:
+            raise ValueError(describe_errors(analysis))
         
-        # Find trigger nodes (nodes with no incoming edges)
-        incoming_edges = {edge["target"] for edge in edges}
-        trigger_nodes = [node_id for node_id in nodes.keys() if node_id not in incoming_edges]
+        journal = MemoryJournal()
+        result = await self._execute_workflow_steps(
+            SimpleNamespace(id=run_id, workflow_data=workflow_data), input_data, journal=journal
+        )
         
-        if not trigger_nodes:
-            raise ValueError("No trigger nodes found in workflow")
+        plan = execution_plan_cache.get_plan(workflow_data)
+        node_outputs = result["node_outputs"]
+        sinks = [
+            node_id for node_id in plan.topological_order
+            if not plan.adjacency.get(node_id) and node_id in node_outputs
+        ]
+        outputs = {node_id: await blob_store.resolve_all(node_outputs[node_id]) for node_id in sinks}
+        result["output"] = outputs[sinks[0]] if len(sinks) == 1 else outputs
+        result["failed_steps"] = [
+            {"node_id": row["node_id"], "error": row["error_message"]}
+            for row in journal.rows if row["status"] in ("failed", "timed_out")
+        ]
+        return result
+    
+    def _save_trace(self, instance: WorkflowInstance):
+        """Attach the current run's trace to the instance (saved with its final commit)"""
+        trace = current_trace()
+        if trace is not None:
+            instance.trace_data = trace.to_dict()
+    
+    async def _execute_workflow_steps(
+        self,
+        instance: WorkflowInstance,
+        input_data: Dict[str, Any],
+        checkpoints: Optional[Dict[str, Dict[str, Any]]] = None,
+        journal: Optional[Union[StepJournal, MemoryJournal]] = None,
+        plan: Optional[ExecutionPlan] = None
+    ) -> Dict[str, Any]:
+        """Execute workflow steps
+        
+        Nodes are scheduled by in-degree: a node becomes ready once every
+        incoming edge has been resolved, and all ready nodes run concurrently
+        (bounded by ``max_concurrency``). An edge is resolved either by firing
+        (its source succeeded on that handle) or by being skipped (its source
+        failed, took another handle, or was itself skipped). A node with no
+        fired incoming edge is skipped and propagates the skip downstream.
+        
+        A ready node with an entry in ``checkpoints`` is not executed; its
+        saved output and fired handles are restored instead.
+        
+        A ready node heading one of the plan's ``stream_chains`` runs the whole
+        chain as a single pipelined task; the chain's later stages are not
+        scheduled on their own, and every stage's result is routed once the
+        pipeline ends.
+        """
+        checkpoints = checkpoints or {}
         
-        # Build adjacency list for efficient traversal
-        adjacency = {}
-        for edge in edges:
-            source = edge["source"]
-            target = edge["target"]
-            if source not in adjacency:
-                adjacency[source] = []
-            adjacency[source].append({
-                "target": target,
-                "source_handle": edge.get("sourceHandle"),
-                "target_handle": edge.get("targetHandle")
-            })
+        # Compiled once per workflow revision and shared between runs
+        plan = plan or execution_plan_cache.get_plan(instance.workflow_data)
+        
+        if not plan.trigger_nodes:
+            raise ValueError("No trigger nodes found in workflow")
         
         # Track execution state
         executed_nodes = set()
+        skipped_nodes = set()
+        restored_nodes = set()
+        streamed_nodes = set()  # Chain stages run by their head's pipeline
         node_outputs = {}
         global_variables = {}
         
-        # Execute trigger nodes first
-        for trigger_node_id in trigger_nodes:
-            if trigger_node_id not in executed_nodes:
-                await self._execute_node(
-                    instance.id,
-                    trigger_node_id,
-                    nodes[trigger_node_id],
-                    input_data,
-                    node_outputs,
-                    global_variables,
-                    executed_nodes,
-                    adjacency
-                )
+        pending_inputs = dict(plan.in_degree)  # Incoming edges not yet resolved
+        fired_inputs = {node_id: 0 for node_id in plan.nodes}  # Incoming edges that fired
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        running: Dict[asyncio.Task, str] = {}
+        journal = journal or StepJournal(self.db, instance.id)
+        
+        def schedule(node_id: str):
+            chain = plan.stream_chains.get(node_id)
+            # A partly checkpointed chain resumes node by node
+            if chain and not any(stage in checkpoints for stage in chain):
+                streamed_nodes.update(chain[1:])
+                execute = self._execute_stream_chain_with_limit
+                target = chain
+            else:
+                execute = self._execute_node_with_limit
+                target = node_id
+            task = asyncio.create_task(execute(
+                semaphore,
+                instance.id,
+                plan,
+                target,
+                input_data,
+                node_outputs,
+                global_variables,
+                executed_nodes,
+                journal
+            ))
+            running[task] = node_id
+        
+        def restore(node_id: str) -> List[Tuple[str, bool]]:
+            checkpoint = checkpoints[node_id]
+            node_outputs[node_id] = checkpoint["output_data"]
+            executed_nodes.add(node_id)
+            restored_nodes.add(node_id)
+            self._emit_event(instance.id, ExecutionEvent(
+                "step_restored",
+                {"node_id": node_id, "output_data": checkpoint["output_data"]}
+            ))
+            return plan.route(node_id, checkpoint["next_steps"])
+        
+        def resolve_edges(resolved: List[Tuple[str, bool]]):
+            # Iterative so long skipped chains don't hit the recursion limit
+            while resolved:
+                target, fired = resolved.pop()
+                pending_inputs[target] -= 1
+                if fired:
+                    fired_inputs[target] += 1
+                if pending_inputs[target] > 0 or target in streamed_nodes:
+                    continue
+                if not fired_inputs[target]:
+                    skipped_nodes.add(target)
+                    resolved.extend(plan.route(target, None))
+                elif target in checkpoints:
+                    resolved.extend(restore(target))
+                else:
+                    schedule(target)
+        
+        restored_edges = []
+        for trigger_node_id in plan.trigger_nodes:
+            if trigger_node_id in checkpoints:
+                restored_edges.extend(restore(trigger_node_id))
+            else:
+                schedule(trigger_node_id)
+        resolve_edges(restored_edges)
+        
+        try:
+            while running:
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node_id = running.pop(task)
+                    outcome = task.result()
+                    
+                    # A stream chain reports every stage, in chain order
+                    steps = outcome if isinstance(outcome, list) else [(node_id, outcome)]
+                    for step_id, result in steps:
+                        # Check which output handles fired
+                        resolve_edges(plan.route(step_id, result.next_steps if result.success else None))
+                    
+                    self._emit_event(instance.id, ExecutionEvent(
+                        "execution_progress",
+                        {
+                            "completed": len(executed_nodes),
+                            "skipped": len(skipped_nodes),
+                            "total": len(plan.nodes)
+                        }
+                    ))
+        finally:
+            # A failing node aborts the run; don't leave sibling branches behind
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+            # Persist whatever steps completed, including on failure
+            await journal.close()
         
         # Return final outputs
         return {
             "node_outputs": node_outputs,
             "global_variables": global_variables,
-            "executed_nodes": list(executed_nodes)
+            "executed_nodes": list(executed_nodes),
+            "skipped_nodes": list(skipped_nodes),
+            "restored_nodes": list(restored_nodes)
+        }
+    
+    async def _acquire_slot(self, semaphore: asyncio.Semaphore):
+        """Take a run concurrency slot, tracing the wait if there is one"""
+        if not semaphore.locked():
+            await semaphore.acquire()
+            return
+        with trace_span("wait for run slot", QUEUE):
+            await semaphore.acquire()
+    
+    async def _execute_node_with_limit(self, semaphore: asyncio.Semaphore, *args) -> ExecutionResult:
+        """Execute a single node once a concurrency slot is free"""
+        # Spans recorded in this task belong to the node (args[2] is node_id)
+        set_current_node(args[2])
+        await self._acquire_slot(semaphore)
+        try:
+            return await self._execute_node(*args)
+        finally:
+            semaphore.release()
+    
+    async def _execute_stream_chain_with_limit(self, semaphore: asyncio.Semaphore, *args) -> List[Tuple[str, ExecutionResult]]:
+        """Execute a stream chain once a concurrency slot is free; the chain takes one slot"""
+        set_current_node(args[2][0])
+        await self._acquire_slot(semaphore)
+        try:
+            return await self._execute_stream_chain(*args)
+        finally:
+            semaphore.release()
+    
+    def _step_row(
+        self,
+        instance_id: str,
+        node_id: str,
+        node_type: str,
+        node_data: Dict[str, Any],
+        input_data: Dict[str, Any],
+        status: str,
+        step_result: Optional[ExecutionResult],
+        started_at: datetime
+    ) -> Dict[str, Any]:
+        """Build a workflow_steps row for the journal"""
+        return {
+            "id": str(uuid.uuid4()),
+            "workflow_instance_id": instance_id,
+            "step_name": node_data.get("label", node_type),
+            "step_type": node_type,
+            "node_id": node_id,
+            "input_data": input_data,
+            "output_data": step_result.output_data if step_result else None,
+            "status": status,
+            "error_message": step_result.error if step_result else "Execution cancelled",
+            "execution_time_ms": step_result.execution_time_ms if step_result else None,
+            "next_steps": step_result.next_steps if status == "completed" else None,
+            "started_at": started_at,
+            "completed_at": datetime.now()
         }
     
     async def _execute_node(
         self,
         instance_id: str,
+        plan: ExecutionPlan,
         node_id: str,
-        node: Dict[str, Any],
         workflow_input: Dict[str, Any],
         node_outputs: Dict[str, Any],
         global_variables: Dict[str, Any],
         executed_nodes: set,
-        adjacency: Dict[str, List[Dict[str, Any]]]
-    ):
+        journal: StepJournal
+    ) -> ExecutionResult:
         """Execute a single node"""
         
-        if node_id in executed_nodes:
-            return
-        
+        node = plan.nodes[node_id]
         node_type = node["type"]
         node_data = node["data"]
         
@@ -208,109 +519,123 @@ class WorkflowExecutionEngine:
             {"node_id": node_id, "node_type": node_type, "node_data": node_data}
         ))
         
-        # DEBUG: Log node config for GoogleSheetsWrite
-        if node_type == "google_sheets_write":
-            with open("d:/EmbeddedChat/frontend_execution_debug.log", "a", encoding="utf-8") as f:
-                f.write(f"\n=== GOOGLE SHEETS WRITE NODE EXECUTION ===\n")
-                f.write(f"Node ID: {node_id}\n")
-                f.write(f"Node Type: {node_type}\n")
-                f.write(f"Node Data: {json.dumps(node_data, indent=2, ensure_ascii=False)}\n")
-                f.write(f"Config from node_data: {json.dumps(node_data.get('config', {}), indent=2, ensure_ascii=False)}\n")
-                f.write(f"==========================================\n")
-        
         try:
             # Get component for this node type
-            component_class = component_registry.get_component(node_type)
-            component = component_class()
+            with trace_span("init component", INIT):
+                component_class = plan.get_component_class(node_id)
+                component = component_class()
             
-            # Prepare execution context
-            input_data = {**workflow_input, **node_data.get("config", {})}
+            with trace_span("resolve inputs", INPUT):
+                # Prepare execution context
+                input_data = {**workflow_input, **node_data.get("config", {})}
             
-            # DEBUG: Log execution context for GoogleSheetsWrite
-            if node_type == "google_sheets_write":
-                with open("d:/EmbeddedChat/frontend_execution_debug.log", "a", encoding="utf-8") as f:
-                    f.write(f"\n=== EXECUTION CONTEXT ===\n")
-                    f.write(f"Input Data: {json.dumps(input_data, indent=2, ensure_ascii=False)}\n")
-                    f.write(f"Previous Outputs: {json.dumps(node_outputs, indent=2, ensure_ascii=False)}\n")
-                    f.write(f"Global Variables: {json.dumps(global_variables, indent=2, ensure_ascii=False)}\n")
-                    f.write(f"========================\n")
+                context = ExecutionContext(
+                    workflow_id=instance_id,
+                    instance_id=instance_id,
+                    step_id=node_id,
+                    input_data=input_data,
+                    # Upstream nodes only, nearest first; large values stay in the
+                    # blob store until the component reads them
+                    previous_outputs=UpstreamOutputs(node_outputs, plan.ancestors[node_id]),
+                    global_variables=global_variables
+                )
             
-            context = ExecutionContext(
-                workflow_id=instance_id,
-                instance_id=instance_id,
-                step_id=node_id,
-                input_data=input_data,
-                previous_outputs=node_outputs,
-                global_variables=global_variables
-            )
+            # Opt-in result cache keyed by what this node can see
+            node_config = node_data.get("config", {})
+            cache_key = None
+            cached = None
+            if node_config.get("cache_results"):
+                with trace_span("cache lookup", STORAGE):
+                    cache_key = node_result_cache.make_key(
+                        node_type,
+                        input_data,
+                        {ancestor: node_outputs.get(ancestor) for ancestor in plan.ancestors[node_id]}
+                    )
+                    cached = await node_result_cache.get(cache_key)
             
-            # Execute component
-            result = await component.execute(context)
+            def step_row(status: str, step_result: Optional[ExecutionResult]) -> Dict[str, Any]:
+                return self._step_row(
+                    instance_id, node_id, node_type, node_data, input_data, status, step_result, started_at
+                )
             
-            # Store execution step in database
-            step = WorkflowExecutionStep(
-                id=str(uuid.uuid4()),
-                workflow_instance_id=instance_id,
-                step_name=node_data.get("label", node_type),
-                step_type=node_type,
-                input_data=input_data,
-                output_data=result.output_data,
-                status="completed" if result.success else "failed",
-                error_message=result.error,
-                execution_time_ms=result.execution_time_ms,
-                started_at=datetime.now(),
-                completed_at=datetime.now()
-            )
+            # Execute component
+            started_at = datetime.now()
+            timed_out = False
+            if cached is not None:
+                result = ExecutionResult(**cached)
+            else:
+                timeout = plan.max_runtime_seconds.get(node_id) or settings.WORKFLOW_NODE_TIMEOUT_SECONDS or None
+                try:
+                    # Queue behind other runs' nodes of this type; the deadline starts once admitted
+                    async with resource_governor.component(node_type):
+                        # Cancelling the component's coroutine aborts its in-flight awaits (HTTP, AI calls)
+                        with trace_span("execute", COMPONENT):
+                            result = await asyncio.wait_for(component.execute(context), timeout)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    result = ExecutionResult(
+                        success=False,
+                        output_data={},
+                        error=f"Node exceeded its {timeout}s runtime limit",
+                        execution_time_ms=int((datetime.now() - started_at).total_seconds() * 1000),
+                        logs=[f"Timed out after {timeout}s"]
+                    )
+                except asyncio.CancelledError:
+                    # Run stopped: record the step so the journal is not left half-written
+                    if not self.abandoned:
+                        await journal.record(step_row("cancelled", None))
+                        self._emit_event(instance_id, ExecutionEvent(
+                            "step_cancelled",
+                            {"node_id": node_id}
+                        ))
+                    raise
+                # Spill large values so the in-memory outputs, journal rows and
+                # events only carry references
+                with trace_span("spill outputs", STORAGE):
+                    result.output_data = await blob_store.spill(result.output_data)
+                if cache_key and result.success:
+                    with trace_span("cache store", STORAGE):
+                        await node_result_cache.set(
+                            cache_key, result.model_dump(), node_config.get("cache_ttl_seconds")
+                        )
             
-            self.db.add(step)
-            self.db.commit()
+            # Journal execution step (bulk-inserted into the database); completed
+            # steps double as the checkpoints a resumed run restores from
+            if timed_out:
+                step_status = "timed_out"
+            else:
+                step_status = "completed" if result.success else "failed"
+            with trace_span("journal step", DB):
+                await journal.record(step_row(step_status, result))
             
             # Store node output
             node_outputs[node_id] = result.output_data
             executed_nodes.add(node_id)
             
-            print(f"🔧 Node {node_id} executed successfully!")
-            print(f"🔧 Output keys: {list(result.output_data.keys()) if isinstance(result.output_data, dict) else type(result.output_data)}")
-            print(f"🔧 Current node_outputs keys: {list(node_outputs.keys())}")
+            logger.debug("Node %s executed", node_id)
             
-            # Emit step completed event
-            self._emit_event(instance_id, ExecutionEvent(
-                "step_completed",
-                {
-                    "node_id": node_id,
-                    "success": result.success,
-                    "output_data": result.output_data,
-                    "execution_time_ms": result.execution_time_ms,
-                    "logs": result.logs
-                }
-            ))
-            
-            if result.success:
-                # Execute next nodes based on successful execution
-                if node_id in adjacency:
-                    for next_connection in adjacency[node_id]:
-                        # Check if this is the correct output handle
-                        if not next_connection["source_handle"] or next_connection["source_handle"] in result.next_steps:
-                            next_node_id = next_connection["target"]
-                            next_node = self.db.query(WorkflowInstance).filter(
-                                WorkflowInstance.id == instance_id
-                            ).first().workflow_data["nodes"]
-                            
-                            next_node_obj = next((n for n in next_node if n["id"] == next_node_id), None)
-                            if next_node_obj:
-                                await self._execute_node(
-                                    instance_id,
-                                    next_node_id,
-                                    next_node_obj,
-                                    workflow_input,
-                                    node_outputs,
-                                    global_variables,
-                                    executed_nodes,
-                                    adjacency
-                                )
+            # Emit step completed (or served from cache) event
+            event_data = {
+                "node_id": node_id,
+                "success": result.success,
+                "output_data": result.output_data,
+                "execution_time_ms": result.execution_time_ms,
+                "logs": result.logs
+            }
+            if cached is not None:
+                event_data["cache_key"] = cache_key
+                event_type = "step_cached"
+            elif timed_out:
+                event_type = "step_timed_out"
             else:
+                event_type = "step_completed"
+            self._emit_event(instance_id, ExecutionEvent(event_type, event_data))
+            
+            if not result.success:
                 # Handle error case - could trigger error handlers
-                print(f"Node {node_id} failed: {result.error}")
+                logger.warning("Node %s failed: %s", node_id, result.error)
+            
+            return result
                 
         except Exception as e:
             # Emit step failed event
@@ -320,37 +645,131 @@ class WorkflowExecutionEngine:
             ))
             raise e
     
+    async def _execute_stream_chain(
+        self,
+        instance_id: str,
+        plan: ExecutionPlan,
+        chain: List[str],
+        workflow_input: Dict[str, Any],
+        node_outputs: Dict[str, Any],
+        global_variables: Dict[str, Any],
+        executed_nodes: set,
+        journal: StepJournal
+    ) -> List[Tuple[str, ExecutionResult]]:
+        """Execute a stream chain as one pipeline, recording each stage as a step
+        
+        Records flow from stage to stage through bounded buffers, so the last
+        stage starts writing while the first is still reading. Streamed stages
+        record summary outputs; the records themselves are not kept.
+        """
+        stages = []
+        input_by_node = {}
+        for node_id in chain:
+            node = plan.nodes[node_id]
+            node_data = node["data"]
+            self._emit_event(instance_id, ExecutionEvent(
+                "step_started",
+                {"node_id": node_id, "node_type": node["type"], "node_data": node_data, "streamed": True}
+            ))
+            input_by_node[node_id] = {**workflow_input, **node_data.get("config", {})}
+            context = ExecutionContext(
+                workflow_id=instance_id,
+                instance_id=instance_id,
+                step_id=node_id,
+                input_data=input_by_node[node_id],
+                previous_outputs=UpstreamOutputs(node_outputs, plan.ancestors[node_id]),
+                global_variables=global_variables
+            )
+            with trace_span("init component", INIT, node_id=node_id):
+                component = plan.get_component_class(node_id)()
+            stages.append(StreamStage(
+                node_id,
+                component,
+                context,
+                plan.max_runtime_seconds.get(node_id) or settings.WORKFLOW_NODE_TIMEOUT_SECONDS or None
+            ))
+        
+        def record(stage: StreamStage, status: str, result: Optional[ExecutionResult]):
+            node = plan.nodes[stage.node_id]
+            return journal.record(self._step_row(
+                instance_id, stage.node_id, node["type"], node["data"],
+                input_by_node[stage.node_id], status, result, started_at
+            ))
+        
+        started_at = datetime.now()
+        try:
+            # Every stage runs at once, so admit the chain on all its component pools together
+            async with resource_governor.limit(*(f"component:{plan.nodes[node_id]['type']}" for node_id in chain)):
+                await run_stream_pipeline(stages)
+        except asyncio.CancelledError:
+            if not self.abandoned:
+                for stage in stages:
+                    await record(stage, "cancelled", None)
+                    self._emit_event(instance_id, ExecutionEvent("step_cancelled", {"node_id": stage.node_id}))
+            raise
+        
+        results = []
+        for stage in stages:
+            result = stage.result
+            with trace_span("spill outputs", STORAGE, node_id=stage.node_id):
+                result.output_data = await blob_store.spill(result.output_data)
+            if stage.timed_out:
+                step_status = "timed_out"
+            else:
+                step_status = "completed" if result.success else "failed"
+            with trace_span("journal step", DB, node_id=stage.node_id):
+                await record(stage, step_status, result)
+            
+            node_outputs[stage.node_id] = result.output_data
+            executed_nodes.add(stage.node_id)
+            self._emit_event(instance_id, ExecutionEvent(
+                "step_timed_out" if stage.timed_out else "step_completed",
+                {
+                    "node_id": stage.node_id,
+                    "success": result.success,
+                    "output_data": result.output_data,
+                    "execution_time_ms": result.execution_time_ms,
+                    "logs": result.logs,
+                    "streamed": True
+                }
+            ))
+            if not result.success:
+                logger.warning("Node %s failed: %s", stage.node_id, result.error)
+            results.append((stage.node_id, result))
+        
+        return results
+    
     async def stop_execution(self, instance_id: str) -> bool:
         """Stop a running workflow execution"""
         if instance_id in self.active_executions:
             task = self.active_executions[instance_id]
+            finished = self.finished_executions.get(instance_id)
             task.cancel()
             
-            # Update instance status
-            instance = self.db.query(WorkflowInstance).filter(
-                WorkflowInstance.id == instance_id
-            ).first()
+            # Wait for the run to unwind and mark the instance and its in-flight
+            # steps cancelled itself, so the session is not shared
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                print(f"Error stopping workflow {instance_id}: {e}")
+            if finished:
+                await finished.wait()
             
-            if instance:
-                instance.status = "cancelled"
-                instance.completed_at = datetime.now()
-                self.db.commit()
-                
-                # Emit execution stopped event
-                self._emit_event(instance_id, ExecutionEvent(
-                    "execution_stopped",
-                    {"instance_id": instance_id}
-                ))
+            # Emit execution stopped event
+            self._emit_event(instance_id, ExecutionEvent(
+                "execution_stopped",
+                {"instance_id": instance_id}
+            ))
             
             return True
         
         return False
     
-    def get_execution_status(self, instance_id: str) -> Dict[str, Any]:
+    async def get_execution_status(self, instance_id: str) -> Dict[str, Any]:
         """Get current execution status"""
-        instance = self.db.query(WorkflowInstance).filter(
-            WorkflowInstance.id == instance_id
-        ).first()
+        instance = await self.db.get(WorkflowInstance, instance_id)
         
         if not instance:
             return {"error": "Instance not found"}
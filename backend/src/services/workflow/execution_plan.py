@@ -0,0 +1,233 @@
+"""
+Compiled Workflow Execution Plans
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Type
+
+from ...core.config import settings
+from .component_registry import BaseWorkflowComponent, component_registry
+
+
+def hash_workflow_data(workflow_data: Dict[str, Any]) -> str:
+    """Stable content hash of a workflow graph (key order independent)"""
+    canonical = json.dumps(workflow_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ExecutionPlan:
+    """Pre-resolved view of a workflow graph, built once per workflow revision.
+
+    Plans are shared between runs through ``execution_plan_cache`` and must be
+    treated as read-only.
+    """
+
+    def __init__(self, workflow_hash: str, workflow_data: Dict[str, Any]):
+        self.workflow_hash = workflow_hash
+
+        # Node index
+        self.nodes: Dict[str, Dict[str, Any]] = {node["id"]: node for node in workflow_data["nodes"]}
+
+        # Adjacency lists and handle routing tables. Edges pointing at unknown
+        # nodes are dropped, the same way the editor ignores them.
+        self.adjacency: Dict[str, List[Dict[str, Any]]] = {}
+        self.upstream: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes}
+        self.handle_routes: Dict[str, Dict[Optional[str], List[str]]] = {}
+        self.in_degree: Dict[str, int] = {node_id: 0 for node_id in self.nodes}
+        for edge in workflow_data.get("edges", []):
+            source = edge["source"]
+            target = edge["target"]
+            if source not in self.nodes or target not in self.nodes:
+                continue
+            source_handle = edge.get("sourceHandle")
+            self.adjacency.setdefault(source, []).append({
+                "target": target,
+                "source_handle": source_handle,
+                "target_handle": edge.get("targetHandle")
+            })
+            self.handle_routes.setdefault(source, {}).setdefault(source_handle, []).append(target)
+            self.in_degree[target] += 1
+            if source not in self.upstream[target]:
+                self.upstream[target].append(source)
+
+        self.trigger_nodes: List[str] = [
+            node_id for node_id, degree in self.in_degree.items() if degree == 0
+        ]
+        self.topological_order: List[str] = self._topological_sort()
+        self.ancestors: Dict[str, List[str]] = {
+            node_id: self._collect_ancestors(node_id) for node_id in self.nodes
+        }
+
+        # Resolved component classes; unknown types fail when (and if) the node runs
+        self.component_classes: Dict[str, Type[BaseWorkflowComponent]] = {}
+        # Per-node deadline: node config override, else the component's metadata
+        self.max_runtime_seconds: Dict[str, Optional[float]] = {}
+        for node_id, node in self.nodes.items():
+            try:
+                component_class = component_registry.get_component(node["type"])
+            except ValueError:
+                continue
+            self.component_classes[node_id] = component_class
+            config = (node.get("data") or {}).get("config") or {}
+            self.max_runtime_seconds[node_id] = (
+                config.get("max_runtime_seconds") or component_class.get_metadata().max_runtime_seconds
+            )
+        
+        # Linear chains of streaming components run as one pipeline: head -> stages
+        self.stream_chains: Dict[str, List[str]] = (
+            self._find_stream_chains() if settings.WORKFLOW_STREAMING_ENABLED else {}
+        )
+        
+        # Static analysis result, filled in once by graph_analyzer.analyze_workflow
+        self.analysis: Optional[Dict[str, Any]] = None
+
+    def _topological_sort(self) -> List[str]:
+        """Kahn's algorithm; nodes on a cycle are left out"""
+        remaining = dict(self.in_degree)
+        order = list(self.trigger_nodes)
+        index = 0
+        while index < len(order):
+            node_id = order[index]
+            index += 1
+            for connection in self.adjacency.get(node_id, []):
+                target = connection["target"]
+                remaining[target] -= 1
+                if remaining[target] == 0:
+                    order.append(target)
+        return order
+
+    def _collect_ancestors(self, node_id: str) -> List[str]:
+        """Every node with a path to ``node_id``, nearest first"""
+        ancestors = []
+        seen = {node_id}
+        frontier = [node_id]
+        while frontier:
+            next_frontier = []
+            for current in frontier:
+                for source in self.upstream[current]:
+                    if source not in seen:
+                        seen.add(source)
+                        ancestors.append(source)
+                        next_frontier.append(source)
+            frontier = next_frontier
+        return ancestors
+
+    def _can_stream(self, node_id: str) -> bool:
+        if node_id not in self.component_classes:
+            return False
+        config = (self.nodes[node_id].get("data") or {}).get("config") or {}
+        # Cached nodes replay a whole result, which a pipeline cannot feed
+        return config.get("streaming", True) is not False and not config.get("cache_results")
+    
+    def _find_stream_chains(self) -> Dict[str, List[str]]:
+        """Find maximal chains producer -> ... -> sink of streaming components
+        
+        Each link must be the producer's only outgoing edge, on its success
+        (first) output handle, and the consumer's only incoming edge. A chain
+        must end in a sink (a component that consumes but does not produce a
+        stream) with no outgoing edges: streamed stages keep only a summary
+        output, so no node may run after the chain and read from it.
+        """
+        chains = {}
+        claimed = set()
+        for head in self.topological_order:
+            if head in claimed or not self._can_stream(head) or not self.component_classes[head].streams_output:
+                continue
+            chain = [head]
+            while True:
+                current = chain[-1]
+                component_class = self.component_classes[current]
+                connections = self.adjacency.get(current, [])
+                if not component_class.streams_output or len(connections) != 1:
+                    break
+                output_handles = component_class.get_metadata().output_handles
+                success_handle = output_handles[0].id if output_handles else None
+                target = connections[0]["target"]
+                if (
+                    connections[0]["source_handle"] not in (None, success_handle)
+                    or self.in_degree[target] != 1
+                    or target in claimed
+                    or not self._can_stream(target)
+                    or not self.component_classes[target].streams_input
+                ):
+                    break
+                chain.append(target)
+            while len(chain) > 1 and self.component_classes[chain[-1]].streams_output:
+                chain.pop()
+            if len(chain) > 1 and not self.adjacency.get(chain[-1]):
+                chains[head] = chain
+                claimed.update(chain)
+        return chains
+    
+    def get_component_class(self, node_id: str) -> Type[BaseWorkflowComponent]:
+        """Get the resolved component class for a node"""
+        if node_id not in self.component_classes:
+            raise ValueError(f"Component type '{self.nodes[node_id]['type']}' not found")
+        return self.component_classes[node_id]
+
+    def route(self, node_id: str, fired_handles: Optional[List[str]]) -> List[Tuple[str, bool]]:
+        """Resolve every outgoing edge of a finished node.
+
+        ``fired_handles`` is the component's ``next_steps`` on success, or None
+        when the node failed. Returns ``(target, fired)`` pairs, one per edge.
+        """
+        resolved = []
+        for handle, targets in self.handle_routes.get(node_id, {}).items():
+            fired = fired_handles is not None and (not handle or handle in fired_handles)
+            resolved.extend((target, fired) for target in targets)
+        return resolved
+
+
+class ExecutionPlanCache:
+    """LRU cache of compiled plans keyed by workflow_data hash"""
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._plans: "OrderedDict[str, ExecutionPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_plan(self, workflow_data: Dict[str, Any]) -> ExecutionPlan:
+        """Get the compiled plan for a workflow graph, compiling it on a miss"""
+        workflow_hash = hash_workflow_data(workflow_data)
+
+        with self._lock:
+            plan = self._plans.get(workflow_hash)
+            if plan is not None:
+                self._plans.move_to_end(workflow_hash)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        # Compile from a private copy so later edits to the caller's dict
+        # cannot leak into a shared plan
+        plan = ExecutionPlan(workflow_hash, json.loads(json.dumps(workflow_data, default=str)))
+
+        with self._lock:
+            self._plans[workflow_hash] = plan
+            self._plans.move_to_end(workflow_hash)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+
+        return plan
+
+    def clear(self):
+        """Drop all cached plans"""
+        with self._lock:
+            self._plans.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache statistics"""
+        return {
+            "size": len(self._plans),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Global plan cache instance
+execution_plan_cache = ExecutionPlanCache(max_size=settings.WORKFLOW_PLAN_CACHE_SIZE)
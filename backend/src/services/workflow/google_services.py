@@ -56,9 +56,14 @@ class GoogleSheetsService:
         sheet_name: str, 
         range_start: str, 
         mode: str, 
-        data: List[List[Any]]
+        data: List[List[Any]],
+        write_header: bool = True
     ) -> Tuple[bool, Dict[str, Any]]:
-        """Write data to Google Sheets with automatic Prompt column creation"""
+        """Write data to Google Sheets with automatic Prompt column creation
+        
+        ``data[0]`` is the header row. With ``write_header=False`` it is used
+        for column alignment only and not written.
+        """
         try:
             if not self.authenticated or not self.client:
                 return False, {"error": "Not authenticated"}
@@ -116,6 +121,9 @@ class GoogleSheetsService:
                 except Exception as header_error:
                     print(f"⚠️ Header alignment error: {header_error}, proceeding with original data")
             
+            if not write_header:
+                data = data[1:]
+            
             # Write data based on mode
             if mode == "append":
                 # Append rows to the end
@@ -192,32 +200,34 @@ class GoogleSheetsService:
             if not self.authenticated or not self.client:
                 return False, {"error": "Not authenticated"}
                 
+            # gspread is blocking; run its calls in threads so the event loop
+            # (and node timeouts) keep working while Google responds
             # Open the spreadsheet
-            sheet = self.client.open_by_key(sheet_id)
+            sheet = await asyncio.to_thread(self.client.open_by_key, sheet_id)
             
             # If no sheet_name specified, use first sheet
             if not sheet_name:
-                worksheet = sheet.sheet1
+                worksheet = await asyncio.to_thread(lambda: sheet.sheet1)
                 sheet_name = worksheet.title
             else:
                 # Try to get the specific worksheet, create if not exists
                 try:
-                    worksheet = sheet.worksheet(sheet_name)
+                    worksheet = await asyncio.to_thread(sheet.worksheet, sheet_name)
                     print(f"✅ Found existing worksheet: {sheet_name}")
                 except gspread.WorksheetNotFound:
                     # Create new worksheet
-                    worksheet = sheet.add_worksheet(title=sheet_name, rows=1000, cols=26)
+                    worksheet = await asyncio.to_thread(sheet.add_worksheet, title=sheet_name, rows=1000, cols=26)
                     print(f"✅ Created new worksheet: {sheet_name}")
                     
                     # Add default headers
                     default_headers = ["Column A", "Column B", "Column C", "Column D", "Column E"]
-                    worksheet.update("A1:E1", [default_headers])
+                    await asyncio.to_thread(worksheet.update, "A1:E1", [default_headers])
                     print(f"✅ Added default headers to new worksheet")
             
             # Read data from the specified range
             try:
                 # Get all values in the range
-                values = worksheet.get(range_str)
+                values = await asyncio.to_thread(worksheet.get, range_str)
                 
                 if not values:
                     values = []
@@ -252,11 +262,11 @@ class GoogleSheetsService:
     async def read_sheet_data(self, sheet_id: str, sheet_range: str = "A:Z") -> List[Dict[str, Any]]:
         """Read data from Google Sheets"""
         try:
-            sheet = self.client.open_by_key(sheet_id)
-            worksheet = sheet.sheet1  # Use first sheet by default
+            sheet = await asyncio.to_thread(self.client.open_by_key, sheet_id)
+            worksheet = await asyncio.to_thread(lambda: sheet.sheet1)  # Use first sheet by default
             
             # Get all records as list of dictionaries
-            records = worksheet.get_all_records()
+            records = await asyncio.to_thread(worksheet.get_all_records)
             
             return records
             
@@ -0,0 +1,208 @@
+"""
+Static Analysis of Workflow Graphs
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from ...schemas.workflow_components import ComponentCategory
+from .execution_plan import ExecutionPlan, execution_plan_cache
+
+
+def _issue(code: str, message: str, **details) -> Dict[str, Any]:
+    return {"code": code, "message": message, **details}
+
+
+def _find_cycles(plan: ExecutionPlan) -> List[List[str]]:
+    """Strongly connected components that contain a cycle (Tarjan, iterative)"""
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack = set()
+    cycles = []
+
+    for root in plan.nodes:
+        if root in index:
+            continue
+        work = [(root, iter(plan.adjacency.get(root, [])))]
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node_id, connections = work[-1]
+            advanced = False
+            for connection in connections:
+                target = connection["target"]
+                if target not in index:
+                    index[target] = lowlink[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(plan.adjacency.get(target, []))))
+                    advanced = True
+                    break
+                if target in on_stack:
+                    lowlink[node_id] = min(lowlink[node_id], index[target])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node_id])
+            if lowlink[node_id] == index[node_id]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node_id:
+                        break
+                self_loop = any(c["target"] == node_id for c in plan.adjacency.get(node_id, []))
+                if len(component) > 1 or self_loop:
+                    cycles.append(sorted(component))
+    return cycles
+
+
+def _reachable_from(plan: ExecutionPlan, sources: List[str]) -> set:
+    seen = set(sources)
+    frontier = list(sources)
+    while frontier:
+        node_id = frontier.pop()
+        for connection in plan.adjacency.get(node_id, []):
+            if connection["target"] not in seen:
+                seen.add(connection["target"])
+                frontier.append(connection["target"])
+    return seen
+
+
+def analyze_plan(plan: ExecutionPlan, workflow_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a compiled workflow for problems that would break or silently skip a run
+
+    Errors make the workflow invalid: duplicate node ids, unknown component
+    types, cycles, no entry node, and edges leaving through a handle the
+    component does not have (they can never fire). Warnings are kept for the
+    editor: edges to missing nodes or unknown input handles, and nodes no
+    trigger component leads to (they start on their own, with no input).
+    """
+    errors: List[Dict[str, Any]] = []
+    warnings: List[Dict[str, Any]] = []
+
+    node_ids = Counter(node.get("id") for node in workflow_data.get("nodes", []))
+    for node_id, count in node_ids.items():
+        if count > 1:
+            errors.append(_issue("duplicate_node", f"Node id '{node_id}' is used by {count} nodes", node_id=node_id))
+
+    for node_id, node in plan.nodes.items():
+        if node_id not in plan.component_classes:
+            errors.append(_issue(
+                "unknown_component", f"Node '{node_id}' has unknown component type '{node.get('type')}'",
+                node_id=node_id
+            ))
+
+    for edge in workflow_data.get("edges", []):
+        source, target = edge.get("source"), edge.get("target")
+        edge_id = edge.get("id")
+        missing = [end for end in (source, target) if end not in plan.nodes]
+        if missing:
+            warnings.append(_issue(
+                "dangling_edge", f"Edge {source} -> {target} points at missing node(s): {', '.join(map(str, missing))}",
+                edge_id=edge_id
+            ))
+            continue
+
+        source_class = plan.component_classes.get(source)
+        source_handle = edge.get("sourceHandle")
+        if source_class and source_handle:
+            handles = [handle.id for handle in source_class.get_metadata().output_handles]
+            if source_handle not in handles:
+                errors.append(_issue(
+                    "handle_mismatch",
+                    f"Edge {source} -> {target} leaves through unknown handle '{source_handle}' "
+                    f"(expected one of: {', '.join(handles) or 'none'})",
+                    edge_id=edge_id, node_id=source
+                ))
+
+        target_class = plan.component_classes.get(target)
+        target_handle = edge.get("targetHandle")
+        if target_class:
+            handles = [handle.id for handle in target_class.get_metadata().input_handles]
+            if not handles:
+                warnings.append(_issue(
+                    "handle_mismatch", f"Edge {source} -> {target} enters a node that takes no input",
+                    edge_id=edge_id, node_id=target
+                ))
+            elif target_handle and target_handle not in handles:
+                warnings.append(_issue(
+                    "handle_mismatch",
+                    f"Edge {source} -> {target} enters through unknown handle '{target_handle}' "
+                    f"(expected one of: {', '.join(handles)})",
+                    edge_id=edge_id, node_id=target
+                ))
+
+    cycles = _find_cycles(plan)
+    for cycle in cycles:
+        errors.append(_issue("cycle", f"Workflow contains a cycle through: {', '.join(cycle)}", node_ids=cycle))
+
+    if plan.nodes and not plan.trigger_nodes:
+        errors.append(_issue("no_trigger", "Workflow has no node without incoming edges to start from"))
+
+    # Nodes behind a cycle never become ready; report them once, with the cycle
+    on_cycle = {node_id for cycle in cycles for node_id in cycle}
+    scheduled = set(plan.topological_order)
+    blocked = [node_id for node_id in plan.nodes if node_id not in scheduled and node_id not in on_cycle]
+    if blocked and cycles:
+        errors.append(_issue(
+            "unreachable", f"Nodes downstream of a cycle never run: {', '.join(blocked)}", node_ids=blocked
+        ))
+
+    trigger_components = [
+        node_id for node_id, component_class in plan.component_classes.items()
+        if component_class.get_metadata().category == ComponentCategory.TRIGGERS
+    ]
+    if trigger_components:
+        reachable = _reachable_from(plan, trigger_components)
+        unreachable = [node_id for node_id in plan.topological_order if node_id not in reachable]
+        if unreachable:
+            warnings.append(_issue(
+                "unreachable",
+                f"Nodes not connected to any trigger start on their own: {', '.join(unreachable)}",
+                node_ids=unreachable
+            ))
+
+    return {
+        "valid": not errors,
+        "workflow_hash": plan.workflow_hash,
+        "errors": errors,
+        "warnings": warnings,
+        "trigger_nodes": plan.trigger_nodes,
+        "topological_order": plan.topological_order,
+        "node_count": len(plan.nodes),
+        "edge_count": sum(len(connections) for connections in plan.adjacency.values()),
+        "analyzed_at": datetime.now().isoformat()
+    }
+
+
+def analyze_workflow(workflow_data: Dict[str, Any], stored: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analyze a workflow graph, once per revision
+
+    The plan is compiled through ``execution_plan_cache``, so analyzing at
+    save time also leaves the plan ready for the first run, and the result is
+    kept on the plan for every later check of the same revision. ``stored`` is
+    an analysis saved earlier (a template's ``graph_analysis``); it is used
+    instead of analyzing again when it was made for this same revision, so a
+    process with a cold plan cache does not repeat the save-time work.
+    """
+    plan = execution_plan_cache.get_plan(workflow_data)
+    if plan.analysis is None:
+        if stored and stored.get("workflow_hash") == plan.workflow_hash:
+            plan.analysis = stored
+        else:
+            plan.analysis = analyze_plan(plan, workflow_data)
+    return plan.analysis
+
+
+def describe_errors(analysis: Dict[str, Any], limit: Optional[int] = 5) -> str:
+    """One-line summary of an invalid analysis, for error messages"""
+    messages = [error["message"] for error in analysis["errors"]]
+    if limit and len(messages) > limit:
+        messages = messages[:limit] + [f"and {len(analysis['errors']) - limit} more"]
+    return "Invalid workflow: " + "; ".join(messages)
@@ -0,0 +1,689 @@
+"""
+Durable Job Queue for Workflow Executions
+"""
+import json
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import select, update, func, or_, and_
+
+from ...core.config import settings
+from ...models.database import AsyncSessionLocal
+from ...models.workflow import WorkflowInstance, WorkflowJob
+from .leases import as_utc, utcnow
+
+# Redis backend is optional
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+@dataclass
+class QueuedJob:
+    """A job claimed by a worker"""
+    id: str
+    instance_id: str
+    input_data: Dict[str, Any]
+    attempts: int
+    resume: bool = False
+
+
+# Tenant of runs whose instance has no created_by
+ANONYMOUS_TENANT = "anonymous"
+
+
+async def _fail_instance(db, instance_id: str, error: str, now: datetime):
+    """Fail the run of a job that will not be retried, unless the run already finished"""
+    await db.execute(
+        update(WorkflowInstance)
+        .where(WorkflowInstance.id == instance_id, WorkflowInstance.status.in_(["queued", "running"]))
+        .values(status="failed", error_message=error, completed_at=now)
+    )
+
+
+class WorkflowJobQueue(ABC):
+    """Interface shared by the queue backends
+
+    A claimed job is leased to one worker for ``lease_seconds``. The worker
+    extends the lease with ``heartbeat``; if it stops (crash, redeploy) the
+    lease runs out and the job is handed to another worker, up to
+    ``max_attempts`` claims in total.
+
+    Jobs are claimed by weighted fair share across tenants (the user who
+    created the instance): the next job comes from the tenant with the fewest
+    running jobs relative to its weight in ``WORKFLOW_TENANT_WEIGHTS``. Within
+    a tenant, higher ``priority`` goes first, then the oldest job. Ties
+    between tenants go to the higher priority, then the older job.
+    """
+
+    def __init__(
+        self,
+        lease_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        tenant_weights: Optional[Dict[str, float]] = None
+    ):
+        self.lease_seconds = lease_seconds or settings.WORKFLOW_QUEUE_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.WORKFLOW_QUEUE_MAX_ATTEMPTS
+        self.tenant_weights = dict(
+            settings.WORKFLOW_TENANT_WEIGHTS if tenant_weights is None else tenant_weights
+        )
+
+    def _weight(self, tenant: Optional[str]) -> float:
+        weight = self.tenant_weights.get(tenant or ANONYMOUS_TENANT, 1.0)
+        return weight if weight > 0 else 1.0
+
+    @abstractmethod
+    async def enqueue(
+        self,
+        instance_id: str,
+        input_data: Dict[str, Any] = None,
+        resume: bool = False,
+        tenant: Optional[str] = None,
+        priority: int = 0
+    ) -> str:
+        """Queue a workflow instance for execution, returns the job id"""
+        pass
+
+    async def enqueue_many(self, jobs: List[Dict[str, Any]]) -> List[str]:
+        """Queue several instances at once; each dict holds ``enqueue`` arguments"""
+        return [await self.enqueue(**job) for job in jobs]
+
+    @abstractmethod
+    async def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        """Lease the next runnable job to a worker, by fair share across tenants"""
+        pass
+
+    @abstractmethod
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend a lease; False if the worker no longer owns the job"""
+        pass
+
+    @abstractmethod
+    async def get_job_status(self, job_id: str) -> Optional[str]:
+        """Get a job's state, or None if it is unknown"""
+        pass
+
+    @abstractmethod
+    async def complete(self, job_id: str, worker_id: str):
+        """Mark a leased job completed"""
+        pass
+
+    @abstractmethod
+    async def fail(self, job_id: str, worker_id: str, error: str):
+        """Mark a leased job failed"""
+        pass
+
+    @abstractmethod
+    async def cancel(self, instance_id: str) -> bool:
+        """Cancel the queued or running job of an instance"""
+        pass
+
+    @abstractmethod
+    async def has_active_job(self, instance_id: str) -> bool:
+        """Check whether an instance is queued or running"""
+        pass
+
+    @abstractmethod
+    async def get_stats(self) -> Dict[str, int]:
+        """Get job counts by state"""
+        pass
+
+    @abstractmethod
+    async def get_tenant_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get queue depth, running jobs and queue wait times per tenant"""
+        pass
+
+    async def close(self):
+        """Release backend connections"""
+
+
+class DatabaseJobQueue(WorkflowJobQueue):
+    """Job queue stored in the ``workflow_jobs`` table
+
+    Workers claim jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` so any number
+    of them can poll the table without blocking on each other's rows.
+    """
+
+    # Jobs started within this window count towards the wait time statistics
+    WAIT_STATS_WINDOW_SECONDS = 60 * 60
+
+    def __init__(self, session_factory=None, **kwargs):
+        super().__init__(**kwargs)
+        self.session_factory = session_factory or AsyncSessionLocal
+
+    async def enqueue(
+        self,
+        instance_id: str,
+        input_data: Dict[str, Any] = None,
+        resume: bool = False,
+        tenant: Optional[str] = None,
+        priority: int = 0
+    ) -> str:
+        job = WorkflowJob(
+            id=str(uuid.uuid4()),
+            workflow_instance_id=instance_id,
+            status="queued",
+            input_data=input_data or {},
+            resume=resume,
+            tenant_id=tenant or ANONYMOUS_TENANT,
+            priority=priority or 0,
+            attempts=0,
+            max_attempts=self.max_attempts,
+            created_at=utcnow()
+        )
+        async with self.session_factory() as db:
+            db.add(job)
+            await db.commit()
+        return job.id
+
+    async def enqueue_many(self, jobs: List[Dict[str, Any]]) -> List[str]:
+        # One transaction (and multi-row INSERT) for the whole list
+        now = utcnow()
+        rows = [
+            WorkflowJob(
+                id=str(uuid.uuid4()),
+                workflow_instance_id=job["instance_id"],
+                status="queued",
+                input_data=job.get("input_data") or {},
+                resume=job.get("resume", False),
+                tenant_id=job.get("tenant") or ANONYMOUS_TENANT,
+                priority=job.get("priority") or 0,
+                attempts=0,
+                max_attempts=self.max_attempts,
+                created_at=now
+            )
+            for job in jobs
+        ]
+        async with self.session_factory() as db:
+            db.add_all(rows)
+            await db.commit()
+        return [row.id for row in rows]
+
+    async def _next_job(self, db, now: datetime) -> Optional[WorkflowJob]:
+        """Lock the head job of the tenant with the smallest weighted share"""
+        runnable = or_(
+            WorkflowJob.status == "queued",
+            and_(WorkflowJob.status == "running", WorkflowJob.lease_expires_at < now)
+        )
+
+        result = await db.execute(
+            select(WorkflowJob.tenant_id, func.count(WorkflowJob.id))
+            .where(WorkflowJob.status == "running", WorkflowJob.lease_expires_at >= now)
+            .group_by(WorkflowJob.tenant_id)
+        )
+        running = {tenant: count for tenant, count in result.all()}
+
+        ranked = select(
+            WorkflowJob.id,
+            WorkflowJob.tenant_id,
+            WorkflowJob.priority,
+            WorkflowJob.created_at,
+            func.row_number().over(
+                partition_by=WorkflowJob.tenant_id,
+                order_by=(WorkflowJob.priority.desc(), WorkflowJob.created_at)
+            ).label("position")
+        ).where(runnable).subquery()
+        result = await db.execute(select(ranked).where(ranked.c.position == 1))
+        heads = sorted(
+            result.all(),
+            key=lambda head: (
+                (running.get(head.tenant_id, 0) + 1) / self._weight(head.tenant_id),
+                -(head.priority or 0),
+                head.created_at
+            )
+        )
+
+        for head in heads:
+            result = await db.execute(
+                select(WorkflowJob)
+                .where(WorkflowJob.id == head.id, runnable)
+                .with_for_update(skip_locked=True)
+            )
+            job = result.scalar_one_or_none()
+            if job is not None:
+                return job
+            # Claimed by another worker in the meantime; try the next tenant
+        return None
+
+    async def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        async with self.session_factory() as db:
+            while True:
+                now = utcnow()
+                job = await self._next_job(db, now)
+                if job is None:
+                    return None
+
+                if job.attempts >= job.max_attempts:
+                    # Abandoned by one worker too many; stop handing it out
+                    job.status = "failed"
+                    job.error_message = f"Lease expired after {job.attempts} attempt(s)"
+                    job.completed_at = now
+                    await _fail_instance(db, job.workflow_instance_id, job.error_message, now)
+                    await db.commit()
+                    continue
+
+                job.status = "running"
+                job.worker_id = worker_id
+                job.attempts += 1
+                job.lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+                job.heartbeat_at = now
+                if job.started_at is None:
+                    job.started_at = now
+                    job.wait_ms = int((now - as_utc(job.created_at)).total_seconds() * 1000)
+                await db.commit()
+
+                return QueuedJob(
+                    id=job.id,
+                    instance_id=job.workflow_instance_id,
+                    input_data=job.input_data or {},
+                    attempts=job.attempts,
+                    resume=bool(job.resume)
+                )
+
+    async def _update_owned(self, job_id: str, worker_id: str, **values) -> bool:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(WorkflowJob)
+                .where(
+                    WorkflowJob.id == job_id,
+                    WorkflowJob.worker_id == worker_id,
+                    WorkflowJob.status == "running"
+                )
+                .values(**values)
+            )
+            await db.commit()
+            return result.rowcount > 0
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        now = utcnow()
+        return await self._update_owned(
+            job_id,
+            worker_id,
+            lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+            heartbeat_at=now
+        )
+
+    async def get_job_status(self, job_id: str) -> Optional[str]:
+        async with self.session_factory() as db:
+            result = await db.execute(select(WorkflowJob.status).where(WorkflowJob.id == job_id))
+            return result.scalar_one_or_none()
+
+    async def complete(self, job_id: str, worker_id: str):
+        await self._update_owned(job_id, worker_id, status="completed", completed_at=utcnow())
+
+    async def fail(self, job_id: str, worker_id: str, error: str):
+        await self._update_owned(
+            job_id, worker_id, status="failed", error_message=error, completed_at=utcnow()
+        )
+
+    async def cancel(self, instance_id: str) -> bool:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(WorkflowJob)
+                .where(
+                    WorkflowJob.workflow_instance_id == instance_id,
+                    WorkflowJob.status.in_(["queued", "running"])
+                )
+                .values(status="cancelled", completed_at=utcnow())
+            )
+            await db.commit()
+            return result.rowcount > 0
+
+    async def has_active_job(self, instance_id: str) -> bool:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(func.count(WorkflowJob.id)).where(
+                    WorkflowJob.workflow_instance_id == instance_id,
+                    WorkflowJob.status.in_(["queued", "running"])
+                )
+            )
+            return (result.scalar() or 0) > 0
+
+    async def get_stats(self) -> Dict[str, int]:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(WorkflowJob.status, func.count(WorkflowJob.id)).group_by(WorkflowJob.status)
+            )
+            return {status: count for status, count in result.all()}
+
+    async def get_tenant_stats(self) -> Dict[str, Dict[str, Any]]:
+        now = utcnow()
+        since = now - timedelta(seconds=self.WAIT_STATS_WINDOW_SECONDS)
+        tenants: Dict[str, Dict[str, Any]] = {}
+
+        def tenant_stats(tenant: Optional[str]) -> Dict[str, Any]:
+            return tenants.setdefault(tenant or ANONYMOUS_TENANT, {
+                "weight": self._weight(tenant),
+                "queued": 0,
+                "running": 0,
+                "oldest_wait_seconds": 0,
+                "avg_wait_ms": 0,
+                "max_wait_ms": 0
+            })
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(WorkflowJob.tenant_id, func.count(WorkflowJob.id), func.min(WorkflowJob.created_at))
+                .where(WorkflowJob.status == "queued")
+                .group_by(WorkflowJob.tenant_id)
+            )
+            for tenant, count, oldest in result.all():
+                stats = tenant_stats(tenant)
+                stats["queued"] = count
+                stats["oldest_wait_seconds"] = int((now - as_utc(oldest)).total_seconds()) if oldest else 0
+
+            result = await db.execute(
+                select(WorkflowJob.tenant_id, func.count(WorkflowJob.id))
+                .where(WorkflowJob.status == "running")
+                .group_by(WorkflowJob.tenant_id)
+            )
+            for tenant, count in result.all():
+                tenant_stats(tenant)["running"] = count
+
+            # Wait times of runs that started recently
+            result = await db.execute(
+                select(WorkflowJob.tenant_id, func.avg(WorkflowJob.wait_ms), func.max(WorkflowJob.wait_ms))
+                .where(WorkflowJob.started_at >= since, WorkflowJob.wait_ms.isnot(None))
+                .group_by(WorkflowJob.tenant_id)
+            )
+            for tenant, avg_wait, max_wait in result.all():
+                stats = tenant_stats(tenant)
+                stats["avg_wait_ms"] = int(avg_wait or 0)
+                stats["max_wait_ms"] = int(max_wait or 0)
+
+        return tenants
+
+
+# Atomically pick the fair-share tenant, pop the head of its queue and lease it
+_REDIS_CLAIM_SCRIPT = """
+local weights = cjson.decode(ARGV[5])
+local best_tenant, best_ratio, best_score, best_job
+for _, tenant in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+    local head = redis.call('ZRANGE', ARGV[4] .. tenant, 0, 0, 'WITHSCORES')
+    if #head == 0 then
+        redis.call('SREM', KEYS[1], tenant)
+    else
+        local weight = tonumber(weights[tenant]) or 1
+        if weight <= 0 then weight = 1 end
+        local ratio = (tonumber(redis.call('HGET', KEYS[3], tenant) or '0') + 1) / weight
+        local score = tonumber(head[2])
+        if not best_tenant or ratio < best_ratio or (ratio == best_ratio and score < best_score) then
+            best_tenant, best_ratio, best_score, best_job = tenant, ratio, score, head[1]
+        end
+    end
+end
+if not best_tenant then return false end
+redis.call('ZREM', ARGV[4] .. best_tenant, best_job)
+redis.call('ZADD', KEYS[2], ARGV[1], best_job)
+redis.call('HINCRBY', KEYS[3], best_tenant, 1)
+local job_key = ARGV[3] .. best_job
+redis.call('HSET', job_key, 'status', 'running', 'worker_id', ARGV[2])
+redis.call('HINCRBY', job_key, 'attempts', 1)
+if redis.call('HEXISTS', job_key, 'started_at') == 0 then
+    local wait = tonumber(ARGV[6]) - tonumber(redis.call('HGET', job_key, 'enqueued_at') or ARGV[6])
+    redis.call('HSET', job_key, 'started_at', ARGV[6])
+    redis.call('HINCRBY', KEYS[4], best_tenant .. ':total_ms', wait)
+    redis.call('HINCRBY', KEYS[4], best_tenant .. ':count', 1)
+    if wait > tonumber(redis.call('HGET', KEYS[4], best_tenant .. ':max_ms') or '0') then
+        redis.call('HSET', KEYS[4], best_tenant .. ':max_ms', wait)
+    end
+end
+return best_job
+"""
+
+# Extend a lease only while the worker still owns the running job
+_REDIS_HEARTBEAT_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'status') == 'running'
+    and redis.call('HGET', KEYS[1], 'worker_id') == ARGV[1] then
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class RedisJobQueue(WorkflowJobQueue):
+    """Job queue stored in Redis (or any Redis-compatible server)
+
+    Queued job ids live in one sorted set per tenant (scored by priority,
+    then enqueue order), leases in a sorted set scored by expiry time, and job
+    state in one hash per job. Running jobs are counted per tenant for the
+    fair-share claim.
+    """
+
+    # Finished jobs are kept this long for inspection
+    FINISHED_JOB_TTL_SECONDS = 24 * 60 * 60
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        prefix: Optional[str] = None,
+        session_factory=None,
+        **kwargs
+    ):
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis package is required for the redis workflow queue backend")
+        super().__init__(**kwargs)
+        # Instances still live in the database; runs of exhausted jobs are failed there
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.redis = aioredis.from_url(redis_url or settings.REDIS_URL, decode_responses=True)
+        self.prefix = prefix or settings.WORKFLOW_QUEUE_REDIS_PREFIX
+        self.queued_key_prefix = f"{self.prefix}:queued:"  # + tenant
+        self.tenants_key = f"{self.prefix}:tenants"  # Tenants that may have queued jobs
+        self.running_key = f"{self.prefix}:running"  # tenant -> running job count
+        self.waits_key = f"{self.prefix}:waits"  # Queue wait totals per tenant
+        self.seq_key = f"{self.prefix}:seq"
+        self.leases_key = f"{self.prefix}:leases"
+        self.active_key = f"{self.prefix}:active"  # instance_id -> job_id
+        self.job_key_prefix = f"{self.prefix}:job:"
+        self._claim = self.redis.register_script(_REDIS_CLAIM_SCRIPT)
+        self._heartbeat = self.redis.register_script(_REDIS_HEARTBEAT_SCRIPT)
+
+    def _job_key(self, job_id: str) -> str:
+        return self.job_key_prefix + job_id
+
+    def _queued_key(self, tenant: str) -> str:
+        return self.queued_key_prefix + tenant
+
+    def _lease_deadline(self) -> float:
+        return utcnow().timestamp() + self.lease_seconds
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(utcnow().timestamp() * 1000)
+
+    async def enqueue(
+        self,
+        instance_id: str,
+        input_data: Dict[str, Any] = None,
+        resume: bool = False,
+        tenant: Optional[str] = None,
+        priority: int = 0
+    ) -> str:
+        job_id = str(uuid.uuid4())
+        tenant = tenant or ANONYMOUS_TENANT
+        # Higher priority first, then enqueue order
+        score = -(priority or 0) * 1e12 + await self.redis.incr(self.seq_key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._job_key(job_id), mapping={
+                "instance_id": instance_id,
+                "input_data": json.dumps(input_data or {}, default=str),
+                "status": "queued",
+                "resume": int(resume),
+                "tenant": tenant,
+                "score": score,
+                "attempts": 0,
+                "max_attempts": self.max_attempts,
+                "enqueued_at": self._now_ms()
+            })
+            pipe.hset(self.active_key, instance_id, job_id)
+            pipe.zadd(self._queued_key(tenant), {job_id: score})
+            pipe.sadd(self.tenants_key, tenant)
+            await pipe.execute()
+        return job_id
+
+    async def _requeue_expired(self):
+        """Put jobs whose worker stopped heartbeating back on the queue"""
+        expired = await self.redis.zrangebyscore(self.leases_key, 0, utcnow().timestamp())
+        for job_id in expired:
+            # Only the caller that removes the lease gets to requeue the job
+            if not await self.redis.zrem(self.leases_key, job_id):
+                continue
+            job = await self.redis.hgetall(self._job_key(job_id))
+            if not job or job.get("status") != "running":
+                continue
+            if int(job.get("attempts", 0)) >= int(job.get("max_attempts", self.max_attempts)):
+                error = f"Lease expired after {job.get('attempts')} attempt(s)"
+                await self._finish(job_id, job.get("instance_id"), "failed", error)
+                async with self.session_factory() as db:
+                    await _fail_instance(db, job["instance_id"], error, utcnow())
+                    await db.commit()
+            else:
+                tenant = job.get("tenant") or ANONYMOUS_TENANT
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.hset(self._job_key(job_id), "status", "queued")
+                    pipe.hincrby(self.running_key, tenant, -1)
+                    pipe.zadd(self._queued_key(tenant), {job_id: float(job.get("score") or 0)})
+                    pipe.sadd(self.tenants_key, tenant)
+                    await pipe.execute()
+
+    async def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        await self._requeue_expired()
+        while True:
+            job_id = await self._claim(
+                keys=[self.tenants_key, self.leases_key, self.running_key, self.waits_key],
+                args=[
+                    self._lease_deadline(),
+                    worker_id,
+                    self.job_key_prefix,
+                    self.queued_key_prefix,
+                    json.dumps(self.tenant_weights),
+                    self._now_ms()
+                ]
+            )
+            if not job_id:
+                return None
+            job = await self.redis.hgetall(self._job_key(job_id))
+            if not job:
+                # Cancelled while queued
+                await self.redis.zrem(self.leases_key, job_id)
+                continue
+            return QueuedJob(
+                id=job_id,
+                instance_id=job["instance_id"],
+                input_data=json.loads(job.get("input_data") or "{}"),
+                attempts=int(job.get("attempts", 1)),
+                resume=job.get("resume") == "1"
+            )
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        extended = await self._heartbeat(
+            keys=[self._job_key(job_id), self.leases_key],
+            args=[worker_id, self._lease_deadline(), job_id]
+        )
+        return bool(extended)
+
+    async def _finish(self, job_id: str, instance_id: Optional[str], status: str, error: Optional[str] = None):
+        job_key = self._job_key(job_id)
+        previous_status, tenant = await self.redis.hmget(job_key, "status", "tenant")
+        tenant = tenant or ANONYMOUS_TENANT
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(job_key, mapping={"status": status, "error_message": error or ""})
+            pipe.expire(job_key, self.FINISHED_JOB_TTL_SECONDS)
+            pipe.zrem(self.leases_key, job_id)
+            pipe.zrem(self._queued_key(tenant), job_id)
+            if previous_status == "running":
+                pipe.hincrby(self.running_key, tenant, -1)
+            if instance_id:
+                pipe.hdel(self.active_key, instance_id)
+            await pipe.execute()
+
+    async def _finish_owned(self, job_id: str, worker_id: str, status: str, error: Optional[str] = None):
+        job = await self.redis.hgetall(self._job_key(job_id))
+        if job.get("status") != "running" or job.get("worker_id") != worker_id:
+            return
+        await self._finish(job_id, job.get("instance_id"), status, error)
+
+    async def get_job_status(self, job_id: str) -> Optional[str]:
+        return await self.redis.hget(self._job_key(job_id), "status")
+
+    async def complete(self, job_id: str, worker_id: str):
+        await self._finish_owned(job_id, worker_id, "completed")
+
+    async def fail(self, job_id: str, worker_id: str, error: str):
+        await self._finish_owned(job_id, worker_id, "failed", error)
+
+    async def cancel(self, instance_id: str) -> bool:
+        job_id = await self.redis.hget(self.active_key, instance_id)
+        if not job_id:
+            return False
+        await self._finish(job_id, instance_id, "cancelled")
+        return True
+
+    async def has_active_job(self, instance_id: str) -> bool:
+        return bool(await self.redis.hexists(self.active_key, instance_id))
+
+    async def get_stats(self) -> Dict[str, int]:
+        queued = 0
+        for tenant in await self.redis.smembers(self.tenants_key):
+            queued += await self.redis.zcard(self._queued_key(tenant))
+        return {
+            "queued": queued,
+            "running": await self.redis.zcard(self.leases_key)
+        }
+
+    async def get_tenant_stats(self) -> Dict[str, Dict[str, Any]]:
+        now_ms = self._now_ms()
+        running = await self.redis.hgetall(self.running_key)
+        waits = await self.redis.hgetall(self.waits_key)
+        tenants = set(await self.redis.smembers(self.tenants_key)) | set(running)
+
+        stats = {}
+        for tenant in sorted(tenants):
+            queued_key = self._queued_key(tenant)
+            head = await self.redis.zrange(queued_key, 0, 0)
+            enqueued_at = await self.redis.hget(self._job_key(head[0]), "enqueued_at") if head else None
+            count = int(waits.get(f"{tenant}:count", 0))
+            stats[tenant] = {
+                "weight": self._weight(tenant),
+                "queued": await self.redis.zcard(queued_key),
+                "running": int(running.get(tenant, 0)),
+                # Oldest by priority order, which is the next job the tenant will run
+                "oldest_wait_seconds": (now_ms - int(enqueued_at)) // 1000 if enqueued_at else 0,
+                "avg_wait_ms": int(waits.get(f"{tenant}:total_ms", 0)) // count if count else 0,
+                "max_wait_ms": int(waits.get(f"{tenant}:max_ms", 0))
+            }
+        return stats
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+_job_queue: Optional[WorkflowJobQueue] = None
+
+
+def get_job_queue() -> Optional[WorkflowJobQueue]:
+    """Get the configured job queue, or None when runs execute inside the API process"""
+    global _job_queue
+    if _job_queue is None:
+        backend = settings.WORKFLOW_QUEUE_BACKEND
+        if backend == "database":
+            _job_queue = DatabaseJobQueue()
+        elif backend == "redis":
+            _job_queue = RedisJobQueue()
+        elif backend != "inline":
+            raise ValueError(f"Unknown workflow queue backend '{backend}'")
+    return _job_queue
+
+
+async def close_job_queue():
+    """Close the configured job queue"""
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.close()
+        _job_queue = None
@@ -0,0 +1,26 @@
+"""
+Lease Helpers Shared by the Job Queue, Bulk Runs and Scheduler
+"""
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes for timezone-aware columns
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def holder_id() -> str:
+    """Identify this process as the holder of a lease, unique across restarts"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def renew_interval(lease_seconds: float) -> float:
+    """How often a lease holder renews: well before the lease runs out"""
+    return lease_seconds / 3
@@ -0,0 +1,192 @@
+"""
+Content-Addressed Cache for Workflow Node Results
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from ...core.config import settings
+
+# Node config keys that control caching and must not affect the cache key
+CACHE_CONTROL_KEYS = ("cache_results", "cache_ttl_seconds")
+
+
+class NodeResultCache:
+    """Two-tier cache of successful node results
+
+    Entries are keyed by ``make_key`` (component type, normalized node input
+    and upstream outputs), so any change to what a node sees is a miss. The
+    memory tier is an LRU bounded by entry count; the disk tier is a directory
+    of JSON files bounded by total size, evicting least recently used files.
+    Both tiers honour a per-entry TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        max_disk_bytes: Optional[int] = None
+    ):
+        self.max_entries = max_entries or settings.NODE_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.NODE_CACHE_TTL_SECONDS
+        cache_dir = settings.NODE_CACHE_DIR if cache_dir is None else cache_dir
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_disk_bytes = max_disk_bytes or settings.NODE_CACHE_MAX_DISK_MB * 1024 * 1024
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._disk_lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None  # Running total, measured on first write
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(component_type: str, input_data: Dict[str, Any], upstream_outputs: Dict[str, Any]) -> str:
+        """Hash everything that determines a node's result"""
+        config = {k: v for k, v in input_data.items() if k not in CACHE_CONTROL_KEYS}
+        canonical = json.dumps(
+            {"type": component_type, "input": config, "upstream": upstream_outputs},
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached result, or None on a miss"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return result
+            del self._memory[key]
+
+        if self.cache_dir is not None:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self._remember(key, *entry)
+                self.disk_hits += 1
+                return entry[1]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any], ttl_seconds: Optional[int] = None):
+        """Store a result in both tiers"""
+        expires_at = time.time() + (ttl_seconds or self.ttl_seconds)
+        self._remember(key, expires_at, result)
+        if self.cache_dir is not None:
+            try:
+                await asyncio.to_thread(self._write_disk, key, expires_at, result)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Error writing node cache entry {key}: {e}")
+
+    def _remember(self, key: str, expires_at: float, result: Dict[str, Any]):
+        self._memory[key] = (expires_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("expires_at", 0) <= time.time():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        # Touch so size-based eviction drops least recently used entries first
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["expires_at"], entry["result"]
+
+    def _write_disk(self, key: str, expires_at: float, result: Dict[str, Any]):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"expires_at": expires_at, "result": result}, f, ensure_ascii=False, default=str)
+        size = tmp_path.stat().st_size
+
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(self._scan_disk()[1])
+            try:
+                self._disk_bytes -= path.stat().st_size
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+            self._disk_bytes += size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _scan_disk(self):
+        files = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files, [size for _, size, _ in files]
+
+    def _evict_disk(self):
+        """Remove least recently used files until the tier fits (caller holds the lock)"""
+        files, sizes = self._scan_disk()
+        total = sum(sizes)
+        for _, size, path in sorted(files, key=lambda item: item[0]):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    def clear(self):
+        """Drop all cached results"""
+        self._memory.clear()
+        if self.cache_dir is not None and self.cache_dir.exists():
+            with self._disk_lock:
+                for path in self.cache_dir.glob("*.json"):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                self._disk_bytes = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache statistics"""
+        return {
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses
+        }
+
+
+# Global node result cache instance
+node_result_cache = NodeResultCache()
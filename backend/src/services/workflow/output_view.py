@@ -0,0 +1,63 @@
+"""
+Scoped View of Upstream Node Outputs
+"""
+from typing import Dict, Any, Iterable, Mapping, Optional, Tuple
+
+from .blob_store import NodeOutput
+
+
+class UpstreamOutputs(dict):
+    """Read-only ``previous_outputs`` for one node
+
+    Holds only the node's direct and transitive upstream nodes, nearest first
+    and in edge order (``ExecutionPlan.ancestors``), so a component looking
+    for a key such as ``spreadsheet_info`` finds its closest producer and never
+    sees unrelated branches. Building the view is O(ancestors); each output is
+    wrapped in a lazy ``NodeOutput`` only when it is read.
+    """
+
+    def __init__(self, node_outputs: Dict[str, Any], node_ids: Iterable[str]):
+        super().__init__(
+            (node_id, node_outputs[node_id]) for node_id in node_ids if node_id in node_outputs
+        )
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, dict) and not isinstance(value, NodeOutput):
+            value = NodeOutput(value)
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __iter__(self):
+        # Overridden so {**outputs} and dict(outputs) go through __getitem__
+        return super().__iter__()
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("previous_outputs is read-only")
+
+    __setitem__ = __delitem__ = _read_only
+    pop = popitem = clear = update = setdefault = _read_only
+
+
+def nearest_output(previous_outputs: Mapping[str, Any], keys: Iterable[str]) -> Tuple[Optional[str], Optional[dict]]:
+    """The nearest upstream ``(node_id, output)`` holding any of ``keys``, else ``(None, None)``
+
+    ``previous_outputs`` is ordered nearest first, so farther ancestors are
+    never consulted once a producer is found. Only key presence is tested,
+    so outputs passed over do not load their blobs.
+    """
+    keys = tuple(keys)
+    for node_id in previous_outputs:
+        output = previous_outputs[node_id]
+        if isinstance(output, dict) and any(key in output for key in keys):
+            return node_id, output
+    return None, None
@@ -0,0 +1,339 @@
+"""
+Prompt/Response Cache for AI Providers
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+
+from ...core.config import settings
+from ...models.ai_provider import AIResponseCache
+from ...models.database import AsyncSessionLocal
+from .leases import as_utc, utcnow
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompt text with Unicode, line endings and runs of whitespace normalized"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", prompt or "")).strip()
+
+
+def make_key(
+    provider: str,
+    model: Optional[str],
+    prompt: str,
+    output_format: str,
+    temperature: Optional[float],
+    max_tokens: Optional[int]
+) -> str:
+    """Hash everything that determines a deterministic response"""
+    canonical = json.dumps(
+        {
+            "provider": provider.lower(),
+            "model": model or "",
+            "prompt": normalize_prompt(prompt),
+            "output_format": (output_format or "text").lower(),
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        },
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PromptResponseCache:
+    """Two-tier cache of successful AI provider responses
+
+    Only calls at or below ``max_temperature`` are cached; sampling at a
+    higher temperature is meant to vary. The memory tier is an LRU bounded by
+    entry count; the database tier (``ai_response_cache``, shared by every
+    process) is bounded by total response size, dropping least recently
+    used rows. Both tiers honour a per-entry TTL. Identical calls made while
+    the first is still running wait for its response instead of calling
+    the provider again.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        max_db_bytes: Optional[int] = None,
+        persistent: Optional[bool] = None,
+        max_temperature: Optional[float] = None,
+        session_factory=None
+    ):
+        self.max_entries = max_entries or settings.AI_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.AI_CACHE_TTL_SECONDS
+        self.max_db_bytes = max_db_bytes or settings.AI_CACHE_MAX_DB_MB * 1024 * 1024
+        self.persistent = settings.AI_CACHE_PERSISTENT if persistent is None else persistent
+        self.max_temperature = settings.AI_CACHE_MAX_TEMPERATURE if max_temperature is None else max_temperature
+        self.session_factory = session_factory or AsyncSessionLocal
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._db_bytes: Optional[int] = None  # Running total, measured on first write
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bypassed = 0
+        self.stores = 0
+
+    def is_cacheable(self, temperature: Optional[float]) -> bool:
+        # No temperature means the provider's default, which samples
+        return temperature is not None and float(temperature) <= self.max_temperature
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached response, or None on a miss"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return response
+            del self._memory[key]
+
+        if self.persistent:
+            try:
+                entry = await self._db_get(key)
+            except Exception as e:
+                print(f"Error reading AI response cache entry {key}: {e}")
+                entry = None
+            if entry is not None:
+                self._remember(key, *entry)
+                self.db_hits += 1
+                return entry[1]
+
+        self.misses += 1
+        return None
+
+    async def set(
+        self,
+        key: str,
+        provider: str,
+        model: Optional[str],
+        response: Dict[str, Any],
+        ttl_seconds: Optional[int] = None
+    ):
+        """Store a response in both tiers"""
+        serialized = json.dumps(response, ensure_ascii=False, default=str)
+        # Store what JSON keeps, so both tiers return the same thing
+        response = json.loads(serialized)
+        expires_at = time.time() + (ttl_seconds or self.ttl_seconds)
+        self._remember(key, expires_at, response)
+        self.stores += 1
+        if self.persistent:
+            try:
+                await self._db_set(key, provider, model, response, expires_at, len(serialized.encode("utf-8")))
+            except Exception as e:
+                print(f"Error writing AI response cache entry {key}: {e}")
+
+    async def get_or_call(
+        self,
+        provider: str,
+        model: Optional[str],
+        prompt: str,
+        output_format: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        ttl_seconds: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Return the cached response for this call, else make it and cache a successful result"""
+        if not self.is_cacheable(temperature):
+            self.bypassed += 1
+            return await call()
+
+        key = make_key(provider, model, prompt, output_format, temperature, max_tokens)
+        cached = await self.get(key)
+        if cached is not None:
+            return self._mark_cached(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The first caller was cancelled, not us
+                return await call()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await call()
+            if self._should_store(response):
+                await self.set(key, provider, model, response, ttl_seconds)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters see the error; mark it retrieved in case nobody is waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _should_store(response: Dict[str, Any]) -> bool:
+        if not isinstance(response, dict) or not response.get("success"):
+            return False
+        metadata = response.get("metadata") or {}
+        # Providers answer with a simulation when the real call failed; a failover
+        # provider's answer must not outlive the outage under this provider's key
+        return not metadata.get("simulated") and not metadata.get("failover_from")
+
+    @staticmethod
+    def _mark_cached(response: Dict[str, Any]) -> Dict[str, Any]:
+        return {**response, "metadata": {**(response.get("metadata") or {}), "cached": True}}
+
+    def _remember(self, key: str, expires_at: float, response: Dict[str, Any]):
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _db_get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        async with self.session_factory() as db:
+            row = await db.get(AIResponseCache, key)
+            if row is None:
+                return None
+            now = utcnow()
+            if as_utc(row.expires_at) <= now:
+                await db.delete(row)
+                await db.commit()
+                return None
+            row.hits = (row.hits or 0) + 1
+            row.last_used_at = now
+            await db.commit()
+            return as_utc(row.expires_at).timestamp(), row.response
+
+    async def _db_set(
+        self,
+        key: str,
+        provider: str,
+        model: Optional[str],
+        response: Dict[str, Any],
+        expires_at: float,
+        size_bytes: int
+    ):
+        async with self.session_factory() as db:
+            if self._db_bytes is None:
+                total = await db.scalar(select(func.coalesce(func.sum(AIResponseCache.size_bytes), 0)))
+                self._db_bytes = int(total or 0)
+
+            row = await db.get(AIResponseCache, key)
+            if row is None:
+                row = AIResponseCache(key=key, provider=provider, hits=0)
+                db.add(row)
+            else:
+                self._db_bytes -= row.size_bytes or 0
+            row.model = model
+            row.response = response
+            row.size_bytes = size_bytes
+            row.expires_at = datetime.fromtimestamp(expires_at, timezone.utc)
+            row.last_used_at = utcnow()
+            await db.commit()
+            self._db_bytes += size_bytes
+
+            if self._db_bytes > self.max_db_bytes:
+                await self._evict_db(db)
+
+    async def _evict_db(self, db):
+        """Drop expired rows, then least recently used ones until the tier fits"""
+        await db.execute(delete(AIResponseCache).where(AIResponseCache.expires_at <= utcnow()))
+        result = await db.execute(
+            select(AIResponseCache.key, AIResponseCache.size_bytes).order_by(AIResponseCache.last_used_at)
+        )
+        rows = result.all()
+        total = sum(size or 0 for _, size in rows)
+        evict = []
+        for key, size in rows:
+            if total <= self.max_db_bytes:
+                break
+            evict.append(key)
+            total -= size or 0
+        if evict:
+            await db.execute(delete(AIResponseCache).where(AIResponseCache.key.in_(evict)))
+        await db.commit()
+        for key in evict:
+            self._memory.pop(key, None)
+        self._db_bytes = total
+
+    async def clear(self):
+        """Drop all cached responses"""
+        self._memory.clear()
+        if self.persistent:
+            async with self.session_factory() as db:
+                await db.execute(delete(AIResponseCache))
+                await db.commit()
+            self._db_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.db_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "db_bytes": self._db_bytes,
+            "max_db_bytes": self.max_db_bytes if self.persistent else 0,
+            "hits": self.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "hit_rate": round((self.hits + self.db_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+class CachedAIProvider:
+    """An AI provider whose ``generate_content`` goes through the response cache
+
+    Everything else (``process_with_assets``, ``client``, ...) is the wrapped
+    provider's. Pass ``cache=False`` to skip the cache for one call, or
+    ``cache_ttl_seconds`` to keep its response for longer or shorter.
+    """
+
+    def __init__(self, provider_name: str, provider, cache: Optional[PromptResponseCache] = None):
+        self.provider_name = provider_name
+        self.provider = provider
+        self.cache = cache or prompt_response_cache
+
+    async def generate_content(self, prompt: str, output_format: str, model_name: str = None, **kwargs) -> Dict[str, Any]:
+        use_cache = kwargs.pop("cache", True)
+        ttl_seconds = kwargs.pop("cache_ttl_seconds", None)
+
+        async def call():
+            if model_name is None:
+                # Keep the provider's own default model
+                return await self.provider.generate_content(prompt, output_format, **kwargs)
+            return await self.provider.generate_content(prompt, output_format, model_name, **kwargs)
+
+        if not use_cache:
+            self.cache.bypassed += 1
+            return await call()
+        return await self.cache.get_or_call(
+            self.provider_name, model_name, prompt, output_format,
+            kwargs.get("temperature"), kwargs.get("max_tokens"), call, ttl_seconds
+        )
+
+    def __getattr__(self, name: str):
+        return getattr(self.provider, name)
+
+
+# Global prompt/response cache instance
+prompt_response_cache = PromptResponseCache()
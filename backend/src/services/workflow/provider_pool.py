@@ -0,0 +1,150 @@
+"""
+Pooled AI Provider Clients
+"""
+import asyncio
+import hashlib
+import inspect
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ...core.config import settings
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Stable, non-reversible id of an API key, so keys are never held as pool keys"""
+    if not api_key:
+        return ""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+async def close_client(client: Any):
+    """Close an SDK client, whichever of the usual close methods it has"""
+    if client is None:
+        return
+    for name in ("aclose", "close"):
+        method = getattr(client, name, None)
+        if callable(method):
+            result = method()
+            if inspect.isawaitable(result):
+                await result
+            return
+    # ollama.AsyncClient keeps its httpx client private
+    inner = getattr(client, "_client", None)
+    if inner is not None and inner is not client:
+        await close_client(inner)
+
+
+class _PooledProvider:
+    __slots__ = ("provider", "last_used")
+
+    def __init__(self, provider: Any, last_used: float):
+        self.provider = provider
+        self.last_used = last_used
+
+
+class ProviderClientPool:
+    """Provider instances reused across calls, keyed by provider, base URL and API-key fingerprint
+
+    Each provider owns an SDK client with its own keep-alive connection pool,
+    so reusing it saves a TLS handshake per call. Providers unused for
+    ``idle_seconds``, or beyond ``max_clients`` (least recently used first),
+    are evicted; they are closed ``close_grace_seconds`` later, since a call
+    that fetched them before eviction may still be running.
+    """
+
+    def __init__(
+        self,
+        idle_seconds: Optional[float] = None,
+        max_clients: Optional[int] = None,
+        close_grace_seconds: Optional[float] = None
+    ):
+        self.idle_seconds = idle_seconds or settings.AI_CLIENT_IDLE_SECONDS
+        self.max_clients = max_clients or settings.AI_CLIENT_MAX_POOLED
+        self.close_grace_seconds = (
+            settings.AI_CLIENT_CLOSE_GRACE_SECONDS if close_grace_seconds is None else close_grace_seconds
+        )
+        self._providers: "OrderedDict[Tuple[str, str, str], _PooledProvider]" = OrderedDict()
+        self._retired: List[Tuple[float, Any]] = []  # (evicted at, provider)
+        self._closing: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(
+        self,
+        provider_type: str,
+        factory: Callable[[], Any],
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None
+    ) -> Any:
+        """Pooled provider for these credentials, built with ``factory`` on first use"""
+        now = time.monotonic()
+        # Drop idle providers first, so a stale one is not handed out again
+        self._evict(now)
+        key = (provider_type.lower(), base_url or "", key_fingerprint(api_key))
+        entry = self._providers.get(key)
+        if entry is not None:
+            self.hits += 1
+            entry.last_used = now
+            self._providers.move_to_end(key)
+        else:
+            self.misses += 1
+            entry = _PooledProvider(factory(), now)
+            self._providers[key] = entry
+            self._evict(now)
+        return entry.provider
+
+    def _evict(self, now: float):
+        # Least recently used first, so idle entries sit at the front
+        while self._providers:
+            key, entry = next(iter(self._providers.items()))
+            if len(self._providers) <= self.max_clients and now - entry.last_used < self.idle_seconds:
+                break
+            del self._providers[key]
+            self._retired.append((now, entry.provider))
+            self.evictions += 1
+
+        due = [provider for retired_at, provider in self._retired if now - retired_at >= self.close_grace_seconds]
+        if not due:
+            return
+        self._retired = [(retired_at, provider) for retired_at, provider in self._retired
+                         if now - retired_at < self.close_grace_seconds]
+        try:
+            task = asyncio.get_running_loop().create_task(self._close_providers(due))
+        except RuntimeError:
+            # No event loop (sync caller): close them at shutdown instead
+            self._retired.extend((now, provider) for provider in due)
+            return
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close_providers(self, providers: List[Any]):
+        for provider in providers:
+            try:
+                await close_client(getattr(provider, "client", provider))
+            except Exception as e:
+                print(f"Error closing AI provider client: {e}")
+
+    async def close(self):
+        """Close every pooled and evicted client (application shutdown)"""
+        providers = [entry.provider for entry in self._providers.values()]
+        providers += [provider for _, provider in self._retired]
+        self._providers.clear()
+        self._retired.clear()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        await self._close_providers(providers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pooled": len(self._providers),
+            "retired": len(self._retired),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+# Global provider client pool
+provider_client_pool = ProviderClientPool()
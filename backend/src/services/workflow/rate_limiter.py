@@ -0,0 +1,460 @@
+"""
+Provider Rate Limits for AI Calls
+"""
+import asyncio
+import json
+import re
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+import httpx
+
+from ...core.config import settings
+from .adaptive_concurrency import looks_rate_limited
+
+# Tokens assumed for an image, audio or file part of a prompt
+ATTACHMENT_TOKENS = 1000
+
+# Longest single sleep while waiting, so limits learned meanwhile are picked up
+MAX_SLEEP_SECONDS = 1.0
+
+# Longest back-off after a 429 without Retry-After
+MAX_RETRY_SECONDS = 60.0
+
+# Headers reported by OpenAI (x-ratelimit-*) and Anthropic (anthropic-ratelimit-*)
+LIMIT_HEADERS = {
+    "requests": ("x-ratelimit-limit-requests", "anthropic-ratelimit-requests-limit"),
+    "tokens": ("x-ratelimit-limit-tokens", "anthropic-ratelimit-tokens-limit", "anthropic-ratelimit-input-tokens-limit"),
+}
+REMAINING_HEADERS = {
+    "requests": ("x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining"),
+    "tokens": (
+        "x-ratelimit-remaining-tokens",
+        "anthropic-ratelimit-tokens-remaining",
+        "anthropic-ratelimit-input-tokens-remaining",
+    ),
+}
+RESET_HEADERS = {
+    "requests": ("x-ratelimit-reset-requests", "anthropic-ratelimit-requests-reset"),
+    "tokens": ("x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset", "anthropic-ratelimit-input-tokens-reset"),
+}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count of a prompt, message list or request body (about 4 characters per token)"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return 0
+    if isinstance(value, str):
+        return len(value) // 4 + 1
+    if isinstance(value, dict):
+        if value.get("type") in ("image", "image_url", "input_image", "input_audio", "file", "document"):
+            return ATTACHMENT_TOKENS
+        # Ollama sends images as a list of base64 strings
+        images = value.get("images") or []
+        return sum(estimate_tokens(item) for key, item in value.items() if key != "images") + ATTACHMENT_TOKENS * len(images)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(item) for item in value)
+    # SDK objects such as inline file or image parts
+    return ATTACHMENT_TOKENS
+
+
+def usage_tokens(response: Any) -> Optional[int]:
+    """Tokens a response reports as used, from a response body or SDK response object"""
+    if response is None:
+        return None
+    if isinstance(response, dict):
+        usage = response.get("usage")
+        if isinstance(usage, dict):
+            if usage.get("total_tokens") is not None:
+                return int(usage["total_tokens"])
+            parts = [usage.get("input_tokens"), usage.get("output_tokens")]
+            if any(part is not None for part in parts):
+                return sum(int(part or 0) for part in parts)
+        # Ollama
+        parts = [response.get("prompt_eval_count"), response.get("eval_count")]
+        if any(part is not None for part in parts):
+            return sum(int(part or 0) for part in parts)
+        return None
+    # Gemini
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is not None and getattr(metadata, "total_token_count", None) is not None:
+        return int(metadata.total_token_count)
+    usage = getattr(response, "usage", None)
+    if usage is not None and hasattr(usage, "model_dump"):
+        return usage_tokens({"usage": usage.model_dump()})
+    return None
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds until a reset, from "1.5", "6m0s", "20ms", an RFC 3339 timestamp or an HTTP date"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(number) * scale[unit] for number, unit in parts)
+
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _header(headers: Mapping[str, str], names: Tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        if headers.get(name) is not None:
+            return headers[name]
+    return None
+
+
+def _header_number(headers: Mapping[str, str], names: Tuple[str, ...]) -> Optional[float]:
+    value = _header(headers, names)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """``capacity`` units refilled evenly over ``period`` seconds
+
+    Takes may overdraw the bucket (a call that used more tokens than
+    estimated); later callers then wait until it has refilled.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0, now: Optional[float] = None):
+        self.period = period
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken; a request larger than the bucket waits for a full one"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= amount
+
+    def give(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def clamp(self, remaining: float, now: float):
+        """Never assume more is left than the provider reports"""
+        self._refill(now)
+        self.tokens = min(self.tokens, remaining)
+
+    def resize(self, capacity: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / self.period
+        self.tokens = min(self.tokens, self.capacity)
+
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one provider and model
+
+    Calls take one request and their estimated tokens before they start
+    and are corrected with the usage the provider reports. Limits, remaining
+    capacity and Retry-After from response headers override the local view,
+    which keeps processes sharing one API key roughly in step. A limit of 0
+    means unlimited until the provider reports one.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        rpm: int = 0,
+        tpm: int = 0,
+        max_wait_seconds: Optional[float] = None
+    ):
+        self.provider = provider
+        self.model = model
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_wait_seconds = settings.AI_RATE_LIMIT_MAX_WAIT_SECONDS if max_wait_seconds is None else max_wait_seconds
+        self.paused_until = 0.0
+        self.calls = 0
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.throttled = 0
+        self.timeouts = 0
+
+    def wait_time(self, tokens: int, now: Optional[float] = None) -> float:
+        """Seconds until a call of ``tokens`` tokens may start"""
+        now = time.monotonic() if now is None else now
+        waits = [self.paused_until - now, 0.0]
+        if self.requests is not None:
+            waits.append(self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            waits.append(self.tokens.wait_time(tokens, now))
+        return max(waits)
+
+    async def acquire(self, tokens: int, deadline: Optional[float] = None) -> float:
+        """Wait for capacity for one call of ``tokens`` tokens and take it; returns seconds waited
+
+        After ``deadline`` (default ``max_wait_seconds`` from now) the call
+        goes ahead regardless and the provider decides.
+        """
+        started = time.monotonic()
+        if deadline is None:
+            deadline = started + self.max_wait_seconds
+        while True:
+            now = time.monotonic()
+            wait = self.wait_time(tokens, now)
+            if wait <= 0:
+                break
+            if now >= deadline:
+                self.timeouts += 1
+                break
+            await asyncio.sleep(min(wait, deadline - now, MAX_SLEEP_SECONDS))
+
+        now = time.monotonic()
+        if self.requests is not None:
+            self.requests.take(1, now)
+        if self.tokens is not None:
+            self.tokens.take(tokens, now)
+        waited = now - started
+        self.calls += 1
+        if waited > 0.001:
+            self.waits += 1
+            self.waited_seconds += waited
+        return waited
+
+    def settle(self, estimated: int, actual: Optional[int]):
+        """Correct a call's token estimate with what it actually used"""
+        if self.tokens is None or actual is None:
+            return
+        now = time.monotonic()
+        if actual < estimated:
+            self.tokens.give(estimated - actual, now)
+        elif actual > estimated:
+            self.tokens.take(actual - estimated, now)
+
+    def pause(self, seconds: float):
+        """Start no calls for ``seconds``"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def observe(self, headers: Mapping[str, str]) -> Optional[float]:
+        """Apply rate limit headers from a response; returns its Retry-After delay, if any"""
+        headers = {str(name).lower(): value for name, value in headers.items()}
+        now = time.monotonic()
+        for kind in ("requests", "tokens"):
+            bucket = getattr(self, kind)
+            limit = _header_number(headers, LIMIT_HEADERS[kind])
+            if limit:
+                # The provider's limit replaces the configured one
+                if bucket is None:
+                    bucket = TokenBucket(limit, now=now)
+                    setattr(self, kind, bucket)
+                elif bucket.capacity != limit:
+                    bucket.resize(limit)
+            remaining = _header_number(headers, REMAINING_HEADERS[kind])
+            if bucket is not None and remaining is not None:
+                bucket.clamp(remaining, now)
+                reset = parse_duration(_header(headers, RESET_HEADERS[kind]))
+                if remaining <= 0 and reset:
+                    self.pause(reset)
+
+        retry_after = _header_number(headers, ("retry-after-ms",))
+        if retry_after is not None:
+            retry_after /= 1000
+        else:
+            retry_after = parse_duration(headers.get("retry-after"))
+        if retry_after is not None:
+            self.pause(retry_after)
+        return retry_after
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "rpm": self.requests.capacity if self.requests else None,
+            "tpm": self.tokens.capacity if self.tokens else None,
+            "requests_available": round(self.requests.tokens, 2) if self.requests else None,
+            "tokens_available": round(self.tokens.tokens) if self.tokens else None,
+            "paused_seconds": round(max(self.paused_until - now, 0.0), 3),
+            "calls": self.calls,
+            "waits": self.waits,
+            "waited_seconds": round(self.waited_seconds, 3),
+            "throttled": self.throttled,
+            "timeouts": self.timeouts
+        }
+
+
+class RateLimitRegistry:
+    """Rate limiters shared by every AI call in the process, one per provider and model
+
+    Limits come from ``limits`` (default AI_RATE_LIMITS), looked up as
+    "provider:model" and then "provider".
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, int]]] = None,
+        max_wait_seconds: Optional[float] = None,
+        retry_seconds: Optional[float] = None
+    ):
+        self.limits = settings.AI_RATE_LIMITS if limits is None else limits
+        self.max_wait_seconds = settings.AI_RATE_LIMIT_MAX_WAIT_SECONDS if max_wait_seconds is None else max_wait_seconds
+        self.retry_seconds = settings.AI_RATE_LIMIT_RETRY_SECONDS if retry_seconds is None else retry_seconds
+        self._limiters: Dict[Tuple[str, str], ProviderRateLimiter] = {}
+
+    def get(self, provider: str, model: Optional[str] = None) -> ProviderRateLimiter:
+        key = (provider.lower(), model or "")
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            config = self.limits.get(f"{key[0]}:{key[1]}") or self.limits.get(key[0]) or {}
+            limiter = ProviderRateLimiter(
+                key[0], key[1],
+                rpm=int(config.get("rpm", 0)),
+                tpm=int(config.get("tpm", 0)),
+                max_wait_seconds=self.max_wait_seconds
+            )
+            self._limiters[key] = limiter
+        return limiter
+
+    def retry_delay(self, attempt: int) -> float:
+        """Back-off after the ``attempt``-th consecutive 429 that gave no Retry-After"""
+        return min(self.retry_seconds * 2 ** attempt, MAX_RETRY_SECONDS)
+
+    async def call(
+        self,
+        provider: str,
+        model: Optional[str],
+        estimated_tokens: int,
+        func: Callable[[], Awaitable[Any]],
+        usage: Callable[[Any], Optional[int]] = usage_tokens
+    ) -> Any:
+        """Run ``await func()`` within the provider's limits, waiting out rate limit errors
+
+        For SDKs whose HTTP traffic does not go through RateLimitedTransport.
+        """
+        limiter = self.get(provider, model)
+        deadline = time.monotonic() + limiter.max_wait_seconds
+        attempt = 0
+        while True:
+            await limiter.acquire(estimated_tokens, deadline)
+            try:
+                result = await func()
+            except Exception as e:
+                limiter.settle(estimated_tokens, 0)
+                if not looks_rate_limited(str(e)):
+                    raise
+                limiter.throttled += 1
+                delay = self.retry_delay(attempt)
+                if time.monotonic() + delay > deadline:
+                    raise
+                limiter.pause(delay)
+                attempt += 1
+                continue
+            limiter.settle(estimated_tokens, usage(result))
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {f"{provider}:{model}" if model else provider: limiter.get_stats()
+                for (provider, model), limiter in self._limiters.items()}
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """httpx transport that runs model calls within the provider's shared rate limits
+
+    Requests whose JSON body names a ``model`` wait for capacity, are
+    charged their estimated tokens and corrected with the response's
+    ``usage``. A 429 pauses the limiter for Retry-After (or a growing
+    back-off) and the request is sent again, until the limiter's
+    ``max_wait_seconds`` have passed; then the 429 is returned to the SDK.
+    """
+
+    def __init__(self, provider: str, transport: httpx.AsyncBaseTransport, registry: Optional[RateLimitRegistry] = None):
+        self.provider = provider
+        self.transport = transport
+        self.registry = registry or ai_rate_limits
+
+    @staticmethod
+    def _describe(request: httpx.Request) -> Tuple[Optional[str], int]:
+        """Model and estimated tokens (prompt plus requested output) of a model call"""
+        if request.method != "POST" or "json" not in request.headers.get("content-type", ""):
+            return None, 0
+        try:
+            body = json.loads(request.content)
+        except (httpx.RequestNotRead, ValueError):
+            return None, 0
+        if not isinstance(body, dict) or not body.get("model"):
+            return None, 0
+        options = body.get("options") if isinstance(body.get("options"), dict) else {}
+        output_tokens = (
+            body.get("max_tokens")
+            or body.get("max_completion_tokens")
+            or body.get("max_output_tokens")
+            or options.get("num_predict")
+            or settings.AI_RATE_LIMIT_OUTPUT_TOKENS
+        )
+        prompt = {key: value for key, value in body.items() if key not in ("model", "options")}
+        return str(body["model"]), estimate_tokens(prompt) + int(output_tokens)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model, estimated = self._describe(request)
+        if model is None:
+            return await self.transport.handle_async_request(request)
+
+        limiter = self.registry.get(self.provider, model)
+        deadline = time.monotonic() + limiter.max_wait_seconds
+        attempt = 0
+        while True:
+            await limiter.acquire(estimated, deadline)
+            response = await self.transport.handle_async_request(request)
+            retry_after = limiter.observe(response.headers)
+            if response.status_code != 429:
+                break
+            limiter.throttled += 1
+            limiter.settle(estimated, 0)
+            if retry_after is None:
+                retry_after = self.registry.retry_delay(attempt)
+                limiter.pause(retry_after)
+            if time.monotonic() + retry_after > deadline:
+                return response
+            await response.aclose()
+            attempt += 1
+
+        actual = None
+        if response.is_success and "json" in response.headers.get("content-type", ""):
+            # Non-streaming response: read it here (the client reuses the read body) for its usage
+            try:
+                actual = usage_tokens(json.loads(await response.aread()))
+            except ValueError:
+                actual = None
+        limiter.settle(estimated, actual)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+# Global rate limiters for AI provider calls
+ai_rate_limits = RateLimitRegistry()
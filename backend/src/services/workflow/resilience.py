@@ -0,0 +1,285 @@
+"""
+Retries, Circuit Breakers and Failover for AI Providers
+"""
+import asyncio
+import random
+import re
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ...core.config import settings
+from .adaptive_concurrency import looks_rate_limited
+
+# Error text of failures worth retrying: timeouts, dropped connections and provider-side errors
+TRANSIENT_MARKERS = (
+    "timeout", "timed out", "connection error", "connection reset", "connecterror", "readerror",
+    "remoteprotocolerror", "server disconnected", "overloaded", "unavailable", "bad gateway",
+    "internal server error", "internal error", "api_error",
+)
+TRANSIENT_STATUS = re.compile(r"(error code|status code|status)[:=\s]+(5\d\d)|\b5\d\d (internal|unavailable)", re.IGNORECASE)
+
+# Failover target: (provider name, provider, model or None for its default)
+Failover = Tuple[str, Any, Optional[str]]
+
+
+def classify_failure(error: Optional[str]) -> Optional[str]:
+    """"rate_limited" or "transient" for failures caused by the provider, else None"""
+    if not error:
+        return None
+    if looks_rate_limited(error):
+        return "rate_limited"
+    text = str(error).lower()
+    if TRANSIENT_STATUS.search(text) or any(marker in text for marker in TRANSIENT_MARKERS):
+        return "transient"
+    return None
+
+
+def failure_error(result: Any) -> Optional[str]:
+    """Error of a failed provider result; simulated responses count as failures of the real call"""
+    if not isinstance(result, dict):
+        return None
+    if not result.get("success"):
+        return str(result.get("error") or "Unknown error")
+    metadata = result.get("metadata") or {}
+    if metadata.get("simulated"):
+        return str(metadata.get("original_error") or "Simulated response")
+    return None
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one provider
+
+    ``failure_threshold`` failed calls in a row open the circuit and calls
+    fail fast. After ``recovery_seconds`` one trial call is let through
+    (half open): success closes the circuit, failure opens it again.
+    Only provider-side failures count; a rejected request proves the
+    provider is up.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None, recovery_seconds: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = max(int(failure_threshold or settings.AI_BREAKER_FAILURE_THRESHOLD), 1)
+        self.recovery_seconds = settings.AI_BREAKER_RECOVERY_SECONDS if recovery_seconds is None else recovery_seconds
+        self.state = self.CLOSED
+        self.failures = 0  # Consecutive
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.trips = 0
+        self.rejected = 0
+        self.successes = 0
+        self.total_failures = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_seconds:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.successes += 1
+        self.failures = 0
+        self.state = self.CLOSED
+        self._trial_in_flight = False
+
+    def record_failure(self, error: Optional[str] = None):
+        self.total_failures += 1
+        self.failures += 1
+        self.last_error = error
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def abandon(self):
+        """A call let through ended without an outcome (cancelled)"""
+        if self.state == self.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def reset(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a trial call through"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(self.recovery_seconds - (time.monotonic() - self.opened_at), 0.0)
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "retry_in_seconds": round(self.retry_in(), 3),
+            "last_error": self.last_error,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "successes": self.successes,
+            "failures": self.total_failures
+        }
+
+
+class CircuitBreakerRegistry:
+    """One circuit breaker per provider, shared by every call in the process"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        provider = provider.lower()
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = self._breakers[provider] = CircuitBreaker(provider)
+        return breaker
+
+    def find(self, provider: str) -> Optional[CircuitBreaker]:
+        return self._breakers.get(provider.lower())
+
+    def get_states(self) -> Dict[str, Dict[str, Any]]:
+        return {provider: breaker.get_state() for provider, breaker in self._breakers.items()}
+
+
+async def _invoke(provider: Any, method: str, args: tuple, model_name: Optional[str], kwargs: Dict[str, Any]):
+    if model_name is None:
+        # Keep the provider's own default model
+        return await getattr(provider, method)(*args, **kwargs)
+    return await getattr(provider, method)(*args, model_name, **kwargs)
+
+
+class ResilientAIProvider:
+    """An AI provider whose calls are retried, guarded by a circuit breaker and failed over
+
+    Transient failures (timeouts, connection errors, 5xx) are retried up to
+    ``max_attempts`` times with full-jitter exponential backoff. A call that
+    still fails counts against the provider's breaker; while it is open
+    calls fail fast. Failed or rejected calls go to the provider returned
+    by ``failover``, if any; pass ``failover=False`` to a call to prevent
+    that. Rate limit errors are returned as they are: the rate limiter has
+    already waited them out, and the caller's concurrency limit needs to
+    see them to back off. They neither trip the breaker nor fail over.
+    Results keep the providers' contract: a dict with ``success`` and
+    ``error``, never an exception.
+    """
+
+    def __init__(
+        self,
+        provider_name: str,
+        provider: Any,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        failover: Optional[Callable[[], Optional[Failover]]] = None,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        self.provider_name = provider_name
+        self.provider = provider
+        self.breaker = (breakers or circuit_breakers).get(provider_name)
+        self.failover = failover
+        self.max_attempts = max(int(max_attempts or settings.AI_RETRY_MAX_ATTEMPTS), 1)
+        self.base_delay = settings.AI_RETRY_BASE_SECONDS if base_delay is None else base_delay
+        self.max_delay = settings.AI_RETRY_MAX_SECONDS if max_delay is None else max_delay
+
+    async def generate_content(self, prompt: str, output_format: str, model_name: str = None, **kwargs) -> Dict[str, Any]:
+        return await self._call("generate_content", (prompt, output_format), model_name, kwargs)
+
+    async def process_with_assets(
+        self,
+        description: str,
+        asset_urls: list,
+        output_format: str,
+        model_name: str = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        return await self._call("process_with_assets", (description, asset_urls, output_format), model_name, kwargs)
+
+    def retry_delay(self, attempt: int) -> float:
+        """Full jitter: uniform between 0 and the exponential backoff for this attempt"""
+        return random.uniform(0, min(self.base_delay * 2 ** attempt, self.max_delay))
+
+    async def _call(self, method: str, args: tuple, model_name: Optional[str], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        use_failover = kwargs.pop("failover", True)
+        if self.breaker.allow():
+            result = await self._attempt(method, args, model_name, kwargs)
+            outage = classify_failure(failure_error(result)) == "transient"
+        else:
+            result = {
+                "success": False,
+                "error": f"{self.provider_name} circuit open after repeated failures; "
+                         f"next attempt in {self.breaker.retry_in():.0f}s",
+                "content": None,
+                "metadata": {"circuit_open": True}
+            }
+            outage = True
+
+        if not outage or not use_failover or self.failover is None:
+            return result
+        target = self.failover()
+        if target is None:
+            return result
+
+        name, secondary, secondary_model = target
+        print(f"AI provider {self.provider_name} unavailable ({failure_error(result)}), failing over to {name}")
+        fallback = await _invoke(secondary, method, args, secondary_model, {**kwargs, "failover": False})
+        if failure_error(fallback) is not None:
+            # Report the primary failure; the secondary is only a stand-in
+            return result
+        fallback["metadata"] = {
+            **(fallback.get("metadata") or {}),
+            "failover_from": self.provider_name,
+            "failover_provider": name
+        }
+        return fallback
+
+    async def _attempt(self, method: str, args: tuple, model_name: Optional[str], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the provider, retrying transient failures; records the outcome on the breaker"""
+        attempt = 0
+        while True:
+            try:
+                result = await _invoke(self.provider, method, args, model_name, kwargs)
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+            except Exception as e:
+                result = {"success": False, "error": str(e), "content": None}
+
+            error = failure_error(result)
+            kind = classify_failure(error)
+            if kind is None:
+                # Success, or a failure of the request rather than the provider
+                self.breaker.record_success()
+                if attempt and isinstance(result.get("metadata"), dict):
+                    result["metadata"]["attempts"] = attempt + 1
+                return result
+            if kind == "rate_limited":
+                # The provider is up and answering; this call just has to wait its turn
+                self.breaker.abandon()
+                return result
+            if attempt + 1 < self.max_attempts:
+                await asyncio.sleep(self.retry_delay(attempt))
+                attempt += 1
+                continue
+            self.breaker.record_failure(error)
+            return result
+
+    def __getattr__(self, name: str):
+        return getattr(self.provider, name)
+
+
+# Global circuit breakers for AI providers
+circuit_breakers = CircuitBreakerRegistry()
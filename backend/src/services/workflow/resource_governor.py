@@ -0,0 +1,154 @@
+"""
+Process-Wide Concurrency Governor for Workflow Components and External Services
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Deque, Optional, Tuple
+
+from ...core.config import settings
+from .tracing import IO, QUEUE, current_node, current_trace, trace_span
+
+
+class WeightedSemaphore:
+    """Semaphore whose holders take ``weight`` units out of ``capacity``
+
+    Waiters are served strictly first come, first served, so a heavy request
+    is not starved by a stream of light ones.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+
+        # Statistics
+        self.acquired = 0
+        self.queued = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def acquire(self, weight: int = 1) -> int:
+        """Wait for ``weight`` units; returns the units actually taken"""
+        weight = min(max(weight, 1), self.capacity)
+        if not self._waiters and self.in_use + weight <= self.capacity:
+            self.in_use += weight
+            self.acquired += 1
+            return weight
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (weight, future)
+        self._waiters.append(waiter)
+        self.queued += 1
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller was cancelled; hand the units back
+                self.release(weight)
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+                self._wake()
+            raise
+
+        waited = time.monotonic() - started
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.acquired += 1
+        return weight
+
+    def release(self, weight: int = 1):
+        self.in_use -= weight
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            weight, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self.in_use + weight > self.capacity:
+                break
+            self._waiters.popleft()
+            self.in_use += weight
+            future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "waiting": len(self._waiters),
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "avg_wait_ms": int(self.total_wait_seconds / self.queued * 1000) if self.queued else 0,
+            "max_wait_ms": int(self.max_wait_seconds * 1000)
+        }
+
+
+class ResourceGovernor:
+    """Named concurrency pools shared by every run in the process
+
+    Pools are named ``component:<type>`` (held by the engine while a node of
+    that type executes) and ``service:<name>`` (held by components around
+    calls to an external API, e.g. ``service:google_sheets`` or
+    ``service:openai``). Capacities come from ``WORKFLOW_RESOURCE_LIMITS``;
+    names without a limit are not throttled. Pools are per process, so with
+    several worker processes the effective limit is multiplied by their count.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self.limits = dict(settings.WORKFLOW_RESOURCE_LIMITS if limits is None else limits)
+        self._pools: Dict[str, WeightedSemaphore] = {}
+
+    def _pool(self, name: str) -> Optional[WeightedSemaphore]:
+        pool = self._pools.get(name)
+        if pool is None:
+            capacity = self.limits.get(name)
+            if not capacity or capacity <= 0:
+                return None
+            pool = self._pools[name] = WeightedSemaphore(capacity)
+        return pool
+
+    @asynccontextmanager
+    async def limit(self, *names: str, weight: int = 1):
+        """Hold ``weight`` units of every named pool for the duration of the block"""
+        acquired = []
+        try:
+            # Fixed order so callers needing several pools cannot deadlock
+            for name in sorted(set(names)):
+                pool = self._pool(name)
+                if pool is not None:
+                    trace = current_trace()
+                    started = trace.now() if trace else 0
+                    queued = pool.queued
+                    acquired.append((pool, await pool.acquire(weight)))
+                    if trace and pool.queued != queued:
+                        trace.add(f"wait {name}", QUEUE, started, trace.now(), current_node())
+            yield
+        finally:
+            for pool, units in reversed(acquired):
+                pool.release(units)
+
+    def component(self, component_type: str, weight: int = 1):
+        """Limit for executing a node of ``component_type``"""
+        return self.limit(f"component:{component_type}", weight=weight)
+
+    @asynccontextmanager
+    async def service(self, service_name: str, weight: int = 1):
+        """Limit for calling an external service; the call is traced as I/O"""
+        async with self.limit(f"service:{service_name}", weight=weight):
+            with trace_span(service_name, IO):
+                yield
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get usage of every pool that has been used"""
+        return {name: pool.get_stats() for name, pool in sorted(self._pools.items())}
+
+
+# Global resource governor instance
+resource_governor = ResourceGovernor()
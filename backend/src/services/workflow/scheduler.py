@@ -0,0 +1,441 @@
+"""
+Scheduler for Cron and Interval Workflow Triggers
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ...core.config import settings
+from ...models.database import AsyncSessionLocal
+from ...models.workflow import WorkflowInstance, WorkflowSchedule, WorkflowSchedulerLease, WorkflowTemplate
+from .cron import CronExpression, get_timezone
+from .execution_engine import WorkflowExecutionEngine
+from .job_queue import get_job_queue
+from .leases import as_utc, holder_id, renew_interval, utcnow
+from .timer_wheel import HashedTimerWheel
+
+# Component type whose nodes become schedules
+SCHEDULE_TRIGGER_TYPE = "schedule_trigger"
+
+# Lease row the scheduler processes compete for
+LEASE_NAME = "workflow-scheduler"
+
+
+def schedule_id_for(template_id: str, node_id: str) -> str:
+    return f"{template_id}:{node_id}"
+
+
+def parse_schedule_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a schedule_trigger node's config; raises ValueError if it cannot fire"""
+    cron_expression = (config.get("cron_expression") or "").strip() or None
+    interval = config.get("interval_seconds")
+    interval_seconds = int(interval) if interval not in (None, "") else None
+    tz = config.get("timezone") or "UTC"
+
+    if cron_expression and interval_seconds:
+        raise ValueError("Set either cron_expression or interval_seconds, not both")
+    if cron_expression:
+        CronExpression(cron_expression, tz)
+    elif interval_seconds is None:
+        raise ValueError("Set cron_expression or interval_seconds")
+    elif interval_seconds < 1:
+        raise ValueError("interval_seconds must be at least 1")
+    get_timezone(tz)
+
+    input_data = config.get("input_data") or {}
+    if not isinstance(input_data, dict):
+        raise ValueError("input_data must be a JSON object")
+
+    return {
+        "cron_expression": cron_expression,
+        "interval_seconds": interval_seconds if not cron_expression else None,
+        "timezone": tz,
+        "enabled": config.get("enabled", True) is not False,
+        "input_data": input_data
+    }
+
+
+def compute_next_run(
+    cron_expression: Optional[str],
+    interval_seconds: Optional[int],
+    tz: Optional[str],
+    after: datetime,
+    anchor: Optional[datetime] = None
+) -> datetime:
+    """Next fire time strictly after ``after``
+
+    Interval schedules stay on the grid of ``anchor`` (the previous fire
+    time), so a late fire does not shift every later one.
+    """
+    if cron_expression:
+        return CronExpression(cron_expression, tz).next_after(after)
+    if not interval_seconds:
+        raise ValueError("Schedule has neither a cron expression nor an interval")
+    interval = timedelta(seconds=interval_seconds)
+    if anchor is None:
+        return after + interval
+    if anchor > after:
+        return anchor
+    return anchor + interval * ((after - anchor) // interval + 1)
+
+
+class WorkflowScheduler:
+    """Fires schedule_trigger nodes at their cron or interval times
+
+    Every API and worker process runs one; they elect a leader through a
+    lease row, and only the leader keeps a timer wheel with all enabled
+    schedules and fires them. A fire creates an instance of the template and
+    hands it to the job queue (or runs it here when runs execute inline).
+    Each fire advances ``next_run_at`` with a compare-and-set, so a schedule
+    fires once even if a deposed leader is still ticking. Fires missed while
+    no process was leading are made up with a single run.
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        tick_seconds: Optional[float] = None,
+        slots: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        reload_seconds: Optional[int] = None,
+        scheduler_id: Optional[str] = None
+    ):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.tick_seconds = tick_seconds or settings.WORKFLOW_SCHEDULER_TICK_SECONDS
+        self.lease_seconds = lease_seconds or settings.WORKFLOW_SCHEDULER_LEASE_SECONDS
+        self.reload_seconds = reload_seconds or settings.WORKFLOW_SCHEDULER_RELOAD_SECONDS
+        self.scheduler_id = scheduler_id or holder_id()
+        self.wheel = HashedTimerWheel(self.tick_seconds, slots or settings.WORKFLOW_SCHEDULER_WHEEL_SLOTS)
+        self.is_leader = False
+        self.fired = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._pending: set = set()  # In-flight fires
+        self._runs: set = set()  # Runs executing inline in this process
+        self._next_reload = 0.0
+
+    # Schedule rows
+
+    async def sync_template(self, db, template: WorkflowTemplate) -> List[Dict[str, Any]]:
+        """Create, update and remove a template's schedules to match its schedule_trigger nodes
+
+        Runs in the caller's transaction; the caller commits. Returns one
+        summary per node, with ``error`` set for nodes that cannot fire.
+        """
+        now = utcnow()
+        result = await db.execute(select(WorkflowSchedule).where(WorkflowSchedule.template_id == template.id))
+        existing = {schedule.id: schedule for schedule in result.scalars().all()}
+        summaries = []
+
+        for node in (template.template_data or {}).get("nodes", []):
+            if node.get("type") != SCHEDULE_TRIGGER_TYPE:
+                continue
+            node_id = node.get("id")
+            schedule_id = schedule_id_for(template.id, node_id)
+            try:
+                config = parse_schedule_config((node.get("data") or {}).get("config") or {})
+            except ValueError as e:
+                # Keep the row out of the way until the node is fixed
+                config, error = None, str(e)
+            else:
+                error = None
+
+            schedule = existing.pop(schedule_id, None)
+            if schedule is None:
+                schedule = WorkflowSchedule(id=schedule_id, template_id=template.id, node_id=node_id)
+                db.add(schedule)
+            timing_changed = config is None or (
+                schedule.cron_expression, schedule.interval_seconds, schedule.timezone, schedule.enabled
+            ) != (config["cron_expression"], config["interval_seconds"], config["timezone"], config["enabled"])
+
+            schedule.created_by = template.created_by
+            if config is None:
+                schedule.enabled = False
+                schedule.next_run_at = None
+            else:
+                schedule.cron_expression = config["cron_expression"]
+                schedule.interval_seconds = config["interval_seconds"]
+                schedule.timezone = config["timezone"]
+                schedule.enabled = config["enabled"]
+                schedule.input_data = config["input_data"]
+                if not schedule.enabled:
+                    schedule.next_run_at = None
+                elif timing_changed or schedule.next_run_at is None:
+                    schedule.next_run_at = compute_next_run(
+                        schedule.cron_expression, schedule.interval_seconds, schedule.timezone, now
+                    )
+            self._track(schedule.id, schedule.next_run_at if schedule.enabled else None)
+
+            summaries.append({
+                "schedule_id": schedule.id,
+                "node_id": node_id,
+                "enabled": bool(schedule.enabled),
+                "next_run_at": schedule.next_run_at.isoformat() if schedule.next_run_at else None,
+                "error": error
+            })
+
+        for schedule in existing.values():
+            self._track(schedule.id, None)
+            await db.delete(schedule)
+        return summaries
+
+    async def remove_template(self, db, template_id: str):
+        """Delete a template's schedules in the caller's transaction"""
+        result = await db.execute(
+            select(WorkflowSchedule.id).where(WorkflowSchedule.template_id == template_id)
+        )
+        for schedule_id in result.scalars().all():
+            self._track(schedule_id, None)
+        await db.execute(delete(WorkflowSchedule).where(WorkflowSchedule.template_id == template_id))
+
+    def _track(self, schedule_id: str, next_run_at: Optional[datetime]):
+        # Other processes' changes reach the leader on its next reload
+        if not self.is_leader:
+            return
+        if next_run_at is None:
+            self.wheel.cancel(schedule_id)
+        else:
+            self.wheel.schedule(schedule_id, as_utc(next_run_at).timestamp())
+
+    async def load_schedules(self):
+        """Put every enabled schedule on the timer wheel, dropping ones that are gone"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(WorkflowSchedule.id, WorkflowSchedule.next_run_at)
+                .where(WorkflowSchedule.enabled.is_(True), WorkflowSchedule.next_run_at.isnot(None))
+            )
+            rows = result.all()
+
+        loaded = set()
+        for schedule_id, next_run_at in rows:
+            loaded.add(schedule_id)
+            when = as_utc(next_run_at).timestamp()
+            if self.wheel.due_time(schedule_id) != when:
+                self.wheel.schedule(schedule_id, when)
+        for schedule_id in [key for key in self.wheel.keys() if key not in loaded]:
+            self.wheel.cancel(schedule_id)
+        self._next_reload = asyncio.get_running_loop().time() + self.reload_seconds
+
+    # Firing
+
+    async def fire(self, schedule_id: str, now: Optional[datetime] = None) -> Optional[str]:
+        """Start the run a schedule is due for; returns its instance id
+
+        Returns None when the schedule is gone, disabled, not yet due or was
+        fired by another process first.
+        """
+        now = now or utcnow()
+        async with self.session_factory() as db:
+            schedule = await db.get(WorkflowSchedule, schedule_id)
+            if schedule is None or not schedule.enabled or schedule.next_run_at is None:
+                return None
+            due = as_utc(schedule.next_run_at)
+            if due > now + timedelta(seconds=self.tick_seconds):
+                # Moved later by an edit since it was put on the wheel
+                self._track(schedule_id, due)
+                return None
+            template = await db.get(WorkflowTemplate, schedule.template_id)
+            if template is None:
+                return None
+
+            # However many fires were missed, one run makes up for them
+            next_run_at = compute_next_run(
+                schedule.cron_expression, schedule.interval_seconds, schedule.timezone, now, anchor=due
+            )
+            instance_id = str(uuid.uuid4())
+            claimed = await db.execute(
+                update(WorkflowSchedule)
+                .where(WorkflowSchedule.id == schedule_id, WorkflowSchedule.next_run_at == schedule.next_run_at)
+                .values(next_run_at=next_run_at, last_run_at=due, last_instance_id=instance_id)
+                .execution_options(synchronize_session=False)
+            )
+            if claimed.rowcount == 0:
+                await db.rollback()
+                return None
+
+            input_data = {
+                **(schedule.input_data or {}),
+                "schedule_id": schedule_id,
+                "scheduled_for": due.isoformat(),
+                "triggered_at": now.isoformat()
+            }
+            tenant = schedule.created_by
+            db.add(WorkflowInstance(
+                id=instance_id,
+                name=f"{template.name} ({due:%Y-%m-%d %H:%M} UTC)",
+                template_id=template.id,
+                workflow_data=template.template_data,
+                input_data=input_data,
+                created_by=tenant,
+                status="queued"
+            ))
+            await db.commit()
+
+        self._track(schedule_id, next_run_at)
+        self.fired += 1
+        await self._dispatch(instance_id, input_data, tenant)
+        return instance_id
+
+    async def _dispatch(self, instance_id: str, input_data: Dict[str, Any], tenant: Optional[str]):
+        job_queue = get_job_queue()
+        if job_queue:
+            await job_queue.enqueue(instance_id, input_data, tenant=tenant)
+        else:
+            task = asyncio.create_task(self._run_inline(instance_id, input_data))
+            self._runs.add(task)
+            task.add_done_callback(self._runs.discard)
+
+    async def _run_inline(self, instance_id: str, input_data: Dict[str, Any]):
+        async with self.session_factory() as db:
+            try:
+                await WorkflowExecutionEngine(db).execute_workflow(instance_id, input_data)
+            except Exception as e:
+                # Failure is already recorded on the instance by the engine
+                print(f"Scheduled workflow run {instance_id} failed: {e}")
+
+    async def _fire_safely(self, schedule_id: str):
+        try:
+            await self.fire(schedule_id)
+        except Exception as e:
+            print(f"Error firing workflow schedule {schedule_id}: {e}")
+            # Try again on the next reload rather than losing the schedule
+            self.wheel.schedule(schedule_id, (utcnow() + timedelta(seconds=self.reload_seconds)).timestamp())
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    # Leader election
+
+    async def acquire_lease(self) -> bool:
+        """Take or renew the scheduler lease; True while this process leads"""
+        now = utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(WorkflowSchedulerLease)
+                .where(
+                    WorkflowSchedulerLease.name == LEASE_NAME,
+                    or_(
+                        WorkflowSchedulerLease.holder == self.scheduler_id,
+                        WorkflowSchedulerLease.expires_at < now
+                    )
+                )
+                .values(holder=self.scheduler_id, expires_at=expires_at)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                await db.commit()
+                return True
+            if await db.get(WorkflowSchedulerLease, LEASE_NAME) is not None:
+                await db.rollback()
+                return False
+            db.add(WorkflowSchedulerLease(name=LEASE_NAME, holder=self.scheduler_id, expires_at=expires_at))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another process created the lease first
+                await db.rollback()
+                return False
+            return True
+
+    async def release_lease(self):
+        async with self.session_factory() as db:
+            await db.execute(
+                update(WorkflowSchedulerLease)
+                .where(WorkflowSchedulerLease.name == LEASE_NAME, WorkflowSchedulerLease.holder == self.scheduler_id)
+                .values(expires_at=utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _elect(self):
+        try:
+            leading = await self.acquire_lease()
+        except Exception as e:
+            print(f"Error renewing workflow scheduler lease: {e}")
+            leading = False
+
+        if leading and not self.is_leader:
+            self.is_leader = True
+            await self.load_schedules()
+            print(f"✅ Workflow scheduler {self.scheduler_id} is leading ({len(self.wheel)} schedule(s))")
+        elif not leading and self.is_leader:
+            self.is_leader = False
+            self.wheel.clear()
+            print(f"Workflow scheduler {self.scheduler_id} lost its lease")
+
+    # Lifecycle
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while not self._stopping.is_set():
+            await self._elect()
+            renew_at = loop.time() + renew_interval(self.lease_seconds)
+            while not self._stopping.is_set() and loop.time() < renew_at:
+                if self.is_leader:
+                    for schedule_id in self.wheel.advance():
+                        self._spawn(self._fire_safely(schedule_id))
+                    if loop.time() >= self._next_reload:
+                        try:
+                            await self.load_schedules()
+                        except Exception as e:
+                            print(f"Error reloading workflow schedules: {e}")
+                    timeout = self.tick_seconds
+                else:
+                    timeout = renew_at - loop.time()
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), max(timeout, 0))
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        """Start competing for leadership in the background"""
+        if self._task is None or self._task.done():
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop ticking, wait for in-flight fires and hand the lease over
+
+        Scheduled runs still executing inline are cancelled rather than waited
+        for, so shutdown does not hang on them.
+        """
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        runs = list(self._runs)
+        for task in runs:
+            task.cancel()
+        if runs:
+            await asyncio.gather(*runs, return_exceptions=True)
+        if self.is_leader:
+            self.is_leader = False
+            self.wheel.clear()
+            try:
+                await self.release_lease()
+            except Exception as e:
+                print(f"Error releasing workflow scheduler lease: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "scheduler_id": self.scheduler_id,
+            "running": self._task is not None and not self._task.done(),
+            "is_leader": self.is_leader,
+            "timers": len(self.wheel),
+            "fired": self.fired,
+            "tick_seconds": self.tick_seconds
+        }
+
+
+# Global scheduler instance
+workflow_scheduler = WorkflowScheduler()
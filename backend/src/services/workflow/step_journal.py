@@ -0,0 +1,305 @@
+"""
+Buffered Journal for Workflow Execution Steps
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.config import settings
+from ...models.workflow import WorkflowExecutionStep, WorkflowInstance
+from .tracing import DB, current_trace
+
+_DATETIME_FIELDS = ("started_at", "completed_at")
+
+# Instance statuses whose write-ahead file may still be in use
+LIVE_STATUSES = ("queued", "running")
+
+
+def _journal_dir() -> Path:
+    return Path(settings.WORKFLOW_JOURNAL_DIR)
+
+
+def _encode_row(row: Dict[str, Any]) -> str:
+    encoded = dict(row)
+    for field in _DATETIME_FIELDS:
+        if isinstance(encoded.get(field), datetime):
+            encoded[field] = encoded[field].isoformat()
+    return json.dumps(encoded, ensure_ascii=False, default=str)
+
+
+def _decode_row(line: str) -> Dict[str, Any]:
+    row = json.loads(line)
+    for field in _DATETIME_FIELDS:
+        if row.get(field):
+            row[field] = datetime.fromisoformat(row[field])
+    return row
+
+
+def read_checkpoint(instance_id: str) -> List[Dict[str, Any]]:
+    """Read step rows from an instance's write-ahead file that have not reached the database"""
+    path = _journal_dir() / f"{instance_id}.jsonl"
+    if not path.exists():
+        return []
+
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(_decode_row(line))
+            except (ValueError, TypeError):
+                # A torn last line from a crash mid-write; everything before it is intact
+                break
+    return rows
+
+
+async def recover_step_journal(db: AsyncSession, instance_id: str) -> int:
+    """Replay an instance's write-ahead file left behind by a crashed run
+
+    Called before the instance runs again, so the previous run's steps are in
+    the database before a new journal reuses the file. Rows already present
+    (the crash happened after the commit but before the file was truncated)
+    are skipped. Returns the number of rows recovered.
+    """
+    path = _journal_dir() / f"{instance_id}.jsonl"
+    if not path.exists():
+        return 0
+
+    recovered = 0
+    rows = read_checkpoint(instance_id)
+    if rows:
+        result = await db.execute(
+            select(WorkflowExecutionStep.id).where(
+                WorkflowExecutionStep.id.in_([row["id"] for row in rows])
+            )
+        )
+        existing = set(result.scalars().all())
+        missing = [row for row in rows if row["id"] not in existing]
+        if missing:
+            await db.execute(insert(WorkflowExecutionStep), missing)
+            await db.commit()
+            recovered = len(missing)
+    path.unlink()
+    return recovered
+
+
+async def recover_step_journals(db: AsyncSession) -> int:
+    """Replay write-ahead files of crashed runs that are not running any more
+
+    Files of queued or running instances are left alone: a worker process may
+    still be writing them, and a run that did die is recovered by
+    ``recover_step_journal`` when it is executed or resumed again. Returns the
+    number of rows recovered.
+    """
+    journal_dir = _journal_dir()
+    if not journal_dir.exists():
+        return 0
+
+    instance_ids = [path.stem for path in journal_dir.glob("*.jsonl")]
+    if not instance_ids:
+        return 0
+    result = await db.execute(
+        select(WorkflowInstance.id).where(
+            WorkflowInstance.id.in_(instance_ids),
+            WorkflowInstance.status.in_(LIVE_STATUSES)
+        )
+    )
+    live = set(result.scalars().all())
+
+    recovered = 0
+    for instance_id in instance_ids:
+        if instance_id not in live:
+            recovered += await recover_step_journal(db, instance_id)
+    return recovered
+
+
+async def load_checkpoints(db: AsyncSession, instance_id: str, since: datetime) -> Dict[str, Dict[str, Any]]:
+    """Collect the checkpoints of an instance's current run, keyed by node id
+
+    A checkpoint is a completed step row with its fired handles, from the
+    database or from a write-ahead file the run did not get to flush. Only
+    steps started at or after ``since`` (the run's start) are considered.
+    """
+    result = await db.execute(
+        select(WorkflowExecutionStep)
+        .where(
+            WorkflowExecutionStep.workflow_instance_id == instance_id,
+            WorkflowExecutionStep.status == "completed",
+            WorkflowExecutionStep.started_at >= since
+        )
+        .order_by(WorkflowExecutionStep.started_at)
+    )
+    rows = [
+        {"node_id": step.node_id, "output_data": step.output_data, "next_steps": step.next_steps, "status": step.status}
+        for step in result.scalars().all()
+    ]
+    # Write-ahead rows carry naive local timestamps
+    local_since = since.astimezone().replace(tzinfo=None) if since.tzinfo else since
+    rows.extend(
+        row for row in read_checkpoint(instance_id)
+        if row.get("status") == "completed" and row.get("started_at") and row["started_at"] >= local_since
+    )
+
+    checkpoints = {}
+    for row in rows:
+        # Rows written before fired handles were recorded cannot be routed
+        if row.get("next_steps") is None:
+            continue
+        checkpoints[row["node_id"]] = {
+            "output_data": row["output_data"],
+            "next_steps": row["next_steps"]
+        }
+    return checkpoints
+
+
+class StepJournal:
+    """Buffers WorkflowExecutionStep rows for one run and writes them in bulk
+
+    Rows are flushed as a single multi-row INSERT when the buffer reaches
+    ``flush_size``, when ``flush_interval`` seconds have passed since the first
+    buffered row, and when the run closes the journal. Every row is also
+    appended to a per-instance write-ahead file before it is buffered, so a
+    crashed run can be reconstructed with ``read_checkpoint`` or
+    ``recover_step_journal``.
+
+    Node tasks of one run share the journal (and its session) concurrently, so
+    every database round trip is serialised behind a lock.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        instance_id: str,
+        flush_size: Optional[int] = None,
+        flush_interval: Optional[float] = None
+    ):
+        self.db = db
+        self.instance_id = instance_id
+        self.flush_size = flush_size or settings.WORKFLOW_JOURNAL_FLUSH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.WORKFLOW_JOURNAL_FLUSH_INTERVAL
+        self.buffer: List[Dict[str, Any]] = []
+        self.flush_count = 0
+
+        journal_dir = _journal_dir()
+        journal_dir.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_path = journal_dir / f"{instance_id}.jsonl"
+        self._checkpoint_file = open(self.checkpoint_path, "a", encoding="utf-8")
+        self._flush_lock = asyncio.Lock()
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._buffer_started_at: Optional[float] = None
+
+    async def record(self, row: Dict[str, Any]):
+        """Add a step row to the journal"""
+        # Write-ahead first so the row survives a crash before the next flush
+        self._checkpoint_file.write(_encode_row(row) + "\n")
+        self._checkpoint_file.flush()
+
+        if not self.buffer:
+            self._buffer_started_at = time.monotonic()
+            self._schedule_timed_flush()
+        self.buffer.append(row)
+
+        if len(self.buffer) >= self.flush_size or (
+            time.monotonic() - self._buffer_started_at >= self.flush_interval
+        ):
+            await self.flush()
+
+    def _schedule_timed_flush(self):
+        if self._flush_timer is None:
+            self._flush_timer = asyncio.create_task(self._timed_flush())
+
+    async def _timed_flush(self):
+        await asyncio.sleep(self.flush_interval)
+        self._flush_timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Error flushing step journal for {self.instance_id}: {e}")
+
+    async def flush(self):
+        """Write all buffered rows with a single bulk INSERT"""
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        async with self._flush_lock:
+            if not self.buffer:
+                return
+
+            rows = self.buffer
+            self.buffer = []
+            trace = current_trace()
+            started = trace.now() if trace else 0
+            try:
+                await self.db.execute(insert(WorkflowExecutionStep), rows)
+                await self.db.commit()
+                if trace:
+                    trace.add("journal flush", DB, started, trace.now(), rows=len(rows))
+            except Exception:
+                await self.db.rollback()
+                # Keep the rows (and the write-ahead file) for the next attempt
+                self.buffer = rows + self.buffer
+                raise
+
+            self.flush_count += 1
+            if self.buffer:
+                # Rows recorded while the INSERT was in flight are still only
+                # in the write-ahead file; rewrite it with just those
+                self._checkpoint_file.seek(0)
+                self._checkpoint_file.truncate()
+                for row in self.buffer:
+                    self._checkpoint_file.write(_encode_row(row) + "\n")
+                self._checkpoint_file.flush()
+            else:
+                # Everything in the write-ahead file is now durable in the database
+                self._checkpoint_file.seek(0)
+                self._checkpoint_file.truncate()
+
+    async def close(self):
+        """Flush remaining rows and drop the write-ahead file
+
+        If the final flush fails the write-ahead file is kept so the steps can
+        be replayed by ``recover_step_journal``.
+        """
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Error flushing step journal for {self.instance_id}, keeping checkpoint: {e}")
+            self._checkpoint_file.close()
+            return
+
+        self._checkpoint_file.close()
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+
+class MemoryJournal:
+    """Step journal that keeps rows in memory instead of writing them
+
+    Used for sub-workflow runs (see ``WorkflowExecutionEngine.run_subworkflow``):
+    they have no instance row to reference, and the parent node's own step
+    row summarises them.
+    """
+
+    def __init__(self):
+        self.rows: List[Dict[str, Any]] = []
+
+    async def record(self, row: Dict[str, Any]):
+        self.rows.append(row)
+
+    async def flush(self):
+        pass
+
+    async def close(self):
+        pass
@@ -0,0 +1,143 @@
+"""
+Pipelined Execution of Streaming Component Chains
+"""
+import asyncio
+import time
+from contextlib import aclosing
+from typing import Dict, Any, List, Optional
+
+from ...core.config import settings
+from ...schemas.workflow_components import ExecutionContext, ExecutionResult
+from .tracing import COMPONENT, set_current_node, trace_span
+
+# Marks the end of a channel
+_END = object()
+
+
+class UpstreamStageError(Exception):
+    """Raised in a consuming stage when the stage feeding it failed"""
+
+
+class StreamAbandoned(Exception):
+    """Raised in a producing stage when its consumer stopped reading"""
+
+
+class BatchChannel:
+    """Bounded buffer of record batches between two adjacent stages
+
+    ``put`` waits while ``max_batches`` batches are unread, so a fast producer
+    runs at most that far ahead of its consumer and memory stays bounded.
+    """
+
+    def __init__(self, max_batches: int):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_batches)
+        self.abandoned = False
+        self.batches = 0
+
+    async def put(self, batch: List[Dict[str, Any]]):
+        if self.abandoned:
+            raise StreamAbandoned("Downstream stage stopped reading")
+        await self._queue.put(batch)
+        self.batches += 1
+
+    async def close(self, error: Optional[str] = None):
+        """Signal the end of the stream, or the producer's failure"""
+        if not self.abandoned:
+            await self._queue.put(UpstreamStageError(error) if error else _END)
+
+    def abandon(self):
+        """Called by the consumer when it stops reading; unblocks the producer"""
+        self.abandoned = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> List[Dict[str, Any]]:
+        item = await self._queue.get()
+        if item is _END:
+            raise StopAsyncIteration
+        if isinstance(item, UpstreamStageError):
+            raise item
+        return item
+
+
+class StreamStage:
+    """One node of a streamed chain and, once the pipeline ends, its result"""
+
+    def __init__(self, node_id: str, component, context: ExecutionContext, timeout: Optional[float] = None):
+        self.node_id = node_id
+        self.component = component
+        self.context = context
+        self.timeout = timeout
+        self.result: Optional[ExecutionResult] = None
+        self.timed_out = False
+
+
+async def _pump(stage: StreamStage, upstream: Optional[BatchChannel], downstream: Optional[BatchChannel]):
+    async with aclosing(stage.component.stream(stage.context, upstream)) as batches:
+        async for batch in batches:
+            if downstream is not None:
+                await downstream.put(batch)
+
+
+async def _run_stage(stage: StreamStage, upstream: Optional[BatchChannel], downstream: Optional[BatchChannel]):
+    started = time.time()
+    # Spans recorded in this task (e.g. service calls) belong to the stage's node
+    set_current_node(stage.node_id)
+
+    def failed(error: str) -> ExecutionResult:
+        return ExecutionResult(
+            success=False,
+            output_data={},
+            error=error,
+            execution_time_ms=int((time.time() - started) * 1000),
+            logs=[f"Streaming stage failed: {error}"]
+        )
+
+    try:
+        with trace_span("execute", COMPONENT, streamed=True):
+            await asyncio.wait_for(_pump(stage, upstream, downstream), stage.timeout)
+        result = stage.component.stream_result or failed("Component finished its stream without a result")
+    except asyncio.TimeoutError:
+        stage.timed_out = True
+        result = failed(f"Node exceeded its {stage.timeout}s runtime limit")
+    except asyncio.CancelledError:
+        if upstream is not None:
+            upstream.abandon()
+        raise
+    except Exception as e:
+        result = failed(str(e))
+
+    if upstream is not None:
+        upstream.abandon()
+    if downstream is not None:
+        await downstream.close(
+            None if result.success else f"Upstream stage '{stage.node_id}' failed: {result.error}"
+        )
+    stage.result = result
+
+
+async def run_stream_pipeline(stages: List[StreamStage], buffer_batches: Optional[int] = None) -> List[StreamStage]:
+    """Run a chain of streaming components concurrently
+
+    The first stage reads its own input (``upstream`` is None); every later
+    stage consumes the batches the previous one yields through a bounded
+    ``BatchChannel``, so rows reach the last stage while the first is still
+    reading. A failing stage ends its consumers with ``UpstreamStageError``
+    and stops its producer with ``StreamAbandoned``; every stage still gets a
+    result. Cancelling the pipeline cancels all stages.
+    """
+    buffer_batches = buffer_batches or settings.WORKFLOW_STREAM_BUFFER_BATCHES
+    channels = [BatchChannel(buffer_batches) for _ in stages[1:]]
+    tasks = [
+        asyncio.create_task(_run_stage(
+            stage,
+            channels[index - 1] if index > 0 else None,
+            channels[index] if index < len(channels) else None
+        ))
+        for index, stage in enumerate(stages)
+    ]
+    await asyncio.gather(*tasks)
+    return stages
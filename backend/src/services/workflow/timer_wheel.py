@@ -0,0 +1,87 @@
+"""
+Hashed Timer Wheel for Scheduled Workflows
+"""
+import math
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class HashedTimerWheel:
+    """Timers bucketed by tick into a fixed ring of slots
+
+    A timer due at tick ``t`` lives in slot ``t % slots``; timers further
+    than one turn of the wheel away share the slot and are skipped until
+    their turn comes. Scheduling and cancelling are O(1), and each tick only
+    looks at one slot, so thousands of timers cost the same per tick as a
+    few as long as ``slots`` covers most of them in one turn.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 3600, start: Optional[float] = None):
+        if tick_seconds <= 0 or slots < 1:
+            raise ValueError("Timer wheel needs a positive tick and at least one slot")
+        self.tick_seconds = tick_seconds
+        self.slots: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._origin = time.time() if start is None else start
+        self._tick = 0  # Next tick to process
+        self._timers: Dict[Hashable, Tuple[int, float]] = {}  # key -> (due tick, due time)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def _tick_at(self, when: float) -> int:
+        return math.ceil((when - self._origin) / self.tick_seconds)
+
+    def schedule(self, key: Hashable, when: float):
+        """Fire ``key`` at epoch time ``when``, replacing any timer it already has
+
+        Times already past fire on the next ``advance``.
+        """
+        self.cancel(key)
+        tick = max(self._tick_at(when), self._tick)
+        self.slots[tick % len(self.slots)][key] = tick
+        self._timers[key] = (tick, when)
+
+    def cancel(self, key: Hashable) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        del self.slots[timer[0] % len(self.slots)][key]
+        return True
+
+    def keys(self) -> List[Hashable]:
+        return list(self._timers)
+
+    def due_time(self, key: Hashable) -> Optional[float]:
+        timer = self._timers.get(key)
+        return timer[1] if timer else None
+
+    def clear(self):
+        for slot in self.slots:
+            slot.clear()
+        self._timers.clear()
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Process every tick up to ``now`` and return the keys that fell due
+
+        After a stall longer than one turn each slot is visited once rather
+        than once per missed tick.
+        """
+        now = time.time() if now is None else now
+        current = math.floor((now - self._origin) / self.tick_seconds)
+        if current < self._tick:
+            return []
+
+        fired: List[Hashable] = []
+        last_slot_tick = min(current, self._tick + len(self.slots) - 1)
+        for tick in range(self._tick, last_slot_tick + 1):
+            slot = self.slots[tick % len(self.slots)]
+            due = [key for key, due_tick in slot.items() if due_tick <= current]
+            for key in due:
+                del slot[key]
+                del self._timers[key]
+            fired.extend(due)
+        self._tick = current + 1
+        return fired
@@ -0,0 +1,149 @@
+"""
+Execution Tracing for Workflow Runs
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from ...core.config import settings
+
+# Span categories
+QUEUE = "queue"          # Waiting for a concurrency slot or resource pool
+INIT = "init"            # Instantiating the component
+INPUT = "input"          # Building input data, upstream view and cache key
+COMPONENT = "component"  # Inside the component's execute/stream
+IO = "io"                # Calls to external services made by the component
+DB = "db"                # Database reads, commits and journal flushes
+STORAGE = "storage"      # Spilling outputs to the blob store
+RUN = "run"              # The run as a whole
+
+_current_trace: ContextVar[Optional["ExecutionTrace"]] = ContextVar("workflow_trace", default=None)
+_current_node: ContextVar[Optional[str]] = ContextVar("workflow_trace_node", default=None)
+
+
+class ExecutionTrace:
+    """Spans recorded during one run
+
+    Span times are microseconds from the start of the trace, taken from a
+    monotonic clock; ``started_at`` anchors them to wall-clock time.
+    """
+
+    def __init__(self, instance_id: str, max_spans: Optional[int] = None):
+        self.instance_id = instance_id
+        self.started_at = datetime.now()
+        self.max_spans = max_spans or settings.WORKFLOW_TRACE_MAX_SPANS
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._origin = time.perf_counter()
+
+    def now(self) -> int:
+        """Microseconds since the trace started"""
+        return int((time.perf_counter() - self._origin) * 1_000_000)
+
+    def add(self, name: str, category: str, start: int, end: int, node_id: Optional[str] = None, **args):
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        span = {"name": name, "cat": category, "ts": start, "dur": max(end - start, 0)}
+        if node_id:
+            span["node_id"] = node_id
+        if args:
+            span["args"] = args
+        self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, category: str, node_id: Optional[str] = None, **args):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add(name, category, start, self.now(), node_id, **args)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact form stored on the workflow instance"""
+        return {
+            "instance_id": self.instance_id,
+            "started_at": self.started_at.isoformat(),
+            "spans": self.spans,
+            "dropped_spans": self.dropped
+        }
+
+
+def current_trace() -> Optional[ExecutionTrace]:
+    return _current_trace.get()
+
+
+def current_node() -> Optional[str]:
+    return _current_node.get()
+
+
+def activate_trace(trace: Optional[ExecutionTrace]):
+    """Make ``trace`` current for this task and the tasks it creates; returns a reset token"""
+    return _current_trace.set(trace)
+
+
+def deactivate_trace(token):
+    _current_trace.reset(token)
+
+
+def set_current_node(node_id: Optional[str]):
+    """Attribute spans recorded in this task to ``node_id``"""
+    _current_node.set(node_id)
+
+
+@contextmanager
+def trace_span(name: str, category: str, node_id: Optional[str] = None, **args):
+    """Record a span on the current run's trace, if any
+
+    The span belongs to ``node_id``, else to the node this task runs.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name, category, node_id or _current_node.get(), **args):
+        yield
+
+
+def to_chrome_trace(trace_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a stored trace to Chrome trace-event JSON
+
+    Loadable in chrome://tracing or https://ui.perfetto.dev. Run-level spans
+    are on the first track; each node gets a track of its own, in the order
+    its first span started.
+    """
+    spans = sorted(trace_data.get("spans", []), key=lambda span: span["ts"])
+    tracks: Dict[Optional[str], int] = {None: 0}
+    for span in spans:
+        tracks.setdefault(span.get("node_id"), len(tracks))
+
+    events = [
+        {"name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+         "args": {"name": f"workflow run {trace_data.get('instance_id')}"}}
+    ]
+    for node_id, tid in tracks.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": node_id or "run"}})
+        events.append({"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid, "args": {"sort_index": tid}})
+    for span in spans:
+        events.append({
+            "name": span["name"],
+            "cat": span["cat"],
+            "ph": "X",
+            "ts": span["ts"],
+            "dur": span["dur"],
+            "pid": 1,
+            "tid": tracks[span.get("node_id")],
+            "args": span.get("args", {})
+        })
+
+    return {
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": {
+            "instance_id": trace_data.get("instance_id"),
+            "started_at": trace_data.get("started_at"),
+            "dropped_spans": trace_data.get("dropped_spans", 0)
+        }
+    }
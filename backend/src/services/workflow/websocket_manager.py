@@ -2,7 +2,6 @@
 WebSocket handler for real-time workflow execution updates
 """
 import json
-import asyncio
 from typing import Dict, Set
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
@@ -174,9 +173,3 @@ async def handle_client_message(websocket: WebSocket, instance_id: str, message:
             "timestamp": datetime.now().isoformat()
         }))
 
-
-def execution_event_callback(instance_id: str, event: ExecutionEvent):
-    """Callback function to handle execution events and send them via WebSocket"""
-    # This will be called by the execution engine
-    # We need to run it in the event loop
-    asyncio.create_task(websocket_manager.send_event(instance_id, event))
@@ -0,0 +1,217 @@
+"""
+Workflow Worker Processes
+
+Executes queued workflow runs outside the API process:
+
+    python -m src.services.workflow.worker --processes 4 --concurrency 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+from typing import Dict, Optional
+
+from ...core.config import settings
+from ...models.database import AsyncSessionLocal
+from .event_bus import event_bus
+from .event_subscribers import register_event_subscribers
+from .execution_engine import WorkflowExecutionEngine
+from .job_queue import QueuedJob, WorkflowJobQueue, get_job_queue, close_job_queue
+from .scheduler import workflow_scheduler
+
+
+class WorkflowWorker:
+    """Claims jobs from the queue and runs up to ``concurrency`` of them at once"""
+
+    def __init__(
+        self,
+        queue: WorkflowJobQueue,
+        concurrency: Optional[int] = None,
+        worker_id: Optional[str] = None,
+        session_factory=None,
+        poll_interval: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None
+    ):
+        self.queue = queue
+        self.concurrency = concurrency or settings.WORKFLOW_WORKER_CONCURRENCY
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.poll_interval = poll_interval if poll_interval is not None else settings.WORKFLOW_QUEUE_POLL_INTERVAL
+        self.heartbeat_interval = heartbeat_interval or settings.WORKFLOW_QUEUE_HEARTBEAT_SECONDS
+        self.running: Dict[str, asyncio.Task] = {}
+        self.engines: Dict[str, WorkflowExecutionEngine] = {}
+        self._stop_event = asyncio.Event()
+
+    def stop(self):
+        """Stop claiming new jobs; runs in progress are allowed to finish"""
+        self._stop_event.set()
+
+    async def run(self):
+        """Claim and execute jobs until stopped"""
+        print(f"Workflow worker {self.worker_id} started (concurrency {self.concurrency})")
+
+        while not self._stop_event.is_set():
+            while len(self.running) < self.concurrency:
+                try:
+                    job = await self.queue.claim(self.worker_id)
+                except Exception as e:
+                    print(f"Error claiming workflow job: {e}")
+                    job = None
+                if job is None:
+                    break
+                self.running[job.id] = asyncio.create_task(self._run_job(job))
+
+            # Wake up when a slot frees, the worker is stopped, or it is time to poll again
+            stop_waiter = asyncio.ensure_future(self._stop_event.wait())
+            await asyncio.wait(
+                [stop_waiter, *self.running.values()],
+                timeout=self.poll_interval,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            stop_waiter.cancel()
+
+        if self.running:
+            print(f"Workflow worker {self.worker_id} draining {len(self.running)} run(s)")
+            await asyncio.gather(*self.running.values(), return_exceptions=True)
+        print(f"Workflow worker {self.worker_id} stopped")
+
+    async def _run_job(self, job: QueuedJob):
+        """Execute one job while keeping its lease alive"""
+        run_task = asyncio.create_task(self._execute(job))
+        heartbeat_task = asyncio.create_task(self._heartbeat(job, run_task))
+        try:
+            await run_task
+        except asyncio.CancelledError:
+            # Job cancelled (the instance is marked cancelled) or lease lost
+            # (whoever owns it now records the outcome)
+            print(f"Workflow job {job.id} stopped: lease lost or cancelled")
+        except Exception as e:
+            await self._report(self.queue.fail(job.id, self.worker_id, str(e)))
+        else:
+            await self._report(self.queue.complete(job.id, self.worker_id))
+        finally:
+            heartbeat_task.cancel()
+            self.running.pop(job.id, None)
+            self.engines.pop(job.id, None)
+
+    async def _execute(self, job: QueuedJob):
+        # A reclaimed job continues from whatever the crashed worker checkpointed
+        resume = job.resume or job.attempts > 1
+        async with self.session_factory() as db:
+            engine = self.engines[job.id] = WorkflowExecutionEngine(db)
+            await engine.execute_workflow(job.instance_id, job.input_data, resume=resume)
+
+    async def _heartbeat(self, job: QueuedJob, run_task: asyncio.Task):
+        while not run_task.done():
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                alive = await self.queue.heartbeat(job.id, self.worker_id)
+            except Exception as e:
+                print(f"Error sending heartbeat for workflow job {job.id}: {e}")
+                continue
+            if not alive:
+                await self._stop_run(job, run_task)
+                return
+
+    async def _stop_run(self, job: QueuedJob, run_task: asyncio.Task):
+        """Stop a run whose lease is gone
+
+        A cancelled job's run is cancelled as usual. Any other way of losing
+        the lease (reclaimed by another worker, failed after max_attempts)
+        leaves the instance to its new owner, so the run stops without
+        recording anything.
+        """
+        try:
+            status = await self.queue.get_job_status(job.id)
+        except Exception as e:
+            print(f"Error checking workflow job {job.id}: {e}")
+            status = None
+        if status != "cancelled":
+            print(f"Workflow job {job.id} lease lost; leaving the run to its new owner")
+            engine = self.engines.get(job.id)
+            if engine:
+                engine.abandoned = True
+        run_task.cancel()
+
+    async def _report(self, outcome):
+        try:
+            await outcome
+        except Exception as e:
+            print(f"Error recording workflow job outcome: {e}")
+
+
+def run_worker_process(concurrency: Optional[int] = None):
+    """Entry point of a single worker process"""
+
+    async def _main():
+        queue = get_job_queue()
+        if queue is None:
+            print("WORKFLOW_QUEUE_BACKEND is 'inline'; runs execute in the API process, nothing to do")
+            return
+
+        # No WebSocket clients connect to worker processes
+        register_event_subscribers(websocket=False)
+        worker = WorkflowWorker(queue, concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, worker.stop)
+            except NotImplementedError:
+                # Windows: Ctrl+C raises KeyboardInterrupt instead
+                pass
+        # Stand in as scheduler leader when no API process holds the lease
+        if settings.WORKFLOW_SCHEDULER_ENABLED:
+            workflow_scheduler.start()
+        try:
+            await worker.run()
+        finally:
+            await workflow_scheduler.stop()
+            await event_bus.close()
+            await close_job_queue()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run workflow executor processes")
+    parser.add_argument("--processes", type=int, default=settings.WORKFLOW_WORKER_PROCESSES,
+                        help="Number of executor processes")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKFLOW_WORKER_CONCURRENCY,
+                        help="Runs executed at once in each process")
+    args = parser.parse_args(argv)
+
+    if args.processes <= 1:
+        run_worker_process(args.concurrency)
+        return
+
+    # Spawn (not fork) so each process builds its own engine and event loop
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker_process, args=(args.concurrency,), name=f"workflow-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def _forward_signal(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, _forward_signal)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Children received the same Ctrl+C and are draining
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
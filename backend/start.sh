@@ -12,6 +12,9 @@ else
     python run_migration.py || echo "Migration failed or no migration needed"
 fi
 
+# With WORKFLOW_QUEUE_BACKEND=database or redis, also run the workers
+# (the Procfile's worker process: python -m src.services.workflow.worker)
+
 # Start the application
 echo "Starting application on port $PORT..."
 uvicorn main:app --host 0.0.0.0 --port ${PORT:-8000}
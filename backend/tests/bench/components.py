@@ -0,0 +1,90 @@
+"""
+Fake Workflow Components for Engine Benchmarks
+"""
+import asyncio
+import time
+from typing import Dict
+
+from src.schemas.workflow_components import (
+    WorkflowComponentMetadata,
+    ExecutionContext,
+    ExecutionResult,
+    ComponentCategory,
+    ComponentHandle
+)
+from src.services.workflow.component_registry import BaseWorkflowComponent, component_registry
+
+# Seconds each node spent inside its component, by node id; reset per run
+component_seconds: Dict[str, float] = {}
+
+
+class BenchComponent(BaseWorkflowComponent):
+    """Base for benchmark components; subclasses override ``work``"""
+
+    component_type = "bench_noop"
+    description = "Returns immediately"
+
+    @classmethod
+    def get_metadata(cls) -> WorkflowComponentMetadata:
+        return WorkflowComponentMetadata(
+            type=cls.component_type,
+            name=cls.component_type,
+            description=cls.description,
+            category=ComponentCategory.CONTROL_FLOW,
+            icon="BoltIcon",
+            color="from-gray-500 to-gray-600",
+            parameters=[],
+            input_handles=[ComponentHandle(id="input", type="target", position="left")],
+            output_handles=[ComponentHandle(id="output", type="source", position="right")]
+        )
+
+    async def work(self, context: ExecutionContext) -> Dict:
+        return {"node": context.step_id}
+
+    async def execute(self, context: ExecutionContext) -> ExecutionResult:
+        started = time.perf_counter()
+        output_data = await self.work(context)
+        component_seconds[context.step_id] = time.perf_counter() - started
+        return ExecutionResult(success=True, output_data=output_data, next_steps=["output"])
+
+
+class NoopComponent(BenchComponent):
+    pass
+
+
+class LatencyComponent(BenchComponent):
+    """Sleeps ``latency_ms``, standing in for an external API call"""
+
+    component_type = "bench_latency"
+    description = "Sleeps for latency_ms"
+
+    async def work(self, context: ExecutionContext) -> Dict:
+        await asyncio.sleep(context.input_data.get("latency_ms", 10) / 1000)
+        return {"node": context.step_id}
+
+
+class PayloadComponent(BenchComponent):
+    """Reads every upstream output and returns ``payload_kb`` of rows"""
+
+    component_type = "bench_payload"
+    description = "Produces payload_kb of record data"
+
+    async def work(self, context: ExecutionContext) -> Dict:
+        # Touch upstream values so spilled outputs are actually loaded
+        upstream_rows = sum(len(output.get("rows", [])) for output in context.previous_outputs.values())
+        row = "x" * 100
+        rows = [{"id": i, "value": row} for i in range(context.input_data.get("payload_kb", 64) * 1024 // 120)]
+        return {"node": context.step_id, "upstream_rows": upstream_rows, "rows": rows}
+
+
+BENCH_COMPONENTS = {
+    "noop": NoopComponent,
+    "latency": LatencyComponent,
+    "payload": PayloadComponent
+}
+
+
+def register_bench_components():
+    """Add the benchmark components to the global component registry"""
+    for component_class in BENCH_COMPONENTS.values():
+        component_registry.register_component(component_class)
@@ -0,0 +1,38 @@
+"""
+Synthetic Workflow Graphs for Engine Benchmarks
+"""
+from typing import Dict, Any
+
+from .components import BENCH_COMPONENTS
+
+
+def build_workflow(width: int, depth: int, fan_in: int, kind: str = "noop", **config) -> Dict[str, Any]:
+    """Build a layered DAG: one trigger, then ``depth`` layers of ``width`` nodes
+
+    Every node in a layer has ``fan_in`` incoming edges from distinct nodes
+    of the previous layer (the first layer hangs off the trigger). ``config``
+    is copied into every node, e.g. ``latency_ms`` or ``payload_kb``.
+    """
+    component_type = BENCH_COMPONENTS[kind].component_type
+    fan_in = max(1, min(fan_in, width))
+
+    def node(node_id: str) -> Dict[str, Any]:
+        return {"id": node_id, "type": component_type, "data": {"label": node_id, "config": dict(config)}}
+
+    nodes = [node("trigger")]
+    edges = []
+    previous = ["trigger"]
+    for layer in range(depth):
+        current = [f"n{layer}_{index}" for index in range(width)]
+        nodes.extend(node(node_id) for node_id in current)
+        for index, node_id in enumerate(current):
+            sources = previous if len(previous) == 1 else [
+                previous[(index + offset) % len(previous)] for offset in range(fan_in)
+            ]
+            edges.extend(
+                {"source": source, "target": node_id, "sourceHandle": "output", "targetHandle": "input"}
+                for source in sources
+            )
+        previous = current
+
+    return {"nodes": nodes, "edges": edges}
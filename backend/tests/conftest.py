@@ -1,5 +1,6 @@
 # Test configuration
 import pytest
+import pytest_asyncio
 import asyncio
 from typing import Generator
 
@@ -10,3 +11,49 @@ def event_loop() -> Generator:
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
     loop.close()
+
+
+@pytest.fixture(autouse=True)
+def workflow_journal_dir(tmp_path, monkeypatch):
+    """Keep workflow step write-ahead files out of the working tree."""
+    from src.core.config import settings
+    journal_dir = tmp_path / "workflow_journal"
+    monkeypatch.setattr(settings, "WORKFLOW_JOURNAL_DIR", str(journal_dir))
+    return journal_dir
+
+
+@pytest.fixture(autouse=True)
+def workflow_blob_dir(tmp_path, monkeypatch):
+    """Keep spilled workflow outputs out of the working tree."""
+    from src.services.workflow.blob_store import blob_store
+    blob_dir = tmp_path / "workflow_blobs"
+    monkeypatch.setattr(blob_store, "root_dir", blob_dir)
+    return blob_dir
+
+
+@pytest.fixture
+def session_tables():
+    """Tables the ``session_factory`` database is created with; modules override this."""
+    return []
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path, session_tables):
+    """Create async file-backed database with the ``session_tables`` tables.
+
+    Workers, bulk runs and schedulers hold several sessions at once, so each
+    needs its own connection (an in-memory database would share one).
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    # Register every model so SQLAlchemy can configure relationship mappers
+    from src.models import user, conversation, message, document, chat_conversation, workflow  # noqa: F401
+    from src.models.database import Base
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Base.metadata.create_all(
+            sync_conn, tables=[model.__table__ for model in session_tables]
+        ))
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
@@ -0,0 +1,126 @@
+# Unit tests for adaptive concurrency of per-record AI calls
+import asyncio
+import random
+
+import pytest
+
+from src.schemas.workflow_components import ExecutionContext
+from src.services.workflow.adaptive_concurrency import AIMDLimiter, looks_rate_limited, map_ordered
+from src.services.workflow.component_registry import AIProcessingComponent
+
+
+def make_context(records, **config) -> ExecutionContext:
+    return ExecutionContext(
+        workflow_id="workflow-1",
+        instance_id="instance-1",
+        step_id="ai",
+        input_data={"provider": "openai", "model": "gpt-4o", "prompt": "Describe {input}", **config},
+        previous_outputs={"sheets": {"spreadsheet_info": {"title": "Tasks"}, "records": records}},
+        global_variables={}
+    )
+
+
+class FakeAIComponent(AIProcessingComponent):
+    """AI step whose provider call sleeps briefly and throttles the first `throttle` calls"""
+
+    def __init__(self, throttle: int = 0):
+        super().__init__()
+        self.throttle = throttle
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _process_with_ai(self, provider, api_key, model, prompt, temperature, max_tokens, record):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(random.uniform(0.005, 0.02))
+        self.in_flight -= 1
+        if self.throttle > 0:
+            self.throttle -= 1
+            return {"error": "AI provider failed: Error code: 429 - Rate limit reached"}
+        return {"type": "ai_generated_content", "content": f"row {record['n']}"}
+
+
+class TestAIMDLimiter:
+    """Test additive increase, multiplicative decrease and ordering"""
+
+    @pytest.mark.asyncio
+    async def test_increase_and_single_decrease_per_congestion(self):
+        """Fast calls grow the limit; a burst of 429s from one window halves it once"""
+        limiter = AIMDLimiter(initial=4, max_limit=8)
+        for _ in range(20):
+            async with limiter.slot():
+                pass
+        assert limiter.current_limit > 4
+
+        grown = limiter.limit
+
+        async def throttled_call():
+            async with limiter.slot() as call:
+                await asyncio.sleep(0.01)
+                call.throttled = True
+
+        await asyncio.gather(*(throttled_call() for _ in range(limiter.current_limit)))
+        assert limiter.limit == pytest.approx(grown / 2)
+        assert limiter.decreases == 1
+        assert limiter.throttled == limiter.get_stats()["throttled"]
+
+    @pytest.mark.asyncio
+    async def test_map_ordered_keeps_order_within_limit(self):
+        """Results come back in input order and in-flight calls never exceed the limit"""
+        limiter = AIMDLimiter(initial=3, max_limit=3)
+        running = 0
+        peak = 0
+
+        async def work(item, call):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(random.uniform(0, 0.01))
+            running -= 1
+            return item * 10
+
+        assert await map_ordered(list(range(25)), work, limiter) == [n * 10 for n in range(25)]
+        assert peak == limiter.peak_in_flight <= 3
+
+    def test_rate_limit_detection(self):
+        """Throttling errors are recognised from provider error text"""
+        assert looks_rate_limited("Error code: 429")
+        assert looks_rate_limited("RESOURCE_EXHAUSTED: quota exceeded")
+        assert not looks_rate_limited("Invalid API key")
+        assert not looks_rate_limited(None)
+
+
+class TestConcurrentAIProcessing:
+    """Test AIProcessingComponent runs every row concurrently in row order"""
+
+    @pytest.mark.asyncio
+    async def test_execute_processes_all_rows_in_order(self):
+        """Every row is processed (no 10-row cap), concurrently, ordered by row_index"""
+        component = FakeAIComponent(throttle=3)
+        records = [{"n": n} for n in range(40)]
+        result = await component.execute(make_context(records, max_concurrency=6))
+
+        assert result.success
+        processed = result.output_data["processed_results"]
+        assert [row["row_index"] for row in processed] == list(range(1, 41))
+        assert [row["input_data"]["n"] for row in processed] == list(range(40))
+        assert 1 < component.peak <= 6
+        concurrency = result.output_data["summary"]["concurrency"]
+        assert concurrency["throttled"] == 3 and concurrency["decreases"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_batches_in_order_and_honours_max_records(self):
+        """Streamed batches keep row order across concurrently processed batches"""
+        component = FakeAIComponent()
+
+        async def upstream():
+            for start in range(0, 30, 5):
+                yield [{"n": n} for n in range(start, start + 5)]
+
+        rows = []
+        async for batch in component.stream(make_context([], max_records=22), upstream()):
+            rows.extend(batch)
+
+        assert [row["row_index"] for row in rows] == list(range(1, 23))
+        summary = component.stream_result.output_data["summary"]
+        assert summary["total_records"] == 30 and summary["processed_records"] == 22
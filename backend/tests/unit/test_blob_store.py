@@ -0,0 +1,91 @@
+# Unit tests for the workflow node output blob store
+import os
+import time
+import pytest
+
+from src.services.workflow.blob_store import BlobStore, NodeOutput, is_blob_ref
+
+
+def make_records(count: int) -> list:
+    return [{"row_index": i, "description": f"Asset {i}", "output_format": "PNG"} for i in range(count)]
+
+
+class TestBlobStore:
+    """Test spilling and loading large node outputs"""
+
+    @pytest.mark.asyncio
+    async def test_spills_only_large_values(self, tmp_path):
+        """Values over the threshold become references; small ones stay inline"""
+        store = BlobStore(str(tmp_path), spill_threshold_bytes=1024)
+        records = make_records(100)
+
+        spilled = await store.spill({"records": records, "count": 100, "status": "ok"})
+
+        assert is_blob_ref(spilled["records"]) and spilled["records"]["items"] == 100
+        assert (spilled["count"], spilled["status"]) == (100, "ok")
+        assert store.get(spilled["records"]) == records
+        assert await store.resolve_all(spilled) == {"records": records, "count": 100, "status": "ok"}
+
+    @pytest.mark.asyncio
+    async def test_resolves_nested_references_for_readers(self, tmp_path):
+        """Run outputs nest step outputs; references up to the size cap are loaded"""
+        store = BlobStore(str(tmp_path), spill_threshold_bytes=1024)
+        small, large = make_records(40), make_records(400)
+        step = await store.spill({"records": small, "rows": large})
+        run = {"node_outputs": {"sheets": step}, "steps": [step], "missing": {"$blob": "0" * 64, "size": 10}}
+
+        resolved = await store.resolve_nested(run, max_bytes=step["rows"]["size"] - 1)
+
+        assert resolved["node_outputs"]["sheets"]["records"] == small
+        assert resolved["steps"][0]["records"] == small
+        assert is_blob_ref(resolved["node_outputs"]["sheets"]["rows"])
+        assert resolved["missing"] == run["missing"]
+
+    @pytest.mark.asyncio
+    async def test_identical_values_stored_once(self, tmp_path):
+        """Blobs are content addressed"""
+        store = BlobStore(str(tmp_path), spill_threshold_bytes=1024)
+        first = await store.spill({"values": make_records(50)})
+        second = await store.spill({"records": make_records(50)})
+
+        assert first["values"] == second["records"]
+        assert len(list(tmp_path.glob("*/*.json.gz"))) == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_store_keeps_outputs(self):
+        """An empty directory disables spilling"""
+        store = BlobStore("", spill_threshold_bytes=1)
+        output = {"records": make_records(10)}
+
+        assert await store.spill(output) is output
+
+    def test_prune_and_missing_blob(self, tmp_path):
+        """Old blobs are pruned; loading one raises KeyError"""
+        store = BlobStore(str(tmp_path))
+        ref = store.put(make_records(5))
+        path = next(tmp_path.glob("*/*.json.gz"))
+        old = time.time() - 3600
+        os.utime(path, (old, old))
+
+        assert store.prune(60) == 1
+        with pytest.raises(KeyError):
+            store.get(ref)
+        with pytest.raises(ValueError):
+            store.get({"$blob": "../secret"})
+
+
+class TestNodeOutput:
+    """Test lazy resolution of spilled outputs"""
+
+    def test_resolves_on_access(self, tmp_path):
+        """Components see the original values through every dict accessor"""
+        store = BlobStore(str(tmp_path), spill_threshold_bytes=1024)
+        records = make_records(100)
+        output = NodeOutput(store.spill_sync({"records": records, "count": 100}), store)
+
+        assert isinstance(output, dict) and "records" in output
+        assert output["records"] == records
+        assert output.get("records") == records
+        assert dict(output.items()) == {"records": records, "count": 100}
+        assert {**output} == {"records": records, "count": 100}
+        assert output.get("missing", []) == []
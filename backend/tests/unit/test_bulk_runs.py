@@ -0,0 +1,230 @@
+# Unit tests for bulk runs of a workflow over many inputs
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+import pytest_asyncio
+from sqlalchemy import select
+
+from src.core.config import settings
+from src.models.workflow import WorkflowTemplate, WorkflowInstance, WorkflowExecutionStep, WorkflowBatch, WorkflowJob
+from src.schemas.workflow_components import (
+    WorkflowComponentMetadata,
+    ExecutionContext,
+    ExecutionResult,
+    ComponentCategory,
+    ComponentHandle
+)
+from src.services.workflow.bulk_runs import BulkRunner, iter_ndjson
+from src.services.workflow.component_registry import BaseWorkflowComponent, component_registry
+from src.services.workflow.execution_plan import execution_plan_cache
+from src.services.workflow.job_queue import DatabaseJobQueue
+
+
+class EchoComponent(BaseWorkflowComponent):
+    """Bulk-run test step: echoes `value` after a short sleep, tracking concurrency"""
+
+    running = 0
+    peak = 0
+
+    @classmethod
+    def get_metadata(cls) -> WorkflowComponentMetadata:
+        return WorkflowComponentMetadata(
+            type="test_echo",
+            name="Test Echo",
+            description="Echoes its input",
+            category=ComponentCategory.TRIGGERS,
+            icon="ArrowPathIcon",
+            color="from-gray-500 to-gray-600",
+            parameters=[],
+            input_handles=[],
+            output_handles=[ComponentHandle(id="output", type="source", position="right")]
+        )
+
+    async def execute(self, context: ExecutionContext) -> ExecutionResult:
+        EchoComponent.running += 1
+        EchoComponent.peak = max(EchoComponent.peak, EchoComponent.running)
+        try:
+            await asyncio.sleep(context.input_data.get("delay", 0.01))
+        finally:
+            EchoComponent.running -= 1
+        return ExecutionResult(success=True, output_data={"value": context.input_data.get("value")}, next_steps=["output"])
+
+
+component_registry.register_component(EchoComponent)
+
+WORKFLOW = {"nodes": [{"id": "echo", "type": "test_echo", "data": {"label": "echo", "config": {}}}], "edges": []}
+
+
+@pytest.fixture
+def session_tables():
+    return [WorkflowTemplate, WorkflowBatch, WorkflowInstance, WorkflowExecutionStep, WorkflowJob]
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def echo_template(session_factory):
+    async with session_factory() as db:
+        db.add(WorkflowTemplate(id="template-1", name="Echo", template_data=WORKFLOW))
+        await db.commit()
+
+
+async def create_batch(session_factory, inputs, **options) -> WorkflowBatch:
+    async with session_factory() as db:
+        template = await db.get(WorkflowTemplate, "template-1")
+        return await BulkRunner(session_factory).create_batch(db, template, inputs, **options)
+
+
+class TestBulkRunner:
+    """Test batch creation, scheduling and progress"""
+
+    @pytest.mark.asyncio
+    async def test_inline_batch_runs_every_input(self, session_factory, monkeypatch):
+        """Runs are created in chunks, executed `parallelism` at a time, and counted"""
+        monkeypatch.setattr(settings, "WORKFLOW_BULK_INSERT_SIZE", 2)
+        EchoComponent.peak = 0
+        batch = await create_batch(session_factory, [{"value": n} for n in range(5)], parallelism=2)
+
+        runner = BulkRunner(session_factory)
+        await runner.run_batch(batch.id, execution_plan_cache.get_plan(WORKFLOW))
+
+        async with session_factory() as db:
+            progress = await runner.get_progress(db, batch.id)
+            result = await db.execute(
+                select(WorkflowInstance).where(WorkflowInstance.batch_id == batch.id).order_by(WorkflowInstance.id)
+            )
+            instances = result.scalars().all()
+
+        assert EchoComponent.peak == 2
+        assert [i.output_data["node_outputs"]["echo"]["value"] for i in instances] == [0, 1, 2, 3, 4]
+        assert (progress["status"], progress["succeeded"], progress["progress"]) == ("completed", 5, 1.0)
+
+    @pytest.mark.asyncio
+    async def test_queued_batch_tops_up_the_queue(self, session_factory):
+        """With a job queue, at most `parallelism` of the batch's runs are queued at once"""
+        batch = await create_batch(session_factory, [{"value": n} for n in range(3)], parallelism=2)
+        queue = DatabaseJobQueue(session_factory)
+        runner = BulkRunner(session_factory, poll_interval=0.01)
+        task = asyncio.create_task(runner.run_batch(batch.id, job_queue=queue))
+
+        # Stand-in worker: finish each claimed job, checking the queue never holds more than two
+        finished = []
+        while len(finished) < 3:
+            await asyncio.sleep(0.02)
+            assert sum((await queue.get_stats()).values()) - len(finished) <= 2
+            job = await queue.claim("worker")
+            if job:
+                async with session_factory() as db:
+                    (await db.get(WorkflowInstance, job.instance_id)).status = "completed"
+                    await db.commit()
+                await queue.complete(job.id, "worker")
+                finished.append(job.instance_id)
+        await asyncio.wait_for(task, 1)
+
+        assert finished == sorted(finished)
+        async with session_factory() as db:
+            assert (await runner.get_progress(db, batch.id))["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_abandoned_batch_is_resumed(self, session_factory):
+        """Batches whose driver stopped renewing its lease are picked up; live ones are left alone"""
+        abandoned = await create_batch(session_factory, [{"value": n} for n in range(3)])
+        driven = await create_batch(session_factory, [{"value": 1}])
+        now = datetime.now(timezone.utc)
+        async with session_factory() as db:
+            for batch_id, expires_at in ((abandoned.id, now - timedelta(seconds=1)), (driven.id, now + timedelta(minutes=1))):
+                batch = await db.get(WorkflowBatch, batch_id)
+                batch.status, batch.driver_id, batch.driver_expires_at = "running", "other-process", expires_at
+            await db.commit()
+
+        runner = BulkRunner(session_factory)
+        assert await runner.resume_batches() == [abandoned.id]
+        await asyncio.wait_for(asyncio.gather(*runner._resuming), 2)
+
+        async with session_factory() as db:
+            resumed = await runner.get_progress(db, abandoned.id)
+            untouched = await runner.get_progress(db, driven.id)
+        assert (resumed["status"], resumed["succeeded"]) == ("completed", 3)
+        assert (untouched["status"], untouched["finished"]) == ("running", 0)
+        assert not await runner._claim(driven.id)
+
+    @pytest.mark.asyncio
+    async def test_stopped_inline_batch_reruns_its_interrupted_runs(self, session_factory):
+        """Runs cut off by a shutdown are not left cancelled; the resumed batch runs them"""
+        batch = await create_batch(session_factory, [{"value": n, "delay": 0.2} for n in range(2)], parallelism=2)
+        runner = BulkRunner(session_factory)
+        task = asyncio.create_task(runner.run_batch(batch.id))
+        await asyncio.sleep(0.05)
+        await runner.stop()
+        await asyncio.gather(task, return_exceptions=True)
+
+        async with session_factory() as db:
+            interrupted = await runner.get_progress(db, batch.id)
+        assert (interrupted["status"], interrupted["finished"]) == ("running", 0)
+
+        resumed = BulkRunner(session_factory)
+        assert await resumed.resume_batches() == [batch.id]
+        await asyncio.wait_for(asyncio.gather(*resumed._resuming), 2)
+
+        async with session_factory() as db:
+            progress = await resumed.get_progress(db, batch.id)
+        assert (progress["status"], progress["succeeded"]) == ("completed", 2)
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_marked_failed(self, session_factory, monkeypatch):
+        """A batch that stops on an error does not stay running"""
+        batch = await create_batch(session_factory, [{"value": 1}])
+        runner = BulkRunner(session_factory)
+
+        async def broken(*args):
+            raise RuntimeError("database went away")
+
+        monkeypatch.setattr(runner, "_run_inline", broken)
+        await runner.run_batch(batch.id)
+
+        async with session_factory() as db:
+            progress = await runner.get_progress(db, batch.id)
+        assert (progress["status"], progress["error_message"]) == ("failed", "database went away")
+
+    @pytest.mark.asyncio
+    async def test_lost_lease_stops_driving(self, session_factory, monkeypatch):
+        """Losing the lease ends run_batch quietly; cancelling it still propagates"""
+        batch = await create_batch(session_factory, [{"value": 1}])
+        runner = BulkRunner(session_factory, lease_seconds=0.03)
+
+        async def stalled(*args):
+            await asyncio.sleep(10)
+
+        monkeypatch.setattr(runner, "_run_inline", stalled)
+        claims = iter([True])
+
+        async def claim(batch_id):
+            return next(claims, False)
+
+        monkeypatch.setattr(runner, "_claim", claim)
+        await asyncio.wait_for(runner.run_batch(batch.id), 1)
+        assert runner._driving == {} and runner._lost_leases == set()
+
+        claims = iter([True, True, True])
+        task = asyncio.create_task(runner.run_batch(batch.id))
+        await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    @pytest.mark.asyncio
+    async def test_rejected_inputs_create_nothing(self, session_factory):
+        """A bad input rolls the whole batch back"""
+        with pytest.raises(ValueError, match="Input 2"):
+            await create_batch(session_factory, [{"value": 1}, "not an object"])
+
+        async with session_factory() as db:
+            assert (await db.execute(select(WorkflowBatch))).scalars().all() == []
+            assert (await db.execute(select(WorkflowInstance))).scalars().all() == []
+
+    @pytest.mark.asyncio
+    async def test_ndjson_lines_split_across_chunks(self):
+        """Objects are parsed as lines complete, whatever the chunking"""
+        async def chunks():
+            for chunk in (b'{"value": 1}\n{"val', b'ue": 2}\n\n', b'{"value": 3}'):
+                yield chunk
+
+        assert [item async for item in iter_ndjson(chunks())] == [{"value": 1}, {"value": 2}, {"value": 3}]
@@ -0,0 +1,219 @@
+# Unit tests for the workflow event bus
+import asyncio
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Register every model so SQLAlchemy can configure relationship mappers
+from src.models import user, conversation, message, document, chat_conversation  # noqa: F401
+from src.models.database import Base
+from src.models.workflow import WorkflowTemplate, WorkflowInstance
+from src.services.workflow.event_bus import EventBus
+from src.services.workflow.event_subscribers import COALESCED_EVENT_TYPES, EventLogJournal, ExecutionLogRelay
+from src.services.workflow.execution_engine import ExecutionEvent
+
+
+def event(event_type: str, **data) -> ExecutionEvent:
+    return ExecutionEvent(event_type, data)
+
+
+@pytest_asyncio.fixture
+async def bus():
+    bus = EventBus()
+    yield bus
+    await bus.close(timeout=1)
+
+
+class TestEventBus:
+    """Test delivery, coalescing and backpressure"""
+
+    @pytest.mark.asyncio
+    async def test_ordered_delivery_to_each_subscriber(self, bus):
+        """Every subscriber sees every event, in publish order"""
+        received = {"a": [], "b": []}
+
+        async def subscriber_a(instance_id, e):
+            received["a"].append(e.data["n"])
+
+        async def subscriber_b(instance_id, e):
+            await asyncio.sleep(0.001)
+            received["b"].append(e.data["n"])
+
+        bus.subscribe("a", subscriber_a)
+        bus.subscribe("b", subscriber_b)
+        for n in range(20):
+            bus.publish("run-1", event("step_completed", n=n))
+        await bus.drain(timeout=1)
+
+        assert received["a"] == list(range(20))
+        assert received["b"] == list(range(20))
+
+    @pytest.mark.asyncio
+    async def test_coalescing_keeps_latest_in_place(self, bus):
+        """Queued progress events are replaced by newer ones without reordering"""
+        received = []
+
+        async def subscriber(instance_id, e):
+            received.append((e.event_type, e.data.get("completed")))
+
+        subscription = bus.subscribe("ws", subscriber, coalesce_types=["execution_progress"])
+        bus.publish("run-1", event("execution_progress", completed=1))
+        bus.publish("run-1", event("step_completed", node_id="a"))
+        bus.publish("run-1", event("execution_progress", completed=2))
+        bus.publish("run-1", event("execution_progress", completed=3))
+        await bus.drain(timeout=1)
+
+        assert received == [("execution_progress", 3), ("step_completed", None)]
+        assert subscription.get_stats()["coalesced"] == 2
+
+    @pytest.mark.asyncio
+    async def test_step_status_coalesced_per_step(self, bus):
+        """A queued step status is replaced by that step's next one; other steps keep theirs"""
+        received = []
+
+        async def subscriber(instance_id, e):
+            received.append((instance_id, e.event_type, e.data.get("node_id")))
+
+        bus.subscribe("ws", subscriber, coalesce_types=COALESCED_EVENT_TYPES)
+        bus.publish("run-1", event("step_started", node_id="a"))
+        bus.publish("run-1", event("step_started", node_id="b"))
+        bus.publish("run-2", event("step_started", node_id="a"))
+        bus.publish("run-1", event("step_completed", node_id="a"))
+        await bus.drain(timeout=1)
+
+        assert received == [
+            ("run-1", "step_completed", "a"),
+            ("run-1", "step_started", "b"),
+            ("run-2", "step_started", "a")
+        ]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_oldest(self, bus):
+        """A slow subscriber loses old events instead of blocking the publisher"""
+        received = []
+        release = asyncio.Event()
+
+        async def subscriber(instance_id, e):
+            await release.wait()
+            received.append(e.data["n"])
+
+        subscription = bus.subscribe("slow", subscriber, max_queue=3)
+        bus.publish("run-1", event("step_completed", n=0))
+        await asyncio.sleep(0)  # Subscriber takes event 0 and blocks
+        for n in range(1, 6):
+            bus.publish("run-1", event("step_completed", n=n))
+        release.set()
+        await bus.drain(timeout=1)
+
+        assert received == [0, 3, 4, 5]
+        assert subscription.get_stats()["dropped"] == 2
+
+    @pytest.mark.asyncio
+    async def test_batches_and_filters(self, bus):
+        """Batch subscribers get lists; event_types filters what they receive"""
+        batches = []
+
+        async def subscriber(batch):
+            batches.append([e.event_type for _, e in batch])
+
+        bus.subscribe("journal", subscriber, event_types=["step_completed"], batch_size=10)
+        bus.publish("run-1", event("step_completed"))
+        bus.publish("run-1", event("execution_progress"))
+        bus.publish("run-1", event("step_completed"))
+        await bus.drain(timeout=1)
+
+        assert batches == [["step_completed", "step_completed"]]
+
+
+class TestEventLogJournal:
+    """Test the database journal subscriber"""
+
+    @pytest.mark.asyncio
+    async def test_appends_and_caps_execution_logs(self):
+        """Events are appended to the instance log, keeping the newest entries"""
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[
+                WorkflowTemplate.__table__,
+                WorkflowInstance.__table__
+            ]))
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as db:
+            db.add(WorkflowInstance(id="run-1", name="Run", workflow_data={}))
+            await db.commit()
+
+        journal = EventLogJournal(session_factory, max_entries=3)
+        await journal([("run-1", event("step_started", node_id=str(n))) for n in range(2)])
+        await journal([("run-1", event("step_completed", node_id=str(n))) for n in range(2)])
+
+        async with session_factory() as db:
+            logs = (await db.get(WorkflowInstance, "run-1")).execution_logs
+        await engine.dispose()
+
+        assert [(log["event_type"], log["data"]["node_id"]) for log in logs] == [
+            ("step_started", "1"), ("step_completed", "0"), ("step_completed", "1")
+        ]
+
+
+class RecordingManager:
+    """WebSocket manager stand-in that records what it is asked to send"""
+
+    def __init__(self, watched):
+        self.watched = set(watched)
+        self.sent = []
+
+    def get_all_instances(self):
+        return set(self.watched)
+
+    async def send_event(self, instance_id, e):
+        self.sent.append((instance_id, e.event_type, e.data.get("node_id")))
+
+
+class TestExecutionLogRelay:
+    """Test relaying worker events from the instance log to WebSocket clients"""
+
+    @pytest.mark.asyncio
+    async def test_sends_only_entries_logged_since_last_poll(self):
+        """A new client starts from the current log end; later entries are sent once"""
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[
+                WorkflowTemplate.__table__,
+                WorkflowInstance.__table__
+            ]))
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as db:
+            db.add(WorkflowInstance(id="run-1", name="Run", workflow_data={}))
+            await db.commit()
+
+        journal = EventLogJournal(session_factory, max_entries=3)
+        manager = RecordingManager(["run-1"])
+        relay = ExecutionLogRelay(session_factory, manager=manager)
+
+        await journal([("run-1", event("step_started", node_id="old"))])
+        await relay.poll()
+        await journal([("run-1", event("step_completed", node_id=str(n))) for n in range(2)])
+        await relay.poll()
+        await relay.poll()
+        # More entries than the log keeps: the last sent entry is trimmed off
+        await journal([("run-1", event("step_started", node_id=str(n))) for n in range(2, 5)])
+        await relay.poll()
+        await engine.dispose()
+
+        assert manager.sent == [
+            ("run-1", "step_completed", "0"),
+            ("run-1", "step_completed", "1"),
+            ("run-1", "step_started", "2"),
+            ("run-1", "step_started", "3"),
+            ("run-1", "step_started", "4")
+        ]
@@ -0,0 +1,593 @@
+# Unit tests for the workflow execution engine
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+# Register every model so SQLAlchemy can configure relationship mappers
+from src.models import user, conversation, message, document, chat_conversation, workflow  # noqa: F401
+from src.schemas.workflow_components import (
+    WorkflowComponentMetadata,
+    ExecutionContext,
+    ExecutionResult,
+    ComponentCategory,
+    ComponentHandle
+)
+from src.services.workflow.component_registry import BaseWorkflowComponent, component_registry
+from src.services.workflow.execution_engine import WorkflowExecutionEngine
+from src.services.workflow.execution_plan import ExecutionPlanCache, hash_workflow_data
+from src.services.workflow.node_cache import NodeResultCache
+from src.services.workflow.blob_store import NodeOutput
+from src.services.workflow.output_view import UpstreamOutputs, nearest_output
+from src.services.workflow import execution_engine, execution_plan
+
+
+class SleepComponent(BaseWorkflowComponent):
+    """Test component that sleeps for `delay` seconds and records what it saw"""
+
+    @classmethod
+    def get_metadata(cls) -> WorkflowComponentMetadata:
+        return WorkflowComponentMetadata(
+            type="test_sleep",
+            name="Test Sleep",
+            description="Sleeps for a configurable delay",
+            category=ComponentCategory.CONTROL_FLOW,
+            icon="ClockIcon",
+            color="from-gray-500 to-gray-600",
+            parameters=[],
+            input_handles=[ComponentHandle(id="input", type="target", position="left")],
+            output_handles=[
+                ComponentHandle(id="output", type="source", position="right"),
+                ComponentHandle(id="error", type="source", position="bottom")
+            ]
+        )
+
+    async def execute(self, context: ExecutionContext) -> ExecutionResult:
+        await asyncio.sleep(context.input_data.get("delay", 0))
+        handle = context.input_data.get("handle", "output")
+        return ExecutionResult(
+            success=context.input_data.get("succeed", True),
+            output_data={
+                "node": context.step_id,
+                "seen": sorted(context.previous_outputs.keys()),
+                "echo": context.input_data.get("echo")
+            },
+            next_steps=[handle]
+        )
+
+
+component_registry.register_component(SleepComponent)
+
+
+class StreamTestComponent(BaseWorkflowComponent):
+    """Streaming test stage: sources emit `records` in batches, maps tag them, sinks collect them"""
+
+    component_type = None
+    streams_input = True
+    streams_output = True
+    timeline = []  # (node_id, event) in the order they happened
+
+    @classmethod
+    def get_metadata(cls) -> WorkflowComponentMetadata:
+        return WorkflowComponentMetadata(
+            type=cls.component_type,
+            name=cls.component_type,
+            description="Streaming test stage",
+            category=ComponentCategory.CONTROL_FLOW,
+            icon="BoltIcon",
+            color="from-gray-500 to-gray-600",
+            parameters=[],
+            input_handles=[ComponentHandle(id="input", type="target", position="left")],
+            output_handles=[ComponentHandle(id="output", type="source", position="right")]
+        )
+
+    async def execute(self, context: ExecutionContext) -> ExecutionResult:
+        return ExecutionResult(success=True, output_data={"streamed": False}, next_steps=["output"])
+
+    async def stream(self, context: ExecutionContext, upstream=None):
+        config = context.input_data
+        count = 0
+        if upstream is None:
+            for start in range(0, config.get("records", 0), 2):
+                await asyncio.sleep(config.get("delay", 0))
+                self.timeline.append((context.step_id, "yield"))
+                batch = [{"n": n} for n in range(start, min(start + 2, config["records"]))]
+                count += len(batch)
+                yield batch
+        else:
+            async for batch in upstream:
+                self.timeline.append((context.step_id, "received"))
+                if config.get("fail_after") is not None and count >= config["fail_after"]:
+                    raise RuntimeError("stage broke")
+                count += len(batch)
+                yield [{**record, context.step_id: True} for record in batch]
+        self.timeline.append((context.step_id, "done"))
+        self.stream_result = ExecutionResult(
+            success=True, output_data={"records": count}, next_steps=["output"]
+        )
+
+
+class StreamSourceComponent(StreamTestComponent):
+    component_type = "test_stream_source"
+    streams_input = False
+
+
+class StreamMapComponent(StreamTestComponent):
+    component_type = "test_stream_map"
+
+
+class StreamSinkComponent(StreamTestComponent):
+    component_type = "test_stream_sink"
+    streams_output = False
+
+
+for stream_component in (StreamSourceComponent, StreamMapComponent, StreamSinkComponent):
+    component_registry.register_component(stream_component)
+
+
+def make_node(node_id: str, **config) -> dict:
+    return {"id": node_id, "type": "test_sleep", "data": {"label": node_id, "config": config}}
+
+
+def make_stream_node(node_id: str, stage: str, **config) -> dict:
+    return {"id": node_id, "type": f"test_stream_{stage}", "data": {"label": node_id, "config": config}}
+
+
+def make_edge(source: str, target: str, source_handle: str = None) -> dict:
+    return {"source": source, "target": target, "sourceHandle": source_handle}
+
+
+def make_instance(nodes: list, edges: list) -> SimpleNamespace:
+    return SimpleNamespace(id="test-instance", workflow_data={"nodes": nodes, "edges": edges})
+
+
+class TestWorkflowScheduler:
+    """Test DAG scheduling in WorkflowExecutionEngine"""
+
+    @pytest.mark.asyncio
+    async def test_independent_branches_run_concurrently(self):
+        """Two slow branches off one trigger take the max, not the sum"""
+        engine = WorkflowExecutionEngine(AsyncMock(), max_concurrency=4)
+        instance = make_instance(
+            [make_node("trigger"), make_node("a", delay=0.2), make_node("b", delay=0.2)],
+            [make_edge("trigger", "a"), make_edge("trigger", "b")]
+        )
+
+        started = time.monotonic()
+        result = await engine._execute_workflow_steps(instance, {})
+        elapsed = time.monotonic() - started
+
+        assert set(result["executed_nodes"]) == {"trigger", "a", "b"}
+        assert elapsed < 0.35
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """Ready nodes queue for a slot once the cap is reached"""
+        engine = WorkflowExecutionEngine(AsyncMock(), max_concurrency=1)
+        instance = make_instance(
+            [make_node("trigger"), make_node("a", delay=0.1), make_node("b", delay=0.1)],
+            [make_edge("trigger", "a"), make_edge("trigger", "b")]
+        )
+
+        started = time.monotonic()
+        await engine._execute_workflow_steps(instance, {})
+
+        assert time.monotonic() - started >= 0.2
+
+    @pytest.mark.asyncio
+    async def test_join_waits_for_all_upstream(self):
+        """A join node starts only after every upstream branch completes"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = make_instance(
+            [
+                make_node("trigger"),
+                make_node("fast", delay=0),
+                make_node("slow", delay=0.1),
+                make_node("join")
+            ],
+            [
+                make_edge("trigger", "fast"),
+                make_edge("trigger", "slow"),
+                make_edge("fast", "join"),
+                make_edge("slow", "join")
+            ]
+        )
+
+        result = await engine._execute_workflow_steps(instance, {})
+
+        assert result["node_outputs"]["join"]["seen"] == ["fast", "slow", "trigger"]
+
+    @pytest.mark.asyncio
+    async def test_untaken_handle_skips_branch(self):
+        """Edges on handles the component did not fire are skipped downstream"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = make_instance(
+            [make_node("trigger"), make_node("ok"), make_node("on_error"), make_node("after_error")],
+            [
+                make_edge("trigger", "ok", "output"),
+                make_edge("trigger", "on_error", "error"),
+                make_edge("on_error", "after_error")
+            ]
+        )
+
+        result = await engine._execute_workflow_steps(instance, {})
+
+        assert set(result["executed_nodes"]) == {"trigger", "ok"}
+        assert set(result["skipped_nodes"]) == {"on_error", "after_error"}
+
+    @pytest.mark.asyncio
+    async def test_join_runs_when_one_branch_skipped(self):
+        """A join still runs if at least one upstream edge fired"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = make_instance(
+            [make_node("trigger"), make_node("a"), make_node("b", succeed=False), make_node("join")],
+            [
+                make_edge("trigger", "a"),
+                make_edge("trigger", "b"),
+                make_edge("a", "join"),
+                make_edge("b", "join")
+            ]
+        )
+
+        result = await engine._execute_workflow_steps(instance, {})
+
+        assert "join" in result["executed_nodes"]
+
+    @pytest.mark.asyncio
+    async def test_no_trigger_nodes(self):
+        """A graph where every node has an incoming edge is rejected"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = make_instance(
+            [make_node("a"), make_node("b")],
+            [make_edge("a", "b"), make_edge("b", "a")]
+        )
+
+        with pytest.raises(ValueError):
+            await engine._execute_workflow_steps(instance, {})
+
+
+class TestNodeDeadlines:
+    """Test per-node timeouts and cancellation"""
+
+    @pytest.mark.asyncio
+    async def test_node_exceeding_its_runtime_fails(self):
+        """A node over its max_runtime_seconds is recorded as timed out and skips downstream"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        events = []
+        engine.add_event_callback(lambda instance_id, event: events.append(event.event_type))
+        instance = make_instance(
+            [make_node("trigger"), make_node("stuck", delay=5, max_runtime_seconds=0.05), make_node("after")],
+            [make_edge("trigger", "stuck"), make_edge("stuck", "after")]
+        )
+
+        started = time.monotonic()
+        result = await engine._execute_workflow_steps(instance, {})
+
+        assert time.monotonic() - started < 1
+        assert "step_timed_out" in events
+        assert result["skipped_nodes"] == ["after"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_run_records_in_flight_steps(self, monkeypatch):
+        """Cancelling a run journals its running nodes as cancelled"""
+        recorded = []
+
+        async def record(journal, row):
+            recorded.append((row["node_id"], row["status"]))
+
+        monkeypatch.setattr(execution_engine.StepJournal, "record", record)
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = make_instance(
+            [make_node("trigger"), make_node("slow", delay=5)],
+            [make_edge("trigger", "slow")]
+        )
+
+        task = asyncio.create_task(engine._execute_workflow_steps(instance, {}))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert recorded == [("trigger", "completed"), ("slow", "cancelled")]
+
+
+    @pytest.mark.asyncio
+    async def test_stop_returns_once_the_run_is_marked_cancelled(self):
+        """stop_execution waits for the run to commit its cancelled status"""
+        instance = SimpleNamespace(
+            id="run-1", workflow_data={"nodes": [make_node("trigger")], "edges": []},
+            status="draft", started_at=None, template_id=None, input_data=None
+        )
+        committed = []
+
+        async def commit():
+            await asyncio.sleep(0.02)
+            committed.append(instance.status)
+
+        db = AsyncMock()
+        db.get = AsyncMock(return_value=instance)
+        db.commit = commit
+        engine = WorkflowExecutionEngine(db)
+
+        async def stalled(*args, **kwargs):
+            await asyncio.sleep(5)
+
+        engine._execute_workflow_steps = stalled
+        run = asyncio.create_task(engine.execute_workflow("run-1", {}))
+        await asyncio.sleep(0.1)
+
+        assert await engine.stop_execution("run-1")
+        assert committed[-1] == "cancelled"
+        with pytest.raises(asyncio.CancelledError):
+            await run
+
+
+class TestStreamChains:
+    """Test pipelined execution of streaming component chains"""
+
+    @pytest.fixture(autouse=True)
+    def streaming_enabled(self, monkeypatch):
+        monkeypatch.setattr(execution_plan.settings, "WORKFLOW_STREAMING_ENABLED", True)
+
+    def make_chain(self, source=None, map=None, sink=None, after=False) -> SimpleNamespace:
+        nodes = [
+            make_node("trigger"),
+            make_stream_node("source", "source", **(source or {"records": 6})),
+            make_stream_node("map", "map", **(map or {})),
+            make_stream_node("sink", "sink", **(sink or {}))
+        ]
+        edges = [
+            make_edge("trigger", "source"),
+            make_edge("source", "map", "output"),
+            make_edge("map", "sink")
+        ]
+        if after:
+            nodes.append(make_node("after"))
+            edges.append(make_edge("sink", "after"))
+        return make_instance(nodes, edges)
+
+    def test_plan_finds_linear_chains(self):
+        """Chains need single edges between streaming stages and must end the workflow in a sink"""
+        cache = ExecutionPlanCache()
+        plan = cache.get_plan(self.make_chain().workflow_data)
+        assert plan.stream_chains == {"source": ["source", "map", "sink"]}
+
+        branched = self.make_chain().workflow_data
+        branched["nodes"].append(make_node("after"))
+        branched["edges"].append(make_edge("map", "after"))
+        assert cache.get_plan(branched).stream_chains == {}
+
+        opted_out = self.make_chain(sink={"streaming": False}).workflow_data
+        assert cache.get_plan(opted_out).stream_chains == {}
+
+        followed = self.make_chain(after=True).workflow_data
+        assert cache.get_plan(followed).stream_chains == {}
+
+    @pytest.mark.asyncio
+    async def test_records_reach_sink_while_source_reads(self):
+        """The sink gets its first batch before the source has finished"""
+        StreamTestComponent.timeline = []
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = self.make_chain(source={"records": 6, "delay": 0.02})
+
+        result = await engine._execute_workflow_steps(instance, {})
+
+        timeline = StreamTestComponent.timeline
+        assert timeline.index(("sink", "received")) < timeline.index(("source", "done"))
+        assert result["node_outputs"]["sink"] == {"records": 6}
+        assert set(result["executed_nodes"]) == {"trigger", "source", "map", "sink"}
+
+    @pytest.mark.asyncio
+    async def test_node_after_sink_gets_full_outputs(self):
+        """A chain with a node after its sink runs stage by stage, so that node reads full outputs"""
+        StreamTestComponent.timeline = []
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = self.make_chain(after=True)
+
+        result = await engine._execute_workflow_steps(instance, {})
+
+        assert StreamTestComponent.timeline == []
+        assert result["node_outputs"]["sink"] == {"streamed": False}
+        assert result["node_outputs"]["after"]["seen"] == ["map", "sink", "source", "trigger"]
+
+    @pytest.mark.asyncio
+    async def test_failed_stage_fails_chain(self):
+        """A failing stage ends its consumer and stops its producer"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = self.make_chain(source={"records": 20}, map={"fail_after": 2})
+
+        result = await asyncio.wait_for(engine._execute_workflow_steps(instance, {}), timeout=2)
+
+        assert result["node_outputs"]["map"] == {}
+        assert result["node_outputs"]["sink"] == {}
+
+
+class TestUpstreamOutputs:
+    """Test the previous_outputs view passed to components"""
+
+    @pytest.mark.asyncio
+    async def test_only_upstream_nodes_are_visible(self):
+        """A node does not see outputs of sibling branches"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = make_instance(
+            [make_node("trigger"), make_node("a"), make_node("b", delay=0.05), make_node("a2")],
+            [make_edge("trigger", "a"), make_edge("trigger", "b"), make_edge("a", "a2")]
+        )
+
+        result = await engine._execute_workflow_steps(instance, {})
+
+        assert result["node_outputs"]["a2"]["seen"] == ["a", "trigger"]
+
+    def test_view_is_ordered_and_read_only(self):
+        """Nearest upstream first, and components cannot modify it"""
+        outputs = UpstreamOutputs({"trigger": {"n": 1}, "a": {"n": 2}, "other": {"n": 3}}, ["a", "trigger"])
+
+        assert list(outputs.keys()) == ["a", "trigger"]
+        assert isinstance(outputs["a"], NodeOutput)
+        assert outputs.get("other") is None
+        with pytest.raises(TypeError):
+            outputs["x"] = {}
+
+    def test_nearest_producer_wins(self):
+        """A scan for data keys stops at the closest upstream node that has any of them"""
+        outputs = UpstreamOutputs(
+            {"sheets": {"values": [[1]]}, "ai": {"processed_results": [{"row": 1}]}, "trigger": {}},
+            ["sheets", "ai", "trigger"]
+        )
+
+        assert nearest_output(outputs, ("processed_results", "values")) == ("sheets", {"values": [[1]]})
+        assert nearest_output(outputs, ("processed_results",))[0] == "ai"
+        assert nearest_output(outputs, ("spreadsheet_info",)) == (None, None)
+
+
+class TestOutputSpilling:
+    """Test that large node outputs are kept out of memory"""
+
+    @pytest.mark.asyncio
+    async def test_large_output_is_spilled_and_resolved_downstream(self, monkeypatch):
+        """The engine holds a reference; the downstream component reads the value"""
+        monkeypatch.setattr(execution_engine.blob_store, "spill_threshold_bytes", 1024)
+        seen = {}
+
+        async def execute(self, context):
+            seen[context.step_id] = context.previous_outputs.get("big", {}).get("echo")
+            return ExecutionResult(success=True, output_data={"echo": context.input_data.get("echo")}, next_steps=["output"])
+
+        monkeypatch.setattr(SleepComponent, "execute", execute)
+        payload = "x" * 4096
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = make_instance(
+            [make_node("big", echo=payload), make_node("after")],
+            [make_edge("big", "after")]
+        )
+
+        result = await engine._execute_workflow_steps(instance, {})
+
+        assert result["node_outputs"]["big"]["echo"]["size"] == len(payload) + 2
+        assert seen["after"] == payload
+
+
+class TestResume:
+    """Test resuming a run from checkpoints"""
+
+    @pytest.mark.asyncio
+    async def test_restored_nodes_are_not_executed(self):
+        """Checkpointed nodes keep their outputs; only the failed frontier runs"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = make_instance(
+            [make_node("trigger"), make_node("a", delay=5), make_node("b")],
+            [make_edge("trigger", "a"), make_edge("a", "b")]
+        )
+        checkpoints = {
+            "trigger": {"output_data": {"node": "trigger"}, "next_steps": ["output"]},
+            "a": {"output_data": {"node": "a", "restored": True}, "next_steps": ["output"]}
+        }
+
+        result = await asyncio.wait_for(engine._execute_workflow_steps(instance, {}, checkpoints), timeout=1)
+
+        assert set(result["restored_nodes"]) == {"trigger", "a"}
+        assert result["node_outputs"]["a"]["restored"] is True
+        assert result["node_outputs"]["b"]["seen"] == ["a", "trigger"]
+
+    @pytest.mark.asyncio
+    async def test_restored_handles_route_branches(self):
+        """Branches a restored node did not fire stay skipped"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = make_instance(
+            [make_node("trigger"), make_node("ok"), make_node("on_error")],
+            [make_edge("trigger", "ok", "output"), make_edge("trigger", "on_error", "error")]
+        )
+        checkpoints = {"trigger": {"output_data": {}, "next_steps": ["error"]}}
+
+        result = await engine._execute_workflow_steps(instance, {}, checkpoints)
+
+        assert set(result["executed_nodes"]) == {"trigger", "on_error"}
+        assert result["skipped_nodes"] == ["ok"]
+
+
+class TestNodeResultCaching:
+    """Test the opt-in node result cache in the engine"""
+
+    @pytest.mark.asyncio
+    async def test_cached_node_is_not_executed_again(self, monkeypatch):
+        """A second run with the same inputs reuses the result and emits step_cached"""
+        monkeypatch.setattr(execution_engine, "node_result_cache", NodeResultCache(cache_dir=""))
+        engine = WorkflowExecutionEngine(AsyncMock())
+        events = []
+        engine.add_event_callback(lambda instance_id, event: events.append(event.event_type))
+        instance = make_instance(
+            [make_node("trigger"), make_node("slow", delay=0.2, cache_results=True)],
+            [make_edge("trigger", "slow")]
+        )
+
+        await engine._execute_workflow_steps(instance, {})
+        started = time.monotonic()
+        result = await engine._execute_workflow_steps(instance, {})
+
+        assert time.monotonic() - started < 0.1
+        assert result["node_outputs"]["slow"]["seen"] == ["trigger"]
+        assert events.count("step_cached") == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_upstream_output_misses(self, monkeypatch):
+        """Different upstream outputs produce a different key"""
+        cache = NodeResultCache(cache_dir="")
+        monkeypatch.setattr(execution_engine, "node_result_cache", cache)
+        engine = WorkflowExecutionEngine(AsyncMock())
+
+        for echo in ("first", "second"):
+            instance = make_instance(
+                [make_node("trigger", echo=echo), make_node("cached", cache_results=True)],
+                [make_edge("trigger", "cached")]
+            )
+            await engine._execute_workflow_steps(instance, {})
+
+        assert cache.get_stats()["misses"] == 2
+
+
+class TestExecutionPlan:
+    """Test compiled execution plans and the plan cache"""
+
+    def test_hash_ignores_key_order(self):
+        """Equivalent graphs hash the same regardless of dict key order"""
+        assert hash_workflow_data({"nodes": [], "edges": []}) == hash_workflow_data({"edges": [], "nodes": []})
+
+    def test_plan_compilation(self):
+        """Plans index nodes, route handles and order nodes topologically"""
+        cache = ExecutionPlanCache(max_size=4)
+        plan = cache.get_plan({
+            "nodes": [make_node("trigger"), make_node("a"), make_node("b"), {"id": "x", "type": "nope", "data": {}}],
+            "edges": [
+                make_edge("trigger", "a", "output"),
+                make_edge("trigger", "b", "error"),
+                make_edge("a", "b"),
+                make_edge("a", "missing")
+            ]
+        })
+
+        assert plan.trigger_nodes == ["trigger", "x"]
+        assert plan.topological_order.index("a") < plan.topological_order.index("b")
+        assert plan.route("trigger", ["output"]) == [("a", True), ("b", False)]
+        assert plan.route("a", None) == [("b", False)]
+        assert plan.ancestors["b"] == ["trigger", "a"]
+        assert plan.get_component_class("a") is SleepComponent
+        with pytest.raises(ValueError):
+            plan.get_component_class("x")
+
+    def test_cache_hits_and_eviction(self):
+        """Same revision reuses the plan; least recently used plans are evicted"""
+        cache = ExecutionPlanCache(max_size=2)
+        first = {"nodes": [make_node("one")], "edges": []}
+        second = {"nodes": [make_node("two")], "edges": []}
+        third = {"nodes": [make_node("three")], "edges": []}
+
+        plan = cache.get_plan(first)
+        assert cache.get_plan({"edges": [], "nodes": [make_node("one")]}) is plan
+
+        cache.get_plan(second)
+        cache.get_plan(first)
+        cache.get_plan(third)
+
+        assert cache.get_stats() == {"size": 2, "max_size": 2, "hits": 2, "misses": 3}
+        assert cache.get_plan(first) is plan
@@ -0,0 +1,121 @@
+# Unit tests for workflow graph analysis
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+# Register every model so SQLAlchemy can configure relationship mappers
+from src.models import user, conversation, message, document, chat_conversation, workflow  # noqa: F401
+from src.services.workflow.execution_engine import WorkflowExecutionEngine
+from src.services.workflow.execution_plan import execution_plan_cache
+from src.services.workflow.graph_analyzer import analyze_workflow
+
+
+def node(node_id: str, node_type: str = "data_transform") -> dict:
+    return {"id": node_id, "type": node_type, "data": {"label": node_id, "config": {}}}
+
+
+def edge(source: str, target: str, source_handle: str = None, target_handle: str = None) -> dict:
+    return {
+        "id": f"{source}-{target}",
+        "source": source,
+        "target": target,
+        "sourceHandle": source_handle,
+        "targetHandle": target_handle
+    }
+
+
+def codes(issues: list) -> list:
+    return sorted(issue["code"] for issue in issues)
+
+
+class TestGraphAnalyzer:
+    """Test the checks run when a workflow is saved"""
+
+    def test_valid_workflow_gets_run_order(self):
+        """A clean graph is valid and carries its topological order"""
+        analysis = analyze_workflow({
+            "nodes": [node("start", "manual_trigger"), node("a"), node("b"), node("join")],
+            "edges": [
+                edge("start", "a", "output", "input"),
+                edge("start", "b", "output"),
+                edge("a", "join"),
+                edge("b", "join")
+            ]
+        })
+
+        assert analysis["valid"]
+        assert analysis["errors"] == [] and analysis["warnings"] == []
+        assert analysis["trigger_nodes"] == ["start"]
+        order = analysis["topological_order"]
+        assert order[0] == "start" and order[-1] == "join"
+
+    def test_cycles_and_nodes_behind_them(self):
+        """Cycle members are reported together; nodes after the cycle are unreachable"""
+        analysis = analyze_workflow({
+            "nodes": [node("start", "manual_trigger"), node("a"), node("b"), node("after")],
+            "edges": [edge("start", "a"), edge("a", "b"), edge("b", "a"), edge("b", "after")]
+        })
+
+        assert not analysis["valid"]
+        assert codes(analysis["errors"]) == ["cycle", "unreachable"]
+        cycle = next(error for error in analysis["errors"] if error["code"] == "cycle")
+        assert cycle["node_ids"] == ["a", "b"]
+        assert "after" not in analysis["topological_order"]
+
+    def test_unknown_types_and_handles(self):
+        """Unknown components and source handles are errors; bad target handles warnings"""
+        analysis = analyze_workflow({
+            "nodes": [node("start", "manual_trigger"), node("a", "no_such_component"), node("b"), node("c")],
+            "edges": [
+                edge("start", "a"),
+                edge("start", "b", "success"),
+                edge("start", "c", "output", "wrong_input"),
+                edge("c", "missing")
+            ]
+        })
+
+        assert codes(analysis["errors"]) == ["handle_mismatch", "unknown_component"]
+        assert codes(analysis["warnings"]) == ["dangling_edge", "handle_mismatch"]
+
+    def test_nodes_not_fed_by_a_trigger(self):
+        """A stray node with no incoming edge is a warning, not an error"""
+        analysis = analyze_workflow({
+            "nodes": [node("start", "manual_trigger"), node("a"), node("stray")],
+            "edges": [edge("start", "a")]
+        })
+
+        assert analysis["valid"]
+        assert analysis["warnings"][0]["node_ids"] == ["stray"]
+
+    def test_stored_analysis_is_reused_for_its_revision(self):
+        """A saved analysis seeds a cold plan only when its hash matches the graph"""
+        execution_plan_cache.clear()
+        workflow_data = {"nodes": [node("start", "manual_trigger"), node("a")], "edges": [edge("start", "a")]}
+        stored = {**analyze_workflow(workflow_data), "analyzed_at": "at save time"}
+        execution_plan_cache.clear()
+
+        assert analyze_workflow(workflow_data, {**stored, "workflow_hash": "other"})["analyzed_at"] != "at save time"
+        execution_plan_cache.clear()
+        assert analyze_workflow(workflow_data, stored)["analyzed_at"] == "at save time"
+
+    @pytest.mark.asyncio
+    async def test_invalid_workflow_fails_before_running(self):
+        """The engine marks an invalid run failed without executing a node"""
+        instance = SimpleNamespace(
+            id="run-1",
+            workflow_data={"nodes": [node("a"), node("b")], "edges": [edge("a", "b"), edge("b", "a")]},
+            status="draft",
+            started_at=None,
+            template_id=None
+        )
+        db = AsyncMock()
+        db.get = AsyncMock(return_value=instance)
+        engine = WorkflowExecutionEngine(db)
+        engine._execute_workflow_steps = AsyncMock()
+
+        with pytest.raises(ValueError, match="cycle"):
+            await engine.execute_workflow("run-1", {})
+
+        assert instance.status == "failed"
+        assert "no node without incoming edges" in instance.error_message
+        engine._execute_workflow_steps.assert_not_called()
@@ -0,0 +1,224 @@
+# Unit tests for the workflow job queue and worker
+import asyncio
+import pytest
+from datetime import timedelta
+from sqlalchemy import update
+
+from src.models.workflow import WorkflowTemplate, WorkflowInstance, WorkflowJob
+from src.services.workflow.job_queue import DatabaseJobQueue
+from src.services.workflow.leases import utcnow
+from src.services.workflow.execution_engine import WorkflowExecutionEngine
+from src.services.workflow.worker import WorkflowWorker
+
+
+@pytest.fixture
+def session_tables():
+    return [WorkflowTemplate, WorkflowInstance, WorkflowJob]
+
+
+async def expire_lease(session_factory, job_id: str):
+    async with session_factory() as db:
+        await db.execute(
+            update(WorkflowJob)
+            .where(WorkflowJob.id == job_id)
+            .values(lease_expires_at=utcnow() - timedelta(seconds=1))
+        )
+        await db.commit()
+
+
+class TestDatabaseJobQueue:
+    """Test leasing in the database queue backend"""
+
+    @pytest.mark.asyncio
+    async def test_claim_in_order(self, session_factory):
+        """Jobs are claimed oldest first, and each only once"""
+        queue = DatabaseJobQueue(session_factory)
+        first = await queue.enqueue("instance-1", {"a": 1})
+        second = await queue.enqueue("instance-2")
+
+        job = await queue.claim("worker-a")
+        assert (job.id, job.instance_id, job.input_data, job.attempts) == (first, "instance-1", {"a": 1}, 1)
+        assert (await queue.claim("worker-b")).id == second
+        assert await queue.claim("worker-c") is None
+        assert await queue.get_stats() == {"running": 2}
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_reclaimed(self, session_factory):
+        """A job whose worker stopped heartbeating moves to another worker"""
+        queue = DatabaseJobQueue(session_factory)
+        job_id = await queue.enqueue("instance-1")
+        await queue.claim("worker-a")
+        await expire_lease(session_factory, job_id)
+
+        job = await queue.claim("worker-b")
+
+        assert job.id == job_id and job.attempts == 2
+        assert not await queue.heartbeat(job_id, "worker-a")
+        assert await queue.heartbeat(job_id, "worker-b")
+
+    @pytest.mark.asyncio
+    async def test_abandoned_job_fails_after_max_attempts(self, session_factory):
+        """A job is not handed out again once it used up its attempts, and its run fails"""
+        async with session_factory() as db:
+            db.add(WorkflowInstance(id="instance-1", name="Run", workflow_data={}, status="running"))
+            await db.commit()
+        queue = DatabaseJobQueue(session_factory, max_attempts=1)
+        job_id = await queue.enqueue("instance-1")
+        await queue.claim("worker-a")
+        await expire_lease(session_factory, job_id)
+
+        assert await queue.claim("worker-b") is None
+        assert await queue.get_stats() == {"failed": 1}
+        async with session_factory() as db:
+            instance = await db.get(WorkflowInstance, "instance-1")
+        assert instance.status == "failed"
+        assert instance.error_message == "Lease expired after 1 attempt(s)"
+
+    @pytest.mark.asyncio
+    async def test_cancel(self, session_factory):
+        """Cancelling revokes the lease so the worker's heartbeat fails"""
+        queue = DatabaseJobQueue(session_factory)
+        job_id = await queue.enqueue("instance-1")
+        await queue.claim("worker-a")
+
+        assert await queue.has_active_job("instance-1")
+        assert await queue.cancel("instance-1")
+        assert not await queue.has_active_job("instance-1")
+        assert not await queue.heartbeat(job_id, "worker-a")
+
+
+class TestFairShare:
+    """Test per-tenant fair queuing and priorities"""
+
+    @pytest.mark.asyncio
+    async def test_tenants_take_turns(self, session_factory):
+        """A tenant with a backlog does not hold back another tenant's run"""
+        queue = DatabaseJobQueue(session_factory)
+        for i in range(3):
+            await queue.enqueue(f"a-{i}", tenant="alice")
+        await queue.enqueue("b-0", tenant="bob")
+
+        claimed = [(await queue.claim("worker")).instance_id for _ in range(4)]
+
+        assert claimed == ["a-0", "b-0", "a-1", "a-2"]
+
+    @pytest.mark.asyncio
+    async def test_priority_and_weight(self, session_factory):
+        """Higher priority runs first within a tenant; weights scale a tenant's share"""
+        queue = DatabaseJobQueue(session_factory, tenant_weights={"alice": 2})
+        await queue.enqueue("a-low", tenant="alice")
+        await queue.enqueue("a-high", tenant="alice", priority=5)
+        await queue.enqueue("a-next", tenant="alice")
+        await queue.enqueue("b-0", tenant="bob")
+
+        claimed = [(await queue.claim("worker")).instance_id for _ in range(4)]
+
+        assert claimed == ["a-high", "a-low", "b-0", "a-next"]
+
+    @pytest.mark.asyncio
+    async def test_tenant_stats(self, session_factory):
+        """Queue depth, running jobs and wait times are reported per tenant"""
+        queue = DatabaseJobQueue(session_factory)
+        await queue.enqueue("a-0", tenant="alice")
+        await queue.enqueue("a-1", tenant="alice")
+        await queue.enqueue("n-0")
+        await queue.claim("worker")
+
+        stats = await queue.get_tenant_stats()
+
+        assert (stats["alice"]["queued"], stats["alice"]["running"]) == (1, 1)
+        assert stats["alice"]["avg_wait_ms"] >= 0
+        assert stats["anonymous"]["queued"] == 1
+
+
+class RecordingWorker(WorkflowWorker):
+    """Worker that sleeps instead of running the execution engine"""
+
+    def __init__(self, *args, delay: float = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+        self.executed = []
+
+    async def _execute(self, job):
+        await asyncio.sleep(self.delay)
+        self.executed.append(job.instance_id)
+
+
+class StalledEngineWorker(WorkflowWorker):
+    """Worker whose runs go through the engine's bookkeeping but never finish"""
+
+    async def _execute(self, job):
+        async with self.session_factory() as db:
+            engine = self.engines[job.id] = WorkflowExecutionEngine(db)
+
+            async def stalled(*args, **kwargs):
+                await asyncio.sleep(10)
+
+            engine._execute_workflow_steps = stalled
+            await engine.execute_workflow(job.instance_id, job.input_data)
+
+
+class TestWorkflowWorker:
+    """Test the worker loop"""
+
+    @pytest.mark.asyncio
+    async def test_runs_jobs_concurrently_and_completes_them(self, session_factory):
+        """Queued jobs run in parallel up to the worker's concurrency"""
+        queue = DatabaseJobQueue(session_factory)
+        for i in range(3):
+            await queue.enqueue(f"instance-{i}")
+        worker = RecordingWorker(queue, concurrency=3, worker_id="worker-a", poll_interval=0.01, delay=0.1)
+
+        runner = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.15)
+        worker.stop()
+        await runner
+
+        assert sorted(worker.executed) == ["instance-0", "instance-1", "instance-2"]
+        assert await queue.get_stats() == {"completed": 3}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_stops_on_heartbeat(self, session_factory):
+        """A run is cancelled once its heartbeat finds the lease revoked"""
+        queue = DatabaseJobQueue(session_factory)
+        await queue.enqueue("instance-1")
+        worker = RecordingWorker(
+            queue, concurrency=1, worker_id="worker-a", poll_interval=0.01, heartbeat_interval=0.02, delay=5
+        )
+
+        runner = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.05)
+        await queue.cancel("instance-1")
+        await asyncio.sleep(0.1)
+        worker.stop()
+        await asyncio.wait_for(runner, timeout=1)
+
+        assert worker.executed == []
+        assert await queue.get_stats() == {"cancelled": 1}
+
+    @pytest.mark.asyncio
+    async def test_reclaimed_job_is_left_to_its_new_owner(self, session_factory):
+        """Losing the lease to another worker stops the run without marking it cancelled"""
+        async with session_factory() as db:
+            db.add(WorkflowInstance(id="instance-1", name="Run", workflow_data={
+                "nodes": [{"id": "start", "type": "manual_trigger", "data": {"label": "start", "config": {}}}],
+                "edges": []
+            }))
+            await db.commit()
+        queue = DatabaseJobQueue(session_factory)
+        job_id = await queue.enqueue("instance-1")
+        worker = StalledEngineWorker(
+            queue, concurrency=1, worker_id="worker-a", poll_interval=0.01, heartbeat_interval=0.05
+        )
+
+        runner = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.03)
+        await expire_lease(session_factory, job_id)
+        assert (await queue.claim("worker-b")).id == job_id
+        await asyncio.sleep(0.1)
+        worker.stop()
+        await asyncio.wait_for(runner, timeout=1)
+
+        async with session_factory() as db:
+            assert (await db.get(WorkflowInstance, "instance-1")).status == "running"
+        assert await queue.get_stats() == {"running": 1}
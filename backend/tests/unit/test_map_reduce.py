@@ -0,0 +1,190 @@
+# Unit tests for the map and reduce components
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+# Register every model so SQLAlchemy can configure relationship mappers
+from src.models import user, conversation, message, document, chat_conversation, workflow  # noqa: F401
+from src.schemas.workflow_components import (
+    WorkflowComponentMetadata,
+    ExecutionContext,
+    ExecutionResult,
+    ComponentCategory,
+    ComponentHandle
+)
+from src.services.workflow.component_registry import (
+    BaseWorkflowComponent,
+    MapComponent,
+    ReduceComponent,
+    component_registry
+)
+from src.services.workflow.execution_engine import WorkflowExecutionEngine
+
+
+class DoubleComponent(BaseWorkflowComponent):
+    """Sub-workflow test step: doubles `item` (or each of `items`) after `item` / 100 seconds"""
+
+    running = 0
+    peak = 0
+
+    @classmethod
+    def get_metadata(cls) -> WorkflowComponentMetadata:
+        return WorkflowComponentMetadata(
+            type="test_double",
+            name="Test Double",
+            description="Doubles its item",
+            category=ComponentCategory.CONTROL_FLOW,
+            icon="CalculatorIcon",
+            color="from-gray-500 to-gray-600",
+            parameters=[],
+            input_handles=[ComponentHandle(id="input", type="target", position="left")],
+            output_handles=[ComponentHandle(id="output", type="source", position="right")]
+        )
+
+    async def execute(self, context: ExecutionContext) -> ExecutionResult:
+        DoubleComponent.running += 1
+        DoubleComponent.peak = max(DoubleComponent.peak, DoubleComponent.running)
+        try:
+            if "items" in context.input_data:
+                return ExecutionResult(
+                    success=True, output_data={"records": [n * 2 for n in context.input_data["items"]]},
+                    next_steps=["output"]
+                )
+            item = context.input_data["item"]
+            if item == "bad":
+                return ExecutionResult(success=False, output_data={}, error="bad item")
+            await asyncio.sleep(item / 100)
+            return ExecutionResult(success=True, output_data={"value": item * 2}, next_steps=["output"])
+        finally:
+            DoubleComponent.running -= 1
+
+
+component_registry.register_component(DoubleComponent)
+
+SUB_WORKFLOW = {
+    "nodes": [{"id": "double", "type": "test_double", "data": {"label": "double", "config": {}}}],
+    "edges": []
+}
+
+
+def context(component: str, previous_outputs: dict = None, **config) -> ExecutionContext:
+    return ExecutionContext(
+        workflow_id="run-1",
+        instance_id="run-1",
+        step_id=component,
+        input_data=config,
+        previous_outputs=previous_outputs or {},
+        global_variables={}
+    )
+
+
+class TestMapComponent:
+    """Test fanning a collection out into sub-workflow runs"""
+
+    @pytest.mark.asyncio
+    async def test_results_in_input_or_completion_order(self):
+        """Results follow the input by default, or the order sub-runs finished"""
+        upstream = {"sheets": {"records": [3, 1, 2]}}
+
+        by_input = await MapComponent().execute(context("map", upstream, sub_workflow=SUB_WORKFLOW, parallelism=3))
+        by_completion = await MapComponent().execute(
+            context("map", upstream, sub_workflow=SUB_WORKFLOW, parallelism=3, ordering="completion")
+        )
+
+        assert [entry["output"]["value"] for entry in by_input.output_data["map_results"]] == [6, 2, 4]
+        assert [entry["output"]["value"] for entry in by_completion.output_data["map_results"]] == [2, 4, 6]
+
+    @pytest.mark.asyncio
+    async def test_parallelism_and_chunks(self):
+        """At most `parallelism` sub-runs run at once; chunks pass `items`"""
+        DoubleComponent.peak = 0
+        await MapComponent().execute(context("map", items=[1] * 6, sub_workflow=SUB_WORKFLOW, parallelism=2))
+        chunked = await MapComponent().execute(context("map", items=[1, 2, 3, 4, 5], sub_workflow=SUB_WORKFLOW, chunk_size=2))
+
+        assert DoubleComponent.peak == 2
+        assert chunked.output_data["units"] == 3
+        assert [entry["output"]["records"] for entry in chunked.output_data["map_results"]] == [[2, 4], [6, 8], [10]]
+
+    @pytest.mark.asyncio
+    async def test_failed_items(self):
+        """Failures are reported per item, or stop the map with fail_fast"""
+        items = [1, "bad", 2, 3]
+        tolerant = await MapComponent().execute(context("map", items=items, sub_workflow=SUB_WORKFLOW))
+        strict = await MapComponent().execute(
+            context("map", items=items, sub_workflow=SUB_WORKFLOW, parallelism=1, fail_fast=True)
+        )
+
+        assert tolerant.success and tolerant.next_steps == ["output", "error"]
+        assert (tolerant.output_data["succeeded"], tolerant.output_data["failed"]) == (3, 1)
+        assert "bad item" in tolerant.output_data["map_results"][1]["error"]
+        assert not strict.success
+        assert strict.output_data["not_run"] == 2
+
+    @pytest.mark.asyncio
+    async def test_items_come_from_the_nearest_producer(self):
+        """The nearest output holding a collection key wins, even if its value is not a list"""
+        nearest = await MapComponent().execute(context(
+            "map", {"near": {"records": [1]}, "far": {"records": [5, 6]}}, sub_workflow=SUB_WORKFLOW
+        ))
+        not_a_list = await MapComponent().execute(context(
+            "map", {"near": {"records": "none"}, "far": {"records": [5, 6]}}, sub_workflow=SUB_WORKFLOW
+        ))
+
+        assert [entry["output"]["value"] for entry in nearest.output_data["map_results"]] == [2]
+        assert not not_a_list.success
+
+    @pytest.mark.asyncio
+    async def test_invalid_sub_workflow(self):
+        """A broken sub-workflow fails the map before any item runs"""
+        result = await MapComponent().execute(context(
+            "map", items=[1], sub_workflow={"nodes": [{"id": "x", "type": "missing", "data": {}}], "edges": []}
+        ))
+
+        assert not result.success
+        assert "unknown component type" in result.error
+
+
+class TestReduceComponent:
+    """Test gathering map results"""
+
+    @pytest.mark.asyncio
+    async def test_operations(self):
+        """collect, concat, merge and count over the successful items"""
+        map_output = {"map_results": [
+            {"index": 0, "success": True, "output": {"records": [1, 2]}, "error": None},
+            {"index": 1, "success": False, "output": None, "error": "boom"},
+            {"index": 2, "success": True, "output": {"records": [3]}, "error": None}
+        ]}
+        upstream = {"map": map_output}
+
+        concat = await ReduceComponent().execute(context("reduce", upstream, operation="concat"))
+        merge = await ReduceComponent().execute(context("reduce", upstream, operation="merge"))
+        count = await ReduceComponent().execute(context("reduce", upstream, operation="count"))
+
+        assert concat.output_data["records"] == [1, 2, 3]
+        assert concat.output_data["errors"] == [{"index": 1, "error": "boom"}]
+        assert merge.output_data["result"] == {"records": [3]}
+        assert count.output_data["result"] == {"succeeded": 2, "failed": 1}
+
+    @pytest.mark.asyncio
+    async def test_map_reduce_workflow(self):
+        """trigger -> map -> reduce runs end to end in the engine"""
+        engine = WorkflowExecutionEngine(AsyncMock())
+        instance = SimpleNamespace(id="run-1", workflow_data={
+            "nodes": [
+                {"id": "start", "type": "manual_trigger", "data": {"label": "start", "config": {}}},
+                {"id": "map", "type": "map", "data": {"label": "map", "config": {
+                    "items": [1, 2, 3], "sub_workflow": SUB_WORKFLOW
+                }}},
+                {"id": "reduce", "type": "reduce", "data": {"label": "reduce", "config": {"operation": "collect"}}}
+            ],
+            "edges": [
+                {"source": "start", "target": "map", "sourceHandle": "output"},
+                {"source": "map", "target": "reduce", "sourceHandle": "output"}
+            ]
+        })
+
+        result = await engine._execute_workflow_steps(instance, {})
+
+        assert result["node_outputs"]["reduce"]["records"] == [{"value": 2}, {"value": 4}, {"value": 6}]
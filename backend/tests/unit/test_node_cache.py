@@ -0,0 +1,55 @@
+# Unit tests for the workflow node result cache
+import os
+import time
+import pytest
+
+from src.services.workflow.node_cache import NodeResultCache
+
+
+def make_key(**input_data) -> str:
+    return NodeResultCache.make_key("ai_processing", input_data, {"sheets": {"rows": [1, 2]}})
+
+
+class TestNodeResultCache:
+    """Test keying, expiry and eviction of cached node results"""
+
+    def test_key_ignores_order_and_cache_settings(self):
+        """Equivalent configs share a key; cache control keys do not change it"""
+        assert make_key(prompt="p", model="m") == make_key(model="m", prompt="p", cache_results=True)
+        assert make_key(prompt="p") != make_key(prompt="q")
+        assert make_key(prompt="p") != NodeResultCache.make_key("ai_processing", {"prompt": "p"}, {})
+
+    @pytest.mark.asyncio
+    async def test_memory_ttl(self):
+        """Entries expire after their TTL"""
+        cache = NodeResultCache(cache_dir="")
+        await cache.set("a", {"output_data": {}}, ttl_seconds=60)
+        await cache.set("b", {"output_data": {}}, ttl_seconds=60)
+        cache._memory["b"] = (time.time() - 1, cache._memory["b"][1])
+
+        assert await cache.get("a") == {"output_data": {}}
+        assert await cache.get("b") is None
+        assert cache.get_stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        """A result evicted from memory (or a new process) is served from disk"""
+        cache = NodeResultCache(max_entries=1, cache_dir=str(tmp_path))
+        await cache.set("a", {"output_data": {"n": 1}})
+        await cache.set("b", {"output_data": {"n": 2}})
+
+        assert "a" not in cache._memory
+        assert await cache.get("a") == {"output_data": {"n": 1}}
+        assert await NodeResultCache(cache_dir=str(tmp_path)).get("b") == {"output_data": {"n": 2}}
+        assert cache.get_stats()["disk_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_size_eviction(self, tmp_path):
+        """The disk tier drops least recently used files once over its size cap"""
+        cache = NodeResultCache(cache_dir=str(tmp_path), max_disk_bytes=250)
+        payload = {"output_data": {"text": "x" * 100}}
+        await cache.set("old", payload)
+        os.utime(tmp_path / "old.json", (time.time() - 60, time.time() - 60))
+        await cache.set("new", payload)
+
+        assert sorted(path.name for path in tmp_path.glob("*.json")) == ["new.json"]
@@ -0,0 +1,124 @@
+# Unit tests for the AI prompt/response cache
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from src.models.ai_provider import AIResponseCache
+from src.services.workflow.prompt_cache import CachedAIProvider, PromptResponseCache, make_key
+
+
+class FakeProvider:
+    """Provider that counts calls and answers with the prompt it was given"""
+
+    def __init__(self, delay: float = 0.0, success: bool = True):
+        self.delay = delay
+        self.success = success
+        self.calls = 0
+        self.client = "client"
+
+    async def generate_content(self, prompt, output_format, model_name="fake-default", **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {
+            "success": self.success,
+            "content": {"text": f"answer to {prompt}"},
+            "metadata": {"model": model_name, "temperature": kwargs.get("temperature")}
+        }
+
+
+@pytest.fixture
+def session_tables():
+    return [AIResponseCache]
+
+
+class TestPromptCacheKeys:
+    """Test cache key normalization"""
+
+    def test_key_normalizes_prompt_whitespace(self):
+        """Whitespace differences share a key; any sampling setting difference does not"""
+        key = make_key("openai", "gpt-4o", "Summarize  row 1\r\n", "text", 0.0, 100)
+        assert key == make_key("OpenAI", "gpt-4o", " Summarize row 1", "TEXT", 0.0, 100)
+        assert key != make_key("openai", "gpt-4o", "Summarize row 1", "text", 0.0, 200)
+        assert key != make_key("openai", "gpt-4o-mini", "Summarize row 1", "text", 0.0, 100)
+        assert key != make_key("claude", "gpt-4o", "Summarize row 1", "text", 0.0, 100)
+
+
+class TestCachedAIProvider:
+    """Test caching of generate_content through the provider wrapper"""
+
+    @pytest.mark.asyncio
+    async def test_deterministic_calls_hit_the_database_tier(self, session_factory):
+        """A repeat call is served from memory, and from the database after a restart"""
+        cache = PromptResponseCache(session_factory=session_factory, persistent=True)
+        provider = FakeProvider()
+        cached = CachedAIProvider("openai", provider, cache)
+
+        first = await cached.generate_content("Describe row 1", "text", "gpt-4o", temperature=0.0, max_tokens=50)
+        second = await cached.generate_content("Describe   row 1", "text", "gpt-4o", temperature=0.0, max_tokens=50)
+        assert provider.calls == 1
+        assert second["content"] == first["content"] and second["metadata"]["cached"]
+
+        restarted = CachedAIProvider("openai", provider, PromptResponseCache(session_factory=session_factory, persistent=True))
+        third = await restarted.generate_content("Describe row 1", "text", "gpt-4o", temperature=0.0, max_tokens=50)
+        assert provider.calls == 1 and third["metadata"]["cached"]
+        assert restarted.cache.get_stats()["db_hits"] == 1
+        assert restarted.client == "client"  # Other attributes are the provider's
+
+    @pytest.mark.asyncio
+    async def test_sampling_failures_and_opt_out_are_not_cached(self):
+        """Temperature above the limit, failed calls and cache=False always reach the provider"""
+        cache = PromptResponseCache(persistent=False)
+        provider = FakeProvider()
+        cached = CachedAIProvider("openai", provider, cache)
+
+        for _ in range(2):
+            await cached.generate_content("Write a poem", "text", "gpt-4o", temperature=0.7)
+            await cached.generate_content("Write a poem", "text", "gpt-4o")
+            await cached.generate_content("Write a poem", "text", "gpt-4o", temperature=0.0, cache=False)
+        provider.success = False
+        for _ in range(2):
+            await cached.generate_content("Failing prompt", "text", "gpt-4o", temperature=0.0)
+
+        assert provider.calls == 8
+        stats = cache.get_stats()
+        assert stats["bypassed"] == 6 and stats["stores"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_are_coalesced(self):
+        """Identical calls in flight together make one provider call"""
+        cache = PromptResponseCache(persistent=False)
+        provider = FakeProvider(delay=0.05)
+        cached = CachedAIProvider("claude", provider, cache)
+
+        results = await asyncio.gather(*(
+            cached.generate_content("Same prompt", "json", "claude-3", temperature=0.0) for _ in range(5)
+        ))
+        assert provider.calls == 1
+        assert all(result["content"] == results[0]["content"] for result in results)
+        assert cache.get_stats()["coalesced"] == 4
+
+
+class TestPromptCacheLimits:
+    """Test TTL expiry and the size caps of both tiers"""
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_size_caps(self, session_factory):
+        """Expired entries miss; the database tier drops least recently used rows past its cap"""
+        cache = PromptResponseCache(max_entries=2, max_db_bytes=400, session_factory=session_factory, persistent=True)
+        response = {"success": True, "content": {"text": "x" * 100}, "metadata": {}}
+
+        await cache.set("expired", "openai", "gpt-4o", response, ttl_seconds=0.01)
+        await asyncio.sleep(0.02)
+        assert await cache.get("expired") is None
+
+        for key in ["a", "b", "c", "d"]:
+            await cache.set(key, "openai", "gpt-4o", response)
+        assert list(cache._memory) == ["c", "d"]
+
+        async with session_factory() as db:
+            keys = (await db.execute(select(AIResponseCache.key))).scalars().all()
+            total = await db.scalar(select(func.sum(AIResponseCache.size_bytes)))
+        assert total <= 400
+        assert sorted(keys) == ["c", "d"]
+        assert cache.get_stats()["db_bytes"] == total
@@ -0,0 +1,89 @@
+# Unit tests for the pooled AI provider clients
+import asyncio
+
+import pytest
+
+from src.services.workflow.provider_pool import ProviderClientPool, close_client, key_fingerprint
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeProvider:
+    """Provider stand-in holding a closable SDK client"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.client = FakeClient()
+
+
+class TestProviderClientPool:
+    """Test reuse, keying, eviction and shutdown"""
+
+    @pytest.mark.asyncio
+    async def test_reuses_provider_per_credentials(self):
+        """Same provider, base URL and key share one instance; any difference gets its own"""
+        pool = ProviderClientPool(idle_seconds=60, max_clients=10)
+        first = pool.get("openai", lambda: FakeProvider("a"), api_key="sk-1")
+        assert pool.get("OpenAI", lambda: FakeProvider("b"), api_key="sk-1") is first
+        assert pool.get("openai", lambda: FakeProvider("c"), api_key="sk-2") is not first
+        assert pool.get("ollama", lambda: FakeProvider("d"), base_url="http://a:11434") is not \
+            pool.get("ollama", lambda: FakeProvider("e"), base_url="http://b:11434")
+        assert pool.get_stats()["hits"] == 1 and pool.get_stats()["misses"] == 4
+        # Keys are only held as fingerprints
+        assert key_fingerprint("sk-1") != "sk-1" and key_fingerprint(None) == ""
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used_and_closes_after_grace(self):
+        """Beyond max_clients the LRU provider is evicted, then closed once the grace period passes"""
+        pool = ProviderClientPool(idle_seconds=60, max_clients=2, close_grace_seconds=0)
+        a = pool.get("openai", lambda: FakeProvider("a"), api_key="a")
+        b = pool.get("openai", lambda: FakeProvider("b"), api_key="b")
+        pool.get("openai", lambda: FakeProvider("a2"), api_key="a")  # a is now most recent
+        pool.get("openai", lambda: FakeProvider("c"), api_key="c")
+        await asyncio.sleep(0)
+        await asyncio.gather(*pool._closing)
+
+        assert b.client.closed and not a.client.closed
+        assert pool.get_stats()["evictions"] == 1
+
+        await pool.close()
+        assert a.client.closed
+        assert pool.get_stats()["pooled"] == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_providers_are_evicted(self):
+        """A provider unused for idle_seconds is replaced on the next lookup"""
+        pool = ProviderClientPool(idle_seconds=0.01, max_clients=10, close_grace_seconds=60)
+        old = pool.get("claude", lambda: FakeProvider("old"), api_key="k")
+        await asyncio.sleep(0.02)
+        new = pool.get("claude", lambda: FakeProvider("new"), api_key="k")
+        assert new is not old
+        # Still inside its grace period: a call may be using it
+        assert not old.client.closed
+        await pool.close()
+        assert old.client.closed and new.client.closed
+
+    @pytest.mark.asyncio
+    async def test_close_client_handles_sync_and_private_clients(self):
+        """Clients with a sync close or only a private httpx client are closed too"""
+        class SyncClient:
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        class WrapsHttpx:
+            def __init__(self):
+                self._client = FakeClient()
+
+        sync_client, wrapper = SyncClient(), WrapsHttpx()
+        await close_client(sync_client)
+        await close_client(wrapper)
+        await close_client(None)
+        assert sync_client.closed and wrapper._client.closed
@@ -0,0 +1,137 @@
+# Unit tests for shared AI provider rate limits
+import time
+
+import httpx
+import pytest
+
+from src.services.workflow.rate_limiter import (
+    ProviderRateLimiter,
+    RateLimitRegistry,
+    RateLimitedTransport,
+    TokenBucket,
+    estimate_tokens,
+    parse_duration,
+    usage_tokens
+)
+
+
+class TestTokenAccounting:
+    """Test token estimates, reported usage and reset durations"""
+
+    def test_estimates_usage_and_durations(self):
+        """Estimates count text and attachments; usage and reset formats of each provider parse"""
+        messages = [{"role": "user", "content": [
+            {"type": "text", "text": "x" * 400},
+            {"type": "image_url", "image_url": {"url": "data:image/png;base64," + "A" * 100000}}
+        ]}]
+        assert 1000 < estimate_tokens(messages) < 1200
+
+        assert usage_tokens({"usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}}) == 15
+        assert usage_tokens({"usage": {"input_tokens": 10, "output_tokens": 7}}) == 17
+        assert usage_tokens({"prompt_eval_count": 3, "eval_count": 4}) == 7
+        assert usage_tokens({"id": "no-usage"}) is None
+
+        assert parse_duration("6m0s") == 360
+        assert parse_duration("1.5s") == 1.5
+        assert parse_duration("20ms") == pytest.approx(0.02)
+        assert parse_duration("12") == 12
+        assert parse_duration("2000-01-01T00:00:00Z") == 0
+        assert parse_duration("soon") is None
+
+    def test_bucket_refill_and_overdraw(self):
+        """Buckets refill evenly; an overdrawn bucket makes the next call wait longer"""
+        bucket = TokenBucket(60, now=0.0)  # One token per second
+        assert bucket.wait_time(60, 0.0) == 0
+        bucket.take(60, 0.0)
+        assert bucket.wait_time(30, 0.0) == pytest.approx(30)
+        bucket.take(30, 10.0)  # Used more than estimated
+        assert bucket.wait_time(10, 10.0) == pytest.approx(30)
+        assert bucket.wait_time(1000, 100.0) == pytest.approx(0)  # Larger than the bucket: waits for a full one
+
+
+class TestProviderRateLimiter:
+    """Test waiting for capacity and learning from response headers"""
+
+    @pytest.mark.asyncio
+    async def test_calls_wait_for_request_capacity(self):
+        """Calls beyond the requests bucket wait instead of failing"""
+        limiter = ProviderRateLimiter("openai", "gpt-4o", rpm=1200)  # 20 per second
+        limiter.requests.tokens = 2
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire(10)
+        assert time.monotonic() - started >= 0.04
+        assert limiter.calls == 3 and limiter.waits == 1
+
+    def test_headers_set_limits_remaining_and_pauses(self):
+        """OpenAI and Anthropic headers replace limits, clamp capacity and pause on exhaustion"""
+        limiter = ProviderRateLimiter("openai", "gpt-4o", rpm=500)
+        limiter.observe({
+            "x-ratelimit-limit-requests": "60",
+            "x-ratelimit-remaining-requests": "59",
+            "x-ratelimit-limit-tokens": "1000",
+            "x-ratelimit-remaining-tokens": "0",
+            "x-ratelimit-reset-tokens": "6s",
+        })
+        assert limiter.requests.capacity == 60 and limiter.tokens.capacity == 1000
+        assert limiter.wait_time(10) == pytest.approx(6, abs=0.1)
+
+        claude = ProviderRateLimiter("claude", "claude-3-haiku")
+        assert claude.observe({"Retry-After": "3", "anthropic-ratelimit-tokens-remaining": "100"}) == 3
+        assert claude.tokens is None  # No limit reported yet
+        assert claude.wait_time(10) == pytest.approx(3, abs=0.1)
+
+
+class TestRateLimitedCalls:
+    """Test the rate limited transport and registry calls"""
+
+    @pytest.mark.asyncio
+    async def test_transport_waits_out_429_and_settles_usage(self):
+        """A 429 is retried after Retry-After; the token estimate is corrected with reported usage"""
+        registry = RateLimitRegistry(limits={"openai": {"rpm": 100, "tpm": 100000}}, max_wait_seconds=5)
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            if len(sent) == 1:
+                return httpx.Response(429, headers={"retry-after-ms": "50"}, json={"error": "Rate limit reached"})
+            return httpx.Response(200, json={"choices": [], "usage": {"total_tokens": 42}})
+
+        transport = RateLimitedTransport("openai", httpx.MockTransport(handler), registry)
+        async with httpx.AsyncClient(transport=transport) as client:
+            started = time.monotonic()
+            response = await client.post("https://api.openai.com/v1/chat/completions", json={
+                "model": "gpt-4o", "messages": [{"role": "user", "content": "hello"}], "max_tokens": 200
+            })
+            assert response.json()["usage"]["total_tokens"] == 42
+            assert time.monotonic() - started >= 0.05
+            # Requests that are not model calls are passed straight through
+            await client.get("https://api.openai.com/v1/models")
+
+        assert len(sent) == 3
+        stats = registry.get_stats()["openai:gpt-4o"]
+        assert stats["calls"] == 2 and stats["throttled"] == 1
+        assert 100000 - 43 <= stats["tokens_available"] <= 100000
+
+    @pytest.mark.asyncio
+    async def test_call_retries_rate_limit_errors_only(self):
+        """SDK calls outside the transport wait out rate limit errors; other errors raise"""
+        registry = RateLimitRegistry(limits={}, retry_seconds=0.01, max_wait_seconds=5)
+        attempts = 0
+
+        async def flaky():
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise RuntimeError("429 RESOURCE_EXHAUSTED")
+            return {"usage": {"total_tokens": 5}}
+
+        assert await registry.call("gemini", "gemini-2.5-flash", 100, flaky) == {"usage": {"total_tokens": 5}}
+        assert attempts == 3
+        assert registry.get("gemini", "gemini-2.5-flash").throttled == 2
+
+        async def broken():
+            raise ValueError("Invalid API key")
+
+        with pytest.raises(ValueError):
+            await registry.call("gemini", "gemini-2.5-flash", 100, broken)
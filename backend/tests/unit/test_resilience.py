@@ -0,0 +1,126 @@
+# Unit tests for AI provider retries, circuit breakers and failover
+import asyncio
+
+import pytest
+
+from src.services.workflow.resilience import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    ResilientAIProvider,
+    classify_failure
+)
+
+
+class ScriptedProvider:
+    """Provider that returns the scripted errors in order, then succeeds"""
+
+    def __init__(self, name: str, errors=()):
+        self.name = name
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def generate_content(self, prompt, output_format, model_name="default-model", **kwargs):
+        self.calls += 1
+        if self.errors:
+            return {"success": False, "error": self.errors.pop(0), "content": None}
+        return {"success": True, "content": f"{self.name}: {prompt}", "metadata": {"model": model_name}}
+
+
+def resilient(provider, breakers=None, failover=None, **options):
+    options.setdefault("base_delay", 0.001)
+    return ResilientAIProvider(provider.name, provider, breakers or CircuitBreakerRegistry(), failover, **options)
+
+
+class TestFailureClassification:
+    """Test which provider errors are retried"""
+
+    def test_transient_rate_limited_and_permanent(self):
+        """Timeouts and 5xx are transient, 429s rate limited, bad requests permanent"""
+        assert classify_failure("Request timed out.") == "transient"
+        assert classify_failure("Error code: 503 - {'error': 'Service Unavailable'}") == "transient"
+        assert classify_failure("Error code: 529 - {'type': 'overloaded_error'}") == "transient"
+        assert classify_failure("503 UNAVAILABLE. The model is overloaded.") == "transient"
+        assert classify_failure("Error code: 429 - Rate limit reached") == "rate_limited"
+        assert classify_failure("Error code: 400 - max_tokens must be at most 500") is None
+        assert classify_failure("Error code: 401 - Incorrect API key provided") is None
+
+
+class TestCircuitBreaker:
+    """Test opening, fast failing and recovery"""
+
+    @pytest.mark.asyncio
+    async def test_opens_then_recovers_through_one_trial(self):
+        """Consecutive failures open the circuit; after recovery one trial call decides"""
+        breaker = CircuitBreaker("openai", failure_threshold=2, recovery_seconds=0.05)
+        breaker.record_failure("timeout")
+        assert breaker.allow()
+        breaker.record_failure("timeout")
+        assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+        await asyncio.sleep(0.06)
+        assert breaker.allow()  # Trial call
+        assert not breaker.allow()  # Only one at a time
+        breaker.record_failure("timeout")
+        assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 2
+
+        await asyncio.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+class TestResilientAIProvider:
+    """Test retries, fast failing and failover around generate_content"""
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_failures_only(self):
+        """Transient errors are retried until success; permanent errors return at once"""
+        flaky = ScriptedProvider("openai", ["Request timed out.", "Error code: 502 - Bad Gateway"])
+        result = await resilient(flaky, max_attempts=3).generate_content("hi", "text", "gpt-4o")
+        assert result["success"] and flaky.calls == 3
+        assert result["metadata"]["attempts"] == 3
+
+        rejected = ScriptedProvider("openai", ["Error code: 401 - Incorrect API key"])
+        wrapped = resilient(rejected, max_attempts=3)
+        result = await wrapped.generate_content("hi", "text")
+        assert not result["success"] and rejected.calls == 1
+        assert wrapped.breaker.failures == 0  # The provider answered
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast_and_fails_over(self):
+        """After repeated outages calls skip the primary and go to the secondary provider"""
+        breakers = CircuitBreakerRegistry()
+        primary = ScriptedProvider("openai", ["Error code: 503 - Service Unavailable"] * 10)
+        secondary = ScriptedProvider("claude")
+        wrapped = resilient(primary, breakers, failover=lambda: ("claude", secondary, "claude-3-haiku"), max_attempts=2)
+        wrapped.breaker.failure_threshold = 2
+
+        for _ in range(2):
+            result = await wrapped.generate_content("summarize", "text", "gpt-4o")
+            assert result["content"] == "claude: summarize"
+            assert result["metadata"]["failover_from"] == "openai"
+            assert result["metadata"]["model"] == "claude-3-haiku"
+        assert primary.calls == 4
+        assert breakers.get_states()["openai"]["state"] == "open"
+
+        result = await wrapped.generate_content("summarize", "text", "gpt-4o")
+        assert result["success"] and primary.calls == 4  # Fast fail, straight to the secondary
+
+        result = await wrapped.generate_content("summarize", "text", "gpt-4o", failover=False)
+        assert not result["success"] and result["metadata"]["circuit_open"]
+        assert breakers.get_states()["openai"]["rejected"] == 2
+
+    @pytest.mark.asyncio
+    async def test_rate_limits_neither_trip_nor_fail_over(self):
+        """429s are returned as they are, so the caller can back off"""
+        breakers = CircuitBreakerRegistry()
+        primary = ScriptedProvider("openai", ["Error code: 429 - Rate limit reached"] * 5)
+        secondary = ScriptedProvider("claude")
+        wrapped = resilient(primary, breakers, failover=lambda: ("claude", secondary, None), max_attempts=3)
+        wrapped.breaker.failure_threshold = 2
+
+        for _ in range(3):
+            result = await wrapped.generate_content("summarize", "text")
+            assert result["error"] == "Error code: 429 - Rate limit reached"
+        assert primary.calls == 3 and secondary.calls == 0
+        assert breakers.get_states()["openai"]["state"] == "closed"
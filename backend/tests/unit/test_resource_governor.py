@@ -0,0 +1,78 @@
+# Unit tests for the workflow resource governor
+import asyncio
+import pytest
+
+from src.services.workflow.resource_governor import ResourceGovernor, WeightedSemaphore
+
+
+class TestWeightedSemaphore:
+    """Test weighted, first come first served admission"""
+
+    @pytest.mark.asyncio
+    async def test_heavy_waiter_is_not_starved(self):
+        """A later light request queues behind an earlier heavy one"""
+        pool = WeightedSemaphore(3)
+        await pool.acquire(2)
+        order = []
+
+        async def take(name, weight):
+            await pool.acquire(weight)
+            order.append(name)
+
+        heavy = asyncio.create_task(take("heavy", 3))
+        await asyncio.sleep(0)
+        light = asyncio.create_task(take("light", 1))
+        await asyncio.sleep(0)
+        assert order == []
+
+        pool.release(2)
+        await heavy
+        pool.release(3)
+        await light
+
+        assert order == ["heavy", "light"]
+        assert pool.get_stats()["queued"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_releases_its_place(self):
+        """Cancelling a queued acquire lets the next waiter through"""
+        pool = WeightedSemaphore(2)
+        await pool.acquire(1)
+        blocked = asyncio.create_task(pool.acquire(2))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(pool.acquire(1))
+        await asyncio.sleep(0)
+
+        blocked.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await blocked
+        await asyncio.wait_for(follower, timeout=1)
+
+        assert pool.in_use == 2
+
+
+class TestResourceGovernor:
+    """Test named pools"""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrent_holders(self):
+        """At most `limit` blocks run at once; unlisted names are not limited"""
+        governor = ResourceGovernor({"service:google_sheets": 2})
+        running = 0
+        peak = 0
+
+        async def call():
+            nonlocal running, peak
+            async with governor.service("google_sheets"):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.02)
+                running -= 1
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        async with governor.component("manual_trigger"):
+            pass
+
+        assert peak == 2
+        assert governor.get_stats()["service:google_sheets"]["in_use"] == 0
+        assert "component:manual_trigger" not in governor.get_stats()
@@ -0,0 +1,198 @@
+# Unit tests for the workflow scheduler, its cron parser and timer wheel
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from src.models.workflow import (
+    WorkflowTemplate,
+    WorkflowInstance,
+    WorkflowExecutionStep,
+    WorkflowBatch,
+    WorkflowSchedule,
+    WorkflowSchedulerLease
+)
+from src.services.workflow import scheduler as scheduler_module
+from src.services.workflow.cron import CronExpression
+from src.services.workflow.scheduler import WorkflowScheduler
+from src.services.workflow.timer_wheel import HashedTimerWheel
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def scheduled_workflow(config):
+    return {
+        "nodes": [{"id": "schedule", "type": "schedule_trigger", "data": {"label": "Every minute", "config": config}}],
+        "edges": []
+    }
+
+
+@pytest.fixture
+def session_tables():
+    return [
+        WorkflowTemplate,
+        WorkflowBatch,
+        WorkflowInstance,
+        WorkflowExecutionStep,
+        WorkflowSchedule,
+        WorkflowSchedulerLease
+    ]
+
+
+@pytest.fixture(autouse=True)
+def inline_runs(monkeypatch):
+    """Scheduled runs execute inline, with the test database"""
+    monkeypatch.setattr(scheduler_module, "get_job_queue", lambda: None)
+
+
+async def save_template(session_factory, scheduler, config) -> WorkflowSchedule:
+    async with session_factory() as db:
+        template = WorkflowTemplate(id="template-1", name="Report", template_data=scheduled_workflow(config))
+        db.add(template)
+        await db.flush()
+        summaries = await scheduler.sync_template(db, template)
+        await db.commit()
+        return await db.get(WorkflowSchedule, summaries[0]["schedule_id"])
+
+
+class TestCronExpression:
+    """Test cron parsing and next fire times"""
+
+    def test_fields_steps_and_names(self):
+        """Steps, ranges and weekday names match the expected times"""
+        every_quarter = CronExpression("*/15 * * * *")
+        assert every_quarter.next_after(utc(2026, 10, 16, 12, 7)) == utc(2026, 10, 16, 12, 15)
+        assert every_quarter.next_after(utc(2026, 10, 16, 12, 15)) == utc(2026, 10, 16, 12, 30)
+
+        # Friday 16 Oct 2026 after 9:00 -> Monday 19 Oct
+        weekdays = CronExpression("0 9 * * mon-fri")
+        assert weekdays.next_after(utc(2026, 10, 16, 9, 0)) == utc(2026, 10, 19, 9, 0)
+        assert CronExpression("@monthly").next_after(utc(2026, 12, 5)) == utc(2027, 1, 1)
+
+    def test_day_fields_are_or_and_timezone_is_honoured(self):
+        """Restricting both day fields matches either; times follow the given timezone"""
+        # The 13th, or any Friday: Friday 23 Oct comes first
+        assert CronExpression("0 0 13 * fri").next_after(utc(2026, 10, 17)) == utc(2026, 10, 23)
+        # 8:00 in Ho Chi Minh City (UTC+7) is 1:00 UTC
+        local = CronExpression("0 8 * * *", "Asia/Ho_Chi_Minh")
+        assert local.next_after(utc(2026, 10, 16, 2, 0)) == utc(2026, 10, 17, 1, 0)
+
+    def test_invalid_expressions_raise(self):
+        """Malformed fields, out-of-range values and unknown timezones are rejected"""
+        for expression in ["* * * *", "60 * * * *", "* * * * funday", "*/0 * * * *", "5-1 * * * *"]:
+            with pytest.raises(ValueError):
+                CronExpression(expression)
+        with pytest.raises(ValueError):
+            CronExpression("* * * * *", "Mars/Olympus")
+        with pytest.raises(ValueError):
+            CronExpression("0 0 30 2 *").next_after(utc(2026, 1, 1))
+
+
+class TestHashedTimerWheel:
+    """Test timer placement, firing and cancellation"""
+
+    def test_fires_on_time_across_turns(self):
+        """Timers fire on their tick, never early, including ones more than one turn away"""
+        wheel = HashedTimerWheel(tick_seconds=1.0, slots=8, start=0.0)
+        wheel.schedule("soon", 3.0)
+        wheel.schedule("next-turn", 11.0)  # Same slot as "soon", one turn later
+        wheel.schedule("cancelled", 5.0)
+        assert wheel.cancel("cancelled")
+
+        assert wheel.advance(2.9) == []
+        assert wheel.advance(3.0) == ["soon"]
+        assert wheel.advance(10.5) == []
+        assert wheel.advance(11.0) == ["next-turn"]
+        assert len(wheel) == 0
+
+    def test_stall_and_reschedule(self):
+        """After a long stall every overdue timer fires once; rescheduling replaces the timer"""
+        wheel = HashedTimerWheel(tick_seconds=1.0, slots=4, start=0.0)
+        for n in range(10):
+            wheel.schedule(f"timer-{n}", float(n))
+        wheel.schedule("timer-9", 100.0)
+
+        assert sorted(wheel.advance(50.0)) == sorted(f"timer-{n}" for n in range(9))
+        assert wheel.keys() == ["timer-9"]
+        assert wheel.advance(100.0) == ["timer-9"]
+
+
+class TestWorkflowScheduler:
+    """Test schedule sync, firing and leader election"""
+
+    @pytest.mark.asyncio
+    async def test_sync_and_fire_starts_a_run(self, session_factory):
+        """Saving creates the schedule; a due fire runs the template and advances next_run_at"""
+        scheduler = WorkflowScheduler(session_factory, tick_seconds=0.05)
+        schedule = await save_template(session_factory, scheduler, {"interval_seconds": 60, "input_data": {"report": "daily"}})
+        assert schedule.enabled and schedule.next_run_at is not None
+
+        # Pretend we are 5 minutes late: one run makes up for the missed fires
+        now = schedule.next_run_at.replace(tzinfo=timezone.utc) + timedelta(minutes=5, seconds=10)
+        instance_id = await scheduler.fire(schedule.id, now=now)
+        assert instance_id is not None
+        # A second process firing the same due time loses the compare-and-set
+        assert await WorkflowScheduler(session_factory).fire(schedule.id, now=now) is None
+        await asyncio.gather(*scheduler._runs)
+
+        async with session_factory() as db:
+            instance = await db.get(WorkflowInstance, instance_id)
+            schedule = await db.get(WorkflowSchedule, schedule.id)
+        assert instance.status == "completed"
+        assert instance.input_data["report"] == "daily"
+        assert instance.output_data["node_outputs"]["schedule"]["scheduled_for"] == instance.input_data["scheduled_for"]
+        assert schedule.last_instance_id == instance_id
+        assert schedule.next_run_at.replace(tzinfo=timezone.utc) - now == timedelta(seconds=50)
+
+    @pytest.mark.asyncio
+    async def test_invalid_and_removed_nodes(self, session_factory):
+        """Unfireable nodes are kept disabled with an error; removed nodes lose their schedule"""
+        scheduler = WorkflowScheduler(session_factory)
+        schedule = await save_template(session_factory, scheduler, {"cron_expression": "61 * * * *"})
+        assert not schedule.enabled and schedule.next_run_at is None
+
+        async with session_factory() as db:
+            template = await db.get(WorkflowTemplate, "template-1")
+            template.template_data = {"nodes": [], "edges": []}
+            assert await scheduler.sync_template(db, template) == []
+            await db.commit()
+            result = await db.execute(select(WorkflowSchedule))
+            assert result.scalars().all() == []
+
+    @pytest.mark.asyncio
+    async def test_one_leader_and_failover(self, session_factory):
+        """Only one process holds the lease; another takes over once it is released"""
+        first = WorkflowScheduler(session_factory, lease_seconds=30, scheduler_id="first")
+        second = WorkflowScheduler(session_factory, lease_seconds=30, scheduler_id="second")
+
+        assert await first.acquire_lease()
+        assert not await second.acquire_lease()
+        assert await first.acquire_lease()  # Renewal
+
+        await first.release_lease()
+        assert await second.acquire_lease()
+        assert not await first.acquire_lease()
+
+    @pytest.mark.asyncio
+    async def test_leader_loop_fires_due_schedules(self, session_factory):
+        """A started scheduler wins the lease, loads schedules onto the wheel and fires them"""
+        scheduler = WorkflowScheduler(session_factory, tick_seconds=0.05, scheduler_id="leader")
+        schedule = await save_template(session_factory, scheduler, {"interval_seconds": 3600})
+        async with session_factory() as db:
+            row = await db.get(WorkflowSchedule, schedule.id)
+            row.next_run_at = datetime.now(timezone.utc) + timedelta(seconds=0.2)
+            await db.commit()
+
+        scheduler.start()
+        try:
+            for _ in range(100):
+                if scheduler.fired:
+                    break
+                await asyncio.sleep(0.05)
+            assert scheduler.is_leader
+            assert scheduler.fired == 1
+        finally:
+            await scheduler.stop()
@@ -0,0 +1,163 @@
+# Unit tests for the workflow step journal
+import asyncio
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Register every model so SQLAlchemy can configure relationship mappers
+from src.models import user, conversation, message, document, chat_conversation  # noqa: F401
+from src.models.database import Base
+from src.models.workflow import WorkflowTemplate, WorkflowInstance, WorkflowExecutionStep
+from src.services.workflow.step_journal import (
+    StepJournal, load_checkpoints, read_checkpoint, recover_step_journal, recover_step_journals
+)
+
+
+@pytest_asyncio.fixture
+async def db_session():
+    """Create async in-memory database session with the workflow tables"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[
+            WorkflowTemplate.__table__,
+            WorkflowInstance.__table__,
+            WorkflowExecutionStep.__table__
+        ]))
+    session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    yield session
+    await session.close()
+    await engine.dispose()
+
+
+async def count_steps(db: AsyncSession) -> int:
+    result = await db.execute(select(func.count(WorkflowExecutionStep.id)))
+    return result.scalar()
+
+
+def make_row(step_id: str) -> dict:
+    return {
+        "id": step_id,
+        "workflow_instance_id": "instance-1",
+        "step_name": step_id,
+        "step_type": "manual_trigger",
+        "node_id": step_id,
+        "input_data": {},
+        "output_data": {"ok": True},
+        "status": "completed",
+        "started_at": datetime.now(),
+        "completed_at": datetime.now()
+    }
+
+
+class TestStepJournal:
+    """Test buffered bulk persistence of execution steps"""
+
+    @pytest.mark.asyncio
+    async def test_flush_on_size_and_close(self, db_session):
+        """Rows are bulk-inserted once the buffer fills and when the journal closes"""
+        journal = StepJournal(db_session, "instance-1", flush_size=2, flush_interval=60)
+
+        await journal.record(make_row("a"))
+        assert await count_steps(db_session) == 0
+
+        await journal.record(make_row("b"))
+        assert await count_steps(db_session) == 2
+        assert journal.flush_count == 1
+
+        await journal.record(make_row("c"))
+        await journal.close()
+
+        assert await count_steps(db_session) == 3
+        assert journal.flush_count == 2
+        assert not journal.checkpoint_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_flush_on_interval(self, db_session):
+        """A lone buffered row is flushed by the timer"""
+        journal = StepJournal(db_session, "instance-1", flush_size=10, flush_interval=0.05)
+
+        await journal.record(make_row("a"))
+        await asyncio.sleep(0.1)
+
+        assert await count_steps(db_session) == 1
+        await journal.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_records_share_session(self, db_session):
+        """Parallel node tasks can record into one journal without clashing on the session"""
+        journal = StepJournal(db_session, "instance-1", flush_size=1, flush_interval=60)
+
+        await asyncio.gather(*(journal.record(make_row(str(i))) for i in range(5)))
+        await journal.close()
+
+        assert await count_steps(db_session) == 5
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_holds_unflushed_rows(self, db_session):
+        """The write-ahead file holds exactly the rows not yet in the database"""
+        journal = StepJournal(db_session, "instance-1", flush_size=2, flush_interval=60)
+
+        await journal.record(make_row("a"))
+        await journal.record(make_row("b"))
+        await journal.record(make_row("c"))
+
+        assert [row["id"] for row in read_checkpoint("instance-1")] == ["c"]
+
+    @pytest.mark.asyncio
+    async def test_recover_after_crash(self, db_session):
+        """Rows from an unclosed journal are replayed once, skipping ones already stored"""
+        journal = StepJournal(db_session, "instance-1", flush_size=10, flush_interval=60)
+        await journal.record(make_row("a"))
+        await journal.record(make_row("b"))
+        # Simulate a crash after "a" reached the database but before truncation
+        journal._flush_timer.cancel()
+        db_session.add(WorkflowExecutionStep(**make_row("a")))
+        await db_session.commit()
+
+        recovered = await recover_step_journals(db_session)
+
+        assert recovered == 1
+        assert await count_steps(db_session) == 2
+        assert read_checkpoint("instance-1") == []
+
+    @pytest.mark.asyncio
+    async def test_startup_recovery_skips_live_runs(self, db_session):
+        """A running instance's file may belong to a worker, so only its own rerun replays it"""
+        db_session.add(WorkflowInstance(id="instance-1", name="Run", workflow_data={}, status="running"))
+        await db_session.commit()
+        journal = StepJournal(db_session, "instance-1", flush_size=10, flush_interval=60)
+        await journal.record(make_row("a"))
+        journal._flush_timer.cancel()
+
+        assert await recover_step_journals(db_session) == 0
+        assert [row["id"] for row in read_checkpoint("instance-1")] == ["a"]
+
+        assert await recover_step_journal(db_session, "instance-1") == 1
+        assert await count_steps(db_session) == 1
+        assert read_checkpoint("instance-1") == []
+
+    @pytest.mark.asyncio
+    async def test_load_checkpoints(self, db_session):
+        """Checkpoints come from stored and unflushed completed steps of the current run"""
+        run_started = datetime.now()
+        stale = make_row("stale")
+        stale["started_at"] = run_started - timedelta(hours=1)
+        failed = make_row("failed")
+        failed["status"] = "failed"
+        for row in (stale, failed, make_row("stored")):
+            db_session.add(WorkflowExecutionStep(next_steps=["output"], **row))
+        await db_session.commit()
+
+        journal = StepJournal(db_session, "instance-1", flush_size=10, flush_interval=60)
+        await journal.record({**make_row("unflushed"), "next_steps": ["output"]})
+        await journal.record({**make_row("no_handles"), "next_steps": None})
+        journal._flush_timer.cancel()
+
+        checkpoints = await load_checkpoints(db_session, "instance-1", run_started)
+
+        assert sorted(checkpoints) == ["stored", "unflushed"]
+        assert checkpoints["stored"] == {"output_data": {"ok": True}, "next_steps": ["output"]}
@@ -0,0 +1,181 @@
+# Unit tests for workflow execution tracing
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Register every model so SQLAlchemy can configure relationship mappers
+from src.models import user, conversation, message, document, chat_conversation  # noqa: F401
+from src.models.database import Base
+from src.models.workflow import WorkflowTemplate, WorkflowInstance, WorkflowExecutionStep
+from src.schemas.workflow_components import (
+    WorkflowComponentMetadata,
+    ExecutionContext,
+    ExecutionResult,
+    ComponentCategory,
+    ComponentHandle
+)
+from src.services.workflow.component_registry import BaseWorkflowComponent, component_registry
+from src.services.workflow.execution_engine import WorkflowExecutionEngine
+from src.services.workflow.resource_governor import ResourceGovernor
+from src.services.workflow.tracing import (
+    COMPONENT, DB, INIT, INPUT, IO, QUEUE,
+    ExecutionTrace, activate_trace, deactivate_trace, set_current_node, to_chrome_trace, trace_span
+)
+
+
+class TraceTestComponent(BaseWorkflowComponent):
+    """Test component that sleeps for `delay` seconds"""
+
+    @classmethod
+    def get_metadata(cls) -> WorkflowComponentMetadata:
+        return WorkflowComponentMetadata(
+            type="test_trace",
+            name="Test Trace",
+            description="Sleeps for a configurable delay",
+            category=ComponentCategory.CONTROL_FLOW,
+            icon="ClockIcon",
+            color="from-gray-500 to-gray-600",
+            parameters=[],
+            input_handles=[ComponentHandle(id="input", type="target", position="left")],
+            output_handles=[ComponentHandle(id="output", type="source", position="right")]
+        )
+
+    async def execute(self, context: ExecutionContext) -> ExecutionResult:
+        await asyncio.sleep(context.input_data.get("delay", 0))
+        return ExecutionResult(success=True, output_data={"node": context.step_id}, next_steps=["output"])
+
+
+component_registry.register_component(TraceTestComponent)
+
+
+def make_node(node_id: str, **config) -> dict:
+    return {"id": node_id, "type": "test_trace", "data": {"label": node_id, "config": config}}
+
+
+def make_edge(source: str, target: str) -> dict:
+    return {"source": source, "target": target, "sourceHandle": None}
+
+
+class TestExecutionTrace:
+    """Test span recording and export"""
+
+    def test_spans_are_capped(self):
+        """Spans past max_spans are counted, not kept"""
+        trace = ExecutionTrace("run-1", max_spans=2)
+        for n in range(5):
+            with trace.span(f"span {n}", DB):
+                pass
+
+        data = trace.to_dict()
+        assert [span["name"] for span in data["spans"]] == ["span 0", "span 1"]
+        assert data["dropped_spans"] == 3
+
+    def test_trace_span_without_active_trace_is_noop(self):
+        """Code outside a traced run can call trace_span freely"""
+        with trace_span("untraced", IO):
+            pass
+
+    def test_chrome_trace_export(self):
+        """Run-level spans go on the first track and each node gets its own"""
+        trace = ExecutionTrace("run-1")
+        trace.add("load instance", DB, 0, 10)
+        trace.add("execute", COMPONENT, 20, 50, node_id="a", rows=3)
+        trace.add("execute", COMPONENT, 30, 60, node_id="b")
+
+        exported = to_chrome_trace(trace.to_dict())
+        spans = [event for event in exported["traceEvents"] if event["ph"] == "X"]
+        names = {
+            event["tid"]: event["args"]["name"]
+            for event in exported["traceEvents"] if event["name"] == "thread_name"
+        }
+
+        assert names == {0: "run", 1: "a", 2: "b"}
+        assert [(span["tid"], span["ts"], span["dur"]) for span in spans] == [(0, 0, 10), (1, 20, 30), (2, 30, 30)]
+        assert spans[1]["args"] == {"rows": 3}
+        assert exported["otherData"]["instance_id"] == "run-1"
+
+
+class TestEngineTracing:
+    """Test the spans recorded while a workflow runs"""
+
+    @pytest.mark.asyncio
+    async def test_node_phases_are_traced(self):
+        """Every node gets init, input and execute spans; queued nodes a wait span"""
+        engine = WorkflowExecutionEngine(AsyncMock(), max_concurrency=1)
+        instance = SimpleNamespace(id="run-1", workflow_data={
+            "nodes": [make_node("trigger"), make_node("a", delay=0.02), make_node("b", delay=0.02)],
+            "edges": [make_edge("trigger", "a"), make_edge("trigger", "b")]
+        })
+
+        trace = ExecutionTrace(instance.id)
+        token = activate_trace(trace)
+        try:
+            await engine._execute_workflow_steps(instance, {})
+        finally:
+            deactivate_trace(token)
+
+        by_node = {}
+        for span in trace.spans:
+            by_node.setdefault(span.get("node_id"), set()).add((span["cat"], span["name"]))
+        for node_id in ("trigger", "a", "b"):
+            assert {(INIT, "init component"), (INPUT, "resolve inputs"), (COMPONENT, "execute")} <= by_node[node_id]
+        # One of the two branches waited for the single run slot
+        assert sum((QUEUE, "wait for run slot") in by_node[node_id] for node_id in ("a", "b")) == 1
+
+    @pytest.mark.asyncio
+    async def test_service_calls_belong_to_the_calling_node(self):
+        """Governed service calls are recorded as I/O spans of the node making them"""
+        governor = ResourceGovernor({"service:google_sheets": 1})
+        trace = ExecutionTrace("run-1")
+        token = activate_trace(trace)
+
+        async def call(node_id: str):
+            set_current_node(node_id)
+            async with governor.service("google_sheets"):
+                await asyncio.sleep(0.01)
+
+        try:
+            await asyncio.gather(asyncio.create_task(call("a")), asyncio.create_task(call("b")))
+        finally:
+            deactivate_trace(token)
+
+        io_spans = sorted((span["node_id"], span["name"]) for span in trace.spans if span["cat"] == IO)
+        waits = [span for span in trace.spans if span["cat"] == QUEUE]
+        assert io_spans == [("a", "google_sheets"), ("b", "google_sheets")]
+        assert len(waits) == 1
+
+    @pytest.mark.asyncio
+    async def test_trace_is_saved_on_the_instance(self):
+        """execute_workflow stores the run's spans, including its DB work"""
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[
+                WorkflowTemplate.__table__,
+                WorkflowInstance.__table__,
+                WorkflowExecutionStep.__table__
+            ]))
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as db:
+            db.add(WorkflowInstance(id="run-1", name="Run", workflow_data={
+                "nodes": [make_node("trigger"), make_node("a")],
+                "edges": [make_edge("trigger", "a")]
+            }))
+            await db.commit()
+            await WorkflowExecutionEngine(db).execute_workflow("run-1", {})
+
+        async with session_factory() as db:
+            trace_data = (await db.get(WorkflowInstance, "run-1")).trace_data
+        await engine.dispose()
+
+        names = {(span["cat"], span["name"]) for span in trace_data["spans"]}
+        assert trace_data["instance_id"] == "run-1"
+        assert {(DB, "load instance"), (DB, "journal flush")} <= names
+        assert {span.get("node_id") for span in trace_data["spans"]} >= {"trigger", "a"}